@@ -16,6 +16,8 @@ DATA_DIR = BASE_DIR / "data"
 DB_DIR = DATA_DIR / "database"
 BACKUP_DIR = DATA_DIR / "backups"
 EXPORTS_DIR = DATA_DIR / "exports"
+BLOB_DIR = DATA_DIR / "blobs"                       # Fotky a dokumenty podle obsahu (SHA-256)
+THUMBNAIL_DIR = DATA_DIR / "cache" / "thumbnails"   # Náhledy - lze kdykoli smazat
 
 # Vytvoření složek pokud neexistují
 for directory in (DATA_DIR, DB_DIR, BACKUP_DIR, EXPORTS_DIR):
@@ -23,6 +25,8 @@ for directory in (DATA_DIR, DB_DIR, BACKUP_DIR, EXPORTS_DIR):
 
 # Databáze
 DATABASE_PATH = DB_DIR / "motoservis.db"
+# Pool připojení: vedlejší vlákna (zálohy, exporty, reporty) čtou přes vlastní WAL připojení
+DB_CONNECTION_POOL = True
 
 # Vzhled aplikace
 WINDOW_WIDTH = 1400
@@ -66,6 +70,10 @@ AUTO_BACKUP_ENABLED = True
 BACKUP_INTERVAL_DAYS = 1
 MAX_BACKUPS = 30  # Maximální počet záloh k uchování
 
+# Náhledy fotek (delší strana v px: karta vozidla, galerie, prohlížeč)
+THUMBNAIL_SIZES = (96, 192, 800)
+THUMBNAIL_CACHE_MB = 256  # Nejdéle nepoužité náhledy nad limit se mažou
+
 # Zakázky - typy
 ORDER_TYPES = [
     "Zakázka",
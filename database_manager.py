@@ -2,10 +2,14 @@
 """
 Motoservis DMS – produkční správce databáze
 - Bezpečné připojení (PRAGMA, WAL, busy timeout)
-- Idempotentní migrace schématu (tabulky + sloupce)
+- Idempotentní migrace schématu (tabulky + sloupce) s verzí v tabulce schema_version
 - Legacy aliasy sloupců (order_date, order_id, purchase_price, ...)
 - Jedna verze order_items + odolná migrace starých struktur
 - Sekvence čísel zakázek (bez kolizí) + helper na generování
+- Pool připojení: zapisovací připojení + čtecí WAL připojení pro každé vlákno
+- Globální vyhledávání (FTS5 index udržovaný triggery)
+- Souhrny zákazníků (customer_stats) udržované triggery
+- Časové souhrny zakázek a hodin mechaniků (order_rollups_*) udržované triggery
 - Modul administrativa (faktury, platby, dokumenty)
 - Modul kalendář (kompletní)
 - Modul users (role, oprávnění, audit)
@@ -14,13 +18,251 @@ Motoservis DMS – produkční správce databáze
 
 from __future__ import annotations
 import sqlite3
-import shutil
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Iterable, Tuple
 import config
 
 
+# Indexy pro nejčastěji používané dotazy (seznam zákazníků, položky zakázek,
+# management). Formát: (název indexu, tabulka, sloupce)
+PERFORMANCE_INDEXES: list[tuple[str, str, str]] = [
+    # Pokrývá COUNT/SUM(total_price)/MAX(created_at) na zákazníka
+    ("idx_orders_customer", "orders", "customer_id, created_at, total_price"),
+    ("idx_orders_vehicle", "orders", "vehicle_id, created_date"),
+    ("idx_orders_status", "orders", "status"),
+    ("idx_orders_created_date", "orders", "created_date, total_price"),
+    ("idx_vehicles_customer", "vehicles", "customer_id"),
+    ("idx_order_items_order", "order_items", "order_id"),
+    ("idx_customers_active", "customers", "is_active"),
+]
+
+# Globální vyhledávání: FTS5 tabulka search_index udržovaná triggery.
+# rowid = id * SEARCH_ROWID_FACTOR + code (rychlé mazání/přepis bez skenu).
+# Výrazy používají {p} jako alias řádku (NEW v triggeru, t při přestavbě).
+# "compact" sloupce se indexují i bez mezer/pomlček a s koncovkami 4/6 znaků,
+# aby šlo hledat podle konce VIN, telefonu bez předvolby apod.
+SEARCH_ROWID_FACTOR = 8
+SEARCH_SOURCES: list[dict] = [
+    {
+        "entity": "customer", "code": 1, "table": "customers",
+        "title": ("CASE WHEN {p}.customer_type = 'company' "
+                  "THEN COALESCE(NULLIF({p}.company_name, ''), {p}.company) "
+                  "ELSE {p}.first_name || ' ' || {p}.last_name END"),
+        "fields": ["first_name", "last_name", "company", "company_name", "email", "city", "ico"],
+        "compact": ["phone"],
+    },
+    {
+        "entity": "vehicle", "code": 2, "table": "vehicles",
+        "title": "{p}.brand || ' ' || {p}.model || ' (' || {p}.license_plate || ')'",
+        "fields": ["brand", "model"],
+        "compact": ["license_plate", "vin"],
+    },
+    {
+        "entity": "order", "code": 3, "table": "orders",
+        "title": "'Zakázka ' || {p}.order_number",
+        "fields": ["note"],
+        "compact": ["order_number"],
+    },
+    {
+        "entity": "invoice", "code": 4, "table": "invoices",
+        "title": "'Faktura ' || {p}.invoice_number",
+        "fields": ["variable_symbol"],
+        "compact": ["invoice_number"],
+    },
+    {
+        "entity": "warehouse", "code": 5, "table": "warehouse",
+        "title": "{p}.code || ' – ' || {p}.name",
+        "fields": ["name"],
+        "compact": ["code", "ean"],
+    },
+]
+
+# Přírůstkové úpravy souhrnu zákazníka z triggerů ({row} = NEW / OLD).
+# Trigger jen přičte/odečte změněný řádek (total = total + NEW.total_price), takže
+# hromadný zápis stojí O(n) místo přepočtu celého zákazníka na každý řádek.
+# Hranice first/last_order_at se dohledají v orders jen při odebrání krajní zakázky.
+CUSTOMER_STATS_ORDER_ADD_SQL = """
+    INSERT INTO customer_stats
+        (customer_id, order_count, total_spent, first_order_at, last_order_at, updated_at)
+    SELECT {row}.customer_id, 1, COALESCE({row}.total_price, 0),
+           {row}.created_at, {row}.created_at, CURRENT_TIMESTAMP
+    WHERE {row}.customer_id IS NOT NULL
+    ON CONFLICT(customer_id) DO UPDATE SET
+        order_count = order_count + 1,
+        total_spent = total_spent + excluded.total_spent,
+        first_order_at = CASE WHEN first_order_at IS NULL OR excluded.first_order_at < first_order_at
+                              THEN excluded.first_order_at ELSE first_order_at END,
+        last_order_at = CASE WHEN last_order_at IS NULL OR excluded.last_order_at > last_order_at
+                             THEN excluded.last_order_at ELSE last_order_at END,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+CUSTOMER_STATS_ORDER_REMOVE_SQL = """
+    UPDATE customer_stats SET
+        order_count = MAX(order_count - 1, 0),
+        total_spent = total_spent - COALESCE({row}.total_price, 0),
+        first_order_at = CASE WHEN {row}.created_at <= first_order_at
+                              THEN (SELECT MIN(created_at) FROM orders WHERE customer_id = {row}.customer_id)
+                              ELSE first_order_at END,
+        last_order_at = CASE WHEN {row}.created_at >= last_order_at
+                             THEN (SELECT MAX(created_at) FROM orders WHERE customer_id = {row}.customer_id)
+                             ELSE last_order_at END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE customer_id = {row}.customer_id
+"""
+
+CUSTOMER_STATS_VEHICLE_ADD_SQL = """
+    INSERT INTO customer_stats (customer_id, vehicle_count, updated_at)
+    SELECT {row}.customer_id, 1, CURRENT_TIMESTAMP
+    WHERE {row}.customer_id IS NOT NULL
+    ON CONFLICT(customer_id) DO UPDATE SET
+        vehicle_count = vehicle_count + 1,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+CUSTOMER_STATS_VEHICLE_REMOVE_SQL = """
+    UPDATE customer_stats SET
+        vehicle_count = MAX(vehicle_count - 1, 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE customer_id = {row}.customer_id
+"""
+
+# Denní souhrn zakázek ({day} = výraz s datem zakázky, např. NEW.created_date).
+# Přepočítá se jen dotčený den (rozsah přes idx_orders_created_date, položky přes
+# idx_order_items_order) a z jeho denních řádků celý měsíc. Klíč je den/měsíc + stav
+# + typ zakázky, takže dotazy nad souhrny filtrují stejně jako dotazy nad orders.
+ORDER_ROLLUP_REFRESH_SQL = """
+    DELETE FROM order_rollups_daily WHERE day = DATE({day});
+    INSERT INTO order_rollups_daily
+        (day, status, order_type, orders, revenue, material_cost, parts, labor, external)
+    SELECT DATE({day}), o.status, o.order_type, COUNT(*),
+           COALESCE(SUM(o.total_price), 0), COALESCE(SUM(o.material_cost), 0),
+           COALESCE(SUM(o.parts), 0), COALESCE(SUM(o.labor), 0), COALESCE(SUM(o.external), 0)
+    FROM (
+        SELECT COALESCE(status, '') AS status, COALESCE(order_type, '') AS order_type,
+               total_price, material_cost,
+               (SELECT SUM(total_price) FROM order_items
+                WHERE order_id = orders.id AND item_type = 'Materiál') AS parts,
+               (SELECT SUM(total_price) FROM order_items
+                WHERE order_id = orders.id AND item_type = 'Práce') AS labor,
+               (SELECT SUM(total_price) FROM order_items
+                WHERE order_id = orders.id AND item_type = 'Cizí výkon') AS external
+        FROM orders
+        WHERE created_date >= DATE({day}) AND created_date < DATE({day}, '+1 day')
+    ) o
+    GROUP BY o.status, o.order_type;
+    DELETE FROM order_rollups_monthly WHERE month = strftime('%Y-%m', {day});
+    INSERT INTO order_rollups_monthly
+        (month, status, order_type, orders, revenue, material_cost, parts, labor, external)
+    SELECT strftime('%Y-%m', {day}), status, order_type, SUM(orders), SUM(revenue),
+           SUM(material_cost), SUM(parts), SUM(labor), SUM(external)
+    FROM order_rollups_daily
+    WHERE day >= DATE({day}, 'start of month') AND day < DATE({day}, 'start of month', '+1 month')
+    GROUP BY status, order_type;
+"""
+
+# Denní souhrn hodin mechanika ({uid}, {day} = výrazy z řádku order_work_log)
+MECHANIC_ROLLUP_REFRESH_SQL = """
+    DELETE FROM mechanic_rollups_daily WHERE user_id = {uid} AND day = DATE({day});
+    INSERT INTO mechanic_rollups_daily (user_id, day, hours, entries)
+    SELECT {uid}, DATE({day}), COALESCE(SUM(hours_worked), 0), COUNT(*)
+    FROM order_work_log
+    WHERE user_id = {uid} AND date >= DATE({day}) AND date < DATE({day}, '+1 day')
+    HAVING COUNT(*) > 0;
+"""
+
+# Číslované kroky migrace schématu: (verze, popis, metoda DatabaseManager).
+# create_tables() na aktuální databázi provede jediný dotaz na schema_version;
+# kroky se spouští jen při upgradu (verze vyšší než uložená), každý ve vlastním commitu.
+# Při změně schématu (nová tabulka, sloupec, index, trigger) přidej nový krok
+# na konec seznamu - úprava už existujícího kroku se na starších DB neprojeví.
+SCHEMA_MIGRATIONS: list[tuple[int, str, str]] = [
+    (1, "Základní schéma (tabulky, sloupce, legacy aliasy)", "_migrate_base_schema"),
+    (2, "Výkonnostní indexy", "ensure_performance_indexes"),
+    (3, "Globální vyhledávání (FTS5)", "ensure_search_index"),
+    (4, "Souhrny zákazníků (customer_stats)", "ensure_customer_stats"),
+    (5, "Kompatibilní view pro starší dotazy", "_create_compat_views"),
+    (6, "Skladová kniha (průběžné zůstatky, měsíční snapshoty)", "ensure_stock_ledger"),
+    (7, "Časové souhrny zakázek a hodin mechaniků", "ensure_order_rollups"),
+    (8, "Opakující se události rozvíjené za běhu (jen výjimky v calendar_events)",
+     "ensure_recurrence_overrides"),
+    (9, "Indexy plánovače připomínek (STK, pojištění, sklad pod minimem)", "ensure_scheduler_indexes"),
+    (10, "Přírůstkové triggery souhrnů zákazníků", "ensure_customer_stats_triggers"),
+    (11, "Needitované instance opakujících se událostí (rozvine je pravidlo)",
+     "prune_recurrence_instances"),
+]
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+# Registrované "horké" dotazy aplikace pro index advisor (EXPLAIN QUERY PLAN).
+# allow_scan = tabulky, jejichž plný průchod je u dotazu očekávaný (např. výpis všech zákazníků)
+DEFAULT_HOT_QUERIES: list[dict] = [
+    {
+        "name": "Seznam zákazníků (souhrny z customer_stats)",
+        "sql": """
+            SELECT c.id, s.vehicle_count, s.order_count, s.total_spent, s.last_order_at
+            FROM customers c
+            LEFT JOIN customer_stats s ON s.customer_id = c.id
+            WHERE c.is_active = 1
+        """,
+        "params": (),
+        "allow_scan": ("customers", "c"),
+    },
+    {
+        "name": "Položky zakázky",
+        "sql": "SELECT * FROM order_items WHERE order_id = ? ORDER BY id",
+        "params": (0,),
+        "allow_scan": (),
+    },
+    {
+        "name": "Zakázky vozidla",
+        "sql": "SELECT * FROM orders WHERE vehicle_id = ? ORDER BY created_date DESC",
+        "params": (0,),
+        "allow_scan": (),
+    },
+    {
+        "name": "Zakázky podle stavu",
+        "sql": "SELECT COUNT(*) FROM orders WHERE status = ?",
+        "params": ("Rozpracovaná",),
+        "allow_scan": (),
+    },
+    {
+        "name": "Tržby za období (management)",
+        "sql": """
+            SELECT COUNT(*), COALESCE(SUM(total_price), 0)
+            FROM orders
+            WHERE created_date BETWEEN ? AND ?
+        """,
+        "params": ("2000-01-01", "2000-12-31"),
+        "allow_scan": (),
+    },
+    {
+        "name": "Vozidla zákazníka",
+        "sql": "SELECT * FROM vehicles WHERE customer_id = ?",
+        "params": (0,),
+        "allow_scan": (),
+    },
+    {
+        "name": "Okno kalendáře (obsazenost mechaniků)",
+        "sql": """
+            SELECT id, mechanic_id, start_datetime, end_datetime, status
+            FROM calendar_events
+            WHERE start_datetime >= ? AND start_datetime < ?
+        """,
+        "params": ("2000-01-01", "2000-02-01"),
+        "allow_scan": (),
+    },
+]
+
+
+# Online záloha (sqlite3 backup API): stránek na jeden krok a pauza mezi kroky,
+# během které mohou zapisovat ostatní připojení
+BACKUP_PAGES_PER_STEP = 2048
+BACKUP_STEP_SLEEP = 0.002
+
+
 class DatabaseManager:
     """Správce databáze pro Motoservis DMS (produkční)"""
 
@@ -29,41 +271,128 @@ class DatabaseManager:
         self.connection: Optional[sqlite3.Connection] = None
         self.cursor: Optional[sqlite3.Cursor] = None
 
+        # Pool připojení (WAL): self.connection je zapisovací připojení,
+        # vedlejší vlákna (QThread) dostanou vlastní čtecí připojení.
+        self.pooled: bool = getattr(config, "DB_CONNECTION_POOL", True)
+        self._owner_thread: Optional[int] = None
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._pool_lock = threading.Lock()
+        self._thread_connections: dict[int, sqlite3.Connection] = {}
+        # Hloubka vnoření db.transaction() pro každé vlákno zvlášť
+        # (0 = execute_query commituje hned)
+        self._tx_state = threading.local()
+
+        # Horké dotazy pro index advisor (moduly mohou registrovat další)
+        self.hot_queries: list[dict] = list(DEFAULT_HOT_QUERIES)
+
+        # False = create_tables() našel aktuální schéma (seed dat se přeskočí)
+        self.schema_upgraded: bool = True
+
+    @property
+    def _tx_depth(self) -> int:
+        """Hloubka db.transaction() volajícího vlákna"""
+        return getattr(self._tx_state, "depth", 0)
+
+    @_tx_depth.setter
+    def _tx_depth(self, depth: int):
+        self._tx_state.depth = depth
+
     # -----------------------
     # Připojení / odpojení
     # -----------------------
+    def _open_connection(self) -> sqlite3.Connection:
+        """Otevře nové připojení s doporučenými PRAGMA pro SQLite."""
+        conn = sqlite3.connect(self.db_path, timeout=10.0, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute("PRAGMA busy_timeout = 5000;")
+        return conn
+
     def connect(self) -> bool:
         """Připojení k databázi + doporučené PRAGMA pro SQLite."""
         try:
-            self.connection = sqlite3.connect(self.db_path, timeout=10.0)
-            self.connection.row_factory = sqlite3.Row
+            self.connection = self._open_connection()
             self.cursor = self.connection.cursor()
-
-            self.cursor.execute("PRAGMA foreign_keys = ON;")
-            self.cursor.execute("PRAGMA journal_mode = WAL;")
-            self.cursor.execute("PRAGMA synchronous = NORMAL;")
-            self.cursor.execute("PRAGMA busy_timeout = 5000;")
-
+            self._owner_thread = threading.get_ident()
             return True
         except Exception as e:
             print(f"Chyba připojení k databázi: {e}")
             return False
 
     def disconnect(self):
-        """Odpojení od databáze."""
+        """Odpojení od databáze (včetně připojení vedlejších vláken)."""
+        with self._pool_lock:
+            for conn in self._thread_connections.values():
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._thread_connections.clear()
+        self._local = threading.local()
+
         if self.connection:
             self.connection.close()
         self.connection = None
         self.cursor = None
+        self._owner_thread = None
+
+    def _is_owner_thread(self) -> bool:
+        """True, pokud volající běží ve vlákně, které otevřelo hlavní připojení (GUI)."""
+        return not self.pooled or threading.get_ident() == self._owner_thread
+
+    def _thread_connection(self) -> sqlite3.Connection:
+        """Vrátí čtecí připojení aktuálního vedlejšího vlákna (vytvoří ho při prvním použití)."""
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.connection = conn
+            with self._pool_lock:
+                self._thread_connections[threading.get_ident()] = conn
+        return conn
+
+    def release_thread_connection(self):
+        """
+        Uzavře připojení aktuálního vedlejšího vlákna.
+        Volat na konci QThread.run(), aby v poolu nezůstávala mrtvá připojení.
+        """
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            return
+        with self._pool_lock:
+            self._thread_connections.pop(threading.get_ident(), None)
+        self._local.connection = None
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def pool_status(self) -> dict:
+        """Přehled stavu poolu (pro diagnostiku v nastavení databáze)."""
+        with self._pool_lock:
+            readers = len(self._thread_connections)
+        return {
+            "pooled": self.pooled,
+            "writer_connected": self.connection is not None,
+            "reader_connections": readers,
+        }
 
     # -----------------------
     # Pomocné dotazy pro migrace
     # -----------------------
     def get_connection(self):
-        """Vrátí aktivní připojení k databázi"""
+        """
+        Vrátí připojení pro volající vlákno.
+        GUI vlákno dostane hlavní (zapisovací) připojení, vedlejší vlákna
+        v režimu poolu své vlastní WAL připojení.
+        """
         if self.connection is None:
             self.connect()
-        return self.connection
+        if self._is_owner_thread():
+            return self.connection
+        return self._thread_connection()
 
 
     def _table_exists(self, table: str) -> bool:
@@ -109,8 +438,56 @@ class DatabaseManager:
     # -----------------------
     # Schéma + migrace
     # -----------------------
-    def create_tables(self):
-        """Vytvoření/migrace schématu – idempotentně a odolně."""
+    def get_schema_version(self) -> int:
+        """Verze schématu uložená v databázi (0 = databáze bez schema_version)"""
+        try:
+            row = self.connection.execute("SELECT MAX(version) FROM schema_version").fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return (row[0] or 0) if row else 0
+
+    def create_tables(self, force: bool = False):
+        """
+        Vytvoření/migrace schématu podle verze
+
+        Aktuální databáze = jediný dotaz na schema_version, bez introspekce.
+        Jinak se spustí chybějící kroky SCHEMA_MIGRATIONS a sanity check.
+        force=True spustí všechny kroky znovu (diagnostika, oprava databáze).
+        """
+        current = 0 if force else self.get_schema_version()
+        if current > SCHEMA_VERSION:
+            print(f"⚠️ Databáze má novější schéma ({current}) než aplikace ({SCHEMA_VERSION})")
+        self.schema_upgraded = current < SCHEMA_VERSION
+        if not self.schema_upgraded:
+            print(f"✅ Schéma databáze je aktuální (verze {current})")
+            return
+
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        for version, description, method in SCHEMA_MIGRATIONS:
+            if version <= current:
+                continue
+            print(f"⏳ Migrace schématu {version}: {description}")
+            getattr(self, method)()
+            self.cursor.execute(
+                "INSERT OR REPLACE INTO schema_version(version, description, applied_at) "
+                "VALUES (?, ?, CURRENT_TIMESTAMP)",
+                (version, description),
+            )
+            self.connection.commit()
+
+        print(f"✅ Schéma databáze je připravené (verze {SCHEMA_VERSION})")
+
+        # Extra: sanity kontrola po migraci
+        self._sanity_check()
+
+    def _migrate_base_schema(self):
+        """Krok 1: tabulky, sloupce a legacy aliasy – idempotentně a odolně."""
 
         # ==========================================
         # === 1) ZÁKAZNÍCI ===
@@ -150,6 +527,7 @@ class DatabaseManager:
             ("last_visit", "TEXT"),
             ("total_orders", "INTEGER DEFAULT 0"),
             ("total_spent", "REAL DEFAULT 0"),
+            ("company_name", "TEXT"),
         ])
 
         # ==========================================
@@ -1248,9 +1626,11 @@ class DatabaseManager:
             (datetime.now().year,),
         )
 
-        # ==========================================
-        # === 20) KOMPATIBILNÍ VIEW PRO STARŠÍ DOTAZY ===
-        # ==========================================
+        # Výkonnostní indexy, FTS5 vyhledávání, souhrny zákazníků a view
+        # jsou samostatné kroky SCHEMA_MIGRATIONS (2-5)
+
+    def _create_compat_views(self):
+        """Krok 5: kompatibilní view pro starší dotazy."""
         self.cursor.execute("DROP VIEW IF EXISTS orders_legacy;")
         self.cursor.execute("""
             CREATE VIEW IF NOT EXISTS orders_legacy AS
@@ -1290,12 +1670,6 @@ class DatabaseManager:
             FROM warehouse;
         """)
 
-        self.connection.commit()
-        print("✅ Schéma databáze je připravené (vytvořeno/migrováno)")
-
-        # Extra: sanity kontrola po migraci
-        self._sanity_check()
-
     # -----------------------
     # Helpers
     # -----------------------
@@ -1355,6 +1729,602 @@ class DatabaseManager:
             """)
         self.cursor.execute("DROP TABLE order_work_log_old;")
 
+    def ensure_performance_indexes(self) -> int:
+        """
+        Vytvoří chybějící indexy z PERFORMANCE_INDEXES (jen pokud tabulka
+        i sloupce existují). Vrací počet nově vytvořených indexů.
+        """
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        existing = {r["name"] for r in self.cursor.fetchall()}
+        created = 0
+        for index_name, table, columns in PERFORMANCE_INDEXES:
+            if index_name in existing or not self._table_exists(table):
+                continue
+            wanted = {c.strip() for c in columns.split(",")}
+            if not wanted.issubset(self._columns(table)):
+                continue
+            self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({columns});")
+            created += 1
+        return created
+
+    # -----------------------
+    # Globální vyhledávání (FTS5)
+    # -----------------------
+    @staticmethod
+    def _search_content_sql(source: dict, p: str) -> str:
+        """SQL výraz s textem, který se indexuje pro daný zdroj."""
+        parts = [f"COALESCE({p}.{col}, '')" for col in source["fields"]]
+        for col in source["compact"]:
+            compact = (f"REPLACE(REPLACE(REPLACE(COALESCE({p}.{col}, ''), ' ', ''), '-', ''), "
+                       f"'+420', '')")
+            parts += [f"COALESCE({p}.{col}, '')", compact,
+                      f"substr({compact}, -6)", f"substr({compact}, -4)"]
+        return " || ' ' || ".join(parts)
+
+    def _search_values_sql(self, source: dict, p: str) -> str:
+        """Hodnoty (rowid, entity, entity_id, title, content) pro řádek s aliasem p."""
+        return (
+            f"{p}.id * {SEARCH_ROWID_FACTOR} + {source['code']}, '{source['entity']}', {p}.id, "
+            f"COALESCE({source['title'].format(p=p)}, ''), {self._search_content_sql(source, p)}"
+        )
+
+    def _search_source_ready(self, source: dict) -> bool:
+        """Zdrojová tabulka existuje a má všechny indexované sloupce."""
+        needed = set(source["fields"]) | set(source["compact"]) | {"id"}
+        return self._table_exists(source["table"]) and needed.issubset(self._columns(source["table"]))
+
+    def ensure_search_index(self) -> bool:
+        """
+        Vytvoří FTS5 tabulku search_index a triggery na zdrojových tabulkách.
+        Při prvním vytvoření index naplní. Vrací False, pokud SQLite nemá FTS5.
+        """
+        created = not self._table_exists("search_index")
+        try:
+            # remove_diacritics 2: č/ř/ž/ů... se ukládají i hledají bez diakritiky
+            self.cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+                    entity UNINDEXED,
+                    entity_id UNINDEXED,
+                    title,
+                    content,
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Globální vyhledávání není dostupné (FTS5): {e}")
+            return False
+
+        for source in SEARCH_SOURCES:
+            table, name = source["table"], source["entity"]
+            if not self._search_source_ready(source):
+                print(f"⚠️ Vyhledávání: tabulka {table} nemá potřebné sloupce, přeskočeno")
+                continue
+            rowid = f"OLD.id * {SEARCH_ROWID_FACTOR} + {source['code']}"
+            delete_sql = f"DELETE FROM search_index WHERE rowid = {rowid};"
+            insert_sql = (
+                "INSERT INTO search_index(rowid, entity, entity_id, title, content) "
+                f"VALUES ({self._search_values_sql(source, 'NEW')});"
+            )
+            # Triggery se vždy přegenerují, aby odpovídaly aktuální definici
+            for suffix in ("ai", "au", "ad"):
+                self.cursor.execute(f"DROP TRIGGER IF EXISTS trg_search_{name}_{suffix};")
+            self.cursor.execute(f"""
+                CREATE TRIGGER trg_search_{name}_ai AFTER INSERT ON {table}
+                BEGIN {insert_sql} END;
+            """)
+            self.cursor.execute(f"""
+                CREATE TRIGGER trg_search_{name}_au AFTER UPDATE ON {table}
+                BEGIN {delete_sql} {insert_sql} END;
+            """)
+            self.cursor.execute(f"""
+                CREATE TRIGGER trg_search_{name}_ad AFTER DELETE ON {table}
+                BEGIN {delete_sql} END;
+            """)
+
+        if created:
+            self.rebuild_search_index()
+        return True
+
+    def rebuild_search_index(self) -> int:
+        """Kompletní přestavba search_index ze zdrojových tabulek. Vrací počet záznamů."""
+        with self._write_lock:
+            self.cursor.execute("DELETE FROM search_index;")
+            for source in SEARCH_SOURCES:
+                if not self._search_source_ready(source):
+                    continue
+                self.cursor.execute(
+                    "INSERT INTO search_index(rowid, entity, entity_id, title, content) "
+                    f"SELECT {self._search_values_sql(source, 't')} FROM {source['table']} t;"
+                )
+            self.connection.commit()
+            self.cursor.execute("SELECT COUNT(*) FROM search_index")
+            return self.cursor.fetchone()[0]
+
+    @staticmethod
+    def _search_match_query(text: str) -> str:
+        """Převod vstupu uživatele na FTS5 dotaz: každé slovo jako prefix, slova přes AND."""
+        terms = []
+        for word in text.split():
+            word = word.replace('"', '""')
+            terms.append(f'"{word}"*')
+        return " ".join(terms)
+
+    def global_search(self, text: str, limit: int = 30, entities: Optional[Iterable[str]] = None) -> list[dict]:
+        """
+        Globální vyhledávání přes zákazníky, vozidla, zakázky, faktury a sklad.
+
+        Returns:
+            Seznam {entity, id, title} seřazený podle relevance (bm25)
+        """
+        text = (text or "").strip()
+        if len(text) < 2:
+            return []
+        sql = "SELECT entity, entity_id, title FROM search_index WHERE search_index MATCH ?"
+        params: list = [self._search_match_query(text)]
+        if entities:
+            entities = list(entities)
+            sql += f" AND entity IN ({', '.join('?' for _ in entities)})"
+            params += entities
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        rows = self.fetch_all(sql, tuple(params))
+        return [{"entity": r[0], "id": r[1], "title": r[2]} for r in rows]
+
+    # -----------------------
+    # Souhrny zákazníků (customer_stats)
+    # -----------------------
+    def ensure_customer_stats(self):
+        """
+        Vytvoří tabulku customer_stats a triggery na orders/vehicles/customers,
+        které při každé změně upraví souhrn dotčeného zákazníka.
+        Při prvním vytvoření tabulku naplní.
+        """
+        created = not self._table_exists("customer_stats")
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS customer_stats (
+                customer_id INTEGER PRIMARY KEY,
+                vehicle_count INTEGER NOT NULL DEFAULT 0,
+                order_count INTEGER NOT NULL DEFAULT 0,
+                total_spent REAL NOT NULL DEFAULT 0,
+                first_order_at TEXT,
+                last_order_at TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        self.ensure_customer_stats_triggers()
+
+        if created:
+            self.rebuild_customer_stats()
+
+    def ensure_customer_stats_triggers(self):
+        """Triggery na orders/vehicles/customers - přírůstková úprava souhrnu zákazníka"""
+        def delta(template: str, row: str) -> str:
+            return template.format(row=row).strip() + ";"
+
+        order_add = delta(CUSTOMER_STATS_ORDER_ADD_SQL, "NEW")
+        order_remove = delta(CUSTOMER_STATS_ORDER_REMOVE_SQL, "OLD")
+        vehicle_add = delta(CUSTOMER_STATS_VEHICLE_ADD_SQL, "NEW")
+        vehicle_remove = delta(CUSTOMER_STATS_VEHICLE_REMOVE_SQL, "OLD")
+        triggers = {
+            "trg_customer_stats_order_ai": ("AFTER INSERT ON orders", order_add),
+            "trg_customer_stats_order_au": ("AFTER UPDATE OF customer_id, total_price, created_at ON orders",
+                                            order_remove + order_add),
+            "trg_customer_stats_order_ad": ("AFTER DELETE ON orders", order_remove),
+            "trg_customer_stats_vehicle_ai": ("AFTER INSERT ON vehicles", vehicle_add),
+            "trg_customer_stats_vehicle_au": ("AFTER UPDATE OF customer_id ON vehicles",
+                                              vehicle_remove + vehicle_add),
+            "trg_customer_stats_vehicle_ad": ("AFTER DELETE ON vehicles", vehicle_remove),
+            "trg_customer_stats_customer_ad": ("AFTER DELETE ON customers",
+                                               "DELETE FROM customer_stats WHERE customer_id = OLD.id;"),
+        }
+        for name, (event, body) in triggers.items():
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS {name};")
+            self.cursor.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END;")
+
+    def rebuild_customer_stats(self) -> int:
+        """Kompletní přepočet customer_stats jedním průchodem. Vrací počet zákazníků."""
+        with self._write_lock:
+            self.cursor.execute("DELETE FROM customer_stats;")
+            self.cursor.execute("""
+                INSERT INTO customer_stats
+                    (customer_id, vehicle_count, order_count, total_spent, first_order_at, last_order_at)
+                SELECT c.id,
+                       COALESCE(v.cnt, 0),
+                       COALESCE(o.cnt, 0),
+                       COALESCE(o.spent, 0),
+                       o.first_at,
+                       o.last_at
+                FROM customers c
+                LEFT JOIN (
+                    SELECT customer_id, COUNT(*) AS cnt
+                    FROM vehicles GROUP BY customer_id
+                ) v ON v.customer_id = c.id
+                LEFT JOIN (
+                    SELECT customer_id, COUNT(*) AS cnt, SUM(total_price) AS spent,
+                           MIN(created_at) AS first_at, MAX(created_at) AS last_at
+                    FROM orders GROUP BY customer_id
+                ) o ON o.customer_id = c.id
+            """)
+            self.connection.commit()
+            self.cursor.execute("SELECT COUNT(*) FROM customer_stats")
+            return self.cursor.fetchone()[0]
+
+    def get_customer_stats(self, customer_id: int) -> dict:
+        """Souhrn zákazníka (počty, útrata, první/poslední zakázka)."""
+        row = self.fetch_one("SELECT * FROM customer_stats WHERE customer_id = ?", (customer_id,))
+        if row is None:
+            return {"customer_id": customer_id, "vehicle_count": 0, "order_count": 0,
+                    "total_spent": 0.0, "first_order_at": None, "last_order_at": None}
+        return dict(row)
+
+    # -----------------------
+    # Časové souhrny (management)
+    # -----------------------
+    def ensure_order_rollups(self):
+        """
+        Vytvoří tabulky order_rollups_daily / order_rollups_monthly a
+        mechanic_rollups_daily a triggery na orders, order_items a order_work_log,
+        které při každé změně přepočítají dotčený den a měsíc.
+        Při prvním vytvoření tabulky naplní.
+        """
+        created = not self._table_exists("order_rollups_daily")
+        for table, key in (("order_rollups_daily", "day"), ("order_rollups_monthly", "month")):
+            self.cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {key} TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT '',
+                    order_type TEXT NOT NULL DEFAULT '',
+                    orders INTEGER NOT NULL DEFAULT 0,
+                    revenue REAL NOT NULL DEFAULT 0,
+                    material_cost REAL NOT NULL DEFAULT 0,
+                    parts REAL NOT NULL DEFAULT 0,
+                    labor REAL NOT NULL DEFAULT 0,
+                    external REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY ({key}, status, order_type)
+                ) WITHOUT ROWID
+            """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS mechanic_rollups_daily (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                hours REAL NOT NULL DEFAULT 0,
+                entries INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day)
+            ) WITHOUT ROWID
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_mechanic_rollups_day ON mechanic_rollups_daily(day);")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_work_log_user_date ON order_work_log(user_id, date);")
+
+        def refresh(day: str) -> str:
+            return ORDER_ROLLUP_REFRESH_SQL.format(day=day).strip()
+
+        def order_day(order_id: str) -> str:
+            return f"(SELECT created_date FROM orders WHERE id = {order_id})"
+
+        def refresh_mechanic(row: str) -> str:
+            return MECHANIC_ROLLUP_REFRESH_SQL.format(uid=f"{row}.user_id", day=f"{row}.date").strip()
+
+        triggers = {
+            "trg_order_rollups_order_ai": ("AFTER INSERT ON orders",
+                                           refresh("NEW.created_date")),
+            "trg_order_rollups_order_au": ("AFTER UPDATE OF created_date, status, order_type, "
+                                           "total_price, material_cost ON orders",
+                                           refresh("OLD.created_date") + refresh("NEW.created_date")),
+            "trg_order_rollups_order_ad": ("AFTER DELETE ON orders",
+                                           refresh("OLD.created_date")),
+            "trg_order_rollups_item_ai": ("AFTER INSERT ON order_items",
+                                          refresh(order_day("NEW.order_id"))),
+            "trg_order_rollups_item_au": ("AFTER UPDATE OF order_id, item_type, total_price ON order_items",
+                                          refresh(order_day("OLD.order_id")) +
+                                          refresh(order_day("NEW.order_id"))),
+            "trg_order_rollups_item_ad": ("AFTER DELETE ON order_items",
+                                          refresh(order_day("OLD.order_id"))),
+            "trg_mechanic_rollups_ai": ("AFTER INSERT ON order_work_log",
+                                        refresh_mechanic("NEW")),
+            "trg_mechanic_rollups_au": ("AFTER UPDATE OF user_id, date, hours_worked ON order_work_log",
+                                        refresh_mechanic("OLD") + refresh_mechanic("NEW")),
+            "trg_mechanic_rollups_ad": ("AFTER DELETE ON order_work_log",
+                                        refresh_mechanic("OLD")),
+        }
+        for name, (event, body) in triggers.items():
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS {name};")
+            self.cursor.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END;")
+
+        if created:
+            self.rebuild_order_rollups()
+
+    def rebuild_order_rollups(self) -> int:
+        """Kompletní přepočet časových souhrnů jedním průchodem. Vrací počet dní."""
+        with self._write_lock:
+            self.cursor.execute("DELETE FROM order_rollups_daily;")
+            self.cursor.execute("""
+                INSERT INTO order_rollups_daily
+                    (day, status, order_type, orders, revenue, material_cost, parts, labor, external)
+                SELECT DATE(o.created_date), COALESCE(o.status, ''), COALESCE(o.order_type, ''),
+                       COUNT(*), COALESCE(SUM(o.total_price), 0), COALESCE(SUM(o.material_cost), 0),
+                       COALESCE(SUM(i.parts), 0), COALESCE(SUM(i.labor), 0), COALESCE(SUM(i.external), 0)
+                FROM orders o
+                LEFT JOIN (
+                    SELECT order_id,
+                           SUM(CASE WHEN item_type = 'Materiál' THEN total_price END) AS parts,
+                           SUM(CASE WHEN item_type = 'Práce' THEN total_price END) AS labor,
+                           SUM(CASE WHEN item_type = 'Cizí výkon' THEN total_price END) AS external
+                    FROM order_items GROUP BY order_id
+                ) i ON i.order_id = o.id
+                WHERE DATE(o.created_date) IS NOT NULL
+                GROUP BY 1, 2, 3
+            """)
+            self.cursor.execute("DELETE FROM order_rollups_monthly;")
+            self.cursor.execute("""
+                INSERT INTO order_rollups_monthly
+                    (month, status, order_type, orders, revenue, material_cost, parts, labor, external)
+                SELECT substr(day, 1, 7), status, order_type, SUM(orders), SUM(revenue),
+                       SUM(material_cost), SUM(parts), SUM(labor), SUM(external)
+                FROM order_rollups_daily
+                GROUP BY 1, 2, 3
+            """)
+            self.cursor.execute("DELETE FROM mechanic_rollups_daily;")
+            self.cursor.execute("""
+                INSERT INTO mechanic_rollups_daily (user_id, day, hours, entries)
+                SELECT user_id, DATE(date), COALESCE(SUM(hours_worked), 0), COUNT(*)
+                FROM order_work_log
+                WHERE user_id IS NOT NULL AND DATE(date) IS NOT NULL
+                GROUP BY 1, 2
+            """)
+            self.connection.commit()
+            self.cursor.execute("SELECT COUNT(DISTINCT day) FROM order_rollups_daily")
+            return self.cursor.fetchone()[0]
+
+    # -----------------------
+    # Opakující se události (utils_recurrence)
+    # -----------------------
+    def ensure_recurrence_overrides(self):
+        """
+        Pravidla opakování nesou šablonu výskytu (název, začátek, čas, délka,
+        mechanik), výskyty se rozvíjí až při zobrazení. V calendar_events zůstávají
+        jen výjimky označené recurrence_date (původní den výskytu).
+        Dříve vygenerované instance, které uživatel upravil nebo zrušil, se stanou
+        výjimkami svého pravidla; needitované se smažou (prune_recurrence_instances).
+        """
+        self._ensure_columns("calendar_recurring_rules", [
+            ("name", "TEXT"),
+            ("start_date", "TEXT"),
+            ("start_time", "TEXT DEFAULT '09:00'"),
+            ("duration_minutes", "INTEGER DEFAULT 60"),
+            ("event_type", "TEXT DEFAULT 'service'"),
+            ("mechanic_id", "INTEGER"),
+            ("color", "TEXT DEFAULT '#3498db'"),
+        ])
+        self._ensure_columns("calendar_events", [("recurrence_date", "TEXT")])
+
+        self.cursor.execute("""
+            UPDATE calendar_events
+               SET recurrence_date = DATE(start_datetime)
+             WHERE recurring_rule_id IS NOT NULL AND recurrence_date IS NULL
+        """)
+        # Začátek pravidla = první vygenerovaná instance, jinak den vytvoření
+        self.cursor.execute("""
+            UPDATE calendar_recurring_rules
+               SET start_date = COALESCE(
+                   (SELECT MIN(recurrence_date) FROM calendar_events
+                     WHERE recurring_rule_id = calendar_recurring_rules.id),
+                   DATE(created_at), DATE('now'))
+             WHERE start_date IS NULL
+        """)
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_calendar_events_recurrence
+            ON calendar_events(recurrence_date, recurring_rule_id)
+            WHERE recurring_rule_id IS NOT NULL
+        """)
+        self.prune_recurrence_instances()
+
+    def prune_recurrence_instances(self):
+        """
+        Smaže dříve vygenerované instance opakujících se událostí, které nikdo
+        neupravil - stejné výskyty teď rozvine pravidlo. Needitovaná instance:
+        updated_at = created_at (do 1 s), naplánovaná, bez propojení a poznámek,
+        název, čas, délka, typ, barva a mechanik odpovídají šabloně pravidla.
+        """
+        # Pravidla bez názvu převezmou název z vygenerovaných instancí
+        self.cursor.execute("""
+            UPDATE calendar_recurring_rules
+               SET name = (SELECT REPLACE(e.title, ' (opakující se)', '')
+                             FROM calendar_events e
+                            WHERE e.recurring_rule_id = calendar_recurring_rules.id
+                              AND e.title LIKE '% (opakující se)'
+                            ORDER BY e.id LIMIT 1)
+             WHERE name IS NULL OR name = ''
+        """)
+        try:
+            self.cursor.execute("""
+                DELETE FROM calendar_events
+                 WHERE recurring_rule_id IS NOT NULL
+                   AND COALESCE(status, 'scheduled') = 'scheduled'
+                   AND (updated_at IS NULL OR created_at IS NULL
+                        OR ABS(julianday(updated_at) - julianday(created_at)) * 86400 < 1)
+                   AND customer_id IS NULL AND vehicle_id IS NULL AND order_id IS NULL
+                   AND COALESCE(description, '') = '' AND COALESCE(notes, '') = ''
+                   AND COALESCE(priority, 2) = 2
+                   AND EXISTS (
+                       SELECT 1 FROM calendar_recurring_rules r
+                        WHERE r.id = calendar_events.recurring_rule_id
+                          AND calendar_events.title = COALESCE(r.name, '') || ' (opakující se)'
+                          AND TIME(calendar_events.start_datetime) = TIME(COALESCE(r.start_time, '09:00'))
+                          AND ROUND((julianday(calendar_events.end_datetime)
+                                     - julianday(calendar_events.start_datetime)) * 1440)
+                              = COALESCE(r.duration_minutes, 60)
+                          AND calendar_events.mechanic_id IS r.mechanic_id
+                          AND calendar_events.event_type = COALESCE(r.event_type, 'service')
+                          AND COALESCE(calendar_events.color, '') = COALESCE(r.color, '#3498db')
+                   )
+            """)
+        except sqlite3.OperationalError as e:
+            # Např. cizí klíč na neexistující tabulku ve starší databázi
+            print(f"⚠️ Vygenerované instance opakujících se událostí nelze smazat: {e}")
+
+    def ensure_scheduler_indexes(self):
+        """
+        Indexy pro dotazy plánovače připomínek (utils_scheduler) - termíny
+        všech vozidel a položky pod minimem se čtou bez průchodu celé tabulky.
+        """
+        if self._table_exists("vehicles"):
+            columns = self._columns("vehicles")
+            if "stk_valid_until" in columns:
+                self.cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_vehicles_stk ON vehicles(stk_valid_until);")
+            if "insurance_valid_until" in columns:
+                self.cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_vehicles_insurance ON vehicles(insurance_valid_until);")
+        if self._table_exists("warehouse"):
+            # Částečný index - obsahuje jen položky pod minimem
+            self.cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_warehouse_below_min
+                ON warehouse(id) WHERE quantity < min_quantity
+            """)
+        if self._table_exists("vehicle_reminders"):
+            columns = self._columns("vehicle_reminders")
+            for column in ("due_date", "reminder_date"):
+                if column in columns:
+                    self.cursor.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_vehicle_reminders_{column} "
+                        f"ON vehicle_reminders({column});")
+
+    # -----------------------
+    # Skladová kniha (warehouse_movements)
+    # -----------------------
+    def ensure_stock_ledger(self):
+        """
+        Pohyby skladu jako zdroj pravdy pro stav zásob:
+        - sloupce, které zapisují dialogy příjmu/výdeje/inventury, a balance_after
+          (zůstatek položky po pohybu v pořadí zápisu)
+        - warehouse_stock_snapshots: stav položky na konci uzavřeného měsíce
+          (řídce - jen měsíce s pohybem), warehouse_snapshot_periods: hotové měsíce
+        - počáteční stav pro položky, jejichž warehouse.quantity pohyby nepokrývají
+        """
+        self._ensure_columns("warehouse_movements", [
+            ("movement_type", "TEXT DEFAULT 'manual'"),
+            ("unit_price", "REAL"),
+            ("supplier_id", "INTEGER"),
+            ("document_number", "TEXT"),
+            ("note", "TEXT"),
+            ("created_by", "TEXT"),
+            ("balance_after", "REAL"),
+        ])
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_movements_item ON warehouse_movements(item_id);")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_movements_date ON warehouse_movements(movement_date);")
+
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS warehouse_stock_snapshots (
+                item_id INTEGER NOT NULL,
+                period TEXT NOT NULL,
+                quantity REAL NOT NULL,
+                PRIMARY KEY (item_id, period)
+            ) WITHOUT ROWID
+        """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS warehouse_snapshot_periods (
+                period TEXT PRIMARY KEY,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Průběžné zůstatky existujících pohybů (v pořadí zápisu)
+        self.cursor.execute("""
+            UPDATE warehouse_movements
+            SET balance_after = r.balance
+            FROM (
+                SELECT id, SUM(qty_change) OVER (PARTITION BY item_id ORDER BY id) AS balance
+                FROM warehouse_movements
+            ) AS r
+            WHERE r.id = warehouse_movements.id
+        """)
+
+        # Počáteční stav: rozdíl mezi warehouse.quantity a součtem pohybů
+        self.cursor.execute("""
+            INSERT INTO warehouse_movements
+                (item_id, movement_date, date, qty_change, quantity, movement_type,
+                 unit_price, note, created_by, balance_after)
+            SELECT w.id,
+                   COALESCE(w.created_at, CURRENT_TIMESTAMP),
+                   COALESCE(w.created_at, CURRENT_TIMESTAMP),
+                   COALESCE(w.quantity, 0) - COALESCE(m.total, 0),
+                   COALESCE(w.quantity, 0) - COALESCE(m.total, 0),
+                   'Počáteční stav',
+                   COALESCE(w.price_purchase, 0),
+                   'Počáteční stav skladové knihy',
+                   'system',
+                   COALESCE(w.quantity, 0)
+            FROM warehouse w
+            LEFT JOIN (
+                SELECT item_id, SUM(qty_change) AS total
+                FROM warehouse_movements GROUP BY item_id
+            ) m ON m.item_id = w.id
+            WHERE ABS(COALESCE(w.quantity, 0) - COALESCE(m.total, 0)) > 0.0001
+        """)
+
+        # Snapshoty se po změně historie staví znovu (viz utils_stock)
+        self.cursor.execute("DELETE FROM warehouse_stock_snapshots;")
+        self.cursor.execute("DELETE FROM warehouse_snapshot_periods;")
+
+    # -----------------------
+    # Index advisor
+    # -----------------------
+    def register_hot_query(self, name: str, sql: str, params: tuple = (), allow_scan: tuple = ()):
+        """Zaregistruje dotaz, který má index advisor kontrolovat."""
+        self.hot_queries = [q for q in self.hot_queries if q["name"] != name]
+        self.hot_queries.append({
+            "name": name,
+            "sql": sql,
+            "params": tuple(params),
+            "allow_scan": tuple(allow_scan),
+        })
+
+    def explain_query(self, sql: str, params: tuple = ()) -> list[str]:
+        """Vrátí řádky EXPLAIN QUERY PLAN (sloupec detail)."""
+        rows = self.get_connection().execute(f"EXPLAIN QUERY PLAN {sql}", tuple(params)).fetchall()
+        return [row["detail"] for row in rows]
+
+    @staticmethod
+    def _full_scan_table(detail: str) -> Optional[str]:
+        """
+        Z řádku plánu vrátí tabulku, kterou SQLite prochází celou
+        ('SCAN orders', 'SCAN TABLE orders', i 'SCAN orders USING COVERING INDEX ...').
+        'SEARCH ...' = dohledání přes index (OK).
+        """
+        words = detail.split()
+        if not words or words[0] != "SCAN":
+            return None
+        if "CONSTANT" in words or "SUBQUERY" in words:
+            return None
+        if len(words) > 2 and words[1] == "TABLE":
+            return words[2]
+        return words[1] if len(words) > 1 else None
+
+    def index_advisor(self) -> list[dict]:
+        """
+        Projde registrované horké dotazy přes EXPLAIN QUERY PLAN a vrátí
+        pro každý plán, nalezené plné průchody tabulek a použití temp B-tree.
+        """
+        report = []
+        for q in self.hot_queries:
+            entry = {"name": q["name"], "plan": [], "full_scans": [], "temp_btree": False, "error": None}
+            try:
+                plan = self.explain_query(q["sql"], q.get("params", ()))
+                entry["plan"] = plan
+                allowed = set(q.get("allow_scan", ()))
+                for detail in plan:
+                    table = self._full_scan_table(detail)
+                    if table and table not in allowed:
+                        entry["full_scans"].append(table)
+                    if "TEMP B-TREE" in detail:
+                        entry["temp_btree"] = True
+            except Exception as e:
+                entry["error"] = str(e)
+            report.append(entry)
+        return report
+
     # -----------------------
     # Sanity check schématu
     # -----------------------
@@ -1373,11 +2343,16 @@ class DatabaseManager:
             "orders": {"id", "order_number", "order_id", "customer_id", "created_date", "order_date"},
             "warehouse_suppliers": {"id", "name", "ico", "dic", "contact_person", "phone", "email"},
             "warehouse": {"id", "code", "name", "category_id", "supplier_id", "ean"},
-            "warehouse_movements": {"id", "item_id", "movement_date", "date", "qty_change", "quantity"},
+            "warehouse_movements": {"id", "item_id", "movement_date", "date", "qty_change", "quantity",
+                                    "movement_type", "unit_price", "note", "balance_after"},
+            "warehouse_stock_snapshots": {"item_id", "period", "quantity"},
+            "order_rollups_daily": {"day", "status", "order_type", "orders", "revenue", "material_cost"},
+            "order_rollups_monthly": {"month", "status", "order_type", "orders", "revenue", "material_cost"},
+            "mechanic_rollups_daily": {"user_id", "day", "hours", "entries"},
             "order_items": {"id", "order_id", "warehouse_id", "item_name", "name", "quantity", "unit", "unit_price", "vat_rate", "total_price"},
-            "calendar_events": {"id", "title", "event_type", "start_datetime", "end_datetime", "mechanic_id", "customer_id", "vehicle_id", "order_id", "status", "priority", "color", "reminder_minutes"},
+            "calendar_events": {"id", "title", "event_type", "start_datetime", "end_datetime", "mechanic_id", "customer_id", "vehicle_id", "order_id", "status", "priority", "color", "reminder_minutes", "recurrence_date"},
             "calendar_reminders": {"id", "event_id", "reminder_type", "remind_at", "sent", "method"},
-            "calendar_recurring_rules": {"id", "frequency", "interval_value", "days_of_week"},
+            "calendar_recurring_rules": {"id", "name", "frequency", "interval_value", "days_of_week", "start_date"},
             "calendar_availability": {"id", "mechanic_id", "day_of_week", "start_time", "end_time", "is_working"},
             "calendar_holidays": {"id", "holiday_date", "name", "is_closed"},
             "calendar_settings": {"id", "setting_key", "setting_value"},
@@ -1406,7 +2381,9 @@ class DatabaseManager:
     # Seed základních dat
     # -----------------------
     def initialize_default_data(self):
-        """Naplnění databáze základními daty (idempotentně)."""
+        """Naplnění databáze základními daty (idempotentně, jen po vytvoření/upgradu schématu)."""
+        if not self.schema_upgraded:
+            return
 
         # Značky vozidel
         self.cursor.execute("SELECT COUNT(*) AS c FROM codebook_brands;")
@@ -1555,15 +2532,66 @@ class DatabaseManager:
     # -----------------------
     # Zálohy
     # -----------------------
+    def snapshot_to(self, target_path, progress=None) -> int:
+        """
+        Konzistentní kopie databáze do souboru (sqlite3 backup API po krocích)
+
+        Kopíruje se z vlastního připojení, které po celou dobu drží čtecí
+        transakci: záloha vidí jeden snímek (WAL) a nezačíná znovu, když
+        ostatní připojení mezitím zapisují - aplikace běží bez omezení.
+        Cíl se zapisuje do dočasného souboru a přejmenuje se až hotový.
+
+        Args:
+            target_path: cílový soubor .db
+            progress: progress(zkopírováno stránek, celkem stránek)
+
+        Returns:
+            int: počet stránek databáze
+        """
+        target_path = Path(target_path)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target_path.with_name(target_path.name + ".tmp")
+        tmp_path.unlink(missing_ok=True)
+
+        source = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+        target = sqlite3.connect(tmp_path)
+        pages = 0
+        try:
+            source.execute("PRAGMA busy_timeout = 5000;")
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+            def step(status, remaining, total):
+                nonlocal pages
+                pages = total
+                if progress is not None:
+                    progress(total - remaining, total)
+
+            source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=step,
+                          sleep=BACKUP_STEP_SLEEP)
+            source.execute("COMMIT")
+
+            # Záloha je jeden soubor (bez -wal)
+            target.execute("PRAGMA journal_mode = DELETE;")
+            target.close()
+            tmp_path.replace(target_path)
+            return pages
+        except BaseException:
+            target.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            source.close()
+
     def backup_database(self) -> bool:
-        """Vytvoření zálohy databáze do config.BACKUP_DIR."""
+        """Vytvoření zálohy databáze do config.BACKUP_DIR (online snímek, nezdržuje zápisy)."""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_name = f"motoservis_backup_{timestamp}.db"
             backup_dir: Path = Path(config.BACKUP_DIR)
             backup_dir.mkdir(parents=True, exist_ok=True)
             backup_path = backup_dir / backup_name
-            shutil.copy2(self.db_path, backup_path)
+            self.snapshot_to(backup_path)
 
             max_backups = getattr(config, "MAX_BACKUPS", 10)
             backups = sorted(backup_dir.glob("motoservis_backup_*.db"))
@@ -1580,45 +2608,115 @@ class DatabaseManager:
             print(f"❌ Chyba při vytváření zálohy: {e}")
             return False
 
+    # -----------------------
+    # Transakce (unit of work)
+    # -----------------------
+    @contextmanager
+    def transaction(self):
+        """
+        Více zápisů jako jedna transakce s jedním commitem:
+
+            with db.transaction():
+                db.execute_query("UPDATE warehouse ...", (...))
+                db.execute_query("INSERT INTO warehouse_movements ...", (...))
+
+        - execute_query uvnitř bloku necommituje a chybu vyhodí (místo False)
+        - výjimka v bloku = rollback všech zápisů bloku
+        - vnořený blok používá SAVEPOINT (při chybě se vrátí jen vnitřní blok)
+        - zapisovací zámek je držen po celou dobu bloku
+        """
+        with self._write_lock:
+            depth = self._tx_depth
+            savepoint = f"tx_{depth}"
+            if depth == 0:
+                if not self.connection.in_transaction:
+                    self.cursor.execute("BEGIN IMMEDIATE;")
+            else:
+                self.cursor.execute(f"SAVEPOINT {savepoint};")
+            self._tx_depth += 1
+            try:
+                yield self.cursor
+            except BaseException:
+                self._tx_depth = depth
+                if depth == 0:
+                    self.connection.rollback()
+                else:
+                    self.cursor.execute(f"ROLLBACK TO {savepoint};")
+                    self.cursor.execute(f"RELEASE {savepoint};")
+                raise
+            self._tx_depth = depth
+            if depth == 0:
+                self.connection.commit()
+            else:
+                self.cursor.execute(f"RELEASE {savepoint};")
+
+    def in_transaction(self) -> bool:
+        """True uvnitř bloku db.transaction()"""
+        return self._tx_depth > 0
+
     # -----------------------
     # Bezpečné provádění SQL
     # -----------------------
     def execute_query(self, query: str, params: Optional[tuple] = None):
-        """Spuštění SQL dotazu a vrácení výsledků s logem chyb."""
+        """
+        Spuštění SQL dotazu a vrácení výsledků s logem chyb.
+        Zápisy jdou vždy přes zapisovací připojení (serializované zámkem),
+        SELECT z vedlejšího vlákna jde přes jeho čtecí připojení.
+        Uvnitř db.transaction() se necommituje a chyba se vyhodí dál.
+        """
+        is_select = query.strip().upper().startswith("SELECT")
+        if is_select and not self._is_owner_thread():
+            return self.fetch_all(query, params)
         try:
-            if params is not None:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            self.connection.commit()
-            if query.strip().upper().startswith("SELECT"):
-                return self.cursor.fetchall()
+            with self._write_lock:
+                if params is not None:
+                    self.cursor.execute(query, params)
+                else:
+                    self.cursor.execute(query)
+                if not self._tx_depth:
+                    self.connection.commit()
+                if is_select:
+                    return self.cursor.fetchall()
             return True
         except Exception as e:
             print(f"Chyba při provádění dotazu: {e}")
             print(f"Dotaz: {query}")
             print(f"Parametry: {params}")
-            return [] if query.strip().upper().startswith("SELECT") else False
+            if self._tx_depth:
+                raise
+            return [] if is_select else False
+
+    def execute_many(self, query: str, rows: Iterable) -> int:
+        """
+        Hromadný zápis (executemany) - v jedné transakci, pokud už neběží vnější.
+        Vrací počet zapsaných řádků; chybu vyhodí (celý zápis se vrátí).
+        """
+        with self.transaction():
+            self.cursor.executemany(query, rows)
+            return self.cursor.rowcount
 
     def fetch_all(self, query: str, params: Optional[tuple] = None):
         try:
-            if params is not None:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            rows = self.cursor.fetchall()
-            return rows or []
+            if self._is_owner_thread():
+                with self._write_lock:
+                    self.cursor.execute(query, params if params is not None else ())
+                    return self.cursor.fetchall() or []
+            cur = self._thread_connection().cursor()
+            cur.execute(query, params if params is not None else ())
+            return cur.fetchall() or []
         except Exception as e:
             print(f"Chyba při načítání dat: {e}")
             return []
 
     def fetch_one(self, query: str, params: Optional[tuple] = None):
         try:
-            if params is not None:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            return self.cursor.fetchone()
+            if self._is_owner_thread():
+                with self._write_lock:
+                    self.cursor.execute(query, params if params is not None else ())
+                    return self.cursor.fetchone()
+            cur = self._thread_connection().cursor()
+            cur.execute(query, params if params is not None else ())
+            return cur.fetchone()
         except Exception as e:
             print(f"Chyba při načítání dat: {e}")
             return None
@@ -1633,30 +2731,31 @@ class DatabaseManager:
         """
         y = year or datetime.now().year
 
-        self.cursor.execute(
-            "INSERT INTO order_sequences(year, last_number) VALUES (?, 0) ON CONFLICT(year) DO NOTHING",
-            (y,),
-        )
+        with self._write_lock:
+            self.cursor.execute(
+                "INSERT INTO order_sequences(year, last_number) VALUES (?, 0) ON CONFLICT(year) DO NOTHING",
+                (y,),
+            )
 
-        started_tx = False
-        try:
-            if not self.connection.in_transaction:
-                self.cursor.execute("BEGIN IMMEDIATE;")
-                started_tx = True
+            started_tx = False
+            try:
+                if not self.connection.in_transaction:
+                    self.cursor.execute("BEGIN IMMEDIATE;")
+                    started_tx = True
 
-            self.cursor.execute("UPDATE order_sequences SET last_number = last_number + 1 WHERE year = ?", (y,))
-            self.cursor.execute("SELECT last_number FROM order_sequences WHERE year = ?", (y,))
-            n = self.cursor.fetchone()["last_number"]
+                self.cursor.execute("UPDATE order_sequences SET last_number = last_number + 1 WHERE year = ?", (y,))
+                self.cursor.execute("SELECT last_number FROM order_sequences WHERE year = ?", (y,))
+                n = self.cursor.fetchone()["last_number"]
 
-            if started_tx:
-                self.connection.commit()
+                if started_tx:
+                    self.connection.commit()
 
-            return f"{y}{n:04d}"
+                return f"{y}{n:04d}"
 
-        except Exception:
-            if started_tx:
-                self.connection.rollback()
-            raise
+            except Exception:
+                if started_tx:
+                    self.connection.rollback()
+                raise
 
     def get_next_invoice_number(self, invoice_type: str = "issued", year: int | None = None) -> str:
         """
@@ -1671,31 +2770,32 @@ class DatabaseManager:
         result = self.fetch_one(query, (prefix_key,))
         prefix = result[0] if result else ("FV" if invoice_type == "issued" else "FP")
 
-        # Inicializuj sekvenci pro daný rok
-        self.cursor.execute(
-            "INSERT INTO invoice_sequences(year, last_number) VALUES (?, 0) ON CONFLICT(year) DO NOTHING",
-            (y,),
-        )
+        with self._write_lock:
+            # Inicializuj sekvenci pro daný rok
+            self.cursor.execute(
+                "INSERT INTO invoice_sequences(year, last_number) VALUES (?, 0) ON CONFLICT(year) DO NOTHING",
+                (y,),
+            )
 
-        started_tx = False
-        try:
-            if not self.connection.in_transaction:
-                self.cursor.execute("BEGIN IMMEDIATE;")
-                started_tx = True
+            started_tx = False
+            try:
+                if not self.connection.in_transaction:
+                    self.cursor.execute("BEGIN IMMEDIATE;")
+                    started_tx = True
 
-            self.cursor.execute("UPDATE invoice_sequences SET last_number = last_number + 1 WHERE year = ?", (y,))
-            self.cursor.execute("SELECT last_number FROM invoice_sequences WHERE year = ?", (y,))
-            n = self.cursor.fetchone()["last_number"]
+                self.cursor.execute("UPDATE invoice_sequences SET last_number = last_number + 1 WHERE year = ?", (y,))
+                self.cursor.execute("SELECT last_number FROM invoice_sequences WHERE year = ?", (y,))
+                n = self.cursor.fetchone()["last_number"]
 
-            if started_tx:
-                self.connection.commit()
+                if started_tx:
+                    self.connection.commit()
 
-            return f"{prefix}-{y}-{n:04d}"
+                return f"{prefix}-{y}-{n:04d}"
 
-        except Exception:
-            if started_tx:
-                self.connection.rollback()
-            raise
+            except Exception:
+                if started_tx:
+                    self.connection.rollback()
+                raise
 
 
 # Globální instance
@@ -276,7 +276,7 @@ class ProjectDiagnostics:
         # Vytvoření tabulek
         self.print_subheader("Vytvoření schématu")
         try:
-            db.create_tables()
+            db.create_tables(force=True)
             self.log_pass("create_tables() proběhlo bez chyby")
         except Exception as e:
             self.log_fail("create_tables()", str(e))
@@ -292,7 +292,7 @@ class UltimateDiagnostics:
             
             # Vytvoř tabulky pokud neexistují
             print("⏳ Spouštím create_tables()...")
-            db.create_tables()
+            db.create_tables(force=True)
             db.initialize_default_data()
             
             # Načti všechny tabulky
@@ -4,6 +4,9 @@ Motoservis DMS - Hlavní spouštěcí soubor (s login dialogem a právy)
 """
 
 import sys
+import time
+
+_START = time.perf_counter()  # začátek měření startu (před importem PyQt)
 
 # Přidej cestu, kde máš uložené moduly (ponech i do budoucna)
 sys.path.append(r"C:\Users\Phili\Desktop\moto DMS")
@@ -14,19 +17,28 @@ from PyQt6.QtGui import QFont
 import config
 from database_manager import db
 from main_window import MainWindow
-from module_dashboard import DashboardModule
-from modules.customers import CustomersModule
-from modules.vehicles import VehiclesModule
-from modules.users.module_users import UsersModule
-from modules.calendar.module_calendar import CalendarModule
 from login_dialog import LoginDialog
 from utils.utils_auth import get_current_username
-from modules.orders import OrdersModule
-from modules.warehouse import WarehouseModule
-from modules.management import ManagementModule  # ← PŘIDEJ TENTO ŘÁDEK
-from modules.administration import AdministrationModule
-from modules.codebooks import CodebooksModule
-from modules.settings import SettingsModule
+from utils.utils_startup import startup_timer
+from utils.utils_scheduler import reminder_scheduler
+
+startup_timer.start(_START)
+startup_timer.mark("importy")
+
+# Moduly se importují a vytvářejí až při prvním otevření (MainWindow.add_lazy_module)
+MODULE_CLASSES = {
+    "dashboard": "module_dashboard:DashboardModule",
+    "customers": "modules.customers:CustomersModule",
+    "vehicles": "modules.vehicles:VehiclesModule",
+    "orders": "modules.orders:OrdersModule",
+    "warehouse": "modules.warehouse:WarehouseModule",
+    "calendar": "modules.calendar.module_calendar:CalendarModule",
+    "users": "modules.users.module_users:UsersModule",
+    "management": "modules.management:ManagementModule",
+    "administration": "modules.administration:AdministrationModule",
+    "codebooks": "modules.codebooks:CodebooksModule",
+    "settings": "modules.settings:SettingsModule",
+}
 
 def initialize_database():
     """Inicializace databáze"""
@@ -89,6 +101,7 @@ def main():
     splash = create_splash_screen()
     splash.show()
     app.processEvents()
+    startup_timer.mark("QApplication + splash")
 
     # Inicializace DB
     splash.showMessage(
@@ -106,6 +119,7 @@ def main():
             "Aplikace bude ukončena."
         )
         sys.exit(1)
+    startup_timer.mark("databáze")
 
     # Přihlášení uživatele (před vytvořením hlavního okna)
     splash.showMessage(
@@ -118,6 +132,7 @@ def main():
     login = LoginDialog()
     if login.exec() != login.DialogCode.Accepted:
         sys.exit(0)
+    startup_timer.mark("přihlášení", interactive=True)
 
     # Hlavní okno a moduly
     splash.showMessage(
@@ -129,18 +144,10 @@ def main():
 
     window = MainWindow()
 
-    # Přidání modulů
-    window.add_module("dashboard", DashboardModule())
-    window.add_module("customers", CustomersModule())
-    window.add_module("vehicles", VehiclesModule())
-    window.add_module("orders", OrdersModule())
-    window.add_module("warehouse", WarehouseModule())
-    window.add_module("calendar", CalendarModule())
-    window.add_module("users", UsersModule())
-    window.add_module("management", ManagementModule())  # ← PŘIDEJ TENTO ŘÁDEK
-    window.add_module("administration", AdministrationModule())
-    window.add_module("codebooks", CodebooksModule())
-    window.add_module("settings", SettingsModule())
+    # Registrace modulů (import a vytvoření až při prvním otevření)
+    for module_id, class_path in MODULE_CLASSES.items():
+        window.add_lazy_module(module_id, class_path)
+    startup_timer.mark("hlavní okno")
 
     # Výchozí modul
     window.switch_module("dashboard")
@@ -148,11 +155,16 @@ def main():
     # Zobrazení
     window.show()
     splash.finish(window)
+    startup_timer.mark("zobrazení okna")
+    startup_timer.print_report()
+
+    # Plánovač připomínek (STK, faktury, sklad, kalendář) - načítá na pozadí
+    reminder_scheduler.start()
 
     # ========================================
     # KONTROLA SKLADOVÝCH UPOZORNĚNÍ PŘI STARTU
     # ========================================
-    # Spustí se 2 sekundy po zobrazení hlavního okna
+    # Spustí se 2 sekundy po zobrazení hlavního okna (počet už z plánovače)
     QTimer.singleShot(2000, lambda: check_warehouse_alerts(window))
 
     # Info do konzole
@@ -163,4 +175,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Dávkové generování PDF spouští procesy (zabalená aplikace ve Windows)
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
@@ -4,12 +4,21 @@ Hlavní okno aplikace Motoservis DMS (s vynucením oprávnění a zobrazením p
 """
 
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QPushButton, QLabel, QFrame, QStackedWidget, QMessageBox)
+                             QPushButton, QLabel, QFrame, QStackedWidget, QMessageBox,
+                             QApplication, QMenu)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 import config
 from utils.utils_auth import get_current_username, get_current_user_id
 from utils.utils_permissions import has_permission
+from utils.utils_quick_search import QuickSearchBox, SEARCH_ENTITIES
+from utils.utils_loader import BackgroundLoader, refresh_async
+from utils.utils_startup import import_class, startup_timer
+from utils.utils_scheduler import (reminder_scheduler, KIND_LABELS, CALENDAR, STOCK,
+                                   INVOICE, STK, INSURANCE, VEHICLE_REMINDER)
+
+# Kolik upozornění se vejde do nabídky zvonku
+NOTIFICATION_MENU_LIMIT = 30
 
 
 class MainWindow(QMainWindow):
@@ -19,6 +28,9 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.current_module = None
         self.modules = {}  # instance modulů
+        self.module_classes = {}  # moduly čekající na první otevření: id -> "balik.modul:Trida"
+        # Načítání dat modulů na pozadí (přepnutí modulu zahodí rozpracované načítání)
+        self.loader = BackgroundLoader(self)
         self.init_ui()
 
     def init_ui(self):
@@ -123,6 +135,20 @@ class MainWindow(QMainWindow):
         top_bar_layout.addWidget(self.module_title)
         top_bar_layout.addStretch()
 
+        # Rychlé globální vyhledávání
+        self.quick_search = QuickSearchBox()
+        self.quick_search.setObjectName("quickSearch")
+        self.quick_search.result_selected.connect(self.open_search_result)
+        top_bar_layout.addWidget(self.quick_search)
+
+        # Upozornění z plánovače připomínek (STK, pojištění, faktury, sklad, připomínky)
+        self.notifications_btn = QPushButton("🔔")
+        self.notifications_btn.setToolTip("Žádná upozornění")
+        self.notifications_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.notifications_btn.clicked.connect(self.show_notifications)
+        reminder_scheduler.summary_changed.connect(self.update_notifications)
+        top_bar_layout.addWidget(self.notifications_btn)
+
         # Tlačítko zálohy – povol jen pokud má uživatel právo "admin" pro modul "administration"
         backup_btn = QPushButton("💾 Záloha")
         backup_btn.clicked.connect(self.create_backup)
@@ -146,22 +172,54 @@ class MainWindow(QMainWindow):
         self.modules[module_id] = module_widget
         self.module_stack.addWidget(module_widget)
 
+    def add_lazy_module(self, module_id, class_path):
+        """Registrace modulu, který se naimportuje a vytvoří až při prvním otevření"""
+        self.module_classes[module_id] = class_path
+
+    def has_module(self, module_id):
+        return module_id in self.modules or module_id in self.module_classes
+
+    def get_module(self, module_id):
+        """Instance modulu - při prvním přístupu modul naimportuje a vytvoří"""
+        if module_id in self.modules:
+            return self.modules[module_id]
+        class_path = self.module_classes.get(module_id)
+        if class_path is None:
+            return None
+
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            with startup_timer.measure(f"modul {module_id}"):
+                module_widget = import_class(class_path)()
+        except Exception as e:
+            print(f"❌ Chyba při načítání modulu {module_id}: {e}")
+            QMessageBox.critical(self, "Chyba modulu", f"Modul '{module_id}' se nepodařilo načíst:\n{e}")
+            return None
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        del self.module_classes[module_id]
+        self.add_module(module_id, module_widget)
+        return module_widget
+
     def switch_module(self, module_id):
         """Přepnutí modulu"""
-        if module_id in self.modules:
+        if self.has_module(module_id):
+            module = self.get_module(module_id)
+            if module is None:
+                return
             # zvýraznění aktivního tlačítka
             for btn_id, btn in self.nav_buttons.items():
                 btn.setProperty("active", btn_id == module_id)
                 btn.style().unpolish(btn); btn.style().polish(btn)
             # přepnutí stacku
-            self.module_stack.setCurrentWidget(self.modules[module_id])
+            self.module_stack.setCurrentWidget(module)
             self.current_module = module_id
             # titulek
             module_name = next((m['name'] for m in config.MODULES if m['id'] == module_id), '')
             self.module_title.setText(module_name)
-            # refresh modulu
-            if hasattr(self.modules[module_id], 'refresh'):
-                self.modules[module_id].refresh()
+            # refresh modulu (na pozadí, pokud modul podporuje fetch_data/apply_data)
+            refresh_async(self.loader, "module", module)
         else:
             QMessageBox.warning(
                 self,
@@ -170,6 +228,60 @@ class MainWindow(QMainWindow):
                 "Bude přidán v příští verzi."
             )
 
+    def open_search_result(self, entity, record_id, title):
+        """Otevření výsledku globálního vyhledávání v příslušném modulu"""
+        module_id = SEARCH_ENTITIES.get(entity, (None, None))[1]
+        if not self.has_module(module_id):
+            return
+        # Jen moduly, na které má uživatel právo "view" (mají tlačítko v navigaci)
+        if module_id not in self.nav_buttons:
+            QMessageBox.warning(self, "Přístup odepřen", "Nemáte oprávnění k zobrazení tohoto modulu.")
+            return
+        self.switch_module(module_id)
+
+        module = self.modules.get(module_id)
+        if module is None:
+            return
+        if hasattr(module, 'open_record'):
+            module.open_record(record_id)
+        elif hasattr(module, 'search_input'):
+            module.search_input.setText(title)
+
+    def update_notifications(self, summary):
+        """Počet aktivních upozornění na zvonku"""
+        total = sum(summary.values())
+        self.notifications_btn.setText(f"🔔 {total}" if total else "🔔")
+        self.notifications_btn.setToolTip(
+            "\n".join(f"{KIND_LABELS.get(kind, kind)}: {count}" for kind, count in summary.items())
+            or "Žádná upozornění"
+        )
+
+    def show_notifications(self):
+        """Nabídka aktivních upozornění (kliknutí otevře záznam)"""
+        items = reminder_scheduler.due_items()
+        menu = QMenu(self)
+        if not items:
+            menu.addAction("Žádná upozornění").setEnabled(False)
+        for item in items[:NOTIFICATION_MENU_LIMIT]:
+            action = menu.addAction(item.text())
+            if item.detail:
+                action.setToolTip(item.detail)
+            action.triggered.connect(lambda checked, i=item: self.open_notification(i))
+        if len(items) > NOTIFICATION_MENU_LIMIT:
+            menu.addAction(f"... a dalších {len(items) - NOTIFICATION_MENU_LIMIT}").setEnabled(False)
+        menu.exec(self.notifications_btn.mapToGlobal(self.notifications_btn.rect().bottomLeft()))
+
+    def open_notification(self, item):
+        """Otevření záznamu, ke kterému upozornění patří"""
+        if item.kind in (STK, INSURANCE, VEHICLE_REMINDER) and item.vehicle_id:
+            self.open_search_result("vehicle", item.vehicle_id, item.title)
+        elif item.kind == INVOICE:
+            self.open_search_result("invoice", item.ref_id, item.title)
+        elif item.kind == STOCK:
+            self.open_search_result("warehouse", item.ref_id, item.title)
+        elif item.kind == CALENDAR and "calendar" in self.nav_buttons:
+            self.switch_module("calendar")
+
     def create_backup(self):
         """Vytvoření zálohy databáze"""
         from database_manager import db
@@ -180,14 +292,18 @@ class MainWindow(QMainWindow):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            if db.backup_database():
-                QMessageBox.information(
-                    self,
-                    "Záloha vytvořena",
-                    f"Záloha byla úspěšně vytvořena.\nUmístění: {config.BACKUP_DIR}"
-                )
-            else:
-                QMessageBox.critical(self, "Chyba", "Nepodařilo se vytvořit zálohu databáze.")
+            # Online snímek na pozadí - aplikace mezitím normálně pracuje
+            def done(success):
+                if success:
+                    QMessageBox.information(
+                        self,
+                        "Záloha vytvořena",
+                        f"Záloha byla úspěšně vytvořena.\nUmístění: {config.BACKUP_DIR}"
+                    )
+                else:
+                    QMessageBox.critical(self, "Chyba", "Nepodařilo se vytvořit zálohu databáze.")
+
+            self.loader.load("backup", lambda _: db.backup_database(), done)
 
     def set_styles(self):
         """Styly aplikace"""
@@ -228,6 +344,13 @@ class MainWindow(QMainWindow):
                 border-bottom: 2px solid #e0e0e0;
                 padding: 0 20px;
             }}
+            #quickSearch {{
+                padding: 6px 10px;
+                border: 1px solid #ccc;
+                border-radius: 4px;
+                font-size: 13px;
+                margin-right: 10px;
+            }}
             #contentPanel {{
                 background-color: #f5f5f5;
             }}
@@ -12,6 +12,7 @@ from PyQt6.QtGui import QFont
 from datetime import datetime
 import config
 from database_manager import db
+from utils.utils_metrics import metrics
 
 
 def _table_columns(table: str) -> set:
@@ -118,8 +119,7 @@ class DashboardModule(QWidget):
         # Posuvník dolů
         layout.addStretch()
 
-        # Načtení dat
-        self.refresh()
+        # Data se načtou na pozadí při zobrazení modulu (MainWindow.switch_module)
 
     def create_stat_card(self, layout, row, col, title, value, color):
         """Vytvoření statistické karty"""
@@ -264,70 +264,52 @@ class DashboardModule(QWidget):
     # ------------------------- DATA -------------------------
 
     def refresh(self):
-        """Obnovení dat na dashboardu"""
-        self._load_stats()
-        self._load_today_appointments()
+        """Obnovení dat na dashboardu (synchronně)"""
+        self.apply_data(self.fetch_data(None))
 
-    def _load_stats(self):
+    # ------------------------- NAČÍTÁNÍ NA POZADÍ -------------------------
+
+    def fetch_data(self, params=None):
+        """Statistiky a dnešní termíny (pracovní vlákno - bez přístupu k widgetům)"""
         try:
-            # Aktivní zakázky
-            active_orders = db.fetch_one(
-                "SELECT COUNT(*) as count FROM orders WHERE status NOT IN ('dokončeno','archiv')"
-            )
-            if active_orders:
-                self.update_stat_value("Aktivní_zakázky", str(active_orders['count']))
-
-            # Zakázky čekající na součástky
-            waiting_orders = db.fetch_one(
-                "SELECT COUNT(*) as count FROM orders WHERE status = 'čeká na součástky'"
-            )
-            if waiting_orders:
-                self.update_stat_value("Čeká_na_součástky", str(waiting_orders['count']))
-
-            # Hotové dnes
-            completed_today = db.fetch_one(
-                "SELECT COUNT(*) as count FROM orders WHERE DATE(completed_date) = DATE('now')"
-            )
-            if completed_today:
-                self.update_stat_value("Hotové_dnes", str(completed_today['count']))
-
-            # Celkový počet zákazníků
-            customers = db.fetch_one("SELECT COUNT(*) as count FROM customers")
-            if customers:
-                self.update_stat_value("Zákazníci_celkem", str(customers['count']))
+            stats = metrics.home_stats()
+        except Exception as e:
+            print(f"Chyba při načítání statistik: {e}")
+            stats = None
+        return {"stats": stats, "appointments": self._fetch_today_appointments()}
 
+    def apply_data(self, data):
+        """Naplnění karet a seznamu termínů (GUI vlákno)"""
+        if data["stats"] is not None:
+            self._load_stats(data["stats"])
+        self._load_today_appointments(data["appointments"])
+
+    def _load_stats(self, stats):
+        try:
+            self.update_stat_value("Aktivní_zakázky", str(stats.active_orders))
+            self.update_stat_value("Čeká_na_součástky", str(stats.waiting_orders))
+            self.update_stat_value("Hotové_dnes", str(stats.completed_today))
+            self.update_stat_value("Zákazníci_celkem", str(stats.customers_total))
             # Vozidla v servisu (z nedokončených zakázek)
-            vehicles = db.fetch_one(
-                """SELECT COUNT(DISTINCT vehicle_id) as count FROM orders
-                   WHERE status NOT IN ('dokončeno','archiv')"""
-            )
-            if vehicles:
-                self.update_stat_value("Vozidla_v_servisu", str(vehicles['count']))
-
-            # Položky na skladě
-            warehouse = db.fetch_one("SELECT COUNT(*) as count FROM warehouse WHERE quantity > 0")
-            if warehouse:
-                self.update_stat_value("Položky_na_skladě", str(warehouse['count']))
+            self.update_stat_value("Vozidla_v_servisu", str(stats.vehicles_in_service))
+            self.update_stat_value("Položky_na_skladě", str(stats.stock_items))
 
         except Exception as e:
-            print(f"Chyba při načítání statistik: {e}")
+            print(f"Chyba při zobrazení statistik: {e}")
 
-    def _load_today_appointments(self):
-        """Načte dnešní termíny z calendar_events (pokud tabulka existuje)."""
-        if self.today_list is None:
-            return
-
-        self.today_list.clear()
+    def _fetch_today_appointments(self):
+        """
+        Dnešní termíny z calendar_events (pokud tabulka existuje)
 
-        # Ověřit existenci tabulky calendar_events
+        Returns:
+            Seznam řádků, nebo text zprávy pro prázdný/chybový stav
+        """
         try:
             exist = db.fetch_one("SELECT name FROM sqlite_master WHERE type='table' AND name='calendar_events'")
             if not exist:
-                self.today_list.addItem(QListWidgetItem("Žádné termíny (kalendář není vytvořen)"))
-                return
+                return "Žádné termíny (kalendář není vytvořen)"
         except Exception:
-            self.today_list.addItem(QListWidgetItem("Žádné termíny (chyba při zjišťování DB)"))
-            return
+            return "Žádné termíny (chyba při zjišťování DB)"
 
         cust_label_sql, cust_email_sql, _ = _customer_label_sql("c")
         v_brand, v_model, v_spz, _ = _vehicle_fields_sql("v")
@@ -361,7 +343,18 @@ class DashboardModule(QWidget):
                 ORDER BY e.start_datetime
             """, (today,))
         except Exception as e:
-            self.today_list.addItem(QListWidgetItem(f"Chyba při načítání dnešních termínů: {e}"))
+            return f"Chyba při načítání dnešních termínů: {e}"
+        return [dict(r) for r in rows]
+
+    def _load_today_appointments(self, rows):
+        """Naplní seznam dnešních termínů"""
+        if self.today_list is None:
+            return
+
+        self.today_list.clear()
+
+        if isinstance(rows, str):
+            self.today_list.addItem(QListWidgetItem(rows))
             return
 
         if not rows:
@@ -11,12 +11,14 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QGroupBox, QTabWidget, QScrollArea, QListWidget,
                              QListWidgetItem, QSplitter, QTreeWidget, QTreeWidgetItem)
 from PyQt6.QtCore import Qt, QDate, pyqtSignal, QUrl, QSize
-from PyQt6.QtGui import QFont, QColor, QIcon, QPixmap, QDesktopServices
+from PyQt6.QtGui import QFont, QColor, QIcon, QDesktopServices
 from datetime import datetime, timedelta, date
 from pathlib import Path
 import shutil
 import config
 from database_manager import db
+from utils.utils_blobs import blob_store
+from utils.utils_thumbnails import thumbnails, LARGE
 
 
 class DocumentsWidget(QWidget):
@@ -582,7 +584,7 @@ class DocumentsWidget(QWidget):
 
         # Pokud je to obrázek, zobrazit náhled
         if file_path.suffix.lower() in ['.png', '.jpg', '.jpeg', '.gif', '.bmp']:
-            pixmap = QPixmap(str(file_path))
+            pixmap = thumbnails.pixmap(file_path, LARGE)
             if not pixmap.isNull():
                 scaled_pixmap = pixmap.scaled(
                     400, 400,
@@ -668,15 +670,15 @@ class DocumentsWidget(QWidget):
                 query = "SELECT file_path FROM documents WHERE id = ?"
                 result = db.fetch_one(query, (doc_id,))
 
-                if result:
-                    file_path = Path(result["file_path"])
-                    if file_path.exists():
-                        file_path.unlink()
-
                 # Smazat z databáze
                 delete_query = "DELETE FROM documents WHERE id = ?"
                 db.execute_query(delete_query, (doc_id,))
 
+                # Soubor smazat, jen pokud na něj neodkazuje jiný záznam
+                if result and result["file_path"]:
+                    if blob_store.release(result["file_path"]):
+                        thumbnails.remove(result["file_path"])
+
                 QMessageBox.information(self, "Úspěch", "Dokument byl smazán.")
                 self.load_documents()
 
@@ -1094,17 +1096,9 @@ class DocumentDialog(QDialog):
                 QMessageBox.warning(self, "Chyba", "Vyberte soubor.")
                 return
 
-            # Zkopírovat soubor do data/documents
+            # Uložit soubor do úložiště (stejný obsah jen jednou)
             if self.file_path and not self.is_edit:
-                documents_dir = Path(config.DATA_DIR) / "documents" / "general"
-                documents_dir.mkdir(parents=True, exist_ok=True)
-
-                source_path = Path(self.file_path)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                dest_filename = f"{timestamp}_{source_path.name}"
-                dest_path = documents_dir / dest_filename
-
-                shutil.copy2(source_path, dest_path)
+                dest_path = blob_store.put(self.file_path)
                 file_path = str(dest_path)
                 file_size = dest_path.stat().st_size
             elif self.is_edit:
@@ -15,9 +15,64 @@ from PyQt6.QtGui import QFont, QColor
 from datetime import datetime, timedelta, date
 from pathlib import Path
 import json
-import csv
 import config
 from database_manager import db
+from utils.utils_export import ExportSheet
+from utils.utils_export_task import run_export
+
+
+INVOICE_EXPORT_HEADERS = [
+    "Číslo faktury", "Typ", "Zákazník", "Datum vystavení",
+    "Datum splatnosti", "Částka bez DPH", "DPH", "Částka s DPH",
+    "Zaplaceno", "Zbývá", "Status"
+]
+
+# Řádek faktury pro proudový export (zákazník přes JOIN, ne dotaz na každou fakturu)
+INVOICE_EXPORT_QUERY = """
+    SELECT i.invoice_number, i.invoice_type,
+           CASE WHEN c.company IS NOT NULL AND c.company != '' THEN c.company
+                WHEN c.id IS NOT NULL THEN c.first_name || ' ' || c.last_name
+                ELSE '' END,
+           i.issue_date, i.due_date,
+           COALESCE(i.total_without_vat, 0), COALESCE(i.total_vat, 0),
+           COALESCE(i.total_with_vat, 0), COALESCE(i.paid_amount, 0), i.status
+    FROM invoices i
+    LEFT JOIN customers c ON c.id = i.customer_id
+"""
+
+INVOICE_STATUS_NAMES = {
+    "paid": "Zaplaceno",
+    "unpaid": "Nezaplaceno",
+    "partial": "Částečně",
+    "overdue": "Po splatnosti"
+}
+
+
+def _cz_date(value) -> str:
+    try:
+        return datetime.fromisoformat(value).strftime("%d.%m.%Y")
+    except (TypeError, ValueError):
+        return value or ""
+
+
+def invoice_export_row_excel(row):
+    """Řádek faktury pro Excel (částky jako čísla, český stav)"""
+    number, invoice_type, customer, issued, due, without_vat, vat, with_vat, paid, status = row
+    return [
+        number, "Vydaná" if invoice_type == "issued" else "Přijatá", customer,
+        _cz_date(issued), _cz_date(due), without_vat, vat, with_vat, paid,
+        with_vat - paid, INVOICE_STATUS_NAMES.get(status, status),
+    ]
+
+
+def invoice_export_row_csv(row):
+    """Řádek faktury pro CSV (částky na 2 desetinná místa)"""
+    number, invoice_type, customer, issued, due, without_vat, vat, with_vat, paid, status = row
+    return [
+        number, "Vydaná" if invoice_type == "issued" else "Přijatá", customer,
+        _cz_date(issued), _cz_date(due), f"{without_vat:.2f}", f"{vat:.2f}",
+        f"{with_vat:.2f}", f"{paid:.2f}", f"{with_vat - paid:.2f}", status,
+    ]
 
 
 class ExportsWidget(QWidget):
@@ -580,28 +635,36 @@ class ExportsWidget(QWidget):
             status = self.invoice_status_filter.currentData()
             format_type = self.invoice_format.checkedId()
 
-            # Načíst faktury
-            query = "SELECT * FROM invoices WHERE 1=1"
+            # Filtr faktur
+            where = " WHERE 1=1"
             params = []
 
             if selection_type == 1:  # Období
-                query += " AND issue_date BETWEEN ? AND ?"
+                where += " AND i.issue_date BETWEEN ? AND ?"
                 params.extend([
                     self.invoice_date_from.date().toString("yyyy-MM-dd"),
                     self.invoice_date_to.date().toString("yyyy-MM-dd")
                 ])
 
             if invoice_type != "all":
-                query += " AND invoice_type = ?"
+                where += " AND i.invoice_type = ?"
                 params.append(invoice_type)
 
             if status != "all":
-                query += " AND status = ?"
+                where += " AND i.status = ?"
                 params.append(status)
 
-            query += " ORDER BY issue_date DESC"
+            where += " ORDER BY i.issue_date DESC"
 
-            invoices = db.fetch_all(query, tuple(params) if params else None)
+            # Excel a CSV jdou proudově z kurzoru na pozadí (faktury se nenačítají do paměti)
+            streamed = format_type in (1, 2)
+            if streamed:
+                convert = invoice_export_row_excel if format_type == 1 else invoice_export_row_csv
+                sheet = ExportSheet("Faktury", INVOICE_EXPORT_QUERY + where, params,
+                                    INVOICE_EXPORT_HEADERS, convert)
+                invoices = sheet.count()
+            else:
+                invoices = db.fetch_all("SELECT i.* FROM invoices i" + where, tuple(params))
 
             if not invoices:
                 QMessageBox.warning(self, "Upozornění", "Nebyly nalezeny žádné faktury odpovídající kritériím.")
@@ -646,13 +709,19 @@ class ExportsWidget(QWidget):
             if not file_path:
                 return
 
+            if streamed:
+                run_export(
+                    self, [sheet], file_path,
+                    lambda path, rows: QMessageBox.information(
+                        self, "Úspěch", f"Export {rows} faktur byl dokončen.\n\nSoubor: {path}"
+                    ),
+                    "Export faktur"
+                )
+                return
+
             # Provést export
             if format_type == 0:  # PDF
                 self.export_invoices_pdf(invoices, file_path)
-            elif format_type == 1:  # Excel
-                self.export_invoices_excel(invoices, file_path)
-            elif format_type == 2:  # CSV
-                self.export_invoices_csv(invoices, file_path)
             else:  # XML
                 self.export_invoices_xml(invoices, file_path)
 
@@ -840,112 +909,6 @@ class ExportsWidget(QWidget):
         # TODO: Implementovat generování PDF faktur
         pass
 
-    def export_invoices_excel(self, invoices, file_path):
-        """Export faktur do Excelu"""
-        try:
-            import openpyxl
-            from openpyxl.styles import Font, Alignment, PatternFill
-
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Faktury"
-
-            # Hlavička
-            headers = [
-                "Číslo faktury", "Typ", "Zákazník", "Datum vystavení",
-                "Datum splatnosti", "Částka bez DPH", "DPH", "Částka s DPH",
-                "Zaplaceno", "Zbývá", "Status"
-            ]
-
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-                cell.alignment = Alignment(horizontal="center")
-
-            # Data
-            for row, invoice in enumerate(invoices, 2):
-                ws.cell(row=row, column=1, value=invoice["invoice_number"])
-                ws.cell(row=row, column=2, value="Vydaná" if invoice["invoice_type"] == "issued" else "Přijatá")
-
-                # Načíst zákazníka
-                customer = db.fetch_one("SELECT first_name, last_name, company FROM customers WHERE id = ?",
-                                       (invoice["customer_id"],))
-                customer_name = customer["company"] if customer and customer["company"] else f"{customer['first_name']} {customer['last_name']}" if customer else ""
-                ws.cell(row=row, column=3, value=customer_name)
-
-                ws.cell(row=row, column=4, value=datetime.fromisoformat(invoice["issue_date"]).strftime("%d.%m.%Y"))
-                ws.cell(row=row, column=5, value=datetime.fromisoformat(invoice["due_date"]).strftime("%d.%m.%Y"))
-                ws.cell(row=row, column=6, value=invoice["total_without_vat"])
-                ws.cell(row=row, column=7, value=invoice["total_vat"])
-                ws.cell(row=row, column=8, value=invoice["total_with_vat"])
-                ws.cell(row=row, column=9, value=invoice["paid_amount"])
-                ws.cell(row=row, column=10, value=invoice["total_with_vat"] - invoice["paid_amount"])
-
-                status_map = {
-                    "paid": "Zaplaceno",
-                    "unpaid": "Nezaplaceno",
-                    "partial": "Částečně",
-                    "overdue": "Po splatnosti"
-                }
-                ws.cell(row=row, column=11, value=status_map.get(invoice["status"], invoice["status"]))
-
-            # Automatická šířka sloupců
-            for col in ws.columns:
-                max_length = 0
-                col_letter = col[0].column_letter
-                for cell in col:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                ws.column_dimensions[col_letter].width = max_length + 2
-
-            wb.save(file_path)
-
-        except ImportError:
-            QMessageBox.critical(
-                self,
-                "Chyba",
-                "Pro export do Excelu je potřeba nainstalovat balíček 'openpyxl'.\n\n"
-                "Instalace: pip install openpyxl"
-            )
-
-    def export_invoices_csv(self, invoices, file_path):
-        """Export faktur do CSV"""
-        try:
-            with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f, delimiter=';')
-
-                # Hlavička
-                writer.writerow([
-                    "Číslo faktury", "Typ", "Zákazník", "Datum vystavení",
-                    "Datum splatnosti", "Částka bez DPH", "DPH", "Částka s DPH",
-                    "Zaplaceno", "Zbývá", "Status"
-                ])
-
-                # Data
-                for invoice in invoices:
-                    # Načíst zákazníka
-                    customer = db.fetch_one("SELECT first_name, last_name, company FROM customers WHERE id = ?",
-                                           (invoice["customer_id"],))
-                    customer_name = customer["company"] if customer and customer["company"] else f"{customer['first_name']} {customer['last_name']}" if customer else ""
-
-                    writer.writerow([
-                        invoice["invoice_number"],
-                        "Vydaná" if invoice["invoice_type"] == "issued" else "Přijatá",
-                        customer_name,
-                        datetime.fromisoformat(invoice["issue_date"]).strftime("%d.%m.%Y"),
-                        datetime.fromisoformat(invoice["due_date"]).strftime("%d.%m.%Y"),
-                        f"{invoice['total_without_vat']:.2f}",
-                        f"{invoice['total_vat']:.2f}",
-                        f"{invoice['total_with_vat']:.2f}",
-                        f"{invoice['paid_amount']:.2f}",
-                        f"{invoice['total_with_vat'] - invoice['paid_amount']:.2f}",
-                        invoice["status"]
-                    ])
-
-        except Exception as e:
-            raise Exception(f"Chyba při exportu CSV: {e}")
-
     def export_invoices_xml(self, invoices, file_path):
         """Export faktur do XML"""
         # TODO: Implementovat XML export
@@ -953,7 +916,7 @@ class ExportsWidget(QWidget):
 
     def export_payments_excel(self, payments, file_path):
         """Export plateb do Excelu"""
-        # TODO: Implementovat podobně jako export_invoices_excel
+        # TODO: Implementovat podobně jako export faktur (ExportSheet + run_export)
         pass
 
     def export_payments_csv(self, payments, file_path):
@@ -17,6 +17,7 @@ from datetime import datetime, timedelta, date
 from pathlib import Path
 import config
 from database_manager import db
+from utils.utils_codebooks import codebooks
 
 
 class InvoiceDetailDialog(QDialog):
@@ -198,7 +199,7 @@ class InvoiceDetailDialog(QDialog):
         payment_layout = QFormLayout(payment_group)
 
         self.payment_method = QComboBox()
-        self.payment_method.addItems([
+        codebooks.fill_combo(self.payment_method, "payment_methods", [
             "Bankovní převod",
             "Hotovost",
             "Karta",
@@ -1289,77 +1290,79 @@ class InvoiceDetailDialog(QDialog):
                 "created_by": 1  # TODO: Skutečné ID přihlášeného uživatele
             }
 
-            if self.is_edit:
-                # Aktualizace
-                paid_amount = self.original_invoice["paid_amount"]
-                status = self.calculate_status(total_with_vat, paid_amount)
+            # Faktura a její položky v jedné transakci
+            with db.transaction():
+                if self.is_edit:
+                    # Aktualizace
+                    paid_amount = self.original_invoice["paid_amount"]
+                    status = self.calculate_status(total_with_vat, paid_amount)
+
+                    query = """
+                        UPDATE invoices SET
+                            invoice_number = ?, invoice_type = ?, customer_id = ?, supplier_name = ?,
+                            issue_date = ?, due_date = ?, tax_date = ?, payment_method = ?,
+                            variable_symbol = ?, constant_symbol = ?, specific_symbol = ?,
+                            note = ?, total_without_vat = ?, total_vat = ?,
+                            total_with_vat = ?, order_id = ?, status = ?, updated_at = CURRENT_TIMESTAMP
+                        WHERE id = ?
+                    """
+                    db.execute_query(query, (
+                        invoice_data["invoice_number"], invoice_data["invoice_type"],
+                        invoice_data["customer_id"], invoice_data["supplier_name"],
+                        invoice_data["issue_date"], invoice_data["due_date"], invoice_data["tax_date"],
+                        invoice_data["payment_method"], invoice_data["variable_symbol"],
+                        invoice_data["constant_symbol"], invoice_data["specific_symbol"],
+                        invoice_data["note"], invoice_data["total_without_vat"],
+                        invoice_data["total_vat"], invoice_data["total_with_vat"],
+                        invoice_data["order_id"], status, self.invoice_id
+                    ))
+
+                    # Smazat staré položky
+                    db.execute_query("DELETE FROM invoice_items WHERE invoice_id = ?", (self.invoice_id,))
+                    invoice_id = self.invoice_id
 
-                query = """
-                    UPDATE invoices SET
-                        invoice_number = ?, invoice_type = ?, customer_id = ?, supplier_name = ?,
-                        issue_date = ?, due_date = ?, tax_date = ?, payment_method = ?,
-                        variable_symbol = ?, constant_symbol = ?, specific_symbol = ?,
-                        note = ?, total_without_vat = ?, total_vat = ?,
-                        total_with_vat = ?, order_id = ?, status = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """
-                db.execute_query(query, (
-                    invoice_data["invoice_number"], invoice_data["invoice_type"],
-                    invoice_data["customer_id"], invoice_data["supplier_name"],
-                    invoice_data["issue_date"], invoice_data["due_date"], invoice_data["tax_date"],
-                    invoice_data["payment_method"], invoice_data["variable_symbol"],
-                    invoice_data["constant_symbol"], invoice_data["specific_symbol"],
-                    invoice_data["note"], invoice_data["total_without_vat"],
-                    invoice_data["total_vat"], invoice_data["total_with_vat"],
-                    invoice_data["order_id"], status, self.invoice_id
-                ))
-
-                # Smazat staré položky
-                db.execute_query("DELETE FROM invoice_items WHERE invoice_id = ?", (self.invoice_id,))
-                invoice_id = self.invoice_id
-
-            else:
-                # Vložení nové faktury
-                query = """
-                    INSERT INTO invoices (
-                        invoice_number, invoice_type, customer_id, supplier_name,
-                        issue_date, due_date, tax_date, payment_method, variable_symbol,
-                        constant_symbol, specific_symbol, note, status, total_without_vat,
-                        total_vat, total_with_vat, paid_amount, order_id, created_by
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                db.execute_query(query, (
-                    invoice_data["invoice_number"], invoice_data["invoice_type"],
-                    invoice_data["customer_id"], invoice_data["supplier_name"],
-                    invoice_data["issue_date"], invoice_data["due_date"], invoice_data["tax_date"],
-                    invoice_data["payment_method"], invoice_data["variable_symbol"],
-                    invoice_data["constant_symbol"], invoice_data["specific_symbol"],
-                    invoice_data["note"], "unpaid",
-                    invoice_data["total_without_vat"], invoice_data["total_vat"],
-                    invoice_data["total_with_vat"], 0,
-                    invoice_data["order_id"], invoice_data["created_by"]
-                ))
-
-                # Získat ID nové faktury
-                invoice_id = db.cursor.lastrowid
-
-            # Vložení položek
-            for item in self.items_data:
-                item_total_without_vat = item["price"] * item["quantity"]
-                item_vat = item_total_without_vat * item["vat_rate"] / 100
-                item_total_with_vat = item_total_without_vat + item_vat
-
-                query = """
-                    INSERT INTO invoice_items (
-                        invoice_id, item_name, quantity, unit, price_per_unit,
-                        vat_rate, total_without_vat, total_vat, total_with_vat, warehouse_item_id
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                db.execute_query(query, (
-                    invoice_id, item["name"], item["quantity"], item["unit"],
-                    item["price"], item["vat_rate"], item_total_without_vat,
-                    item_vat, item_total_with_vat, item.get("warehouse_item_id")
-                ))
+                else:
+                    # Vložení nové faktury
+                    query = """
+                        INSERT INTO invoices (
+                            invoice_number, invoice_type, customer_id, supplier_name,
+                            issue_date, due_date, tax_date, payment_method, variable_symbol,
+                            constant_symbol, specific_symbol, note, status, total_without_vat,
+                            total_vat, total_with_vat, paid_amount, order_id, created_by
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """
+                    db.execute_query(query, (
+                        invoice_data["invoice_number"], invoice_data["invoice_type"],
+                        invoice_data["customer_id"], invoice_data["supplier_name"],
+                        invoice_data["issue_date"], invoice_data["due_date"], invoice_data["tax_date"],
+                        invoice_data["payment_method"], invoice_data["variable_symbol"],
+                        invoice_data["constant_symbol"], invoice_data["specific_symbol"],
+                        invoice_data["note"], "unpaid",
+                        invoice_data["total_without_vat"], invoice_data["total_vat"],
+                        invoice_data["total_with_vat"], 0,
+                        invoice_data["order_id"], invoice_data["created_by"]
+                    ))
+
+                    # Získat ID nové faktury
+                    invoice_id = db.cursor.lastrowid
+
+                # Vložení položek
+                for item in self.items_data:
+                    item_total_without_vat = item["price"] * item["quantity"]
+                    item_vat = item_total_without_vat * item["vat_rate"] / 100
+                    item_total_with_vat = item_total_without_vat + item_vat
+
+                    query = """
+                        INSERT INTO invoice_items (
+                            invoice_id, item_name, quantity, unit, price_per_unit,
+                            vat_rate, total_without_vat, total_vat, total_with_vat, warehouse_item_id
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """
+                    db.execute_query(query, (
+                        invoice_id, item["name"], item["quantity"], item["unit"],
+                        item["price"], item["vat_rate"], item_total_without_vat,
+                        item_vat, item_total_with_vat, item.get("warehouse_item_id")
+                    ))
 
             QMessageBox.information(
                 self,
@@ -1521,7 +1524,7 @@ class InvoiceItemDialog(QDialog):
         # Jednotka
         self.unit_input = QComboBox()
         self.unit_input.setEditable(True)
-        self.unit_input.addItems(["ks", "hod", "m", "m2", "m3", "kg", "l", "bal", "sada"])
+        codebooks.fill_combo(self.unit_input, "units", ["ks", "hod", "m", "m2", "m3", "kg", "l", "bal", "sada"])
         layout.addRow("Jednotka:", self.unit_input)
 
         # Cena bez DPH
@@ -1534,7 +1537,7 @@ class InvoiceItemDialog(QDialog):
 
         # Sazba DPH
         self.vat_input = QComboBox()
-        self.vat_input.addItems(["21", "12", "0"])
+        self.vat_input.addItems([f"{rate:g}" for rate in codebooks.vat_rates()])
         layout.addRow("Sazba DPH (%):", self.vat_input)
 
         # Tlačítka
@@ -1748,7 +1751,7 @@ class PaymentDialog(QDialog):
 
         # Způsob platby
         self.payment_method = QComboBox()
-        self.payment_method.addItems([
+        codebooks.fill_combo(self.payment_method, "payment_methods", [
             "Bankovní převod",
             "Hotovost",
             "Karta",
@@ -1795,34 +1798,36 @@ class PaymentDialog(QDialog):
                 QMessageBox.warning(self, "Chyba", "Částka platby překračuje zbývající dluh.")
                 return
 
-            # Vložení platby
-            query = """
-                INSERT INTO payments (
-                    invoice_id, payment_date, amount, payment_method, note, created_by
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """
-            db.execute_query(query, (
-                self.invoice_id,
-                self.payment_date.date().toString("yyyy-MM-dd"),
-                amount,
-                self.payment_method.currentText(),
-                self.note_input.toPlainText().strip() or None,
-                1  # TODO: Skutečné ID uživatele
-            ))
+            # Platba a stav faktury v jedné transakci
+            with db.transaction():
+                # Vložení platby
+                query = """
+                    INSERT INTO payments (
+                        invoice_id, payment_date, amount, payment_method, note, created_by
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """
+                db.execute_query(query, (
+                    self.invoice_id,
+                    self.payment_date.date().toString("yyyy-MM-dd"),
+                    amount,
+                    self.payment_method.currentText(),
+                    self.note_input.toPlainText().strip() or None,
+                    1  # TODO: Skutečné ID uživatele
+                ))
 
-            # Aktualizace zaplacené částky na faktuře
-            update_query = """
-                UPDATE invoices
-                SET paid_amount = paid_amount + ?,
-                    status = CASE
-                        WHEN (paid_amount + ?) >= total_with_vat THEN 'paid'
-                        WHEN (paid_amount + ?) > 0 THEN 'partial'
-                        ELSE status
-                    END,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """
-            db.execute_query(update_query, (amount, amount, amount, self.invoice_id))
+                # Aktualizace zaplacené částky na faktuře
+                update_query = """
+                    UPDATE invoices
+                    SET paid_amount = paid_amount + ?,
+                        status = CASE
+                            WHEN (paid_amount + ?) >= total_with_vat THEN 'paid'
+                            WHEN (paid_amount + ?) > 0 THEN 'partial'
+                            ELSE status
+                        END,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """
+                db.execute_query(update_query, (amount, amount, amount, self.invoice_id))
 
             QMessageBox.information(
                 self,
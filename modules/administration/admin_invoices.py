@@ -10,10 +10,13 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QSpinBox, QDoubleSpinBox, QFileDialog, QCheckBox,
                              QGroupBox, QTabWidget, QScrollArea)
 from PyQt6.QtCore import Qt, QDate, pyqtSignal
-from PyQt6.QtGui import QFont, QColor
+from PyQt6.QtGui import QFont
 from datetime import datetime, timedelta, date
 import config
 from database_manager import db
+from utils.utils_scheduler import reminder_scheduler
+from utils.utils_codebooks import codebooks
+from utils.utils_table_model import LazyTableView, TableColumn, ALIGN_CENTER, ALIGN_RIGHT
 
 
 class InvoicesWidget(QWidget):
@@ -215,36 +218,47 @@ class InvoicesWidget(QWidget):
         buttons_layout.addStretch()
         parent_layout.addLayout(buttons_layout)
 
+    # Barvy stavů faktur (pozadí buňky Stav)
+    STATUS_COLORS = {
+        "paid": config.COLOR_SUCCESS,
+        "overdue": config.COLOR_DANGER,
+        "unpaid": config.COLOR_WARNING,
+        "partial": "#3498db",
+        "cancelled": "#95a5a6",
+    }
+
     def create_invoices_table(self, parent_layout):
         """Tabulka s fakturami"""
-        self.table = QTableWidget()
-        self.table.setColumnCount(10)
-        self.table.setHorizontalHeaderLabels([
-            "ID",
-            "Číslo faktury",
-            "Zákazník/Dodavatel",
-            "Datum vystavení",
-            "Datum splatnosti",
-            "Částka celkem",
-            "Zaplaceno",
-            "Zbývá",
-            "Stav",
-            "Zakázka"
-        ])
-
-        # Skrýt ID sloupec
-        self.table.setColumnHidden(0, True)
-
-        # Nastavení tabulky
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.table.setAlternatingRowColors(True)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        # Řádek = tuple z load_invoices + vypočtený stav na indexu 10
+        money = lambda v: f"{v or 0:,.2f} Kč".replace(",", " ")
+        columns = [
+            TableColumn("ID", 0, hidden=True),
+            TableColumn("Číslo faktury", 1, stretch=True),
+            TableColumn("Zákazník/Dodavatel", 2, stretch=True),
+            TableColumn("Datum vystavení", 3, formatter=self.format_date, stretch=True),
+            TableColumn("Datum splatnosti", 4, formatter=self.format_date, stretch=True),
+            TableColumn("Částka celkem", 5, formatter=money, align=ALIGN_RIGHT, stretch=True),
+            TableColumn("Zaplaceno", 6, formatter=money, align=ALIGN_RIGHT, stretch=True),
+            TableColumn("Zbývá", 7, formatter=money, align=ALIGN_RIGHT, stretch=True),
+            TableColumn("Stav", 10, formatter=self.get_status_label, align=ALIGN_CENTER,
+                        background=lambda inv: self.STATUS_COLORS.get(inv[10]),
+                        foreground=lambda inv: "white" if inv[10] in self.STATUS_COLORS else None,
+                        stretch=True),
+            TableColumn("Zakázka", 9, formatter=lambda v: v if v else "-", stretch=True),
+        ]
+        self.table = LazyTableView(columns)
         self.table.doubleClicked.connect(self.open_invoice_detail)
 
         parent_layout.addWidget(self.table)
 
+    @staticmethod
+    def format_date(value):
+        """ISO datum -> dd.mm.rrrr"""
+        try:
+            return datetime.fromisoformat(value).strftime("%d.%m.%Y")
+        except (TypeError, ValueError):
+            return str(value or "")
+
     def on_period_changed(self, period_text):
         """Změna předvoleného období"""
         today = QDate.currentDate()
@@ -293,68 +307,11 @@ class InvoicesWidget(QWidget):
 
             invoices = db.fetch_all(query, (self.invoice_type,))
 
-            self.table.setRowCount(len(invoices))
-
-            for row, invoice in enumerate(invoices):
-                # ID (skrytý)
-                self.table.setItem(row, 0, QTableWidgetItem(str(invoice["id"])))
-
-                # Číslo faktury
-                self.table.setItem(row, 1, QTableWidgetItem(invoice["invoice_number"]))
-
-                # Zákazník/Dodavatel
-                self.table.setItem(row, 2, QTableWidgetItem(invoice["partner_name"]))
-
-                # Datum vystavení
-                issue_date = datetime.fromisoformat(invoice["issue_date"]).strftime("%d.%m.%Y")
-                self.table.setItem(row, 3, QTableWidgetItem(issue_date))
-
-                # Datum splatnosti
-                due_date = datetime.fromisoformat(invoice["due_date"]).strftime("%d.%m.%Y")
-                self.table.setItem(row, 4, QTableWidgetItem(due_date))
-
-                # Částka celkem
-                total_item = QTableWidgetItem(f"{invoice['total_with_vat']:,.2f} Kč".replace(",", " "))
-                total_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(row, 5, total_item)
-
-                # Zaplaceno
-                paid_item = QTableWidgetItem(f"{invoice['paid_amount']:,.2f} Kč".replace(",", " "))
-                paid_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(row, 6, paid_item)
-
-                # Zbývá
-                remaining_item = QTableWidgetItem(f"{invoice['remaining']:,.2f} Kč".replace(",", " "))
-                remaining_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(row, 7, remaining_item)
-
-                # Stav - přepočítat podle skutečnosti
-                actual_status = self.calculate_invoice_status(invoice)
-                status_item = QTableWidgetItem(self.get_status_label(actual_status))
-                status_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-                # Barevné rozlišení
-                if actual_status == "paid":
-                    status_item.setBackground(QColor(config.COLOR_SUCCESS))
-                    status_item.setForeground(QColor("white"))
-                elif actual_status == "overdue":
-                    status_item.setBackground(QColor(config.COLOR_DANGER))
-                    status_item.setForeground(QColor("white"))
-                elif actual_status == "unpaid":
-                    status_item.setBackground(QColor(config.COLOR_WARNING))
-                    status_item.setForeground(QColor("white"))
-                elif actual_status == "partial":
-                    status_item.setBackground(QColor("#3498db"))
-                    status_item.setForeground(QColor("white"))
-                elif actual_status == "cancelled":
-                    status_item.setBackground(QColor("#95a5a6"))
-                    status_item.setForeground(QColor("white"))
-
-                self.table.setItem(row, 8, status_item)
-
-                # Zakázka
-                order_text = invoice["order_number"] if invoice["order_number"] else "-"
-                self.table.setItem(row, 9, QTableWidgetItem(order_text))
+            # Stav přepočítaný podle skutečnosti se přidá na konec tuple
+            self.table.set_rows(
+                (tuple(invoice) + (self.calculate_invoice_status(invoice),) for invoice in invoices),
+                autosize=False
+            )
 
             # Aktualizace statistik
             self.update_statistics()
@@ -445,35 +402,28 @@ class InvoicesWidget(QWidget):
         """Aplikace filtrů"""
         search_text = self.search_input.text().lower()
         status_filter = self.status_combo.currentText()
-        date_from = self.date_from.date().toPyDate()
-        date_to = self.date_to.date().toPyDate()
-
-        for row in range(self.table.rowCount()):
-            show_row = True
+        date_from = self.date_from.date().toPyDate().isoformat()
+        date_to = self.date_to.date().toPyDate().isoformat()
 
+        def matches(invoice):
             # Filtr vyhledávání
             if search_text:
-                invoice_number = self.table.item(row, 1).text().lower()
-                customer = self.table.item(row, 2).text().lower()
+                invoice_number = (invoice[1] or "").lower()
+                customer = (invoice[2] or "").lower()
                 if search_text not in invoice_number and search_text not in customer:
-                    show_row = False
+                    return False
 
             # Filtr stavu
-            if status_filter != "Všechny":
-                row_status = self.table.item(row, 8).text()
-                if status_filter != row_status:
-                    show_row = False
+            if status_filter != "Všechny" and status_filter != self.get_status_label(invoice[10]):
+                return False
 
-            # Filtr data
-            issue_date_text = self.table.item(row, 3).text()
-            try:
-                issue_date = datetime.strptime(issue_date_text, "%d.%m.%Y").date()
-                if issue_date < date_from or issue_date > date_to:
-                    show_row = False
-            except:
-                pass
+            # Filtr data (ISO řetězce lze porovnávat přímo)
+            issue_date = (invoice[3] or "")[:10]
+            if issue_date and (issue_date < date_from or issue_date > date_to):
+                return False
+            return True
 
-            self.table.setRowHidden(row, not show_row)
+        self.table.set_filter(matches)
 
     def new_invoice(self):
         """Vytvoření nové faktury"""
@@ -484,12 +434,13 @@ class InvoicesWidget(QWidget):
 
     def send_email(self):
         """Odeslání faktury emailem"""
-        if not self.table.selectedItems():
+        if self.table.current_record() is None:
             QMessageBox.warning(self, "Upozornění", "Vyberte fakturu k odeslání.")
             return
 
-        invoice_id = int(self.table.item(self.table.currentRow(), 0).text())
-        invoice_number = self.table.item(self.table.currentRow(), 1).text()
+        invoice = self.table.current_record()
+        invoice_id = int(invoice[0])
+        invoice_number = invoice[1]
 
         # TODO: Implementovat skutečné odesílání emailu
         QMessageBox.information(
@@ -504,12 +455,13 @@ class InvoicesWidget(QWidget):
 
     def print_invoice(self):
         """Tisk faktury"""
-        if not self.table.selectedItems():
+        if self.table.current_record() is None:
             QMessageBox.warning(self, "Upozornění", "Vyberte fakturu k tisku.")
             return
 
-        invoice_id = int(self.table.item(self.table.currentRow(), 0).text())
-        invoice_number = self.table.item(self.table.currentRow(), 1).text()
+        invoice = self.table.current_record()
+        invoice_id = int(invoice[0])
+        invoice_number = invoice[1]
 
         # TODO: Implementovat generování PDF a tisk
         QMessageBox.information(
@@ -548,6 +500,9 @@ class InvoicesWidget(QWidget):
 
         if dialog.exec() == QDialog.DialogCode.Accepted:
             format_text = format_combo.currentText()
+            if format_text == "PDF":
+                self.export_invoices_pdf()
+                return
             # TODO: Implementovat skutečný export
             QMessageBox.information(
                 self,
@@ -555,15 +510,33 @@ class InvoicesWidget(QWidget):
                 f"Export do formátu {format_text} bude implementován."
             )
 
+    def export_invoices_pdf(self):
+        """PDF vyfiltrovaných faktur (dávka do ZIP nebo jednoho PDF)"""
+        from modules.orders.order_batch_export import invoice_jobs, save_batch_pdf
+
+        invoice_ids = [int(invoice[0]) for invoice in self.table.table_model.rows()]
+        jobs = invoice_jobs(invoice_ids)
+        if len(jobs) < len(invoice_ids):
+            QMessageBox.information(
+                self, "Export PDF",
+                f"Faktury bez zakázky ({len(invoice_ids) - len(jobs)}) nelze vygenerovat do PDF "
+                "a budou přeskočeny."
+            )
+
+        date_from = self.date_from.date().toPyDate().isoformat()
+        date_to = self.date_to.date().toPyDate().isoformat()
+        save_batch_pdf(self, jobs, f"faktury_{date_from}_{date_to}", "Faktury")
+
     def record_payment(self):
         """Zaznamenání platby"""
-        if not self.table.selectedItems():
+        if self.table.current_record() is None:
             QMessageBox.warning(self, "Upozornění", "Vyberte fakturu pro zaznamenání platby.")
             return
 
-        invoice_id = int(self.table.item(self.table.currentRow(), 0).text())
-        invoice_number = self.table.item(self.table.currentRow(), 1).text()
-        remaining = float(self.table.item(self.table.currentRow(), 7).text().replace(" Kč", "").replace(" ", ""))
+        invoice = self.table.current_record()
+        invoice_id = int(invoice[0])
+        invoice_number = invoice[1]
+        remaining = float(invoice[7] or 0)
 
         dialog = PaymentDialog(self, invoice_id, invoice_number, remaining)
         if dialog.exec() == QDialog.DialogCode.Accepted:
@@ -572,12 +545,13 @@ class InvoicesWidget(QWidget):
 
     def cancel_invoice(self):
         """Storno faktury"""
-        if not self.table.selectedItems():
+        if self.table.current_record() is None:
             QMessageBox.warning(self, "Upozornění", "Vyberte fakturu ke stornování.")
             return
 
-        invoice_id = int(self.table.item(self.table.currentRow(), 0).text())
-        invoice_number = self.table.item(self.table.currentRow(), 1).text()
+        invoice = self.table.current_record()
+        invoice_id = int(invoice[0])
+        invoice_number = invoice[1]
 
         reply = QMessageBox.question(
             self,
@@ -591,6 +565,7 @@ class InvoicesWidget(QWidget):
             try:
                 query = "UPDATE invoices SET status = 'cancelled' WHERE id = ?"
                 db.execute_query(query, (invoice_id,))
+                reminder_scheduler.refresh("invoices", invoice_id)
                 QMessageBox.information(self, "Úspěch", f"Faktura {invoice_number} byla stornována.")
                 self.load_invoices()
                 self.invoice_changed.emit()
@@ -599,11 +574,12 @@ class InvoicesWidget(QWidget):
 
     def create_credit_note(self):
         """Vytvoření dobropisu"""
-        if not self.table.selectedItems():
+        if self.table.current_record() is None:
             QMessageBox.warning(self, "Upozornění", "Vyberte fakturu pro vytvoření dobropisu.")
             return
 
-        invoice_id = int(self.table.item(self.table.currentRow(), 0).text())
+        invoice = self.table.current_record()
+        invoice_id = int(invoice[0])
 
         # TODO: Implementovat dialog pro dobropis
         QMessageBox.information(
@@ -618,10 +594,11 @@ class InvoicesWidget(QWidget):
 
     def open_invoice_detail(self):
         """Otevření detailu faktury"""
-        if not self.table.selectedItems():
+        if self.table.current_record() is None:
             return
 
-        invoice_id = int(self.table.item(self.table.currentRow(), 0).text())
+        invoice = self.table.current_record()
+        invoice_id = int(invoice[0])
 
         dialog = InvoiceDialog(self, invoice_type=self.invoice_type, invoice_id=invoice_id)
         if dialog.exec() == QDialog.DialogCode.Accepted:
@@ -748,7 +725,7 @@ class InvoiceDialog(QDialog):
 
         # Forma úhrady
         self.payment_method = QComboBox()
-        self.payment_method.addItems([
+        codebooks.fill_combo(self.payment_method, "payment_methods", [
             "Bankovní převod",
             "Hotovost",
             "Karta",
@@ -1030,72 +1007,76 @@ class InvoiceDialog(QDialog):
                 "created_by": 1  # TODO: Skutečné ID přihlášeného uživatele
             }
 
-            if self.is_edit:
-                # Aktualizace
-                query = """
-                    UPDATE invoices SET
-                        invoice_number = ?, invoice_type = ?, customer_id = ?, supplier_name = ?,
-                        issue_date = ?, due_date = ?, tax_date = ?, payment_method = ?,
-                        variable_symbol = ?, note = ?, total_without_vat = ?, total_vat = ?,
-                        total_with_vat = ?, order_id = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """
-                db.execute_query(query, (
-                    invoice_data["invoice_number"], invoice_data["invoice_type"],
-                    invoice_data["customer_id"], invoice_data["supplier_name"],
-                    invoice_data["issue_date"], invoice_data["due_date"], invoice_data["tax_date"],
-                    invoice_data["payment_method"], invoice_data["variable_symbol"],
-                    invoice_data["note"], invoice_data["total_without_vat"],
-                    invoice_data["total_vat"], invoice_data["total_with_vat"],
-                    invoice_data["order_id"], self.invoice_id
-                ))
-
-                # Smazat staré položky
-                db.execute_query("DELETE FROM invoice_items WHERE invoice_id = ?", (self.invoice_id,))
-                invoice_id = self.invoice_id
-
-            else:
-                # Vložení nové faktury
-                query = """
-                    INSERT INTO invoices (
-                        invoice_number, invoice_type, customer_id, supplier_name,
-                        issue_date, due_date, tax_date, payment_method, variable_symbol,
-                        note, status, total_without_vat, total_vat, total_with_vat,
-                        paid_amount, order_id, created_by
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                db.execute_query(query, (
-                    invoice_data["invoice_number"], invoice_data["invoice_type"],
-                    invoice_data["customer_id"], invoice_data["supplier_name"],
-                    invoice_data["issue_date"], invoice_data["due_date"], invoice_data["tax_date"],
-                    invoice_data["payment_method"], invoice_data["variable_symbol"],
-                    invoice_data["note"], invoice_data["status"],
-                    invoice_data["total_without_vat"], invoice_data["total_vat"],
-                    invoice_data["total_with_vat"], invoice_data["paid_amount"],
-                    invoice_data["order_id"], invoice_data["created_by"]
-                ))
-
-                # Získat ID nové faktury
-                invoice_id = db.cursor.lastrowid
-
-            # Vložení položek
-            for item in self.items_data:
-                item_total_without_vat = item["price"] * item["quantity"]
-                item_vat = item_total_without_vat * item["vat_rate"] / 100
-                item_total_with_vat = item_total_without_vat + item_vat
-
-                query = """
-                    INSERT INTO invoice_items (
-                        invoice_id, item_name, quantity, unit, price_per_unit,
-                        vat_rate, total_without_vat, total_vat, total_with_vat
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                db.execute_query(query, (
-                    invoice_id, item["name"], item["quantity"], item["unit"],
-                    item["price"], item["vat_rate"], item_total_without_vat,
-                    item_vat, item_total_with_vat
-                ))
+            # Faktura a její položky v jedné transakci
+            with db.transaction():
+                if self.is_edit:
+                    # Aktualizace
+                    query = """
+                        UPDATE invoices SET
+                            invoice_number = ?, invoice_type = ?, customer_id = ?, supplier_name = ?,
+                            issue_date = ?, due_date = ?, tax_date = ?, payment_method = ?,
+                            variable_symbol = ?, note = ?, total_without_vat = ?, total_vat = ?,
+                            total_with_vat = ?, order_id = ?, updated_at = CURRENT_TIMESTAMP
+                        WHERE id = ?
+                    """
+                    db.execute_query(query, (
+                        invoice_data["invoice_number"], invoice_data["invoice_type"],
+                        invoice_data["customer_id"], invoice_data["supplier_name"],
+                        invoice_data["issue_date"], invoice_data["due_date"], invoice_data["tax_date"],
+                        invoice_data["payment_method"], invoice_data["variable_symbol"],
+                        invoice_data["note"], invoice_data["total_without_vat"],
+                        invoice_data["total_vat"], invoice_data["total_with_vat"],
+                        invoice_data["order_id"], self.invoice_id
+                    ))
+
+                    # Smazat staré položky
+                    db.execute_query("DELETE FROM invoice_items WHERE invoice_id = ?", (self.invoice_id,))
+                    invoice_id = self.invoice_id
 
+                else:
+                    # Vložení nové faktury
+                    query = """
+                        INSERT INTO invoices (
+                            invoice_number, invoice_type, customer_id, supplier_name,
+                            issue_date, due_date, tax_date, payment_method, variable_symbol,
+                            note, status, total_without_vat, total_vat, total_with_vat,
+                            paid_amount, order_id, created_by
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """
+                    db.execute_query(query, (
+                        invoice_data["invoice_number"], invoice_data["invoice_type"],
+                        invoice_data["customer_id"], invoice_data["supplier_name"],
+                        invoice_data["issue_date"], invoice_data["due_date"], invoice_data["tax_date"],
+                        invoice_data["payment_method"], invoice_data["variable_symbol"],
+                        invoice_data["note"], invoice_data["status"],
+                        invoice_data["total_without_vat"], invoice_data["total_vat"],
+                        invoice_data["total_with_vat"], invoice_data["paid_amount"],
+                        invoice_data["order_id"], invoice_data["created_by"]
+                    ))
+
+                    # Získat ID nové faktury
+                    invoice_id = db.cursor.lastrowid
+
+                # Vložení položek
+                for item in self.items_data:
+                    item_total_without_vat = item["price"] * item["quantity"]
+                    item_vat = item_total_without_vat * item["vat_rate"] / 100
+                    item_total_with_vat = item_total_without_vat + item_vat
+
+                    query = """
+                        INSERT INTO invoice_items (
+                            invoice_id, item_name, quantity, unit, price_per_unit,
+                            vat_rate, total_without_vat, total_vat, total_with_vat
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """
+                    db.execute_query(query, (
+                        invoice_id, item["name"], item["quantity"], item["unit"],
+                        item["price"], item["vat_rate"], item_total_without_vat,
+                        item_vat, item_total_with_vat
+                    ))
+
+            # Splatnost faktury hlídá plánovač připomínek
+            reminder_scheduler.refresh("invoices", invoice_id)
             QMessageBox.information(
                 self,
                 "Úspěch",
@@ -1136,7 +1117,7 @@ class InvoiceItemDialog(QDialog):
         # Jednotka
         self.unit_input = QComboBox()
         self.unit_input.setEditable(True)
-        self.unit_input.addItems(["ks", "hod", "m", "m2", "m3", "kg", "l", "bal"])
+        codebooks.fill_combo(self.unit_input, "units", ["ks", "hod", "m", "m2", "m3", "kg", "l", "bal"])
         layout.addRow("Jednotka:", self.unit_input)
 
         # Cena bez DPH
@@ -1149,7 +1130,7 @@ class InvoiceItemDialog(QDialog):
 
         # Sazba DPH
         self.vat_input = QComboBox()
-        self.vat_input.addItems(["21", "12", "0"])
+        self.vat_input.addItems([f"{rate:g}" for rate in codebooks.vat_rates()])
         layout.addRow("Sazba DPH (%):", self.vat_input)
 
         # Tlačítka
@@ -1224,7 +1205,7 @@ class PaymentDialog(QDialog):
 
         # Způsob platby
         self.payment_method = QComboBox()
-        self.payment_method.addItems([
+        codebooks.fill_combo(self.payment_method, "payment_methods", [
             "Bankovní převod",
             "Hotovost",
             "Karta",
@@ -1271,34 +1252,37 @@ class PaymentDialog(QDialog):
                 QMessageBox.warning(self, "Chyba", "Částka platby překračuje zbývající dluh.")
                 return
 
-            # Vložení platby
-            query = """
-                INSERT INTO payments (
-                    invoice_id, payment_date, amount, payment_method, note, created_by
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """
-            db.execute_query(query, (
-                self.invoice_id,
-                self.payment_date.date().toString("yyyy-MM-dd"),
-                amount,
-                self.payment_method.currentText(),
-                self.note_input.toPlainText().strip() or None,
-                1  # TODO: Skutečné ID uživatele
-            ))
-
-            # Aktualizace zaplacené částky na faktuře
-            update_query = """
-                UPDATE invoices
-                SET paid_amount = paid_amount + ?,
-                    status = CASE
-                        WHEN (paid_amount + ?) >= total_with_vat THEN 'paid'
-                        WHEN (paid_amount + ?) > 0 THEN 'partial'
-                        ELSE status
-                    END,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """
-            db.execute_query(update_query, (amount, amount, amount, self.invoice_id))
+            # Platba a stav faktury v jedné transakci
+            with db.transaction():
+                # Vložení platby
+                query = """
+                    INSERT INTO payments (
+                        invoice_id, payment_date, amount, payment_method, note, created_by
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """
+                db.execute_query(query, (
+                    self.invoice_id,
+                    self.payment_date.date().toString("yyyy-MM-dd"),
+                    amount,
+                    self.payment_method.currentText(),
+                    self.note_input.toPlainText().strip() or None,
+                    1  # TODO: Skutečné ID uživatele
+                ))
+
+                # Aktualizace zaplacené částky na faktuře
+                update_query = """
+                    UPDATE invoices
+                    SET paid_amount = paid_amount + ?,
+                        status = CASE
+                            WHEN (paid_amount + ?) >= total_with_vat THEN 'paid'
+                            WHEN (paid_amount + ?) > 0 THEN 'partial'
+                            ELSE status
+                        END,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """
+                db.execute_query(update_query, (amount, amount, amount, self.invoice_id))
+            reminder_scheduler.refresh("invoices", self.invoice_id)
 
             QMessageBox.information(
                 self,
@@ -14,10 +14,11 @@ from PyQt6.QtCore import Qt, QDate, pyqtSignal, QThread
 from PyQt6.QtGui import QFont, QColor, QTextDocument, QTextCursor
 from PyQt6.QtCharts import QChart, QChartView, QPieSeries, QLineSeries, QBarSeries, QBarSet, QValueAxis, QBarCategoryAxis
 from PyQt6.QtPrintSupport import QPrinter
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 from pathlib import Path
 import config
 from database_manager import db
+from utils.utils_metrics import metrics
 
 
 class ReportsWidget(QWidget):
@@ -346,22 +347,17 @@ class ReportsWidget(QWidget):
                 "previous": {}
             }
 
+            # Souhrnné metriky obou období jedním dotazem
+            summary = metrics.invoice_metrics(date_from, date_to)
+
             # Aktuální období
-            data["current"] = self.load_period_data(date_from, date_to)
+            data["current"] = self.load_period_data(date_from, date_to, summary.as_dict())
 
-            # Předchozí období (pokud porovnáváme)
+            # Předchozí období stejné délky (pokud porovnáváme)
             if compare:
-                # Vypočítat předchozí období stejné délky
-                from_date = datetime.fromisoformat(date_from)
-                to_date = datetime.fromisoformat(date_to)
-                period_length = (to_date - from_date).days
-
-                prev_to = from_date - timedelta(days=1)
-                prev_from = prev_to - timedelta(days=period_length)
-
+                prev_from, prev_to = summary.previous_period
                 data["previous"] = self.load_period_data(
-                    prev_from.strftime("%Y-%m-%d"),
-                    prev_to.strftime("%Y-%m-%d")
+                    prev_from, prev_to, summary.as_dict(previous=True)
                 )
 
             return data
@@ -370,61 +366,12 @@ class ReportsWidget(QWidget):
             print(f"Chyba při načítání dat reportu: {e}")
             return {}
 
-    def load_period_data(self, date_from, date_to):
-        """Načtení dat pro období"""
+    def load_period_data(self, date_from, date_to, summary=None):
+        """Načtení dat pro období (souhrn z MetricsEngine + žebříčky)"""
         try:
-            data = {}
-
-            # Obrat (z vydaných faktur)
-            query_revenue = """
-                SELECT COALESCE(SUM(total_with_vat), 0) as revenue
-                FROM invoices
-                WHERE invoice_type = 'issued'
-                  AND status IN ('paid', 'partial')
-                  AND issue_date BETWEEN ? AND ?
-            """
-            result = db.fetch_one(query_revenue, (date_from, date_to))
-            data["revenue"] = result["revenue"] if result else 0
-
-            # Náklady (z přijatých faktur)
-            query_costs = """
-                SELECT COALESCE(SUM(total_with_vat), 0) as costs
-                FROM invoices
-                WHERE invoice_type = 'received'
-                  AND status IN ('paid', 'partial')
-                  AND issue_date BETWEEN ? AND ?
-            """
-            result = db.fetch_one(query_costs, (date_from, date_to))
-            data["costs"] = result["costs"] if result else 0
-
-            # Zisk
-            data["profit"] = data["revenue"] - data["costs"]
-
-            # Marže
-            data["margin"] = (data["profit"] / data["revenue"] * 100) if data["revenue"] > 0 else 0
-
-            # Počet faktur
-            query_invoices_count = """
-                SELECT COUNT(*) as count
-                FROM invoices
-                WHERE invoice_type = 'issued'
-                  AND issue_date BETWEEN ? AND ?
-            """
-            result = db.fetch_one(query_invoices_count, (date_from, date_to))
-            data["invoices_count"] = result["count"] if result else 0
-
-            # Počet zákazníků
-            query_customers = """
-                SELECT COUNT(DISTINCT customer_id) as count
-                FROM invoices
-                WHERE invoice_type = 'issued'
-                  AND issue_date BETWEEN ? AND ?
-            """
-            result = db.fetch_one(query_customers, (date_from, date_to))
-            data["customers_count"] = result["count"] if result else 0
-
-            # Průměrná hodnota faktury
-            data["avg_invoice_value"] = (data["revenue"] / data["invoices_count"]) if data["invoices_count"] > 0 else 0
+            if summary is None:
+                summary = metrics.invoice_metrics(date_from, date_to).as_dict()
+            data = dict(summary)
 
             # Top zákazníci
             query_top_customers = """
@@ -18,6 +18,7 @@ from pathlib import Path
 import json
 import config
 from database_manager import db
+from utils.utils_documents import document_resources
 
 
 class TemplatesWidget(QWidget):
@@ -819,6 +820,7 @@ class TemplatesWidget(QWidget):
                     1 if self.active_checkbox.isChecked() else 0
                 ))
 
+            document_resources.invalidate()
             QMessageBox.information(self, "Úspěch", "Šablona byla uložena.")
             self.load_templates()
 
@@ -927,6 +929,7 @@ class TemplatesWidget(QWidget):
                 content_json
             ))
 
+            document_resources.invalidate()
             QMessageBox.information(self, "Úspěch", "Šablona byla importována.")
             self.load_templates()
 
@@ -980,6 +983,7 @@ class TemplatesWidget(QWidget):
             try:
                 query = "DELETE FROM document_templates WHERE id = ?"
                 db.execute_query(query, (self.current_template["id"],))
+                document_resources.invalidate()
 
                 QMessageBox.information(self, "Úspěch", "Šablona byla smazána.")
                 self.current_template = None
@@ -1017,6 +1021,7 @@ class TemplatesWidget(QWidget):
                 query = "UPDATE document_templates SET logo_path = ? WHERE id = ?"
                 db.execute_query(query, (str(dest_path), self.current_template["id"]))
                 self.current_template["logo_path"] = str(dest_path)
+                document_resources.invalidate()
 
             # Zobrazit náhled
             pixmap = QPixmap(str(dest_path))
@@ -1039,6 +1044,7 @@ class TemplatesWidget(QWidget):
                 query = "UPDATE document_templates SET logo_path = NULL WHERE id = ?"
                 db.execute_query(query, (self.current_template["id"],))
                 self.current_template["logo_path"] = None
+                document_resources.invalidate()
 
                 self.logo_preview.clear()
                 self.logo_preview.setText("Žádné logo")
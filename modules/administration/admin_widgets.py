@@ -220,63 +220,65 @@ class QuickInvoiceDialog(QDialog):
 
             total_with_vat = total_without_vat + total_vat
 
-            # Vytvořit fakturu
-            invoice_query = """
-                INSERT INTO invoices (
-                    invoice_number, invoice_type, customer_id, order_id,
-                    issue_date, due_date, tax_date, payment_method,
-                    note, status, total_without_vat, total_vat, total_with_vat,
-                    paid_amount, created_by
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            db.execute_query(invoice_query, (
-                self.invoice_number.text().strip(),
-                "issued",
-                self.order_data["customer_id"],
-                self.order_id,
-                self.issue_date.date().toString("yyyy-MM-dd"),
-                self.due_date.date().toString("yyyy-MM-dd"),
-                self.issue_date.date().toString("yyyy-MM-dd"),
-                self.payment_method.currentText(),
-                self.note.toPlainText().strip() or None,
-                "unpaid",
-                total_without_vat,
-                total_vat,
-                total_with_vat,
-                0,
-                1  # TODO: ID přihlášeného uživatele
-            ))
-
-            invoice_id = db.cursor.lastrowid
-
-            # Vytvořit položky faktury
-            for item in order_items:
-                item_total_without_vat = item["quantity"] * item["unit_price"]
-                item_vat = item_total_without_vat * 0.21
-                item_total_with_vat = item_total_without_vat + item_vat
-
-                items_query = """
-                    INSERT INTO invoice_items (
-                        invoice_id, item_name, quantity, unit,
-                        price_per_unit, vat_rate, total_without_vat,
-                        total_vat, total_with_vat
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            # Faktura, položky a označení zakázky v jedné transakci
+            with db.transaction():
+                # Vytvořit fakturu
+                invoice_query = """
+                    INSERT INTO invoices (
+                        invoice_number, invoice_type, customer_id, order_id,
+                        issue_date, due_date, tax_date, payment_method,
+                        note, status, total_without_vat, total_vat, total_with_vat,
+                        paid_amount, created_by
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """
-                db.execute_query(items_query, (
-                    invoice_id,
-                    item["item_name"],
-                    item["quantity"],
-                    item["unit"],
-                    item["unit_price"],
-                    21,
-                    item_total_without_vat,
-                    item_vat,
-                    item_total_with_vat
+                db.execute_query(invoice_query, (
+                    self.invoice_number.text().strip(),
+                    "issued",
+                    self.order_data["customer_id"],
+                    self.order_id,
+                    self.issue_date.date().toString("yyyy-MM-dd"),
+                    self.due_date.date().toString("yyyy-MM-dd"),
+                    self.issue_date.date().toString("yyyy-MM-dd"),
+                    self.payment_method.currentText(),
+                    self.note.toPlainText().strip() or None,
+                    "unpaid",
+                    total_without_vat,
+                    total_vat,
+                    total_with_vat,
+                    0,
+                    1  # TODO: ID přihlášeného uživatele
                 ))
 
-            # Aktualizovat zakázku
-            update_order = "UPDATE orders SET invoiced = 1 WHERE id = ?"
-            db.execute_query(update_order, (self.order_id,))
+                invoice_id = db.cursor.lastrowid
+
+                # Vytvořit položky faktury
+                for item in order_items:
+                    item_total_without_vat = item["quantity"] * item["unit_price"]
+                    item_vat = item_total_without_vat * 0.21
+                    item_total_with_vat = item_total_without_vat + item_vat
+
+                    items_query = """
+                        INSERT INTO invoice_items (
+                            invoice_id, item_name, quantity, unit,
+                            price_per_unit, vat_rate, total_without_vat,
+                            total_vat, total_with_vat
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """
+                    db.execute_query(items_query, (
+                        invoice_id,
+                        item["item_name"],
+                        item["quantity"],
+                        item["unit"],
+                        item["unit_price"],
+                        21,
+                        item_total_without_vat,
+                        item_vat,
+                        item_total_with_vat
+                    ))
+
+                # Aktualizovat zakázku
+                update_order = "UPDATE orders SET invoiced = 1 WHERE id = ?"
+                db.execute_query(update_order, (self.order_id,))
 
             QMessageBox.information(
                 self,
@@ -14,6 +14,7 @@ from PyQt6.QtCore import Qt, QDate, QTime, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 from datetime import datetime, date, timedelta
 from database_manager import db
+from utils.utils_recurrence import recurrence
 import config
 
 
@@ -261,6 +262,7 @@ class HolidayDialog(QDialog):
             placeholders = ", ".join(["?" for _ in data])
             query = f"INSERT OR REPLACE INTO calendar_holidays ({columns}) VALUES ({placeholders})"
             db.execute_query(query, tuple(data.values()))
+            recurrence.invalidate()
 
             QMessageBox.information(self, "Úspěch", "Svátek byl přidán.")
             self.accept()
@@ -881,6 +883,7 @@ class CalendarAvailability(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 db.execute_query("DELETE FROM calendar_holidays WHERE id = ?", (holiday_id,))
+                recurrence.invalidate()
                 self.load_holidays()
             except Exception as e:
                 QMessageBox.critical(self, "Chyba", f"Chyba při mazání: {e}")
@@ -928,6 +931,7 @@ class CalendarAvailability(QWidget):
                 db.execute_query(query, tuple(data.values()))
                 imported += 1
 
+        recurrence.invalidate()
         QMessageBox.information(
             self,
             "Import dokončen",
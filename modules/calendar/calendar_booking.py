@@ -15,6 +15,7 @@ from PyQt6.QtCore import Qt, QDate, QTime, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 from datetime import datetime, date, timedelta
 from database_manager import db
+from utils.utils_calendar import calendar_service
 import config
 import json
 
@@ -919,34 +920,12 @@ class CalendarBooking(QWidget):
         slots = []
         days_cz = ["Po", "Út", "St", "Čt", "Pá", "So", "Ne"]
 
-        for day_offset in range(days_ahead):
-            check_date = today + timedelta(days=day_offset)
-
-            if check_date.weekday() == 6:
-                continue
-
-            if check_date.weekday() == 5:
-                work_hours = [(8, 12)]
-            else:
-                work_hours = [(8, 12), (13, 17)]
-
-            booked_times = db.fetch_all("""
-                SELECT booking_time FROM calendar_bookings
-                WHERE booking_date = ? AND status IN ('pending', 'approved')
-            """, (check_date.isoformat(),))
-
-            booked_set = set()
-            for b in booked_times:
-                if b['booking_time']:
-                    booked_set.add(b['booking_time'])
-
-            for start_h, end_h in work_hours:
-                for hour in range(start_h, end_h):
-                    time_str = f"{hour:02d}:00"
-                    if time_str not in booked_set:
-                        slots.append((check_date, days_cz[check_date.weekday()], time_str, "🟢 Volný"))
-                    else:
-                        slots.append((check_date, days_cz[check_date.weekday()], time_str, "🔴 Obsazený"))
+        # Rezervace celého období jedním dotazem
+        index = calendar_service.load(today, today + timedelta(days=days_ahead - 1))
+        for slot_start, is_free in index.booking_slots(today, days_ahead):
+            check_date = slot_start.date()
+            status = "🟢 Volný" if is_free else "🔴 Obsazený"
+            slots.append((check_date, days_cz[check_date.weekday()], slot_start.strftime("%H:%M"), status))
 
         self.slots_table.setRowCount(len(slots))
 
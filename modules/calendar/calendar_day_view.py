@@ -10,7 +10,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QDate, QTime, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QPainter, QPen
 from datetime import datetime, timedelta
-from database_manager import db
+from utils.utils_calendar import calendar_service
 import config
 
 
@@ -181,34 +181,8 @@ class CalendarDayView(QWidget):
         self.update_header()
 
     def load_events(self):
-        date_str = self.current_date.toPyDate().isoformat()
-
-        query = """
-            SELECT
-                e.id, e.title, e.event_type, e.start_datetime, e.end_datetime,
-                e.status, e.priority, e.color, e.description,
-                c.first_name || ' ' || c.last_name as customer_name,
-                v.license_plate,
-                u.full_name as mechanic_name
-            FROM calendar_events e
-            LEFT JOIN customers c ON e.customer_id = c.id
-            LEFT JOIN vehicles v ON e.vehicle_id = v.id
-            LEFT JOIN users u ON e.mechanic_id = u.id
-            WHERE DATE(e.start_datetime) = ?
-        """
-        params = [date_str]
-
-        if self.mechanic_filter:
-            query += " AND e.mechanic_id = ?"
-            params.append(self.mechanic_filter)
-
-        if self.event_type_filter:
-            query += " AND e.event_type = ?"
-            params.append(self.event_type_filter)
-
-        query += " ORDER BY e.start_datetime"
-
-        self.events = db.fetch_all(query, tuple(params))
+        day = self.current_date.toPyDate()
+        self.events = calendar_service.event_rows(day, day, self.mechanic_filter, self.event_type_filter)
         self.lbl_events_count.setText(f"{len(self.events)} událostí")
 
     def display_events(self):
@@ -14,6 +14,7 @@ from PyQt6.QtCore import Qt, QDateTime, QDate, QTime, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QIcon
 from datetime import datetime, timedelta
 from database_manager import db
+from utils.utils_recurrence import recurrence
 import config
 
 
@@ -387,7 +388,11 @@ class CalendarEventDialog(QDialog):
         query = """
             SELECT * FROM calendar_events WHERE id = ?
         """
-        event = db.fetch_one(query, (self.event_id,))
+        if self.event_id < 0:
+            # Výskyt opakující se události (zatím neuložený)
+            event = recurrence.occurrence_event(self.event_id)
+        else:
+            event = db.fetch_one(query, (self.event_id,))
 
         if not event:
             QMessageBox.warning(self, "Chyba", "Událost nebyla nalezena.")
@@ -642,6 +647,9 @@ class CalendarEventDialog(QDialog):
                 data['order_id'] = order_data
 
         try:
+            if self.is_edit_mode and not self.materialize_occurrence():
+                return
+
             if self.is_edit_mode:
                 # UPDATE
                 set_clause = ", ".join([f"{k} = ?" for k in data.keys()])
@@ -684,15 +692,42 @@ class CalendarEventDialog(QDialog):
 
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                db.execute_query("DELETE FROM calendar_events WHERE id = ?", (self.event_id,))
+                if not self.materialize_occurrence():
+                    return
+                occurrence = db.fetch_one(
+                    "SELECT recurrence_date FROM calendar_events WHERE id = ? AND recurring_rule_id IS NOT NULL",
+                    (self.event_id,)
+                )
+                if occurrence and occurrence['recurrence_date']:
+                    # Výskyt opakující se události zůstane jako zrušená výjimka,
+                    # jinak by ho pravidlo při zobrazení znovu rozvinulo
+                    db.execute_query(
+                        "UPDATE calendar_events SET status = 'cancelled', updated_at = ? WHERE id = ?",
+                        (datetime.now().isoformat(), self.event_id)
+                    )
+                else:
+                    db.execute_query("DELETE FROM calendar_events WHERE id = ?", (self.event_id,))
                 QMessageBox.information(self, "Úspěch", "Událost byla smazána.")
                 self.event_deleted.emit(self.event_id)
                 self.accept()
             except Exception as e:
                 QMessageBox.critical(self, "Chyba", f"Chyba při mazání: {e}")
 
+    def materialize_occurrence(self):
+        """Výskyt opakující se události (záporné id) se uloží jako výjimka"""
+        if self.event_id >= 0:
+            return True
+        event_id = recurrence.materialize(self.event_id)
+        if event_id is None:
+            QMessageBox.warning(self, "Chyba", "Pravidlo opakování už neexistuje.")
+            return False
+        self.event_id = event_id
+        return True
+
     def create_order(self):
         """Vytvoření zakázky z události"""
+        if not self.materialize_occurrence():
+            return
         self.create_order_requested.emit(self.event_id)
 
     def set_styles(self):
@@ -13,6 +13,7 @@ from PyQt6.QtCore import Qt, QDate, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QIcon, QAction
 from datetime import datetime, date, timedelta
 from database_manager import db
+from utils.utils_recurrence import recurrence
 import config
 
 
@@ -438,7 +439,10 @@ class CalendarEventsList(QWidget):
         query += " ORDER BY e.start_datetime DESC"
 
         # Načtení dat
-        events = db.fetch_all(query, tuple(params))
+        events = [dict(event) for event in db.fetch_all(query, tuple(params))]
+        events += self.recurring_events(date_from, date_to, event_type, mechanic_id,
+                                        status, search_text)
+        events.sort(key=lambda e: e['start_datetime'] or '', reverse=True)
 
         # Naplnění tabulky
         self.table.setRowCount(len(events))
@@ -450,6 +454,28 @@ class CalendarEventsList(QWidget):
         self.lbl_total.setText(f"Celkem: {len(events)}")
         self.lbl_selected.setText("Vybráno: 0")
 
+    def recurring_events(self, date_from, date_to, event_type, mechanic_id, status, search_text):
+        """Výskyty opakujících se událostí odpovídající filtrům (v databázi jsou jen výjimky)"""
+        if status and status != 'scheduled':
+            return []
+        if not (date_from and date_to):
+            # Celé období: od začátku nejstaršího pravidla na rok dopředu
+            rules = recurrence.rules().values()
+            if not rules:
+                return []
+            date_from = min(rule.start_date for rule in rules)
+            date_to = date.today() + timedelta(days=365)
+
+        events = recurrence.expand_events(date_from, date_to, mechanic_id, event_type)
+        if search_text:
+            needle = search_text.lower()
+            events = [e for e in events
+                      if needle in (e['title'] or '').lower()
+                      or needle in (e['mechanic_name'] or '').lower()]
+        for event in events:
+            event['vehicle_plate'] = event['license_plate']
+        return events
+
     def populate_row(self, row, event):
         """Naplnění řádku tabulky"""
         # ID (skryté)
@@ -627,6 +653,10 @@ class CalendarEventsList(QWidget):
     def update_event_status(self, event_id, new_status):
         """Aktualizace stavu události"""
         try:
+            # Výskyt opakující se události (záporné id) se uloží jako výjimka
+            event_id = recurrence.materialize(event_id)
+            if event_id is None:
+                return
             db.execute_query(
                 "UPDATE calendar_events SET status = ?, updated_at = ? WHERE id = ?",
                 (new_status, datetime.now().isoformat(), event_id)
@@ -646,12 +676,32 @@ class CalendarEventsList(QWidget):
 
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                db.execute_query("DELETE FROM calendar_events WHERE id = ?", (event_id,))
+                self.delete_event(event_id)
                 self.refresh()
                 self.event_delete_requested.emit(event_id)
             except Exception as e:
                 QMessageBox.critical(self, "Chyba", f"Chyba při mazání: {e}")
 
+    def delete_event(self, event_id):
+        """
+        Smazání události; výskyt opakující se události zůstane jako zrušená
+        výjimka, jinak by ho pravidlo znovu rozvinulo
+        """
+        event_id = recurrence.materialize(event_id)
+        if event_id is None:
+            return
+        occurrence = db.fetch_one(
+            "SELECT recurrence_date FROM calendar_events WHERE id = ? AND recurring_rule_id IS NOT NULL",
+            (event_id,)
+        )
+        if occurrence and occurrence['recurrence_date']:
+            db.execute_query(
+                "UPDATE calendar_events SET status = 'cancelled', updated_at = ? WHERE id = ?",
+                (datetime.now().isoformat(), event_id)
+            )
+        else:
+            db.execute_query("DELETE FROM calendar_events WHERE id = ?", (event_id,))
+
     def delete_selected(self):
         """Smazání vybraných událostí"""
         selected_rows = self.table.selectionModel().selectedRows()
@@ -670,7 +720,7 @@ class CalendarEventsList(QWidget):
             try:
                 for index in selected_rows:
                     event_id = int(self.table.item(index.row(), 0).text())
-                    db.execute_query("DELETE FROM calendar_events WHERE id = ?", (event_id,))
+                    self.delete_event(event_id)
                 self.refresh()
             except Exception as e:
                 QMessageBox.critical(self, "Chyba", f"Chyba při mazání: {e}")
@@ -15,6 +15,7 @@ from PyQt6.QtGui import QFont, QPixmap, QImage, QPainter
 from PyQt6.QtPrintSupport import QPrinter, QPrintDialog, QPrintPreviewDialog
 from datetime import datetime, date, timedelta
 from database_manager import db
+from utils.utils_recurrence import recurrence
 import config
 import csv
 import os
@@ -650,7 +651,10 @@ class CalendarExport(QWidget):
 
         query += " ORDER BY e.start_datetime"
 
-        events = db.fetch_all(query, tuple(params))
+        events = [dict(event) for event in db.fetch_all(query, tuple(params))]
+        # Výskyty opakujících se událostí (v databázi jsou jen výjimky)
+        events += recurrence.expand_events(from_date, to_date)
+        events.sort(key=lambda e: e['start_datetime'] or '')
 
         result = []
         for event in events:
@@ -754,7 +758,11 @@ METHOD:PUBLISH
             else:
                 end_dt = start_dt + timedelta(hours=1)
 
-            uid = f"{event['id']}@motoservis.local"
+            if event['id'] < 0:
+                # Výskyt pravidla nemá trvalé id - UID podle pravidla a dne
+                uid = f"rule{event['recurring_rule_id']}-{event['recurrence_date']}@motoservis.local"
+            else:
+                uid = f"{event['id']}@motoservis.local"
 
             summary = event['title'] or 'Událost'
 
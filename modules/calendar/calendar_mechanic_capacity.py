@@ -13,6 +13,7 @@ from PyQt6.QtCore import Qt, QDate, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QPainter, QPen, QBrush
 from datetime import datetime, date, timedelta
 from database_manager import db
+from utils.utils_calendar import calendar_service
 import config
 
 
@@ -166,6 +167,8 @@ class CalendarMechanicCapacity(QWidget):
         super().__init__(parent)
         self.selected_mechanic_id = None
         self.selected_date = QDate.currentDate()
+        self.mechanics = []
+        self.calendar = None
 
         self.init_ui()
         self.refresh()
@@ -506,7 +509,11 @@ class CalendarMechanicCapacity(QWidget):
 
         return panel
 
+    # Kolik dní dopředu hledá find_free_slot
+    FREE_SLOT_DAYS = 14
+
     def refresh(self):
+        self.load_calendar()
         self.load_mechanics_data()
         self.load_statistics()
         self.check_warnings()
@@ -514,44 +521,52 @@ class CalendarMechanicCapacity(QWidget):
         if self.selected_mechanic_id:
             self.load_mechanic_detail(self.selected_mechanic_id)
 
-    def load_mechanics_data(self):
-        while self.cards_layout.count() > 1:
-            item = self.cards_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+    @staticmethod
+    def _periods():
+        """Dnes, začátek/konec týdne a měsíce"""
+        today = date.today()
+        week_start = today - timedelta(days=today.weekday())
+        week_end = week_start + timedelta(days=6)
+        month_start = today.replace(day=1)
+        if today.month == 12:
+            month_end = today.replace(year=today.year + 1, month=1, day=1) - timedelta(days=1)
+        else:
+            month_end = today.replace(month=today.month + 1, day=1) - timedelta(days=1)
+        return today, week_start, week_end, month_start, month_end
 
-        mechanics = db.fetch_all("""
+    def load_calendar(self):
+        """Mechanici a obsazenost celého sledovaného okna (jeden dotaz na události)"""
+        self.mechanics = db.fetch_all("""
             SELECT id, full_name, role FROM users
             WHERE role IN ('mechanik', 'admin') AND active = 1
             ORDER BY full_name
         """)
+        today, week_start, week_end, month_start, month_end = self._periods()
+        window_end = max(week_end, month_end, today + timedelta(days=self.FREE_SLOT_DAYS))
+        self.calendar = calendar_service.load(min(week_start, month_start), window_end,
+                                              include_bookings=False)
 
-        today = date.today()
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
+    def load_mechanics_data(self):
+        while self.cards_layout.count() > 1:
+            item = self.cards_layout.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
 
-        for mech in mechanics:
-            mech_data = dict(mech)
+        today, week_start, week_end, _, _ = self._periods()
 
-            today_events = db.fetch_one("""
-                SELECT COUNT(*) as count FROM calendar_events
-                WHERE mechanic_id = ? AND DATE(start_datetime) = ? AND status != 'cancelled'
-            """, (mech['id'], today.isoformat()))
-            mech_data['events_today'] = today_events['count'] if today_events else 0
+        for mech in self.mechanics:
+            mech_data = dict(mech)
 
-            week_events = db.fetch_one("""
-                SELECT COUNT(*) as count FROM calendar_events
-                WHERE mechanic_id = ? AND DATE(start_datetime) BETWEEN ? AND ? AND status != 'cancelled'
-            """, (mech['id'], week_start.isoformat(), week_end.isoformat()))
-            mech_data['events_week'] = week_events['count'] if week_events else 0
+            mech_data['events_today'] = self.calendar.count(mech['id'], today)
+            mech_data['events_week'] = self.calendar.count(mech['id'], week_start, week_end)
 
-            today_hours = mech_data['events_today'] * 1.0
-            week_hours = mech_data['events_week'] * 1.0
+            today_hours = self.calendar.busy_hours(mech['id'], today)
+            week_hours = self.calendar.busy_hours(mech['id'], week_start, week_end)
 
             mech_data['today_capacity'] = int((today_hours / 8.0) * 100)
             mech_data['week_capacity'] = int((week_hours / 40.0) * 100)
 
-            free_slots = max(0, 8 - mech_data['events_today'])
+            free_slots = len(self.calendar.free_slots(mech['id'], today, 1))
             mech_data['free_slots'] = free_slots
             mech_data['is_available'] = free_slots > 0
 
@@ -571,38 +586,21 @@ class CalendarMechanicCapacity(QWidget):
 
         self.detail_header.setText(f"📊 Detail: {mechanic['full_name']}")
 
-        today = date.today()
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-        month_start = today.replace(day=1)
-        if today.month == 12:
-            month_end = today.replace(year=today.year + 1, month=1, day=1) - timedelta(days=1)
-        else:
-            month_end = today.replace(month=today.month + 1, day=1) - timedelta(days=1)
+        if self.calendar is None:
+            self.load_calendar()
+        today, week_start, week_end, month_start, month_end = self._periods()
 
-        today_count = db.fetch_one("""
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE mechanic_id = ? AND DATE(start_datetime) = ? AND status != 'cancelled'
-        """, (mechanic_id, today.isoformat()))
-        today_hours = (today_count['count'] if today_count else 0) * 1.0
+        today_hours = self.calendar.busy_hours(mechanic_id, today)
         today_percent = int((today_hours / 8.0) * 100)
         self.today_progress.setValue(min(today_percent, 150))
         self.lbl_today_hours.setText(f"{today_hours:.1f} / 8 hodin")
 
-        week_count = db.fetch_one("""
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE mechanic_id = ? AND DATE(start_datetime) BETWEEN ? AND ? AND status != 'cancelled'
-        """, (mechanic_id, week_start.isoformat(), week_end.isoformat()))
-        week_hours = (week_count['count'] if week_count else 0) * 1.0
+        week_hours = self.calendar.busy_hours(mechanic_id, week_start, week_end)
         week_percent = int((week_hours / 40.0) * 100)
         self.week_progress.setValue(min(week_percent, 150))
         self.lbl_week_hours.setText(f"{week_hours:.1f} / 40 hodin")
 
-        month_count = db.fetch_one("""
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE mechanic_id = ? AND DATE(start_datetime) BETWEEN ? AND ? AND status != 'cancelled'
-        """, (mechanic_id, month_start.isoformat(), month_end.isoformat()))
-        month_hours = (month_count['count'] if month_count else 0) * 1.0
+        month_hours = self.calendar.busy_hours(mechanic_id, month_start, month_end)
         month_percent = int((month_hours / 160.0) * 100)
         self.month_progress.setValue(min(month_percent, 150))
         self.lbl_month_hours.setText(f"{month_hours:.1f} / 160 hodin")
@@ -613,7 +611,7 @@ class CalendarMechanicCapacity(QWidget):
                 c.first_name || ' ' || c.last_name as customer_name
             FROM calendar_events e
             LEFT JOIN customers c ON e.customer_id = c.id
-            WHERE e.mechanic_id = ? AND DATE(e.start_datetime) >= ? AND e.status != 'cancelled'
+            WHERE e.mechanic_id = ? AND e.start_datetime >= ? AND e.status != 'cancelled'
             ORDER BY e.start_datetime
             LIMIT 10
         """, (mechanic_id, today.isoformat()))
@@ -644,43 +642,8 @@ class CalendarMechanicCapacity(QWidget):
             if item.widget():
                 item.widget().deleteLater()
 
-        today = date.today()
-        free_slots = []
-
-        for day_offset in range(7):
-            check_date = today + timedelta(days=day_offset)
-
-            if check_date.weekday() == 6:
-                continue
-
-            if check_date.weekday() == 5:
-                work_hours = [(8, 12)]
-            else:
-                work_hours = [(8, 12), (13, 17)]
-
-            busy_times = db.fetch_all("""
-                SELECT start_datetime, end_datetime FROM calendar_events
-                WHERE mechanic_id = ? AND DATE(start_datetime) = ? AND status != 'cancelled'
-            """, (mechanic_id, check_date.isoformat()))
-
-            busy_hours = set()
-            for event in busy_times:
-                if event['start_datetime']:
-                    start_dt = datetime.fromisoformat(event['start_datetime'])
-                    end_dt = datetime.fromisoformat(event['end_datetime']) if event['end_datetime'] else start_dt + timedelta(hours=1)
-                    for h in range(start_dt.hour, min(end_dt.hour + 1, 18)):
-                        busy_hours.add(h)
-
-            for start_h, end_h in work_hours:
-                for hour in range(start_h, end_h):
-                    if hour not in busy_hours:
-                        free_slots.append((check_date, hour))
-                        if len(free_slots) >= 6:
-                            break
-                if len(free_slots) >= 6:
-                    break
-            if len(free_slots) >= 6:
-                break
+        free_slots = [(slot.date(), slot.hour)
+                      for slot in self.calendar.free_slots(mechanic_id, date.today(), 7, limit=6)]
 
         days_cz = ["Po", "Út", "St", "Čt", "Pá", "So", "Ne"]
 
@@ -727,18 +690,13 @@ class CalendarMechanicCapacity(QWidget):
         )
 
     def load_statistics(self):
-        today = date.today()
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
+        _, week_start, week_end, _, _ = self._periods()
 
-        mechanics = db.fetch_all("""
-            SELECT u.id, u.full_name,
-                   (SELECT COUNT(*) FROM calendar_events
-                    WHERE mechanic_id = u.id AND DATE(start_datetime) BETWEEN ? AND ?
-                    AND status != 'cancelled') as week_events
-            FROM users u
-            WHERE u.role IN ('mechanik', 'admin') AND u.active = 1
-        """, (week_start.isoformat(), week_end.isoformat()))
+        mechanics = [
+            {"id": m["id"], "full_name": m["full_name"],
+             "week_events": self.calendar.count(m["id"], week_start, week_end)}
+            for m in self.mechanics
+        ]
 
         if mechanics:
             total_capacity = sum(m['week_events'] for m in mechanics)
@@ -759,14 +717,7 @@ class CalendarMechanicCapacity(QWidget):
     def check_warnings(self):
         today = date.today()
 
-        overloaded = db.fetch_all("""
-            SELECT u.full_name, COUNT(*) as count
-            FROM users u
-            JOIN calendar_events e ON u.id = e.mechanic_id
-            WHERE DATE(e.start_datetime) = ? AND e.status != 'cancelled'
-            GROUP BY u.id
-            HAVING count > 8
-        """, (today.isoformat(),))
+        overloaded = [m for m in self.mechanics if self.calendar.count(m['id'], today) > 8]
 
         if overloaded:
             names = ", ".join([m['full_name'] for m in overloaded])
@@ -795,20 +746,15 @@ class CalendarMechanicCapacity(QWidget):
         best_mechanic = None
         min_load = float('inf')
 
-        for day_offset in range(14):
+        for day_offset in range(self.FREE_SLOT_DAYS):
             check_date = today + timedelta(days=day_offset)
 
             if check_date.weekday() == 6:
                 continue
 
-            mechanics = db.fetch_all("""
-                SELECT u.id, u.full_name,
-                       (SELECT COUNT(*) FROM calendar_events
-                        WHERE mechanic_id = u.id AND DATE(start_datetime) = ?
-                        AND status != 'cancelled') as day_events
-                FROM users u
-                WHERE u.role IN ('mechanik', 'admin') AND u.active = 1
-            """, (check_date.isoformat(),))
+            mechanics = [{"id": m["id"], "full_name": m["full_name"],
+                          "day_events": self.calendar.count(m["id"], check_date)}
+                         for m in self.mechanics]
 
             for mech in mechanics:
                 max_events = 4 if check_date.weekday() == 5 else 8
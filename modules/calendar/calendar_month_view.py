@@ -11,6 +11,7 @@ from PyQt6.QtCore import Qt, QDate, pyqtSignal, QRect, QPoint
 from PyQt6.QtGui import QFont, QPainter, QColor, QPen, QBrush, QCursor
 from datetime import datetime, date, timedelta
 from database_manager import db
+from utils.utils_calendar import calendar_service
 import config
 
 
@@ -481,36 +482,8 @@ class CalendarMonthView(QWidget):
         start_date = first_day.addDays(-(first_weekday - 1))
         end_date = first_day.addMonths(1).addDays(7)
 
-        # Sestavení dotazu
-        query = """
-            SELECT
-                e.id, e.title, e.description, e.event_type,
-                e.start_datetime, e.end_datetime, e.all_day,
-                e.customer_id, e.vehicle_id, e.order_id,
-                e.mechanic_id, e.priority, e.color, e.status,
-                c.first_name || ' ' || c.last_name as customer_name,
-                v.brand || ' ' || v.model || ' (' || v.license_plate || ')' as vehicle_info,
-                u.full_name as mechanic_name
-            FROM calendar_events e
-            LEFT JOIN customers c ON e.customer_id = c.id
-            LEFT JOIN vehicles v ON e.vehicle_id = v.id
-            LEFT JOIN users u ON e.mechanic_id = u.id
-            WHERE DATE(e.start_datetime) BETWEEN ? AND ?
-        """
-        params = [start_date.toString("yyyy-MM-dd"), end_date.toString("yyyy-MM-dd")]
-
-        # Aplikace filtrů
-        if self.mechanic_filter:
-            query += " AND e.mechanic_id = ?"
-            params.append(self.mechanic_filter)
-
-        if self.event_type_filter:
-            query += " AND e.event_type = ?"
-            params.append(self.event_type_filter)
-
-        query += " ORDER BY e.start_datetime"
-
-        events = db.fetch_all(query, tuple(params))
+        events = calendar_service.event_rows(start_date.toPyDate(), end_date.toPyDate(),
+                                             self.mechanic_filter, self.event_type_filter)
 
         # Seskupení událostí podle dne
         events_by_day = {}
@@ -8,12 +8,13 @@ from PyQt6.QtWidgets import (
     QTableWidgetItem, QHeaderView, QPushButton, QLabel,
     QComboBox, QFrame, QDialog, QFormLayout, QLineEdit,
     QSpinBox, QDateEdit, QCheckBox, QGroupBox, QMessageBox,
-    QListWidget, QListWidgetItem, QTextEdit
+    QListWidget, QListWidgetItem, QTextEdit, QTimeEdit
 )
-from PyQt6.QtCore import Qt, QDate, pyqtSignal
+from PyQt6.QtCore import Qt, QDate, QTime, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 from datetime import datetime, date, timedelta
 from database_manager import db
+from utils.utils_recurrence import recurrence
 import config
 import json
 
@@ -69,6 +70,27 @@ class RecurringRuleDialog(QDialog):
         interval_layout.addStretch()
         form.addRow("Interval:", interval_layout)
 
+        # Šablona výskytu - výskyty se nevytváří, kalendář je rozvíjí při zobrazení
+        self.dt_start = QDateEdit()
+        self.dt_start.setCalendarPopup(True)
+        self.dt_start.setDate(QDate.currentDate())
+        form.addRow("Začátek opakování:", self.dt_start)
+
+        time_layout = QHBoxLayout()
+        self.tm_start = QTimeEdit()
+        self.tm_start.setDisplayFormat("HH:mm")
+        self.tm_start.setTime(QTime(9, 0))
+        time_layout.addWidget(self.tm_start)
+        time_layout.addWidget(QLabel("délka:"))
+        self.spin_duration = QSpinBox()
+        self.spin_duration.setRange(15, 24 * 60)
+        self.spin_duration.setSingleStep(15)
+        self.spin_duration.setValue(60)
+        self.spin_duration.setSuffix(" min")
+        time_layout.addWidget(self.spin_duration)
+        time_layout.addStretch()
+        form.addRow("Čas:", time_layout)
+
         layout.addLayout(form)
 
         self.weekly_group = QGroupBox("Dny v týdnu")
@@ -163,7 +185,7 @@ class RecurringRuleDialog(QDialog):
         layout.addLayout(buttons)
 
         self.setStyleSheet(f"""
-            QLineEdit, QComboBox, QSpinBox, QDateEdit {{
+            QLineEdit, QComboBox, QSpinBox, QDateEdit, QTimeEdit {{
                 padding: 8px;
                 border: 1px solid #d0d0d0;
                 border-radius: 4px;
@@ -241,6 +263,13 @@ class RecurringRuleDialog(QDialog):
 
         self.spin_interval.setValue(dict(rule).get('interval_value', 1))
 
+        if dict(rule).get('start_date'):
+            self.dt_start.setDate(QDate.fromString(rule['start_date'], Qt.DateFormat.ISODate))
+        if dict(rule).get('start_time'):
+            self.tm_start.setTime(QTime.fromString(rule['start_time'], "HH:mm"))
+        if dict(rule).get('duration_minutes'):
+            self.spin_duration.setValue(rule['duration_minutes'])
+
         if dict(rule).get('days_of_week'):
             days = json.loads(rule['days_of_week'])
             for day in days:
@@ -275,6 +304,9 @@ class RecurringRuleDialog(QDialog):
             'name': self.txt_name.text().strip(),
             'frequency': self.cmb_frequency.currentData(),
             'interval_value': self.spin_interval.value(),
+            'start_date': self.dt_start.date().toString(Qt.DateFormat.ISODate),
+            'start_time': self.tm_start.time().toString("HH:mm"),
+            'duration_minutes': self.spin_duration.value(),
             'days_of_week': None,
             'day_of_month': None,
             'end_date': None,
@@ -316,6 +348,8 @@ class RecurringRuleDialog(QDialog):
                 db.execute_query(query, tuple(data.values()))
                 QMessageBox.information(self, "Úspěch", "Pravidlo bylo vytvořeno.")
 
+            # Kalendář rozvine výskyty podle nového pravidla
+            recurrence.invalidate()
             self.accept()
         except Exception as e:
             QMessageBox.critical(self, "Chyba", f"Chyba při ukládání: {e}")
@@ -376,7 +410,7 @@ class CalendarRecurring(QWidget):
         self.btn_new_rule.clicked.connect(self.create_rule)
         layout.addWidget(self.btn_new_rule)
 
-        self.btn_generate_all = QPushButton("⚡ Generovat všechny instance")
+        self.btn_generate_all = QPushButton("⚡ Výskyty na příští rok")
         self.btn_generate_all.setObjectName("actionButton")
         self.btn_generate_all.clicked.connect(self.generate_all_instances)
         layout.addWidget(self.btn_generate_all)
@@ -493,11 +527,11 @@ class CalendarRecurring(QWidget):
         info_layout.addRow("Výjimky:", self.lbl_exceptions)
 
         self.lbl_instances = QLabel("-")
-        info_layout.addRow("Generované instance:", self.lbl_instances)
+        info_layout.addRow("Výskyty (příští rok):", self.lbl_instances)
 
         layout.addWidget(info_group)
 
-        preview_group = QGroupBox("Náhled příštích instancí")
+        preview_group = QGroupBox("Náhled příštích výskytů")
         preview_layout = QVBoxLayout(preview_group)
 
         self.preview_list = QListWidget()
@@ -662,7 +696,7 @@ class CalendarRecurring(QWidget):
 
             btn_generate = QPushButton("⚡")
             btn_generate.setFixedSize(30, 25)
-            btn_generate.setToolTip("Generovat")
+            btn_generate.setToolTip("Výskyty na příští rok")
             btn_generate.clicked.connect(lambda checked, rid=rule['id']: self.generate_for_rule(rid))
             actions_layout.addWidget(btn_generate)
 
@@ -718,48 +752,19 @@ class CalendarRecurring(QWidget):
         else:
             self.lbl_exceptions.setText("Žádné")
 
-        instances_count = db.fetch_one("""
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE recurring_rule_id = ?
-        """, (rule_id,))
-        self.lbl_instances.setText(str(instances_count['count'] if instances_count else 0))
+        occurrences = self.generate_instances_for_rule(rule)
+        overrides = recurrence.count_overrides(rule_id)
+        self.lbl_instances.setText(f"{occurrences} (upravených: {overrides})" if overrides else str(occurrences))
 
         self.generate_preview(rule)
 
     def generate_preview(self, rule):
         self.preview_list.clear()
 
-        today = date.today()
-        preview_dates = []
-
-        for i in range(10):
-            if rule['frequency'] == 'daily':
-                next_date = today + timedelta(days=i * rule['interval_value'])
-            elif rule['frequency'] == 'weekly':
-                next_date = today + timedelta(weeks=i * rule['interval_value'])
-            elif rule['frequency'] == 'monthly':
-                month_offset = i * rule['interval_value']
-                year_offset = month_offset // 12
-                month = today.month + (month_offset % 12)
-                if month > 12:
-                    month -= 12
-                    year_offset += 1
-                day = min(today.day, 28)
-                next_date = today.replace(year=today.year + year_offset, month=month, day=day)
-            else:
-                next_date = today + timedelta(days=i)
-
-            skip = False
-            if rule['exceptions']:
-                exceptions = json.loads(rule['exceptions'])
-                if exceptions.get('skip_weekends') and next_date.weekday() >= 5:
-                    skip = True
-
-            if not skip:
-                preview_dates.append(next_date)
+        preview_dates = recurrence.upcoming(rule['id'], date.today(), limit=10)
 
         days_cz = ["Po", "Út", "St", "Čt", "Pá", "So", "Ne"]
-        for d in preview_dates[:10]:
+        for d in preview_dates:
             day_name = days_cz[d.weekday()]
             item = QListWidgetItem(f"📅 {day_name} {d.strftime('%d.%m.%Y')}")
             self.preview_list.addItem(item)
@@ -787,17 +792,25 @@ class CalendarRecurring(QWidget):
         reply = QMessageBox.question(
             self,
             "Potvrzení",
-            "Opravdu chcete smazat toto pravidlo?\n\nVšechny vygenerované instance zůstanou zachovány.",
+            "Opravdu chcete smazat toto pravidlo?\n\nUpravené výskyty zůstanou zachovány jako samostatné události.",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
 
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                db.execute_query(
-                    "UPDATE calendar_events SET recurring_rule_id = NULL WHERE recurring_rule_id = ?",
-                    (rule_id,)
-                )
-                db.execute_query("DELETE FROM calendar_recurring_rules WHERE id = ?", (rule_id,))
+                with db.transaction():
+                    # Zrušené výskyty jsou jen značky výjimek - bez pravidla nemají význam
+                    db.execute_query(
+                        "DELETE FROM calendar_events WHERE recurring_rule_id = ? AND status = 'cancelled'",
+                        (rule_id,)
+                    )
+                    db.execute_query(
+                        "UPDATE calendar_events SET recurring_rule_id = NULL, recurrence_date = NULL "
+                        "WHERE recurring_rule_id = ?",
+                        (rule_id,)
+                    )
+                    db.execute_query("DELETE FROM calendar_recurring_rules WHERE id = ?", (rule_id,))
+                recurrence.invalidate()
                 QMessageBox.information(self, "Úspěch", "Pravidlo bylo smazáno.")
                 self.refresh()
             except Exception as e:
@@ -817,12 +830,13 @@ class CalendarRecurring(QWidget):
         if not rule:
             return
 
-        generated = self.generate_instances_for_rule(rule)
+        occurrences = self.generate_instances_for_rule(rule)
 
         QMessageBox.information(
             self,
-            "Generování dokončeno",
-            f"Bylo vygenerováno {generated} nových instancí události."
+            "Výskyty pravidla",
+            f"Pravidlo má v příštím roce {occurrences} výskytů.\n"
+            "Kalendář je zobrazuje automaticky, není potřeba je generovat."
         )
         self.refresh()
 
@@ -836,110 +850,22 @@ class CalendarRecurring(QWidget):
         self.generate_for_rule(rule_id)
 
     def generate_instances_for_rule(self, rule):
+        """Počet výskytů pravidla v příštím roce (rozvinuté za běhu, nic se neukládá)"""
         today = date.today()
-        end_date = today + timedelta(days=365)
-
-        if rule['end_date']:
-            end_date = min(end_date, datetime.fromisoformat(rule['end_date']).date())
-
-        exceptions = {}
-        if rule['exceptions']:
-            exceptions = json.loads(rule['exceptions'])
-
-        holidays = set()
-        if exceptions.get('skip_holidays'):
-            holiday_rows = db.fetch_all("SELECT holiday_date FROM calendar_holidays WHERE is_closed = 1")
-            for h in holiday_rows:
-                holidays.add(h['holiday_date'])
-
-        generated = 0
-        current_date = today
-        count = 0
-        max_count = rule['occurrence_count'] or 1000
-
-        while current_date <= end_date and count < max_count:
-            skip = False
-
-            if exceptions.get('skip_weekends') and current_date.weekday() >= 5:
-                skip = True
-
-            if current_date.isoformat() in holidays:
-                skip = True
-
-            if exceptions.get('custom_dates') and current_date.isoformat() in exceptions['custom_dates']:
-                skip = True
-
-            if not skip:
-                existing = db.fetch_one("""
-                    SELECT id FROM calendar_events
-                    WHERE recurring_rule_id = ? AND DATE(start_datetime) = ?
-                """, (rule['id'], current_date.isoformat()))
-
-                if not existing:
-                    event_data = {
-                        'title': f"{rule['name']} (opakující se)",
-                        'event_type': 'service',
-                        'start_datetime': f"{current_date.isoformat()}T09:00:00",
-                        'end_datetime': f"{current_date.isoformat()}T10:00:00",
-                        'all_day': 0,
-                        'recurring_rule_id': rule['id'],
-                        'priority': 2,
-                        'color': '#3498db',
-                        'status': 'scheduled',
-                        'created_at': datetime.now().isoformat(),
-                        'updated_at': datetime.now().isoformat()
-                    }
-
-                    columns = ", ".join(event_data.keys())
-                    placeholders = ", ".join(["?" for _ in event_data])
-                    query = f"INSERT INTO calendar_events ({columns}) VALUES ({placeholders})"
-                    db.execute_query(query, tuple(event_data.values()))
-                    generated += 1
-
-                count += 1
-
-            if rule['frequency'] == 'daily':
-                current_date += timedelta(days=rule['interval_value'])
-            elif rule['frequency'] == 'weekdays':
-                current_date += timedelta(days=1)
-                while current_date.weekday() >= 5:
-                    current_date += timedelta(days=1)
-            elif rule['frequency'] == 'weekly':
-                current_date += timedelta(weeks=rule['interval_value'])
-            elif rule['frequency'] == 'monthly':
-                month = current_date.month + rule['interval_value']
-                year = current_date.year
-                while month > 12:
-                    month -= 12
-                    year += 1
-                day = min(current_date.day, 28)
-                current_date = current_date.replace(year=year, month=month, day=day)
-            elif rule['frequency'] == 'yearly':
-                current_date = current_date.replace(year=current_date.year + rule['interval_value'])
-            else:
-                current_date += timedelta(days=1)
-
-        return generated
+        rule = recurrence.rules().get(rule['id'])
+        if rule is None:
+            return 0
+        return len(rule.dates(today, today + timedelta(days=365), recurrence.holidays()))
 
     def generate_all_instances(self):
-        reply = QMessageBox.question(
+        recurrence.invalidate()
+        total = sum(self.generate_instances_for_rule({'id': rule_id})
+                    for rule_id in recurrence.rules())
+
+        QMessageBox.information(
             self,
-            "Generovat všechny instance",
-            "Chcete vygenerovat instance pro všechna pravidla na příští rok?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            "Výskyty pravidel",
+            f"Všechna pravidla mají v příštím roce celkem {total} výskytů.\n"
+            "Kalendář je zobrazuje automaticky, není potřeba je generovat."
         )
-
-        if reply == QMessageBox.StandardButton.Yes:
-            rules = db.fetch_all("SELECT * FROM calendar_recurring_rules")
-            total_generated = 0
-
-            for rule in rules:
-                generated = self.generate_instances_for_rule(dict(rule))
-                total_generated += generated
-
-            QMessageBox.information(
-                self,
-                "Generování dokončeno",
-                f"Celkem vygenerováno {total_generated} nových instancí."
-            )
-            self.refresh()
+        self.refresh()
@@ -14,6 +14,7 @@ from PyQt6.QtCore import Qt, QDate, QDateTime, pyqtSignal, QTimer
 from PyQt6.QtGui import QFont, QColor, QIcon
 from datetime import datetime, date, timedelta
 from database_manager import db
+from utils.utils_scheduler import reminder_scheduler, CALENDAR
 import config
 
 
@@ -630,9 +631,23 @@ class CalendarReminders(QWidget):
         return panel
 
     def setup_auto_refresh(self):
+        """Obnovení, když plánovač ohlásí připomínku nebo půlnoc (bez dotazování)"""
+        # Krátké zpoždění sloučí více připomínek ohlášených najednou
         self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(200)
         self.refresh_timer.timeout.connect(self.refresh)
-        self.refresh_timer.start(300000)
+        reminder_scheduler.item_due.connect(self.on_item_due)
+        reminder_scheduler.day_changed.connect(self.refresh_timer.start)
+
+    def on_item_due(self, item):
+        if item.kind == CALENDAR:
+            self.refresh_timer.start()
+
+    def reminders_changed(self):
+        """Po změně připomínek: plánovač + zobrazení"""
+        reminder_scheduler.refresh("calendar")
+        self.refresh()
 
     def refresh(self):
         self.load_reminders()
@@ -758,7 +773,7 @@ class CalendarReminders(QWidget):
     def create_reminder(self):
         dialog = NewReminderDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.refresh()
+            self.reminders_changed()
 
     def quick_reminder(self, reminder_type):
         type_names = {
@@ -787,7 +802,7 @@ class CalendarReminders(QWidget):
         try:
             db.execute_query(query, tuple(data.values()))
             QMessageBox.information(self, "Úspěch", f"Připomínka '{title}' byla vytvořena.")
-            self.refresh()
+            self.reminders_changed()
         except Exception as e:
             QMessageBox.critical(self, "Chyba", f"Chyba při vytváření: {e}")
 
@@ -798,6 +813,7 @@ class CalendarReminders(QWidget):
                 (datetime.now().isoformat(), reminder_id)
             )
             self.reminder_completed.emit(reminder_id)
+            reminder_scheduler.refresh("calendar", reminder_id)
             self.refresh()
         except Exception as e:
             QMessageBox.critical(self, "Chyba", f"Chyba při označování: {e}")
@@ -815,6 +831,7 @@ class CalendarReminders(QWidget):
                 "Odloženo",
                 f"Připomínka byla odložena na {new_time.strftime('%d.%m.%Y %H:%M')}"
             )
+            reminder_scheduler.refresh("calendar", reminder_id)
             self.refresh()
         except Exception as e:
             QMessageBox.critical(self, "Chyba", f"Chyba při odkládání: {e}")
@@ -860,7 +877,7 @@ class CalendarReminders(QWidget):
                 "Generování dokončeno",
                 f"Bylo vygenerováno {generated} automatických připomínek."
             )
-            self.refresh()
+            self.reminders_changed()
         else:
             QMessageBox.information(
                 self,
@@ -12,8 +12,10 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt, QDate, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QPainter, QPen
+from collections import Counter
 from datetime import datetime, date, timedelta
 from database_manager import db
+from utils.utils_recurrence import recurrence
 import config
 import csv
 import os
@@ -450,47 +452,42 @@ class CalendarReports(QWidget):
         to_date = self.dt_to.date().toPyDate()
         return from_date, to_date
 
-    def load_overview_data(self):
-        from_date, to_date = self.get_date_range()
-
-        total = db.fetch_one("""
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ?
-        """, (from_date.isoformat(), to_date.isoformat()))
-
-        self.metric_total_events.findChild(QLabel, "metricValue").setText(
-            str(total['count'] if total else 0)
-        )
-
-        completed = db.fetch_one("""
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ? AND status = 'completed'
+    def period_events(self, from_date, to_date):
+        """
+        Události období včetně výskytů opakujících se událostí (v databázi jsou
+        jen výjimky) - souhrny reportu se počítají z tohoto seznamu
+        """
+        rows = db.fetch_all("""
+            SELECT
+                e.id, e.title, e.event_type, e.start_datetime, e.end_datetime,
+                e.status, e.priority, e.mechanic_id, e.notes,
+                c.first_name || ' ' || c.last_name as customer_name,
+                v.license_plate,
+                u.full_name as mechanic_name
+            FROM calendar_events e
+            LEFT JOIN customers c ON e.customer_id = c.id
+            LEFT JOIN vehicles v ON e.vehicle_id = v.id
+            LEFT JOIN users u ON e.mechanic_id = u.id
+            WHERE DATE(e.start_datetime) BETWEEN ? AND ?
         """, (from_date.isoformat(), to_date.isoformat()))
+        events = [dict(row) for row in rows] + recurrence.expand_events(from_date, to_date)
+        events.sort(key=lambda e: e['start_datetime'] or '')
+        return events
 
-        self.metric_completed.findChild(QLabel, "metricValue").setText(
-            str(completed['count'] if completed else 0)
-        )
-
-        cancelled = db.fetch_one("""
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ? AND status = 'cancelled'
-        """, (from_date.isoformat(), to_date.isoformat()))
+    def load_overview_data(self):
+        from_date, to_date = self.get_date_range()
+        events = self.period_events(from_date, to_date)
+        statuses = Counter(e['status'] for e in events)
 
-        self.metric_cancelled.findChild(QLabel, "metricValue").setText(
-            str(cancelled['count'] if cancelled else 0)
-        )
+        self.metric_total_events.findChild(QLabel, "metricValue").setText(str(len(events)))
+        self.metric_completed.findChild(QLabel, "metricValue").setText(str(statuses['completed']))
+        self.metric_cancelled.findChild(QLabel, "metricValue").setText(str(statuses['cancelled']))
 
         days_diff = (to_date - from_date).days + 1
-        avg_per_day = (total['count'] if total else 0) / max(days_diff, 1)
+        avg_per_day = len(events) / max(days_diff, 1)
         self.metric_avg_per_day.findChild(QLabel, "metricValue").setText(f"{avg_per_day:.1f}")
 
-        types_data = db.fetch_all("""
-            SELECT event_type, COUNT(*) as count
-            FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ?
-            GROUP BY event_type
-            ORDER BY count DESC
-        """, (from_date.isoformat(), to_date.isoformat()))
+        types_data = Counter(e['event_type'] for e in events).most_common()
 
         type_names = {
             'service': 'Servis',
@@ -501,17 +498,11 @@ class CalendarReports(QWidget):
             'other': 'Jiné'
         }
 
-        chart_data = [(type_names.get(t['event_type'], t['event_type'][:6]), t['count']) for t in types_data]
+        chart_data = [(type_names.get(event_type, event_type[:6]), count) for event_type, count in types_data]
         self.events_type_chart.data = chart_data
         self.events_type_chart.update()
 
-        status_data = db.fetch_all("""
-            SELECT status, COUNT(*) as count
-            FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ?
-            GROUP BY status
-            ORDER BY count DESC
-        """, (from_date.isoformat(), to_date.isoformat()))
+        status_data = statuses.most_common()
 
         status_names = {
             'scheduled': '📅 Naplánováno',
@@ -522,9 +513,9 @@ class CalendarReports(QWidget):
         }
 
         self.events_status_list.clear()
-        for s in status_data:
-            status_name = status_names.get(s['status'], s['status'])
-            item = QListWidgetItem(f"{status_name}: {s['count']}")
+        for status, count in status_data:
+            status_name = status_names.get(status, status)
+            item = QListWidgetItem(f"{status_name}: {count}")
             self.events_status_list.addItem(item)
 
     def load_utilization_data(self):
@@ -540,12 +531,8 @@ class CalendarReports(QWidget):
 
         total_hours = working_days * 8
 
-        events_count = db.fetch_one("""
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ? AND status != 'cancelled'
-        """, (from_date.isoformat(), to_date.isoformat()))
-
-        used_hours = (events_count['count'] if events_count else 0) * 1
+        events = self.period_events(from_date, to_date)
+        used_hours = sum(1 for e in events if e['status'] != 'cancelled') * 1
 
         utilization = int((used_hours / max(total_hours, 1)) * 100)
         self.utilization_progress.setValue(min(utilization, 100))
@@ -554,69 +541,43 @@ class CalendarReports(QWidget):
         self.lbl_used_hours.setText(f"Využito hodin: {used_hours}")
         self.lbl_free_hours.setText(f"Volno hodin: {total_hours - used_hours}")
 
-        daily_data = db.fetch_all("""
-            SELECT
-                CASE strftime('%w', start_datetime)
-                    WHEN '0' THEN 'Ne'
-                    WHEN '1' THEN 'Po'
-                    WHEN '2' THEN 'Út'
-                    WHEN '3' THEN 'St'
-                    WHEN '4' THEN 'Čt'
-                    WHEN '5' THEN 'Pá'
-                    WHEN '6' THEN 'So'
-                END as day_name,
-                COUNT(*) as count
-            FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ?
-            GROUP BY strftime('%w', start_datetime)
-            ORDER BY
-                CASE strftime('%w', start_datetime)
-                    WHEN '1' THEN 1
-                    WHEN '2' THEN 2
-                    WHEN '3' THEN 3
-                    WHEN '4' THEN 4
-                    WHEN '5' THEN 5
-                    WHEN '6' THEN 6
-                    WHEN '0' THEN 7
-                END
-        """, (from_date.isoformat(), to_date.isoformat()))
-
-        chart_data = [(d['day_name'], d['count']) for d in daily_data]
+        starts = [datetime.fromisoformat(e['start_datetime']) for e in events if e['start_datetime']]
+        day_names = ['Po', 'Út', 'St', 'Čt', 'Pá', 'So', 'Ne']
+        daily_counts = Counter(dt.weekday() for dt in starts)
+        chart_data = [(day_names[day], daily_counts[day]) for day in sorted(daily_counts)]
         self.daily_chart.data = chart_data
         self.daily_chart.update()
 
-        hourly_data = db.fetch_all("""
-            SELECT
-                strftime('%H', start_datetime) as hour,
-                COUNT(*) as count
-            FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ?
-            GROUP BY strftime('%H', start_datetime)
-            ORDER BY count DESC
-            LIMIT 5
-        """, (from_date.isoformat(), to_date.isoformat()))
+        hourly_data = Counter(dt.strftime('%H') for dt in starts).most_common(5)
 
         self.hourly_list.clear()
-        for h in hourly_data:
-            item = QListWidgetItem(f"⏰ {h['hour']}:00 - {h['count']} událostí")
+        for hour, count in hourly_data:
+            item = QListWidgetItem(f"⏰ {hour}:00 - {count} událostí")
             self.hourly_list.addItem(item)
 
     def load_mechanics_data(self):
         from_date, to_date = self.get_date_range()
 
-        mechanics = db.fetch_all("""
-            SELECT
-                u.id, u.full_name,
-                COUNT(e.id) as total_events,
-                SUM(CASE WHEN e.status = 'completed' THEN 1 ELSE 0 END) as completed,
-                SUM(CASE WHEN e.status = 'cancelled' THEN 1 ELSE 0 END) as cancelled
+        users = db.fetch_all("""
+            SELECT u.id, u.full_name
             FROM users u
-            LEFT JOIN calendar_events e ON u.id = e.mechanic_id
-                AND DATE(e.start_datetime) BETWEEN ? AND ?
             WHERE u.role IN ('mechanik', 'admin') AND u.active = 1
-            GROUP BY u.id
-            ORDER BY total_events DESC
-        """, (from_date.isoformat(), to_date.isoformat()))
+        """)
+        by_mechanic = {}
+        for event in self.period_events(from_date, to_date):
+            by_mechanic.setdefault(event['mechanic_id'], []).append(event['status'])
+
+        mechanics = []
+        for user in users:
+            statuses = by_mechanic.get(user['id'], [])
+            mechanics.append({
+                'id': user['id'],
+                'full_name': user['full_name'],
+                'total_events': len(statuses),
+                'completed': statuses.count('completed'),
+                'cancelled': statuses.count('cancelled'),
+            })
+        mechanics.sort(key=lambda m: m['total_events'], reverse=True)
 
         self.mechanics_table.setRowCount(len(mechanics))
 
@@ -655,20 +616,8 @@ class CalendarReports(QWidget):
     def load_events_data(self):
         from_date, to_date = self.get_date_range()
 
-        cancelled = db.fetch_all("""
-            SELECT
-                e.start_datetime,
-                e.event_type,
-                e.notes,
-                c.first_name || ' ' || c.last_name as customer_name,
-                u.full_name as mechanic_name
-            FROM calendar_events e
-            LEFT JOIN customers c ON e.customer_id = c.id
-            LEFT JOIN users u ON e.mechanic_id = u.id
-            WHERE DATE(e.start_datetime) BETWEEN ? AND ? AND e.status = 'cancelled'
-            ORDER BY e.start_datetime DESC
-            LIMIT 20
-        """, (from_date.isoformat(), to_date.isoformat()))
+        cancelled = [e for e in self.period_events(from_date, to_date) if e['status'] == 'cancelled']
+        cancelled = cancelled[::-1][:20]
 
         type_names = {
             'service': 'Servis',
@@ -713,19 +662,11 @@ class CalendarReports(QWidget):
     def load_trends_data(self):
         current_year = date.today().year
 
-        monthly_data = db.fetch_all("""
-            SELECT
-                strftime('%m', start_datetime) as month,
-                COUNT(*) as count
-            FROM calendar_events
-            WHERE strftime('%Y', start_datetime) = ?
-            GROUP BY strftime('%m', start_datetime)
-            ORDER BY month
-        """, (str(current_year),))
+        events = self.period_events(date(current_year, 1, 1), date(current_year, 12, 31))
+        monthly_dict = Counter(e['start_datetime'][5:7] for e in events if e['start_datetime'])
 
         months = ['Led', 'Úno', 'Bře', 'Dub', 'Kvě', 'Čvn', 'Čvc', 'Srp', 'Zář', 'Říj', 'Lis', 'Pro']
 
-        monthly_dict = {m['month']: m['count'] for m in monthly_data}
         chart_data = []
         for i in range(1, 13):
             month_key = f"{i:02d}"
@@ -793,20 +734,7 @@ class CalendarReports(QWidget):
         if not file_path:
             return
 
-        events = db.fetch_all("""
-            SELECT
-                e.id, e.title, e.event_type, e.start_datetime, e.end_datetime,
-                e.status, e.priority,
-                c.first_name || ' ' || c.last_name as customer_name,
-                v.license_plate,
-                u.full_name as mechanic_name
-            FROM calendar_events e
-            LEFT JOIN customers c ON e.customer_id = c.id
-            LEFT JOIN vehicles v ON e.vehicle_id = v.id
-            LEFT JOIN users u ON e.mechanic_id = u.id
-            WHERE DATE(e.start_datetime) BETWEEN ? AND ?
-            ORDER BY e.start_datetime
-        """, (from_date.isoformat(), to_date.isoformat()))
+        events = self.period_events(from_date, to_date)
 
         try:
             with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
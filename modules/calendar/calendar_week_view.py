@@ -11,6 +11,7 @@ from PyQt6.QtCore import Qt, QDate, pyqtSignal, QTime, QTimer, QRect
 from PyQt6.QtGui import QFont, QPainter, QColor, QPen, QBrush
 from datetime import datetime, date, timedelta, time
 from database_manager import db
+from utils.utils_calendar import calendar_service
 import config
 
 
@@ -572,34 +573,8 @@ class CalendarWeekView(QWidget):
         """Načtení událostí pro týden"""
         week_end = self.week_start.addDays(6)
 
-        query = """
-            SELECT
-                e.id, e.title, e.description, e.event_type,
-                e.start_datetime, e.end_datetime, e.all_day,
-                e.customer_id, e.vehicle_id, e.order_id,
-                e.mechanic_id, e.priority, e.color, e.status,
-                c.first_name || ' ' || c.last_name as customer_name,
-                v.brand || ' ' || v.model || ' (' || v.license_plate || ')' as vehicle_info,
-                u.full_name as mechanic_name
-            FROM calendar_events e
-            LEFT JOIN customers c ON e.customer_id = c.id
-            LEFT JOIN vehicles v ON e.vehicle_id = v.id
-            LEFT JOIN users u ON e.mechanic_id = u.id
-            WHERE DATE(e.start_datetime) BETWEEN ? AND ?
-        """
-        params = [self.week_start.toString("yyyy-MM-dd"), week_end.toString("yyyy-MM-dd")]
-
-        if self.mechanic_filter:
-            query += " AND e.mechanic_id = ?"
-            params.append(self.mechanic_filter)
-
-        if self.event_type_filter:
-            query += " AND e.event_type = ?"
-            params.append(self.event_type_filter)
-
-        query += " ORDER BY e.start_datetime"
-
-        events = db.fetch_all(query, tuple(params))
+        events = calendar_service.event_rows(self.week_start.toPyDate(), week_end.toPyDate(),
+                                             self.mechanic_filter, self.event_type_filter)
         self.events_cache = {}
 
         # Umístění událostí do mřížky
@@ -656,31 +631,19 @@ class CalendarWeekView(QWidget):
         """Načtení statistik týdne"""
         week_end = self.week_start.addDays(6)
 
+        # Počty podle stavu jedním dotazem
+        counts = calendar_service.status_counts(self.week_start.toPyDate(), week_end.toPyDate())
+
         # Celkem událostí
-        query = """
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ? AND status != 'cancelled'
-        """
-        result = db.fetch_one(query, (self.week_start.toString("yyyy-MM-dd"), week_end.toString("yyyy-MM-dd")))
-        total = result['count'] if result else 0
+        total = sum(count for status, count in counts.items() if status and status != 'cancelled')
         self.lbl_week_events.setText(f"Celkem událostí: {total}")
 
         # Potvrzené
-        query = """
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ? AND status = 'confirmed'
-        """
-        result = db.fetch_one(query, (self.week_start.toString("yyyy-MM-dd"), week_end.toString("yyyy-MM-dd")))
-        confirmed = result['count'] if result else 0
+        confirmed = counts.get('confirmed', 0)
         self.lbl_week_confirmed.setText(f"Potvrzeno: {confirmed}")
 
         # Čeká na potvrzení
-        query = """
-            SELECT COUNT(*) as count FROM calendar_events
-            WHERE DATE(start_datetime) BETWEEN ? AND ? AND status = 'scheduled'
-        """
-        result = db.fetch_one(query, (self.week_start.toString("yyyy-MM-dd"), week_end.toString("yyyy-MM-dd")))
-        pending = result['count'] if result else 0
+        pending = counts.get('scheduled', 0)
         self.lbl_week_pending.setText(f"Čeká: {pending}")
 
         # Naplánované hodiny (zjednodušený výpočet)
@@ -697,15 +660,15 @@ class CalendarWeekView(QWidget):
             if item.widget():
                 item.widget().deleteLater()
 
-        today = date.today().isoformat()
+        today = date.today()
         query = """
             SELECT id, title, start_datetime, event_type, color
             FROM calendar_events
-            WHERE DATE(start_datetime) = ? AND status != 'cancelled'
+            WHERE start_datetime >= ? AND start_datetime < ? AND status != 'cancelled'
             ORDER BY start_datetime
             LIMIT 10
         """
-        events = db.fetch_all(query, (today,))
+        events = db.fetch_all(query, calendar_service.day_range(today, today))
 
         if not events:
             no_events = QLabel("Žádné události")
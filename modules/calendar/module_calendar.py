@@ -492,6 +492,8 @@ class CalendarModule(QWidget):
 
     def edit_event(self, event_id):
         from .calendar_event_dialog import CalendarEventDialog
+        # Výskyt opakující se události (záporné id) uloží dialog jako výjimku
+        # až při potvrzení
         dialog = CalendarEventDialog(event_id=event_id, parent=self)
         if dialog.exec():
             self.refresh()
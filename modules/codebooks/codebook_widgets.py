@@ -11,6 +11,7 @@ from PyQt6.QtGui import QFont
 from datetime import datetime
 import json
 import config
+from utils.utils_codebooks import codebooks
 
 # Import jednotlivých číselníků
 from modules.codebooks.codebook_brands import BrandsWidget
@@ -151,7 +152,7 @@ class CodebooksWidget(QWidget):
     def add_codebook_tabs(self):
         """Přidání záložek pro jednotlivé číselníky"""
         # Definice číselníků - (název záložky, tooltip, widget třída, klíč)
-        codebooks = [
+        codebook_defs = [
             ("�icing Výrobci", "Výrobci motocyklů", BrandsWidget, "brands"),
 
             ("🔧 Typy oprav", "Typy servisních oprav", RepairTypesWidget, "repair_types"),
@@ -165,10 +166,11 @@ class CodebooksWidget(QWidget):
             ("💱 Měny", "Měny", CurrenciesWidget, "currencies"),
         ]
 
-        for tab_name, tooltip, widget_class, key in codebooks:
+        for tab_name, tooltip, widget_class, key in codebook_defs:
             try:
                 widget = widget_class()
                 widget.data_changed.connect(self.on_data_changed)
+                widget.data_changed.connect(lambda k=key: codebooks.invalidate(k))
                 self.codebook_widgets[key] = widget
 
                 self.tabs.addTab(widget, tab_name)
@@ -380,6 +382,8 @@ class CodebooksWidget(QWidget):
 
             progress.setValue(len(backup_data["codebooks"]))
 
+            # Obnovená data - zahodit cache číselníků
+            codebooks.invalidate()
             self.update_stats()
 
             QMessageBox.information(
@@ -3,6 +3,8 @@
 Modul Číselníky - Hlavní vstupní bod (PRODUKČNÍ VERZE)
 """
 
+import importlib
+
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QLabel, QFrame, QStackedWidget, QScrollArea,
                              QMessageBox, QFileDialog)
@@ -10,6 +12,7 @@ from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 import config
 from database_manager import db
+from utils.utils_codebooks import codebooks
 
 
 class CodebooksModule(QWidget):
@@ -182,83 +185,50 @@ class CodebooksModule(QWidget):
         self.section_stack.setObjectName("codebooksSectionStack")
 
         # Vytvoření sekcí
-        self.create_section_widgets()
+        # Widgety sekcí se do stacku přidávají až při prvním otevření (get_section)
 
         content_layout.addWidget(self.section_stack)
 
         parent_layout.addWidget(content_widget)
 
-    def create_section_widgets(self):
-        """Vytvoření widgetů pro jednotlivé sekce"""
-        from .codebook_brands import BrandsWidget
-        from .codebook_vehicle_types import VehicleTypesWidget
-        from .codebook_fuel_types import FuelTypesWidget
-        from .codebook_colors import ColorsWidget
-        from .codebook_repair_types import RepairTypesWidget
-        from .codebook_order_statuses import OrderStatusesWidget
-        from .codebook_units import UnitsWidget
-        from .codebook_positions import PositionsWidget
-        from .codebook_hourly_rates import HourlyRatesWidget
-        from .codebook_customer_groups import CustomerGroupsWidget
-        from .codebook_payment_methods import PaymentMethodsWidget
-        from .codebook_vat_rates import VatRatesWidget
-        from .codebook_currencies import CurrenciesWidget
-
-        # Značky vozidel
-        self.sections["brands"] = BrandsWidget()
-        self.section_stack.addWidget(self.sections["brands"])
-
-        # Typy vozidel
-        self.sections["vehicle_types"] = VehicleTypesWidget()
-        self.section_stack.addWidget(self.sections["vehicle_types"])
-
-        # Typy paliva
-        self.sections["fuel_types"] = FuelTypesWidget()
-        self.section_stack.addWidget(self.sections["fuel_types"])
-
-        # Barvy
-        self.sections["colors"] = ColorsWidget()
-        self.section_stack.addWidget(self.sections["colors"])
-
-        # Typy oprav
-        self.sections["repair_types"] = RepairTypesWidget()
-        self.section_stack.addWidget(self.sections["repair_types"])
-
-        # Stavy zakázek
-        self.sections["order_statuses"] = OrderStatusesWidget()
-        self.section_stack.addWidget(self.sections["order_statuses"])
-
-        # Jednotky
-        self.sections["units"] = UnitsWidget()
-        self.section_stack.addWidget(self.sections["units"])
-
-        # Pozice
-        self.sections["positions"] = PositionsWidget()
-        self.section_stack.addWidget(self.sections["positions"])
-
-        # Hodinové sazby
-        self.sections["hourly_rates"] = HourlyRatesWidget()
-        self.section_stack.addWidget(self.sections["hourly_rates"])
-
-        # Zákaznické skupiny
-        self.sections["customer_groups"] = CustomerGroupsWidget()
-        self.section_stack.addWidget(self.sections["customer_groups"])
-
-        # Způsoby platby
-        self.sections["payment_methods"] = PaymentMethodsWidget()
-        self.section_stack.addWidget(self.sections["payment_methods"])
-
-        # Sazby DPH
-        self.sections["vat_rates"] = VatRatesWidget()
-        self.section_stack.addWidget(self.sections["vat_rates"])
-
-        # Měny
-        self.sections["currencies"] = CurrenciesWidget()
-        self.section_stack.addWidget(self.sections["currencies"])
+    # Sekce: id -> (modul, třída widgetu); widgety se vytváří až při prvním otevření
+    SECTION_WIDGETS = {
+        "brands": ("codebook_brands", "BrandsWidget"),                      # Značky vozidel
+        "vehicle_types": ("codebook_vehicle_types", "VehicleTypesWidget"),  # Typy vozidel
+        "fuel_types": ("codebook_fuel_types", "FuelTypesWidget"),           # Typy paliva
+        "colors": ("codebook_colors", "ColorsWidget"),                      # Barvy
+        "repair_types": ("codebook_repair_types", "RepairTypesWidget"),     # Typy oprav
+        "order_statuses": ("codebook_order_statuses", "OrderStatusesWidget"),  # Stavy zakázek
+        "units": ("codebook_units", "UnitsWidget"),                         # Jednotky
+        "positions": ("codebook_positions", "PositionsWidget"),             # Pozice
+        "hourly_rates": ("codebook_hourly_rates", "HourlyRatesWidget"),     # Hodinové sazby
+        "customer_groups": ("codebook_customer_groups", "CustomerGroupsWidget"),  # Zákaznické skupiny
+        "payment_methods": ("codebook_payment_methods", "PaymentMethodsWidget"),  # Způsoby platby
+        "vat_rates": ("codebook_vat_rates", "VatRatesWidget"),              # Sazby DPH
+        "currencies": ("codebook_currencies", "CurrenciesWidget"),          # Měny
+    }
+
+    def get_section(self, section_id):
+        """Widget sekce - při prvním přístupu ho naimportuje a vytvoří"""
+        if section_id in self.sections:
+            return self.sections[section_id]
+        if section_id not in self.SECTION_WIDGETS:
+            return None
+
+        module_name, class_name = self.SECTION_WIDGETS[section_id]
+        module = importlib.import_module(f".{module_name}", __package__)
+        widget = getattr(module, class_name)()
+        # Uložení v číselníku = přenačtení sdílené cache pro formuláře
+        if hasattr(widget, "data_changed"):
+            widget.data_changed.connect(lambda sid=section_id: codebooks.invalidate(sid))
+        self.sections[section_id] = widget
+        self.section_stack.addWidget(widget)
+        return widget
 
     def switch_section(self, section_id):
         """Přepnutí na jinou sekci"""
-        if section_id in self.sections:
+        section = self.get_section(section_id)
+        if section is not None:
             # Zvýraznění aktivního tlačítka
             for btn_id, btn in self.section_buttons.items():
                 btn.setProperty("active", btn_id == section_id)
@@ -266,7 +236,7 @@ class CodebooksModule(QWidget):
                 btn.style().polish(btn)
 
             # Přepnutí stacku
-            self.section_stack.setCurrentWidget(self.sections[section_id])
+            self.section_stack.setCurrentWidget(section)
             self.current_section = section_id
 
             # Aktualizace titulku
@@ -288,8 +258,8 @@ class CodebooksModule(QWidget):
             self.section_title.setText(section_titles.get(section_id, ""))
 
             # Refresh sekce a statistiky
-            if hasattr(self.sections[section_id], 'refresh'):
-                self.sections[section_id].refresh()
+            if hasattr(section, 'refresh'):
+                section.refresh()
 
             self.update_stats()
 
@@ -325,8 +295,9 @@ class CodebooksModule(QWidget):
                 "codebooks": {}
             }
 
-            # Export každého číselníku
-            for section_id, widget in self.sections.items():
+            # Export každého číselníku (i dosud neotevřených sekcí)
+            for section_id in self.SECTION_WIDGETS:
+                widget = self.get_section(section_id)
                 if hasattr(widget, 'export_data'):
                     export_data["codebooks"][section_id] = widget.export_data()
 
@@ -377,12 +348,14 @@ class CodebooksModule(QWidget):
             imported_count = 0
 
             for section_id, data in import_data["codebooks"].items():
-                if section_id in self.sections:
-                    widget = self.sections[section_id]
+                if section_id in self.SECTION_WIDGETS:
+                    widget = self.get_section(section_id)
                     if hasattr(widget, 'import_data'):
                         widget.import_data(data)
                         imported_count += 1
 
+            codebooks.invalidate()
+
             QMessageBox.information(
                 self,
                 "Úspěch",
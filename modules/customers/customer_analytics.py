@@ -262,10 +262,9 @@ class CustomerAnalyticsWidget(QWidget):
                         ELSE c.first_name || ' ' || c.last_name
                     END as name
                 FROM customers c
-                LEFT JOIN orders o ON c.id = o.customer_id
+                JOIN customer_stats s ON s.customer_id = c.id
                 WHERE c.is_active = 1
-                GROUP BY c.id
-                ORDER BY SUM(o.total_price) DESC
+                ORDER BY s.total_spent DESC
                 LIMIT 1
             """)
             self.stat_boxes["top_customer"].findChild(QLabel, "statValue").setText(top[0] if top else "-")
@@ -290,11 +289,11 @@ class CustomerAnalyticsWidget(QWidget):
             query = """
                 SELECT
                     c.customer_group,
-                    COUNT(DISTINCT c.id) as count,
-                    COALESCE(SUM(o.total_price), 0) as revenue,
-                    COALESCE(AVG(o.total_price), 0) as avg_revenue
+                    COUNT(*) as count,
+                    COALESCE(SUM(s.total_spent), 0) as revenue,
+                    COALESCE(SUM(s.total_spent) / NULLIF(SUM(s.order_count), 0), 0) as avg_revenue
                 FROM customers c
-                LEFT JOIN orders o ON c.id = o.customer_id
+                LEFT JOIN customer_stats s ON s.customer_id = c.id
                 WHERE c.is_active = 1
                 GROUP BY c.customer_group
                 ORDER BY revenue DESC
@@ -343,11 +342,11 @@ class CustomerAnalyticsWidget(QWidget):
             sort_by = self.cb_top_sort.currentText()
 
             if sort_by == "Útrata":
-                order_by = "SUM(o.total_price) DESC"
+                order_by = "s.total_spent DESC"
             elif sort_by == "Počet zakázek":
-                order_by = "COUNT(o.id) DESC"
+                order_by = "s.order_count DESC"
             else:  # Počet vozidel
-                order_by = "COUNT(DISTINCT v.id) DESC"
+                order_by = "s.vehicle_count DESC"
 
             query = f"""
                 SELECT
@@ -356,14 +355,12 @@ class CustomerAnalyticsWidget(QWidget):
                         ELSE c.first_name || ' ' || c.last_name
                     END as name,
                     c.customer_group,
-                    COUNT(DISTINCT o.id) as order_count,
-                    COUNT(DISTINCT v.id) as vehicle_count,
-                    COALESCE(SUM(o.total_price), 0) as revenue
+                    s.order_count,
+                    s.vehicle_count,
+                    s.total_spent as revenue
                 FROM customers c
-                LEFT JOIN orders o ON c.id = o.customer_id
-                LEFT JOIN vehicles v ON c.id = v.customer_id
+                JOIN customer_stats s ON s.customer_id = c.id
                 WHERE c.is_active = 1
-                GROUP BY c.id
                 ORDER BY {order_by}
                 LIMIT 10
             """
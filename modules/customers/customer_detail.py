@@ -378,11 +378,12 @@ class CustomerDetailWindow(QWidget):
             query = """
                 SELECT
                     c.*,
-                    (SELECT COUNT(*) FROM vehicles WHERE customer_id = c.id) as vehicle_count,
-                    (SELECT COUNT(*) FROM orders WHERE customer_id = c.id) as order_count,
-                    (SELECT COALESCE(SUM(total_price), 0) FROM orders WHERE customer_id = c.id) as total_spent,
-                    (SELECT MAX(created_at) FROM orders WHERE customer_id = c.id) as last_order
+                    COALESCE(s.vehicle_count, 0) as vehicle_count,
+                    COALESCE(s.order_count, 0) as order_count,
+                    COALESCE(s.total_spent, 0) as total_spent,
+                    s.last_order_at as last_order
                 FROM customers c
+                LEFT JOIN customer_stats s ON s.customer_id = c.id
                 WHERE c.id = ?
             """
 
@@ -248,12 +248,9 @@ class CustomerFinancialWidget(QWidget):
     def load_statistics(self):
         """Načtení statistik"""
         try:
-            # Celková útrata
-            total = db.fetch_one(
-                "SELECT COALESCE(SUM(total_price), 0) FROM orders WHERE customer_id = ?",
-                (self.customer_id,)
-            )
-            total_spent = total[0] if total else 0
+            # Celková útrata (souhrn udržovaný v customer_stats)
+            stats = db.get_customer_stats(self.customer_id)
+            total_spent = stats["total_spent"] or 0
             self.overview_labels["total_spent"].setText(f"{total_spent:,.0f} Kč".replace(",", " "))
 
             # Útrata tento rok
@@ -266,12 +263,8 @@ class CustomerFinancialWidget(QWidget):
             self.overview_labels["this_year"].setText(f"{year_spent:,.0f} Kč".replace(",", " "))
 
             # Průměrná útrata za rok
-            years = db.fetch_one(
-                "SELECT MIN(created_at) FROM orders WHERE customer_id = ?",
-                (self.customer_id,)
-            )
-            if years and years[0]:
-                first_order = datetime.fromisoformat(years[0])
+            if stats["first_order_at"]:
+                first_order = datetime.fromisoformat(stats["first_order_at"])
                 years_count = max(1, (datetime.now() - first_order).days / 365)
                 avg_year = total_spent / years_count
             else:
@@ -14,6 +14,7 @@ from PyQt6.QtCore import Qt, QDate, QRegularExpression
 from PyQt6.QtGui import QRegularExpressionValidator, QFont, QCursor
 import config
 from database_manager import db
+from utils.utils_codebooks import codebooks
 import re
 
 
@@ -286,7 +287,8 @@ class CustomerFormDialog(QDialog):
         layout.addRow("Splatnost faktur:", self.sb_payment_days)
 
         self.cb_payment_method = QComboBox()
-        self.cb_payment_method.addItems(["Bankovní převod", "Hotovost", "Platební karta", "Dobírka"])
+        codebooks.fill_combo(self.cb_payment_method, "payment_methods",
+                             ["Bankovní převod", "Hotovost", "Platební karta", "Dobírka"])
         layout.addRow("Platební metoda:", self.cb_payment_method)
 
         self.dsb_credit_limit = QDoubleSpinBox()
@@ -305,7 +307,8 @@ class CustomerFormDialog(QDialog):
         layout.setSpacing(10)
 
         self.cb_customer_group = QComboBox()
-        self.cb_customer_group.addItems(["Standardní", "VIP", "Firemní", "Pojišťovna"])
+        codebooks.fill_combo(self.cb_customer_group, "customer_groups",
+                             ["Standardní", "VIP", "Firemní", "Pojišťovna"])
         layout.addRow("Skupina *:", self.cb_customer_group)
 
         self.dsb_work_discount = QDoubleSpinBox()
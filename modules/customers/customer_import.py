@@ -8,14 +8,15 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QComboBox, QCheckBox, QGroupBox, QProgressBar,
     QMessageBox, QFileDialog, QTableWidget, QTableWidgetItem,
-    QHeaderView, QWizard, QWizardPage, QFrame
+    QHeaderView, QWizard, QWizardPage, QFrame, QApplication
 )
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QCursor
 import config
-from database_manager import db
+from utils.utils_import import (
+    run_import, load_lookup, lower_key, table_columns, TableReader, READABLE_FORMATS
+)
 from datetime import datetime
-import csv
 import os
 
 
@@ -28,10 +29,8 @@ class CustomerImporter:
         try:
             ext = os.path.splitext(file_path)[1].lower()
 
-            if ext == ".csv":
-                return CustomerImporter._preview_csv(file_path, rows)
-            elif ext in [".xls", ".xlsx"]:
-                return CustomerImporter._preview_excel(file_path, rows)
+            if ext in READABLE_FORMATS:
+                return CustomerImporter._preview_table(file_path, rows)
             elif ext == ".vcf":
                 return CustomerImporter._preview_vcard(file_path, rows)
             elif ext == ".json":
@@ -43,32 +42,10 @@ class CustomerImporter:
             return None, str(e)
 
     @staticmethod
-    def _preview_csv(file_path, rows):
-        """Náhled CSV souboru"""
-        data = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            # Detekce oddělovače
-            sample = f.read(1024)
-            f.seek(0)
-
-            if ';' in sample:
-                delimiter = ';'
-            else:
-                delimiter = ','
-
-            reader = csv.reader(f, delimiter=delimiter)
-            for i, row in enumerate(reader):
-                if i >= rows:
-                    break
-                data.append(row)
-
-        return data, None
-
-    @staticmethod
-    def _preview_excel(file_path, rows):
-        """Náhled Excel souboru"""
-        # Zde by byla implementace s openpyxl
-        return [], "Excel import bude implementován"
+    def _preview_table(file_path, rows):
+        """Náhled CSV/Excel souboru (čte jen začátek souboru)"""
+        reader = TableReader(file_path)
+        return [reader.headers] + reader.preview(rows - 1), None
 
     @staticmethod
     def _preview_vcard(file_path, rows):
@@ -86,21 +63,39 @@ class CustomerImporter:
         if isinstance(data, list) and data:
             headers = list(data[0].keys())
             result = [headers]
-            for i, item in enumerate(data[:rows-1]):
+            for item in (data if rows is None else data[:rows - 1]):
                 result.append([str(item.get(h, "")) for h in headers])
             return result, None
 
         return [], "Neplatný formát JSON"
 
     @staticmethod
-    def validate_data(data, mapping):
-        """Validace dat před importem"""
+    def open_rows(file_path):
+        """
+        Datové řádky souboru bez hlavičky (CSV/Excel se čtou proudově)
+
+        Returns:
+            (iterátor řádků, TableReader pro průběh nebo None)
+        """
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext in READABLE_FORMATS:
+            reader = TableReader(file_path)
+            return reader.rows(), reader
+
+        data, error = CustomerImporter.preview_file(file_path, rows=None)
+        if error or not data:
+            return iter(()), None
+        return iter(data[1:]), None
+
+    @staticmethod
+    def validate_data(rows, mapping):
+        """Validace dat před importem (rows = datové řádky bez hlavičky)"""
         errors = []
         warnings = []
 
         required_fields = ["email", "phone"]
 
-        for i, row in enumerate(data[1:], start=2):  # Skip header
+        for i, row in enumerate(rows, start=2):
             # Kontrola povinných polí
             for field in required_fields:
                 if field in mapping:
@@ -110,96 +105,89 @@ class CustomerImporter:
 
         return errors, warnings
 
+    # Pole průvodce, která se v tabulce customers jmenují jinak
+    FIELD_COLUMNS = {
+        "street": "address",
+        "zip": "postal_code",
+    }
+
     @staticmethod
-    def check_duplicates(data, mapping):
-        """Kontrola duplikátů"""
+    def check_duplicates(rows, mapping):
+        """Kontrola duplikátů (existující emaily a IČO načtené jedním dotazem)"""
         duplicates = []
 
         email_col = mapping.get("email", -1)
-        phone_col = mapping.get("phone", -1)
         ico_col = mapping.get("ico", -1)
 
-        for i, row in enumerate(data[1:], start=2):
+        emails = load_lookup("SELECT email, id FROM customers", key=lower_key) if email_col >= 0 else {}
+        icos = load_lookup("SELECT ico, id FROM customers") if ico_col >= 0 else {}
+
+        for i, row in enumerate(rows, start=2):
             # Kontrola emailu
-            if email_col >= 0 and email_col < len(row):
+            if 0 <= email_col < len(row):
                 email = row[email_col].strip()
-                if email:
-                    existing = db.fetch_one(
-                        "SELECT id FROM customers WHERE email = ?",
-                        (email,)
-                    )
-                    if existing:
-                        duplicates.append(f"Řádek {i}: Email {email} již existuje")
+                if email and lower_key(email) in emails:
+                    duplicates.append(f"Řádek {i}: Email {email} již existuje")
 
             # Kontrola IČO
-            if ico_col >= 0 and ico_col < len(row):
+            if 0 <= ico_col < len(row):
                 ico = row[ico_col].strip()
-                if ico:
-                    existing = db.fetch_one(
-                        "SELECT id FROM customers WHERE ico = ?",
-                        (ico,)
-                    )
-                    if existing:
-                        duplicates.append(f"Řádek {i}: IČO {ico} již existuje")
+                if ico and ico in icos:
+                    duplicates.append(f"Řádek {i}: IČO {ico} již existuje")
 
         return duplicates
 
     @staticmethod
-    def import_customers(data, mapping, settings):
-        """Import zákazníků"""
-        imported = 0
-        skipped = 0
-        errors = []
-
-        for i, row in enumerate(data[1:], start=2):  # Skip header
-            try:
-                customer_data = {}
-
-                for field, col_index in mapping.items():
-                    if col_index < len(row):
-                        customer_data[field] = row[col_index].strip()
-                    else:
-                        customer_data[field] = ""
-
-                # Přidat výchozí hodnoty
-                customer_data["customer_group"] = settings.get("default_group", "Standardní")
-                customer_data["is_active"] = 1
-                customer_data["has_debt"] = 0
-                customer_data["created_at"] = datetime.now().isoformat()
-
-                # Určit typ zákazníka
-                if customer_data.get("ico") or customer_data.get("company_name"):
-                    customer_data["customer_type"] = "company"
-                else:
-                    customer_data["customer_type"] = "personal"
-
-                # Kontrola duplikátů
-                if settings.get("skip_duplicates"):
-                    email = customer_data.get("email", "")
-                    if email:
-                        existing = db.fetch_one(
-                            "SELECT id FROM customers WHERE email = ?",
-                            (email,)
-                        )
-                        if existing:
-                            skipped += 1
-                            continue
-
-                # Vložení do databáze
-                columns = ", ".join(customer_data.keys())
-                placeholders = ", ".join(["?" for _ in customer_data])
-
-                db.execute(
-                    f"INSERT INTO customers ({columns}) VALUES ({placeholders})",
-                    list(customer_data.values())
-                )
+    def import_customers(rows, mapping, settings, progress=None):
+        """Import zákazníků (jedna transakce, zápis po dávkách; rows bez hlavičky)"""
+        columns = table_columns("customers")
+
+        # Jen pole, která mají v tabulce sloupec; jméno a příjmení jsou NOT NULL
+        fields = [f for f in mapping
+                  if CustomerImporter.FIELD_COLUMNS.get(f, f) in columns]
+        for required in ("first_name", "last_name"):
+            if required not in fields:
+                fields.append(required)
+
+        defaults = {
+            "customer_group": settings.get("default_group", "Standardní"),
+            "is_active": 1,
+            "has_debt": 0,
+            "created_at": datetime.now().isoformat(),
+        }
+        insert_columns = [CustomerImporter.FIELD_COLUMNS.get(f, f) for f in fields]
+        insert_columns += ["customer_type"] + list(defaults)
+        sql = (f"INSERT INTO customers ({', '.join(insert_columns)}) "
+               f"VALUES ({', '.join('?' for _ in insert_columns)})")
+
+        skip_duplicates = settings.get("skip_duplicates")
+        emails = load_lookup("SELECT email, id FROM customers", key=lower_key) if skip_duplicates else {}
+
+        def import_row(row_num, row, writer):
+            customer_data = {}
+            for field in fields:
+                col_index = mapping.get(field, -1)
+                customer_data[field] = row[col_index].strip() if 0 <= col_index < len(row) else ""
+
+            # Určit typ zákazníka
+            if customer_data.get("ico") or customer_data.get("company_name"):
+                customer_type = "company"
+            else:
+                customer_type = "personal"
 
-                imported += 1
+            # Kontrola duplikátů (i v rámci souboru)
+            if skip_duplicates:
+                email = lower_key(customer_data.get("email"))
+                if email:
+                    if email in emails:
+                        return "skipped"
+                    emails[email] = None
 
-            except Exception as e:
-                errors.append(f"Řádek {i}: {str(e)}")
+            writer.add(sql, [customer_data[f] for f in fields] + [customer_type] + list(defaults.values()))
+            return "imported"
 
-        return imported, skipped, errors
+        stats = run_import(rows, import_row, start_row=2, progress=progress)
+        return stats.imported, stats.skipped, stats.errors
 
 
 class ImportWizard(QWizard):
@@ -268,7 +256,7 @@ class FileSelectionPage(QWizardPage):
         formats_layout = QVBoxLayout(formats_group)
 
         formats_layout.addWidget(QLabel("• CSV (čárka nebo středník)"))
-        formats_layout.addWidget(QLabel("• Excel (XLS, XLSX)"))
+        formats_layout.addWidget(QLabel("• Excel (XLSX)"))
         formats_layout.addWidget(QLabel("• vCard (VCF)"))
         formats_layout.addWidget(QLabel("• JSON"))
 
@@ -290,7 +278,7 @@ class FileSelectionPage(QWizardPage):
             self,
             "Vybrat soubor pro import",
             "",
-            "CSV soubory (*.csv);;Excel soubory (*.xls *.xlsx);;vCard (*.vcf);;JSON (*.json);;Všechny soubory (*.*)"
+            "CSV soubory (*.csv);;Excel soubory (*.xlsx);;vCard (*.vcf);;JSON (*.json);;Všechny soubory (*.*)"
         )
 
         if file_path:
@@ -537,11 +525,12 @@ class ImportProgressPage(QWizardPage):
         self.progress.setValue(10)
 
         try:
+            # Soubor se při každém průchodu čte proudově znovu (náhled má jen 10 řádků)
+            path = self.wizard.file_path
+
             # Validace
-            errors, warnings = CustomerImporter.validate_data(
-                self.wizard.preview_data,
-                self.wizard.mapping
-            )
+            rows, _ = CustomerImporter.open_rows(path)
+            errors, warnings = CustomerImporter.validate_data(rows, self.wizard.mapping)
 
             if errors:
                 QMessageBox.critical(
@@ -555,21 +544,27 @@ class ImportProgressPage(QWizardPage):
             self.progress.setValue(30)
 
             # Kontrola duplikátů
-            duplicates = CustomerImporter.check_duplicates(
-                self.wizard.preview_data,
-                self.wizard.mapping
-            )
+            rows, _ = CustomerImporter.open_rows(path)
+            duplicates = CustomerImporter.check_duplicates(rows, self.wizard.mapping)
 
             if duplicates and self.wizard.settings.get("skip_duplicates"):
                 self.lbl_status.setText(f"Nalezeno {len(duplicates)} duplikátů")
 
             self.progress.setValue(50)
 
-            # Import
+            # Import - průběh 50-100 % podle přečtených bajtů
+            rows, reader = CustomerImporter.open_rows(path)
+
+            def on_progress(done):
+                if reader is not None:
+                    self.progress.setValue(50 + reader.progress_percent // 2)
+                QApplication.processEvents()
+
             imported, skipped, import_errors = CustomerImporter.import_customers(
-                self.wizard.preview_data,
+                rows,
                 self.wizard.mapping,
-                self.wizard.settings
+                self.wizard.settings,
+                progress=on_progress
             )
 
             self.progress.setValue(100)
@@ -6,14 +6,15 @@ Modul Zákazníci - Hlavní seznam zákazníků
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QLineEdit, QComboBox, QTableWidget, QTableWidgetItem,
-    QHeaderView, QFrame, QMenu, QMessageBox, QApplication,
-    QFileDialog, QAbstractItemView
+    QLineEdit, QComboBox, QFrame, QMenu, QMessageBox, QApplication,
+    QFileDialog
 )
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer
-from PyQt6.QtGui import QFont, QColor, QBrush, QCursor
+from PyQt6.QtGui import QFont, QCursor
 import config
 from database_manager import db
+from utils.utils_table_model import LazyTableView, TableColumn, ALIGN_CENTER, ALIGN_RIGHT
+from utils.utils_sql_search import SqlFilter, PagedQuery, DebouncedQuery
 from datetime import datetime, timedelta
 
 
@@ -22,11 +23,43 @@ class CustomersModule(QWidget):
 
     customer_selected = pyqtSignal(int)
 
+    # Seznam zákazníků - pořadí sloupců odpovídá indexům v create_table
+    SELECT_SQL = """
+        SELECT
+            c.id,
+            CASE
+                WHEN c.customer_type = 'company' THEN c.company_name
+                ELSE c.first_name || ' ' || c.last_name
+            END as name,
+            c.phone,
+            c.email,
+            c.city,
+            c.customer_group,
+            COALESCE(s.vehicle_count, 0) as vehicle_count,
+            COALESCE(s.order_count, 0) as order_count,
+            COALESCE(s.total_spent, 0) as total_spent,
+            s.last_order_at as last_order,
+            c.notes,
+            c.customer_type,
+            c.has_debt
+        FROM customers c
+        LEFT JOIN customer_stats s ON s.customer_id = c.id
+    """
+    COUNT_SQL = "SELECT COUNT(*) FROM customers c"
+
+    # Sloupce prohledávané vyhledávacím polem
+    SEARCH_COLUMNS = [
+        "c.first_name", "c.last_name", "c.company_name", "c.company",
+        "c.phone", "c.email", "c.city", "c.ico", "c.notes",
+    ]
+
     def __init__(self):
         super().__init__()
         self.current_filters = {}
+        self.search_query = DebouncedQuery(self)
+        self.search_query.results_ready.connect(self.populate_table)
         self.init_ui()
-        self.load_data()
+        # Data se načtou na pozadí při zobrazení modulu (MainWindow.switch_module)
 
     def init_ui(self):
         """Inicializace uživatelského rozhraní"""
@@ -153,7 +186,7 @@ class CustomersModule(QWidget):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("🔍 Hledat (jméno, telefon, email, IČO...)")
         self.search_input.setMinimumWidth(250)
-        self.search_input.textChanged.connect(self.apply_filters)
+        self.search_input.textChanged.connect(self.schedule_filters)
         filters_layout.addWidget(self.search_input)
 
         # Typ zákazníka
@@ -196,154 +229,106 @@ class CustomersModule(QWidget):
 
     def create_table(self, parent_layout):
         """Vytvoření tabulky zákazníků"""
-        self.table = QTableWidget()
-        self.table.setObjectName("customersTable")
+        debt_bg = lambda c: "#ffcccc" if c[12] else None
 
-        # Nastavení sloupců
+        # Sloupce nad tuple z load_data (index = pozice ve SELECTu)
         columns = [
-            "ID", "Jméno / Firma", "Telefon", "Email", "Město",
-            "Skupina", "Vozidla", "Zakázky", "Útrata", "Poslední zakázka", "Poznámka"
+            TableColumn("ID", 0, hidden=True, sql="c.id"),
+            TableColumn("Jméno / Firma", 1, bold=True, background=debt_bg, stretch=True, sql="name"),
+            TableColumn("Telefon", 2, background=debt_bg, sql="c.phone"),
+            TableColumn("Email", 3, background=debt_bg, sql="c.email"),
+            TableColumn("Město", 4, background=debt_bg, sql="c.city"),
+            TableColumn("Skupina", 5, formatter=lambda v: str(v or "Standardní"),
+                        align=ALIGN_CENTER, background=lambda c: self.get_group_color(c[5]),
+                        sql="c.customer_group"),
+            TableColumn("Vozidla", 6, formatter=lambda v: str(v or 0), align=ALIGN_CENTER, background=debt_bg,
+                        sql="vehicle_count"),
+            TableColumn("Zakázky", 7, formatter=lambda v: str(v or 0), align=ALIGN_CENTER, background=debt_bg,
+                        sql="order_count"),
+            TableColumn("Útrata", 8, formatter=lambda v: f"{v or 0:,.0f} Kč".replace(",", " "),
+                        align=ALIGN_RIGHT, background=debt_bg, sql="total_spent"),
+            TableColumn("Poslední zakázka", 9, formatter=self.format_last_order, background=debt_bg,
+                        sql="last_order"),
+            TableColumn("Poznámka", 10, formatter=self.format_notes, background=debt_bg, stretch=True,
+                        sql="c.notes"),
         ]
-        self.table.setColumnCount(len(columns))
-        self.table.setHorizontalHeaderLabels(columns)
-
-        # Skrytí ID sloupce
-        self.table.setColumnHidden(0, True)
-
-        # Nastavení hlavičky
-        header = self.table.horizontalHeader()
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(4, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(5, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(6, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(7, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(8, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(9, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(10, QHeaderView.ResizeMode.Stretch)
-
-        # Nastavení chování
-        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
-        self.table.setAlternatingRowColors(True)
+
+        self.table = LazyTableView(columns)
+        self.table.setObjectName("customersTable")
+
+        # Nastavení chování (výchozí řazení podle jména jako v SQL)
+        self.table.horizontalHeader().setSortIndicator(1, Qt.SortOrder.AscendingOrder)
         self.table.setSortingEnabled(True)
         self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
 
-        # Signály
+        # Signály (řazení stránkovaných dat provádí SQL)
+        self.table.table_model.sort_requested.connect(self.apply_filters)
         self.table.doubleClicked.connect(self.open_customer_detail)
         self.table.customContextMenuRequested.connect(self.show_context_menu)
 
         parent_layout.addWidget(self.table)
 
+    @staticmethod
+    def format_last_order(value):
+        """Datum poslední zakázky ve formátu dd.mm.rrrr"""
+        if not value:
+            return ""
+        try:
+            return datetime.fromisoformat(value).strftime("%d.%m.%Y")
+        except (TypeError, ValueError):
+            return str(value)
+
+    @staticmethod
+    def format_notes(value):
+        """Zkrácená poznámka"""
+        notes = str(value or "")
+        return notes[:50] + "..." if len(notes) > 50 else notes
+
     def load_data(self):
         """Načtení dat z databáze"""
-        try:
-            # Načtení zákazníků
-            query = """
-                SELECT
-                    c.id,
-                    CASE
-                        WHEN c.customer_type = 'company' THEN c.company_name
-                        ELSE c.first_name || ' ' || c.last_name
-                    END as name,
-                    c.phone,
-                    c.email,
-                    c.city,
-                    c.customer_group,
-                    (SELECT COUNT(*) FROM vehicles WHERE customer_id = c.id) as vehicle_count,
-                    (SELECT COUNT(*) FROM orders WHERE customer_id = c.id) as order_count,
-                    (SELECT COALESCE(SUM(total_price), 0) FROM orders WHERE customer_id = c.id) as total_spent,
-                    (SELECT MAX(created_at) FROM orders WHERE customer_id = c.id) as last_order,
-                    c.notes,
-                    c.customer_type,
-                    c.has_debt
-                FROM customers c
-                WHERE c.is_active = 1
-                ORDER BY name
-            """
-
-            customers = db.fetch_all(query)
-            self.populate_table(customers if customers else [])
-            self.update_statistics()
+        self.update_statistics()
+        self.apply_filters()
 
-        except Exception as e:
-            print(f"Chyba při načítání zákazníků: {e}")
-            self.populate_table([])
-
-    def populate_table(self, customers):
-        """Naplnění tabulky daty"""
-        self.table.setRowCount(0)
-
-        for customer in customers:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-
-            # ID
-            id_item = QTableWidgetItem(str(customer[0]))
-            self.table.setItem(row, 0, id_item)
-
-            # Jméno / Firma
-            name_item = QTableWidgetItem(str(customer[1] or ""))
-            name_font = QFont()
-            name_font.setBold(True)
-            name_item.setFont(name_font)
-            self.table.setItem(row, 1, name_item)
-
-            # Telefon
-            self.table.setItem(row, 2, QTableWidgetItem(str(customer[2] or "")))
-
-            # Email
-            self.table.setItem(row, 3, QTableWidgetItem(str(customer[3] or "")))
-
-            # Město
-            self.table.setItem(row, 4, QTableWidgetItem(str(customer[4] or "")))
-
-            # Skupina (s barvou)
-            group_item = QTableWidgetItem(str(customer[5] or "Standardní"))
-            group_color = self.get_group_color(customer[5])
-            group_item.setBackground(QBrush(QColor(group_color)))
-            group_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.table.setItem(row, 5, group_item)
-
-            # Počet vozidel
-            vehicles_item = QTableWidgetItem(str(customer[6] or 0))
-            vehicles_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.table.setItem(row, 6, vehicles_item)
-
-            # Počet zakázek
-            orders_item = QTableWidgetItem(str(customer[7] or 0))
-            orders_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.table.setItem(row, 7, orders_item)
-
-            # Celková útrata
-            spent = customer[8] or 0
-            spent_item = QTableWidgetItem(f"{spent:,.0f} Kč".replace(",", " "))
-            spent_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table.setItem(row, 8, spent_item)
-
-            # Poslední zakázka
-            last_order = customer[9] or ""
-            if last_order:
-                try:
-                    dt = datetime.fromisoformat(last_order)
-                    last_order = dt.strftime("%d.%m.%Y")
-                except:
-                    pass
-            self.table.setItem(row, 9, QTableWidgetItem(last_order))
-
-            # Poznámka
-            notes = str(customer[10] or "")
-            if len(notes) > 50:
-                notes = notes[:50] + "..."
-            self.table.setItem(row, 10, QTableWidgetItem(notes))
-
-            # Červené pozadí pro dlužníky
-            if customer[12]:  # has_debt
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    if item and col != 5:  # Nezměnit barvu skupiny
-                        item.setBackground(QBrush(QColor("#ffcccc")))
+    def build_query(self):
+        """Sestavení stránkovaného dotazu z vyhledávání a filtrů"""
+        flt = SqlFilter()
+        flt.add("c.is_active = 1")
+        flt.add_search(self.search_input.text(), self.SEARCH_COLUMNS)
+
+        # Typ zákazníka (starší záznamy mají výchozí 'fyzická' místo 'personal')
+        filter_type = self.filter_type.currentText()
+        if filter_type == "Soukromá osoba":
+            flt.add("COALESCE(c.customer_type, '') <> ?", "company")
+        elif filter_type == "Firma":
+            flt.add("c.customer_type = ?", "company")
+
+        # Skupina
+        filter_group = self.filter_group.currentText()
+        if filter_group != "Vše":
+            flt.add("COALESCE(c.customer_group, 'Standardní') = ?", filter_group)
+
+        # Aktivita (zakázka za poslední rok - stejně jako ve statistikách)
+        filter_activity = self.filter_activity.currentText()
+        if filter_activity != "Vše":
+            year_ago = (datetime.now() - timedelta(days=365)).isoformat()
+            exists = "EXISTS (SELECT 1 FROM orders o WHERE o.customer_id = c.id AND o.created_at >= ?)"
+            if filter_activity == "Neaktivní":
+                exists = "NOT " + exists
+            flt.add(exists, year_ago)
+
+        # Pohledávky
+        filter_debt = self.filter_debt.currentText()
+        if filter_debt == "Bez dluhů":
+            flt.add("COALESCE(c.has_debt, 0) = 0")
+        elif filter_debt == "S pohledávkami":
+            flt.add("c.has_debt = 1")
+
+        order_by = self.table.table_model.sql_order_by("name ASC")
+        return PagedQuery(self.SELECT_SQL, self.COUNT_SQL, flt.where(), order_by=order_by)
+
+    def populate_table(self, total, customers, query):
+        """Naplnění tabulky první stránkou, další stránky se dotahují při scrollu"""
+        self.table.set_rows(customers, total=total, page_loader=query.page_loader())
 
     def get_group_color(self, group):
         """Vrátí barvu pro skupinu zákazníka"""
@@ -357,83 +342,83 @@ class CustomersModule(QWidget):
 
     def update_statistics(self):
         """Aktualizace statistik"""
-        try:
-            # Celkem
-            total = db.fetch_one("SELECT COUNT(*) FROM customers WHERE is_active = 1")
-            self.stat_labels["total"].setText(str(total[0] if total else 0))
-
-            # Firemní
-            company = db.fetch_one("SELECT COUNT(*) FROM customers WHERE customer_type = 'company' AND is_active = 1")
-            self.stat_labels["company"].setText(str(company[0] if company else 0))
+        self.show_statistics(self.fetch_statistics())
 
-            # Soukromé
-            personal = db.fetch_one("SELECT COUNT(*) FROM customers WHERE customer_type = 'personal' AND is_active = 1")
-            self.stat_labels["personal"].setText(str(personal[0] if personal else 0))
+    def fetch_statistics(self):
+        """Počty pro statistické karty (bez přístupu k widgetům - lze volat z vlákna)"""
+        stats = {}
+        try:
+            # Celkem, firemní, soukromé, VIP, dlužníci - jedním průchodem
+            row = db.fetch_one("""
+                SELECT
+                    COUNT(*),
+                    SUM(CASE WHEN customer_type = 'company' THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN customer_type = 'personal' THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN customer_group = 'VIP' THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN has_debt = 1 THEN 1 ELSE 0 END)
+                FROM customers
+                WHERE is_active = 1
+            """)
+            if row:
+                for key, value in zip(("total", "company", "personal", "vip", "debtors"), row):
+                    stats[key] = value or 0
 
             # Aktivní (zakázka za poslední rok)
             year_ago = (datetime.now() - timedelta(days=365)).isoformat()
-            active = db.fetch_one(f"""
+            active = db.fetch_one("""
                 SELECT COUNT(DISTINCT c.id) FROM customers c
                 INNER JOIN orders o ON c.id = o.customer_id
-                WHERE o.created_at >= '{year_ago}' AND c.is_active = 1
-            """)
-            self.stat_labels["active"].setText(str(active[0] if active else 0))
-
-            # VIP
-            vip = db.fetch_one("SELECT COUNT(*) FROM customers WHERE customer_group = 'VIP' AND is_active = 1")
-            self.stat_labels["vip"].setText(str(vip[0] if vip else 0))
-
-            # Dlužníci
-            debtors = db.fetch_one("SELECT COUNT(*) FROM customers WHERE has_debt = 1 AND is_active = 1")
-            self.stat_labels["debtors"].setText(str(debtors[0] if debtors else 0))
+                WHERE o.created_at >= ? AND c.is_active = 1
+            """, (year_ago,))
+            stats["active"] = active[0] if active else 0
 
         except Exception as e:
             print(f"Chyba při aktualizaci statistik: {e}")
+        return stats
 
-    def apply_filters(self):
-        """Aplikace filtrů na tabulku"""
-        search_text = self.search_input.text().lower()
-        filter_type = self.filter_type.currentText()
-        filter_group = self.filter_group.currentText()
-        filter_activity = self.filter_activity.currentText()
-        filter_debt = self.filter_debt.currentText()
+    def show_statistics(self, stats):
+        """Zobrazení statistik v kartách"""
+        for key, label in self.stat_labels.items():
+            label.setText(str(stats.get(key, 0)))
 
-        for row in range(self.table.rowCount()):
-            show_row = True
+    # ------------------------- NAČÍTÁNÍ NA POZADÍ -------------------------
 
-            # Vyhledávání
-            if search_text:
-                row_text = ""
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    if item:
-                        row_text += item.text().lower() + " "
-                if search_text not in row_text:
-                    show_row = False
+    def fetch_data(self, params=None):
+        """Statistiky modulu (pracovní vlákno)"""
+        return self.fetch_statistics()
 
-            # Filtr skupiny
-            if filter_group != "Vše" and show_row:
-                group_item = self.table.item(row, 5)
-                if group_item and group_item.text() != filter_group:
-                    show_row = False
+    def apply_data(self, stats):
+        """Zobrazení statistik a spuštění dotazu seznamu (ten běží ve vlastním vlákně)"""
+        self.show_statistics(stats)
+        self.apply_filters()
 
-            self.table.setRowHidden(row, not show_row)
+    def schedule_filters(self):
+        """Vyhledávání při psaní - dotaz až po dopsání, běžící dotaz se zruší"""
+        self.search_query.schedule(self.build_query)
+
+    def apply_filters(self):
+        """Aplikace filtrů - dotaz do databáze ihned"""
+        self.search_query.run_now(self.build_query)
 
     def reset_filters(self):
         """Reset všech filtrů"""
+        widgets = [self.search_input, self.filter_type, self.filter_group,
+                   self.filter_activity, self.filter_debt]
+        for widget in widgets:
+            widget.blockSignals(True)
         self.search_input.clear()
         self.filter_type.setCurrentIndex(0)
         self.filter_group.setCurrentIndex(0)
         self.filter_activity.setCurrentIndex(0)
         self.filter_debt.setCurrentIndex(0)
+        for widget in widgets:
+            widget.blockSignals(False)
 
-        for row in range(self.table.rowCount()):
-            self.table.setRowHidden(row, False)
+        self.apply_filters()
 
     def show_context_menu(self, position):
         """Zobrazení kontextového menu"""
-        item = self.table.itemAt(position)
-        if not item:
+        if self.table.record_at(position) is None:
             return
 
         menu = QMenu(self)
@@ -458,11 +443,9 @@ class CustomersModule(QWidget):
 
     def get_selected_customer_id(self):
         """Získání ID vybraného zákazníka"""
-        current_row = self.table.currentRow()
-        if current_row >= 0:
-            id_item = self.table.item(current_row, 0)
-            if id_item:
-                return int(id_item.text())
+        customer = self.table.current_record()
+        if customer:
+            return int(customer[0])
         return None
 
     def add_customer(self):
@@ -490,21 +473,17 @@ class CustomersModule(QWidget):
 
     def copy_phone(self):
         """Kopírování telefonu do schránky"""
-        current_row = self.table.currentRow()
-        if current_row >= 0:
-            phone_item = self.table.item(current_row, 2)
-            if phone_item:
-                QApplication.clipboard().setText(phone_item.text())
-                QMessageBox.information(self, "Zkopírováno", "Telefon zkopírován do schránky")
+        customer = self.table.current_record()
+        if customer:
+            QApplication.clipboard().setText(str(customer[2] or ""))
+            QMessageBox.information(self, "Zkopírováno", "Telefon zkopírován do schránky")
 
     def copy_email(self):
         """Kopírování emailu do schránky"""
-        current_row = self.table.currentRow()
-        if current_row >= 0:
-            email_item = self.table.item(current_row, 3)
-            if email_item:
-                QApplication.clipboard().setText(email_item.text())
-                QMessageBox.information(self, "Zkopírováno", "Email zkopírován do schránky")
+        customer = self.table.current_record()
+        if customer:
+            QApplication.clipboard().setText(str(customer[3] or ""))
+            QMessageBox.information(self, "Zkopírováno", "Email zkopírován do schránky")
 
     def show_vehicles(self):
         """Zobrazení vozidel zákazníka"""
@@ -520,12 +499,10 @@ class CustomersModule(QWidget):
 
     def send_email(self):
         """Odeslání emailu"""
-        current_row = self.table.currentRow()
-        if current_row >= 0:
-            email_item = self.table.item(current_row, 3)
-            if email_item and email_item.text():
-                import webbrowser
-                webbrowser.open(f"mailto:{email_item.text()}")
+        customer = self.table.current_record()
+        if customer and customer[3]:
+            import webbrowser
+            webbrowser.open(f"mailto:{customer[3]}")
 
     def send_sms(self):
         """Odeslání SMS"""
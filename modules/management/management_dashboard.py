@@ -9,6 +9,8 @@ from PyQt6.QtGui import QFont
 from .management_widgets import (MetricCard, TrendCard, LineChartWidget,
                                  BarChartWidget, PieChartWidget)
 from database_manager import db
+from utils.utils_metrics import metrics
+from utils.utils_rollups import rollups, months_ago, days_ago
 from datetime import datetime, timedelta
 
 
@@ -21,7 +23,7 @@ class ManagementDashboard(QWidget):
         self.date_from = None
         self.date_to = None
         self.init_ui()
-        self.refresh()
+        # Data se načtou na pozadí při zobrazení sekce (ManagementModule.refresh_section)
 
     def init_ui(self):
         """Inicializace UI"""
@@ -174,161 +176,117 @@ class ManagementDashboard(QWidget):
         parent_layout.addWidget(actions_frame)
 
     def refresh(self):
-        """Refresh dat dashboardu"""
+        """Refresh dat dashboardu (synchronně)"""
+        self.apply_data(self.fetch_data(self.load_params()))
+
+    def set_date_range(self, date_from, date_to):
+        """Nastavení období"""
+        self.date_from = date_from
+        self.date_to = date_to
+
+    # ------------------------- NAČÍTÁNÍ NA POZADÍ -------------------------
+
+    def load_params(self):
+        """Období z GUI (volá se v GUI vlákně)"""
         if self.date_from is None or self.date_to is None:
             # Výchozí období - poslední měsíc
             self.date_to = QDate.currentDate()
             self.date_from = self.date_to.addMonths(-1)
+        return self.date_from.toString("yyyy-MM-dd"), self.date_to.toString("yyyy-MM-dd")
 
-        self.load_metrics()
-        self.load_charts()
+    def fetch_data(self, params):
+        """Dotazy dashboardu (pracovní vlákno - bez přístupu k widgetům)"""
+        date_from_str, date_to_str = params
+        data = {"metrics": None, "charts": None}
 
-    def set_date_range(self, date_from, date_to):
-        """Nastavení období"""
-        self.date_from = date_from
-        self.date_to = date_to
+        try:
+            data["metrics"] = metrics.management_metrics(date_from_str, date_to_str)
+        except Exception as e:
+            print(f"Chyba při načítání metrik: {e}")
 
-    def load_metrics(self):
-        """Načtení metrik"""
         try:
-            # Převod QDate na string pro SQL
-            date_from_str = self.date_from.toString("yyyy-MM-dd")
-            date_to_str = self.date_to.toString("yyyy-MM-dd")
+            charts = {}
+            # Graf obratu v čase (posledních 12 měsíců)
+            charts["revenue_trend"] = [(b.period, b.revenue)
+                                       for b in rollups.series("month", months_ago(12))]
 
-            # Celkový obrat
-            query_revenue = """
-                SELECT COALESCE(SUM(total_price), 0) as total
-                FROM orders
-                WHERE order_date BETWEEN ? AND ?
-                AND status != 'cancelled'
-            """
-            result = db.fetch_one(query_revenue, (date_from_str, date_to_str))
-            total_revenue = result[0] if result else 0
+            # Top 5 mechaniků
+            charts["top_mechanics"] = db.fetch_all("""
+                SELECT
+                    u.name,
+                    COALESCE(SUM(wl.hours_worked), 0) as total_hours
+                FROM users u
+                LEFT JOIN order_work_log wl ON u.user_id = wl.user_id
+                    AND wl.date BETWEEN ? AND ?
+                WHERE u.role = 'mechanic' AND u.active = 1
+                GROUP BY u.user_id, u.name
+                ORDER BY total_hours DESC
+                LIMIT 5
+            """, (date_from_str, date_to_str))
 
-            # Předchozí období pro trend
-            days_diff = self.date_from.daysTo(self.date_to)
-            prev_date_to = self.date_from.addDays(-1)
-            prev_date_from = prev_date_to.addDays(-days_diff)
+            # Rozdělení zakázek podle typu
+            charts["order_types"] = [(b.period, b.orders)
+                                     for b in rollups.by_type(date_from_str, date_to_str)]
 
-            prev_revenue_query = """
-                SELECT COALESCE(SUM(total_price), 0) as total
-                FROM orders
-                WHERE order_date BETWEEN ? AND ?
-                AND status != 'cancelled'
-            """
-            prev_result = db.fetch_one(prev_revenue_query,
-                                      (prev_date_from.toString("yyyy-MM-dd"),
-                                       prev_date_to.toString("yyyy-MM-dd")))
-            prev_revenue = prev_result[0] if prev_result else 0
+            # Trendy prodeje (týdenní)
+            charts["sales_trend"] = [(b.period, b.orders)
+                                     for b in rollups.series("week", days_ago(84))]
+            data["charts"] = charts
+        except Exception as e:
+            print(f"Chyba při načítání grafů: {e}")
+
+        return data
 
-            # Výpočet trendu
-            revenue_trend = 0
-            if prev_revenue > 0:
-                revenue_trend = ((total_revenue - prev_revenue) / prev_revenue) * 100
+    def apply_data(self, data):
+        """Naplnění karet a grafů (GUI vlákno)"""
+        if data["metrics"] is not None:
+            self.load_metrics(data["metrics"])
+        if data["charts"] is not None:
+            self.load_charts(data["charts"])
 
+    def load_metrics(self, m):
+        """Zobrazení metrik (všechny karty za období i předchozí období najednou)"""
+        try:
+            # Celkový obrat
+            revenue_trend = m.revenue.change_pct
             self.card_revenue.set_value(
-                f"{total_revenue:,.0f} Kč",
+                f"{m.revenue.current:,.0f} Kč",
                 f"{abs(revenue_trend):.1f}%",
                 revenue_trend >= 0
             )
 
             # Počet zakázek
-            query_orders = """
-                SELECT COUNT(*) as count
-                FROM orders
-                WHERE order_date BETWEEN ? AND ?
-                AND status != 'cancelled'
-            """
-            result = db.fetch_one(query_orders, (date_from_str, date_to_str))
-            orders_count = result[0] if result else 0
-
-            # Předchozí období
-            prev_orders = db.fetch_one(query_orders,
-                                      (prev_date_from.toString("yyyy-MM-dd"),
-                                       prev_date_to.toString("yyyy-MM-dd")))
-            prev_orders_count = prev_orders[0] if prev_orders else 0
-
-            orders_trend = 0
-            if prev_orders_count > 0:
-                orders_trend = ((orders_count - prev_orders_count) / prev_orders_count) * 100
-
+            orders_trend = m.orders.change_pct
             self.card_orders.set_value(
-                f"{orders_count}",
+                f"{m.orders.current:.0f}",
                 f"{abs(orders_trend):.1f}%",
                 orders_trend >= 0
             )
 
             # Průměrná hodnota zakázky
-            avg_order = total_revenue / orders_count if orders_count > 0 else 0
-            self.card_avg_order.set_value(f"{avg_order:,.0f} Kč")
+            self.card_avg_order.set_value(f"{m.avg_order.current:,.0f} Kč")
 
             # Marže
-            query_margin = """
-                SELECT
-                    COALESCE(SUM(total_price), 0) as revenue,
-                    COALESCE(SUM(material_cost), 0) as costs
-                FROM orders
-                WHERE order_date BETWEEN ? AND ?
-                AND status != 'cancelled'
-            """
-            result = db.fetch_one(query_margin, (date_from_str, date_to_str))
-            if result:
-                revenue = result[0]
-                costs = result[1]
-                margin = ((revenue - costs) / revenue * 100) if revenue > 0 else 0
-
-                # Předchozí období
-                prev_result = db.fetch_one(query_margin,
-                                          (prev_date_from.toString("yyyy-MM-dd"),
-                                           prev_date_to.toString("yyyy-MM-dd")))
-                prev_margin = 0
-                if prev_result and prev_result[0] > 0:
-                    prev_margin = ((prev_result[0] - prev_result[1]) / prev_result[0] * 100)
-
-                margin_trend = margin - prev_margin
-
-                self.card_margin.set_value(
-                    f"{margin:.1f}%",
-                    f"{abs(margin_trend):.1f}%",
-                    margin_trend >= 0
-                )
-            else:
-                self.card_margin.set_value("0%", "0%", True)
+            margin_trend = m.margin.diff
+            self.card_margin.set_value(
+                f"{m.margin.current:.1f}%",
+                f"{abs(margin_trend):.1f}%",
+                margin_trend >= 0
+            )
 
             # Odpracované hodiny
-            query_hours = """
-                SELECT COALESCE(SUM(hours_worked), 0) as total_hours
-                FROM order_work_log
-                WHERE date BETWEEN ? AND ?
-            """
-            result = db.fetch_one(query_hours, (date_from_str, date_to_str))
-            total_hours = result[0] if result else 0
-            self.card_hours.set_value(f"{total_hours:.1f} h")
-
-            # Využití mechaniků
-            query_mechanics = """
-                SELECT COUNT(DISTINCT user_id) as mechanic_count
-                FROM users
-                WHERE role = 'mechanic' AND active = 1
-            """
-            result = db.fetch_one(query_mechanics)
-            mechanic_count = result[0] if result else 1
-
-            # Pracovní dny v období
-            working_days = self.calculate_working_days(self.date_from, self.date_to)
-            expected_hours = mechanic_count * working_days * 8  # 8 hodin denně
-
-            utilization = (total_hours / expected_hours * 100) if expected_hours > 0 else 0
-
-            # Předchozí období
-            prev_hours = db.fetch_one(query_hours,
-                                     (prev_date_from.toString("yyyy-MM-dd"),
-                                      prev_date_to.toString("yyyy-MM-dd")))
-            prev_total_hours = prev_hours[0] if prev_hours else 0
-            prev_working_days = self.calculate_working_days(prev_date_from, prev_date_to)
-            prev_expected = mechanic_count * prev_working_days * 8
-            prev_utilization = (prev_total_hours / prev_expected * 100) if prev_expected > 0 else 0
-
+            self.card_hours.set_value(f"{m.hours.current:.1f} h")
+
+            # Využití mechaniků (8 hodin denně v pracovní dny)
+            cur_from = QDate.fromString(m.period[0], "yyyy-MM-dd")
+            cur_to = QDate.fromString(m.period[1], "yyyy-MM-dd")
+            prev_from = QDate.fromString(m.previous_period[0], "yyyy-MM-dd")
+            prev_to = QDate.fromString(m.previous_period[1], "yyyy-MM-dd")
+            expected = m.mechanic_count * self.calculate_working_days(cur_from, cur_to) * 8
+            prev_expected = m.mechanic_count * self.calculate_working_days(prev_from, prev_to) * 8
+
+            utilization = (m.hours.current / expected * 100) if expected > 0 else 0
+            prev_utilization = (m.hours.previous / prev_expected * 100) if prev_expected > 0 else 0
             util_trend = utilization - prev_utilization
 
             self.card_mechanic_util.set_value(
@@ -337,81 +295,29 @@ class ManagementDashboard(QWidget):
                 util_trend >= 0
             )
 
-            # Hodnota skladu
-            query_warehouse = """
-                SELECT COALESCE(SUM(quantity * purchase_price), 0) as value
-                FROM warehouse_items
-            """
-            result = db.fetch_one(query_warehouse)
-            warehouse_value = result[0] if result else 0
-            self.card_warehouse_value.set_value(f"{warehouse_value:,.0f} Kč")
-
-            # Položky pod minimem
-            query_low_stock = """
-                SELECT COUNT(*) as count
-                FROM warehouse_items
-                WHERE quantity <= min_quantity
-            """
-            result = db.fetch_one(query_low_stock)
-            low_stock_count = result[0] if result else 0
-            self.card_low_stock.set_value(str(low_stock_count))
+            # Sklad
+            self.card_warehouse_value.set_value(f"{m.warehouse_value:,.0f} Kč")
+            self.card_low_stock.set_value(str(m.low_stock_count))
 
         except Exception as e:
-            print(f"Chyba při načítání metrik: {e}")
+            print(f"Chyba při zobrazení metrik: {e}")
 
-    def load_charts(self):
-        """Načtení grafů"""
+    def load_charts(self, charts):
+        """Vykreslení grafů z načtených dat"""
         try:
-            # Graf obratu v čase (posledních 12 měsíců)
-            query_revenue_trend = """
-                SELECT
-                    strftime('%Y-%m', order_date) as month,
-                    SUM(total_price) as revenue
-                FROM orders
-                WHERE order_date >= date('now', '-12 months')
-                AND status != 'cancelled'
-                GROUP BY strftime('%Y-%m', order_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query_revenue_trend)
+            results = charts["revenue_trend"]
             if results:
                 months = [r[0] for r in results]
                 revenues = [r[1] for r in results]
                 self.chart_revenue_trend.plot(months, revenues, "Měsíc", "Obrat (Kč)", "#3498db")
 
-            # Top 5 mechaniků
-            date_from_str = self.date_from.toString("yyyy-MM-dd")
-            date_to_str = self.date_to.toString("yyyy-MM-dd")
-
-            query_top_mechanics = """
-                SELECT
-                    u.name,
-                    COALESCE(SUM(wl.hours_worked), 0) as total_hours
-                FROM users u
-                LEFT JOIN order_work_log wl ON u.user_id = wl.user_id
-                    AND wl.date BETWEEN ? AND ?
-                WHERE u.role = 'mechanic' AND u.active = 1
-                GROUP BY u.user_id, u.name
-                ORDER BY total_hours DESC
-                LIMIT 5
-            """
-            results = db.fetch_all(query_top_mechanics, (date_from_str, date_to_str))
+            results = charts["top_mechanics"]
             if results:
                 names = [r[0] for r in results]
                 hours = [r[1] for r in results]
                 self.chart_top_mechanics.plot(names, hours, "Mechanik", "Hodiny", "#27ae60")
 
-            # Rozdělení zakázek podle typu
-            query_order_types = """
-                SELECT
-                    order_type,
-                    COUNT(*) as count
-                FROM orders
-                WHERE order_date BETWEEN ? AND ?
-                AND status != 'cancelled'
-                GROUP BY order_type
-            """
-            results = db.fetch_all(query_order_types, (date_from_str, date_to_str))
+            results = charts["order_types"]
             if results:
                 type_names = {"service": "Servis", "repair": "Oprava",
                              "inspection": "Kontrola", "sale": "Prodej"}
@@ -419,25 +325,14 @@ class ManagementDashboard(QWidget):
                 sizes = [r[1] for r in results]
                 self.chart_order_types.plot(labels, sizes)
 
-            # Trendy prodeje (týdenní)
-            query_sales_trend = """
-                SELECT
-                    strftime('%Y-%W', order_date) as week,
-                    COUNT(*) as order_count
-                FROM orders
-                WHERE order_date >= date('now', '-12 weeks')
-                AND status != 'cancelled'
-                GROUP BY strftime('%Y-%W', order_date)
-                ORDER BY week
-            """
-            results = db.fetch_all(query_sales_trend)
+            results = charts["sales_trend"]
             if results:
                 weeks = [f"Týden {r[0][-2:]}" for r in results]
                 counts = [r[1] for r in results]
                 self.chart_sales_trend.plot(weeks, counts, "Týden", "Počet zakázek", "#e74c3c")
 
         except Exception as e:
-            print(f"Chyba při načítání grafů: {e}")
+            print(f"Chyba při vykreslení grafů: {e}")
 
     def calculate_working_days(self, date_from, date_to):
         """Výpočet pracovních dnů (pondělí-pátek)"""
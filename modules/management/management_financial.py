@@ -10,6 +10,7 @@ from PyQt6.QtGui import QFont
 from .management_widgets import (MetricCard, TrendCard, LineChartWidget,
                                  BarChartWidget, PieChartWidget, AnalyticsTable, RankingTable)
 from database_manager import db
+from utils.utils_rollups import rollups, months_ago, linear_fit, linear_forecast
 from datetime import datetime, timedelta
 
 
@@ -22,7 +23,7 @@ class ManagementFinancial(QWidget):
         self.date_from = None
         self.date_to = None
         self.init_ui()
-        self.refresh()
+        # Data se načtou při zobrazení sekce (ManagementModule.switch_section)
 
     def init_ui(self):
         """Inicializace UI"""
@@ -385,25 +386,17 @@ class ManagementFinancial(QWidget):
             date_from_str = self.date_from.toString("yyyy-MM-dd")
             date_to_str = self.date_to.toString("yyyy-MM-dd")
 
-            # Celkové příjmy
-            query = """
-                SELECT COALESCE(SUM(total_price), 0)
-                FROM orders
-                WHERE created_date BETWEEN ? AND ?
-                AND status != 'Zrušeno'
-            """
-            result = db.fetch_one(query, (date_from_str, date_to_str))
-            total_revenue = result[0] if result else 0
-
-            # Předchozí období
+            # Souhrny za období a předchozí období stejné délky
             days_diff = self.date_from.daysTo(self.date_to)
             prev_date_to = self.date_from.addDays(-1)
             prev_date_from = prev_date_to.addDays(-days_diff)
 
-            prev_revenue = db.fetch_one(query,
-                                       (prev_date_from.toString("yyyy-MM-dd"),
-                                        prev_date_to.toString("yyyy-MM-dd")))
-            prev_total_revenue = prev_revenue[0] if prev_revenue else 0
+            current = rollups.totals(date_from_str, date_to_str)
+            previous = rollups.totals(prev_date_from, prev_date_to)
+
+            # Celkové příjmy
+            total_revenue = current.revenue
+            prev_total_revenue = previous.revenue
 
             revenue_trend = 0
             if prev_total_revenue > 0:
@@ -416,38 +409,19 @@ class ManagementFinancial(QWidget):
             )
 
             # Celkové náklady (materiál z zakázek)
-            query = """
-                SELECT COALESCE(SUM(material_cost), 0)
-                FROM orders
-                WHERE created_date BETWEEN ? AND ?
-                AND status != 'Zrušeno'
-            """
-            result = db.fetch_one(query, (date_from_str, date_to_str))
-            material_costs = result[0] if result else 0
+            material_costs = current.material_cost
 
             # Mzdy (odpracované hodiny * sazba - zjednodušené)
-            query = """
-                SELECT COALESCE(SUM(hours_worked), 0)
-                FROM order_work_log
-                WHERE date BETWEEN ? AND ?
-            """
-            result = db.fetch_one(query, (date_from_str, date_to_str))
-            total_hours = result[0] if result else 0
+            total_hours = rollups.total_hours(date_from_str, date_to_str)
             avg_hourly_rate = 300  # Průměrná hodinová sazba
             wage_costs = total_hours * avg_hourly_rate
 
             total_costs = material_costs + wage_costs
 
             # Předchozí náklady
-            prev_material = db.fetch_one(
-                "SELECT COALESCE(SUM(material_cost), 0) FROM orders WHERE created_date BETWEEN ? AND ? AND status != 'Zrušeno'",
-                (prev_date_from.toString("yyyy-MM-dd"), prev_date_to.toString("yyyy-MM-dd"))
-            )
-            prev_hours = db.fetch_one(
-                "SELECT COALESCE(SUM(hours_worked), 0) FROM order_work_log WHERE date BETWEEN ? AND ?",
-                (prev_date_from.toString("yyyy-MM-dd"), prev_date_to.toString("yyyy-MM-dd"))
-            )
-            prev_total_costs = (prev_material[0] if prev_material else 0) + ((prev_hours[0] if prev_hours else 0) * avg_hourly_rate)
+            prev_material = previous.material_cost
+            prev_hours = rollups.total_hours(prev_date_from, prev_date_to)
+            prev_total_costs = prev_material + prev_hours * avg_hourly_rate
 
             costs_trend = 0
             if prev_total_costs > 0:
@@ -461,7 +435,7 @@ class ManagementFinancial(QWidget):
 
             # Hrubý zisk
             gross_profit = total_revenue - material_costs
-            prev_gross = prev_total_revenue - (prev_material[0] if prev_material else 0)
+            prev_gross = prev_total_revenue - prev_material
 
             gross_trend = 0
             if prev_gross > 0:
@@ -513,18 +487,8 @@ class ManagementFinancial(QWidget):
         """Načtení dat pro přehled"""
         try:
             # Příjmy vs náklady v čase (měsíčně)
-            query = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    SUM(total_price) as revenue,
-                    SUM(material_cost) as costs
-                FROM orders
-                WHERE created_date >= date('now', '-12 months')
-                AND status != 'Zrušeno'
-                GROUP BY strftime('%Y-%m', created_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            results = [(b.period, b.revenue, b.material_cost)
+                       for b in rollups.series("month", months_ago(12))]
             if results:
                 months = [r[0] for r in results]
                 revenues = [r[1] for r in results]
@@ -561,32 +525,14 @@ class ManagementFinancial(QWidget):
             date_from_str = self.date_from.toString("yyyy-MM-dd")
             date_to_str = self.date_to.toString("yyyy-MM-dd")
 
-            # Celkové příjmy (už máme)
-            query = """
-                SELECT COALESCE(SUM(total_price), 0)
-                FROM orders
-                WHERE created_date BETWEEN ? AND ?
-                AND status != 'Zrušeno'
-            """
-            result = db.fetch_one(query, (date_from_str, date_to_str))
-            total_revenue = result[0] if result else 0
+            totals = rollups.totals(date_from_str, date_to_str)
 
             # Rozdělení příjmů (zjednodušené)
             # Práce = total_price - material_cost
             # Materiál = material_cost
-            query = """
-                SELECT
-                    COALESCE(SUM(total_price - material_cost), 0) as labor,
-                    COALESCE(SUM(material_cost), 0) as materials
-                FROM orders
-                WHERE created_date BETWEEN ? AND ?
-                AND status != 'Zrušeno'
-            """
-            result = db.fetch_one(query, (date_from_str, date_to_str))
-
-            if result:
-                labor_revenue = result[0]
-                material_revenue = result[1]
+            if totals.orders:
+                labor_revenue = totals.profit
+                material_revenue = totals.material_cost
                 parts_revenue = material_revenue * 0.6  # Zjednodušené - 60% z materiálu jsou díly
                 pure_material = material_revenue * 0.4
                 other_revenue = 0
@@ -602,17 +548,7 @@ class ManagementFinancial(QWidget):
                 self.chart_revenue_breakdown.plot(labels, sizes)
 
             # Trend příjmů
-            query = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    SUM(total_price) as revenue
-                FROM orders
-                WHERE created_date >= date('now', '-12 months')
-                AND status != 'Zrušeno'
-                GROUP BY strftime('%Y-%m', created_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            results = [(b.period, b.revenue) for b in rollups.series("month", months_ago(12))]
             if results:
                 months = [r[0] for r in results]
                 revenues = [r[1] for r in results]
@@ -657,39 +593,20 @@ class ManagementFinancial(QWidget):
             date_from_str = self.date_from.toString("yyyy-MM-dd")
             date_to_str = self.date_to.toString("yyyy-MM-dd")
 
+            totals = rollups.totals(date_from_str, date_to_str)
+
             # Náklady na materiál
-            query = """
-                SELECT COALESCE(SUM(material_cost), 0)
-                FROM orders
-                WHERE created_date BETWEEN ? AND ?
-                AND status != 'Zrušeno'
-            """
-            result = db.fetch_one(query, (date_from_str, date_to_str))
-            material_costs = result[0] if result else 0
+            material_costs = totals.material_cost
             self.costs_materials.set_value(f"{material_costs:,.0f} Kč")
 
             # Mzdy
-            query = """
-                SELECT COALESCE(SUM(hours_worked), 0)
-                FROM order_work_log
-                WHERE date BETWEEN ? AND ?
-            """
-            result = db.fetch_one(query, (date_from_str, date_to_str))
-            total_hours = result[0] if result else 0
+            total_hours = rollups.total_hours(date_from_str, date_to_str)
             avg_rate = 300
             wage_costs = total_hours * avg_rate
             self.costs_wages.set_value(f"{wage_costs:,.0f} Kč")
 
             # Provozní náklady (odhad 15% z celkových příjmů)
-            query = """
-                SELECT COALESCE(SUM(total_price), 0)
-                FROM orders
-                WHERE created_date BETWEEN ? AND ?
-                AND status != 'Zrušeno'
-            """
-            result = db.fetch_one(query, (date_from_str, date_to_str))
-            total_revenue = result[0] if result else 0
-            operation_costs = total_revenue * 0.15
+            operation_costs = totals.revenue * 0.15
             self.costs_operation.set_value(f"{operation_costs:,.0f} Kč")
 
             # Ostatní náklady
@@ -702,17 +619,7 @@ class ManagementFinancial(QWidget):
             self.chart_costs_breakdown.plot(labels, sizes)
 
             # Trend nákladů
-            query = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    SUM(material_cost) as costs
-                FROM orders
-                WHERE created_date >= date('now', '-12 months')
-                AND status != 'Zrušeno'
-                GROUP BY strftime('%Y-%m', created_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            results = [(b.period, b.material_cost) for b in rollups.series("month", months_ago(12))]
             if results:
                 months = [r[0] for r in results]
                 costs = [r[1] for r in results]
@@ -759,37 +666,14 @@ class ManagementFinancial(QWidget):
             date_to_str = self.date_to.toString("yyyy-MM-dd")
 
             # Rentabilita podle typu
-            query = """
-                SELECT
-                    order_type,
-                    COUNT(*) as count,
-                    SUM(total_price) as revenue,
-                    SUM(material_cost) as costs,
-                    (SUM(total_price) - SUM(material_cost)) / SUM(total_price) * 100 as margin
-                FROM orders
-                WHERE created_date BETWEEN ? AND ?
-                AND status != 'Zrušeno'
-                AND total_price > 0
-                GROUP BY order_type
-            """
-            results = db.fetch_all(query, (date_from_str, date_to_str))
+            results = [b for b in rollups.by_type(date_from_str, date_to_str) if b.revenue > 0]
             if results:
-                types = [r[0] for r in results]
-                margins = [r[4] for r in results]
+                types = [b.period for b in results]
+                margins = [b.margin for b in results]
                 self.chart_profitability_by_type.plot(types, margins, "Typ", "Marže (%)", "#3498db")
 
             # Trend zisku
-            query = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    SUM(total_price - material_cost) as profit
-                FROM orders
-                WHERE created_date >= date('now', '-12 months')
-                AND status != 'Zrušeno'
-                GROUP BY strftime('%Y-%m', created_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            results = [(b.period, b.profit) for b in rollups.series("month", months_ago(12))]
             if results:
                 months = [r[0] for r in results]
                 profits = [r[1] for r in results]
@@ -849,16 +733,7 @@ class ManagementFinancial(QWidget):
         """Načtení trendů"""
         try:
             # Sezónnost (průměry po měsících za celou historii)
-            query = """
-                SELECT
-                    CAST(strftime('%m', created_date) AS INTEGER) as month_num,
-                    AVG(total_price) as avg_revenue
-                FROM orders
-                WHERE status != 'Zrušeno'
-                GROUP BY month_num
-                ORDER BY month_num
-            """
-            results = db.fetch_all(query)
+            results = [(int(b.period), b.avg_value) for b in rollups.month_of_year()]
             if results:
                 month_names = ["Led", "Úno", "Bře", "Dub", "Kvě", "Čer",
                               "Čvc", "Srp", "Zář", "Říj", "Lis", "Pro"]
@@ -868,18 +743,16 @@ class ManagementFinancial(QWidget):
 
             # YoY srovnání
             current_year = datetime.now().year
-            query = f"""
-                SELECT
-                    CAST(strftime('%m', created_date) AS INTEGER) as month_num,
-                    SUM(CASE WHEN strftime('%Y', created_date) = '{current_year}' THEN total_price ELSE 0 END) as current_year,
-                    SUM(CASE WHEN strftime('%Y', created_date) = '{current_year-1}' THEN total_price ELSE 0 END) as last_year
-                FROM orders
-                WHERE status != 'Zrušeno'
-                AND strftime('%Y', created_date) IN ('{current_year}', '{current_year-1}')
-                GROUP BY month_num
-                ORDER BY month_num
-            """
-            results = db.fetch_all(query)
+            by_month = {}
+            for b in rollups.series("month", f"{current_year - 1}-01-01", f"{current_year}-12-31"):
+                month_num = int(b.period[5:7])
+                cur, last = by_month.get(month_num, (0, 0))
+                if b.period.startswith(str(current_year)):
+                    cur += b.revenue
+                else:
+                    last += b.revenue
+                by_month[month_num] = (cur, last)
+            results = [(m, cur, last) for m, (cur, last) in sorted(by_month.items())]
             if results:
                 month_names = ["Led", "Úno", "Bře", "Dub", "Kvě", "Čer",
                               "Čvc", "Srp", "Zář", "Říj", "Lis", "Pro"]
@@ -891,26 +764,17 @@ class ManagementFinancial(QWidget):
                 self.chart_yoy_comparison.plot(months, current, "Měsíc", "Příjmy (Kč)", "#27ae60")
 
             # Predikce (jednoduchý lineární trend)
-            query = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    SUM(total_price) as revenue
-                FROM orders
-                WHERE created_date >= date('now', '-6 months')
-                AND status != 'Zrušeno'
-                GROUP BY strftime('%Y-%m', created_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            results = [(b.period, b.revenue) for b in rollups.series("month", months_ago(6))]
             if results and len(results) >= 3:
                 revenues = [r[1] for r in results]
                 avg_revenue = sum(revenues) / len(revenues)
 
-                # Jednoduchá predikce = průměr + trend
-                trend = (revenues[-1] - revenues[0]) / len(revenues) if len(revenues) > 1 else 0
+                # Lineární trend přes všechny měsíce
+                trend, _ = linear_fit(revenues)
+                forecast = linear_forecast(revenues, 3)
 
-                next_month = avg_revenue + trend
-                next_quarter = next_month * 3
+                next_month = forecast[0]
+                next_quarter = sum(forecast)
 
                 growth_rate = (trend / avg_revenue * 100) if avg_revenue > 0 else 0
 
@@ -922,7 +786,7 @@ class ManagementFinancial(QWidget):
                 months = [r[0] for r in results]
                 # Přidáme 3 budoucí měsíce
                 future_months = months + ["Predikce 1", "Predikce 2", "Predikce 3"]
-                future_revenues = revenues + [next_month] * 3
+                future_revenues = revenues + forecast
 
                 self.chart_prediction.plot(future_months, future_revenues,
                                           "Měsíc", "Příjmy (Kč)", "#9b59b6")
@@ -10,6 +10,7 @@ from PyQt6.QtGui import QFont, QColor
 from .management_widgets import (MetricCard, ProgressCard, TrendCard,
                                  LineChartWidget, AnalyticsTable)
 from database_manager import db
+from utils.utils_rollups import rollups, months_ago
 from datetime import datetime, timedelta
 
 
@@ -79,7 +80,7 @@ class ManagementKPI(QWidget):
         self.targets = KPITargets()
         self.targets.load_from_db()
         self.init_ui()
-        self.refresh()
+        # Data se načtou při zobrazení sekce (ManagementModule.switch_section)
 
     def init_ui(self):
         """Inicializace UI"""
@@ -435,17 +436,8 @@ class ManagementKPI(QWidget):
         """Načtení trendů KPI"""
         try:
             # Trend obratu (poslední 6 měsíců)
-            query = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    SUM(total_price) as revenue
-                FROM orders
-                WHERE created_date >= date('now', '-6 months')
-                AND status != 'Zrušeno'
-                GROUP BY strftime('%Y-%m', created_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            buckets = rollups.series("month", months_ago(6))
+            results = [(b.period, b.revenue) for b in buckets]
             if results:
                 months = [r[0] for r in results]
                 revenues = [r[1] for r in results]
@@ -457,17 +449,7 @@ class ManagementKPI(QWidget):
                 ], "Měsíc", "Kč")
 
             # Trend počtu zakázek
-            query = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    COUNT(*) as count
-                FROM orders
-                WHERE created_date >= date('now', '-6 months')
-                AND status != 'Zrušeno'
-                GROUP BY strftime('%Y-%m', created_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            results = [(b.period, b.orders) for b in buckets]
             if results:
                 months = [r[0] for r in results]
                 counts = [r[1] for r in results]
@@ -479,21 +461,7 @@ class ManagementKPI(QWidget):
                 ], "Měsíc", "Počet")
 
             # Trend marže
-            query = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    CASE
-                        WHEN SUM(total_price) > 0
-                        THEN (SUM(total_price) - SUM(material_cost)) / SUM(total_price) * 100
-                        ELSE 0
-                    END as margin
-                FROM orders
-                WHERE created_date >= date('now', '-6 months')
-                AND status != 'Zrušeno'
-                GROUP BY strftime('%Y-%m', created_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            results = [(b.period, b.margin) for b in buckets]
             if results:
                 months = [r[0] for r in results]
                 margins = [r[1] for r in results]
@@ -505,16 +473,7 @@ class ManagementKPI(QWidget):
                 ], "Měsíc", "%")
 
             # Trend využití mechaniků (zjednodušený)
-            query = """
-                SELECT
-                    strftime('%Y-%m', date) as month,
-                    SUM(hours_worked) as total_hours
-                FROM order_work_log
-                WHERE date >= date('now', '-6 months')
-                GROUP BY strftime('%Y-%m', date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            results = [(period, hours) for period, hours, _ in rollups.mechanic_hours("month", months_ago(6))]
             if results:
                 months = [r[0] for r in results]
 
@@ -10,6 +10,7 @@ from PyQt6.QtGui import QFont
 from .management_widgets import (MetricCard, TrendCard, LineChartWidget,
                                  BarChartWidget, PieChartWidget, AnalyticsTable, RankingTable)
 from database_manager import db
+from utils.utils_rollups import rollups, days_ago
 
 
 class ManagementMechanicPerformance(QWidget):
@@ -22,7 +23,7 @@ class ManagementMechanicPerformance(QWidget):
         self.date_to = None
         self.selected_mechanic_id = None
         self.init_ui()
-        self.refresh()
+        # Data se načtou při zobrazení sekce (ManagementModule.switch_section)
 
     def init_ui(self):
         """Inicializace UI"""
@@ -689,16 +690,8 @@ class ManagementMechanicPerformance(QWidget):
         """Načtení trendů výkonu"""
         try:
             # Trend hodin (týdenní)
-            query = """
-                SELECT
-                    strftime('%Y-%W', date) as week,
-                    SUM(hours_worked) as total_hours
-                FROM order_work_log
-                WHERE date >= date('now', '-12 weeks')
-                GROUP BY strftime('%Y-%W', date)
-                ORDER BY week
-            """
-            results = db.fetch_all(query)
+            weekly_hours = rollups.mechanic_hours("week", days_ago(84))
+            results = weekly_hours
             if results:
                 weeks = [f"Týden {r[0][-2:]}" for r in results]
                 hours = [r[1] for r in results]
@@ -721,17 +714,7 @@ class ManagementMechanicPerformance(QWidget):
                 self.chart_orders_trend.plot(weeks, counts, "Týden", "Zakázky", "#27ae60")
 
             # Trend využití kapacity
-            query = """
-                SELECT
-                    strftime('%Y-%W', date) as week,
-                    SUM(hours_worked) as total_hours,
-                    COUNT(DISTINCT user_id) as mechanic_count
-                FROM order_work_log
-                WHERE date >= date('now', '-12 weeks')
-                GROUP BY strftime('%Y-%W', date)
-                ORDER BY week
-            """
-            results = db.fetch_all(query)
+            results = weekly_hours
             if results:
                 weeks = [f"Týden {r[0][-2:]}" for r in results]
                 # Předpokládáme 5 pracovních dnů v týdnu, 8h denně
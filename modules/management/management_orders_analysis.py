@@ -21,7 +21,7 @@ class ManagementOrdersAnalysis(QWidget):
         self.date_from = None
         self.date_to = None
         self.init_ui()
-        self.refresh()
+        # Data se načtou při zobrazení sekce (ManagementModule.switch_section)
 
     def init_ui(self):
         """Inicializace UI"""
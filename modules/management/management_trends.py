@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """
 Management Trends - Trendy, predikce a forecasting
+Řady zakázek se čtou z časových souhrnů (utils.utils_rollups), ne z orders.
 """
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
                              QPushButton, QLabel, QFrame, QScrollArea, QTabWidget,
@@ -10,6 +11,8 @@ from PyQt6.QtGui import QFont
 from .management_widgets import (MetricCard, TrendCard, LineChartWidget,
                                  BarChartWidget, PieChartWidget, AnalyticsTable)
 from database_manager import db
+from utils.utils_rollups import (rollups, months_ago, days_ago, linear_forecast,
+                                 moving_average, growth_rates, coefficient_of_variation)
 from datetime import datetime, timedelta
 
 
@@ -22,7 +25,7 @@ class ManagementTrends(QWidget):
         self.date_from = None
         self.date_to = None
         self.init_ui()
-        self.refresh()
+        # Data se načtou na pozadí při zobrazení sekce (ManagementModule.refresh_section)
 
     def init_ui(self):
         """Inicializace UI"""
@@ -402,19 +405,20 @@ class ManagementTrends(QWidget):
 
         return tab
 
-    def refresh(self):
-        """Refresh dat"""
-        if self.date_from is None or self.date_to is None:
-            self.date_to = QDate.currentDate()
-            self.date_from = self.date_to.addMonths(-12)
+    # Granularita souhrnu a začátek historie podle typu analýzy
+    TREND_PERIODS = {
+        "Denní": ("day", lambda: days_ago(30)),
+        "Týdenní": ("week", lambda: days_ago(24 * 7)),
+        "Měsíční": ("month", lambda: months_ago(12)),
+        "Čtvrtletní": ("quarter", lambda: months_ago(24)),
+    }
 
-        self.load_trend_metrics()
-        self.load_time_trends()
-        self.load_seasonality()
-        self.load_comparison()
-        self.load_revenue_prediction()
-        self.load_orders_prediction()
-        self.load_warehouse_prediction()
+    MONTH_NAMES = ["Led", "Úno", "Bře", "Dub", "Kvě", "Čer",
+                   "Čvc", "Srp", "Zář", "Říj", "Lis", "Pro"]
+
+    def refresh(self):
+        """Refresh dat (synchronně)"""
+        self.apply_data(self.fetch_data(self.load_params()))
 
     def set_date_range(self, date_from, date_to):
         """Nastavení období"""
@@ -422,25 +426,121 @@ class ManagementTrends(QWidget):
         self.date_to = date_to
 
     def on_filter_changed(self):
-        """Změna filtru"""
-        # Placeholder - pro budoucí implementaci
-        pass
+        """Změna filtru - nové načtení na pozadí (rozpracované načítání se zahodí)"""
+        if hasattr(self.parent_module, "refresh_section"):
+            self.parent_module.refresh_section(self)
+        else:
+            self.refresh()
+
+    # ------------------------- NAČÍTÁNÍ NA POZADÍ -------------------------
 
-    def load_trend_metrics(self):
-        """Načtení metrik trendů"""
+    def load_params(self):
+        """Hodnoty filtrů z GUI (volá se v GUI vlákně)"""
+        if self.date_from is None or self.date_to is None:
+            self.date_to = QDate.currentDate()
+            self.date_from = self.date_to.addMonths(-12)
+        return {
+            "analysis_type": self.filter_analysis_type.currentText(),
+            "prediction_periods": self.spin_prediction_periods.value(),
+            "current_year": datetime.now().year,
+        }
+
+    def fetch_data(self, params):
+        """
+        Data sekce z časových souhrnů (pracovní vlákno - bez přístupu k widgetům)
+
+        Záložky sdílejí výsledky: měsíční obrat za 12 měsíců používají metriky
+        i predikce, detail trendu obsahuje obrat i počty pro všechny grafy trendu.
+        """
+        granularity, since = self.TREND_PERIODS.get(
+            params["analysis_type"], self.TREND_PERIODS["Měsíční"])
+        year = params["current_year"]
+        data = {"params": params}
+
+        def load(key, func):
+            try:
+                data[key] = func()
+            except Exception as e:
+                print(f"Chyba při načítání trendů ({key}): {e}")
+                data[key] = []
+
+        # Měsíční obrat za posledních 12 měsíců (metriky + predikce obratu)
+        load("monthly_revenue", lambda: [
+            (b.period, b.revenue) for b in rollups.series("month", months_ago(12))])
+        # Obrat letos / loni
+        load("yoy_total", lambda: [(
+            rollups.totals(f"{year}-01-01", f"{year}-12-31").revenue,
+            rollups.totals(f"{year - 1}-01-01", f"{year - 1}-12-31").revenue,
+        )])
+        # Trend podle zvoleného typu analýzy (období, zakázky, obrat, průměr)
+        load("trend_detail", lambda: [
+            (b.period, b.orders, b.revenue, b.avg_value)
+            for b in rollups.series(granularity, since())])
+        # Sezónnost - měsíční vzorec (průměr na zakázku, počet)
+        load("monthly_pattern", lambda: [
+            (int(b.period), b.avg_value, b.orders) for b in rollups.month_of_year()])
+        # Sezónnost - den v týdnu
+        load("weekly_pattern", lambda: sorted(rollups.weekday_orders().items()))
+
+        # YoY srovnání po měsících (graf i tabulka)
+        def yoy_monthly():
+            by_month = {}
+            for b in rollups.series("month", f"{year - 1}-01-01", f"{year}-12-31"):
+                current, last = by_month.get(int(b.period[5:7]), (0, 0))
+                if b.period.startswith(str(year)):
+                    current += b.revenue
+                else:
+                    last += b.revenue
+                by_month[int(b.period[5:7])] = (current, last)
+            return [(m, cur, last) for m, (cur, last) in sorted(by_month.items())]
+
+        load("yoy_monthly", yoy_monthly)
+        # QoQ srovnání (poslední 4 kvartály, sestupně)
+        load("quarters", lambda: [
+            (b.period, b.revenue) for b in reversed(rollups.series("quarter", months_ago(18))[-4:])])
+        # Predikce zakázek - poslední 3 měsíce
+        def orders_recent():
+            recent = rollups.totals(months_ago(3))
+            return [(recent.orders, recent.avg_value)]
+
+        load("orders_recent", orders_recent)
+        load("orders_monthly", lambda: [
+            (b.period, b.orders) for b in rollups.series("month", months_ago(6))])
+        load("orders_types", lambda: [
+            (b.period, b.orders) for b in rollups.by_type(months_ago(3))])
+
+        # Predikce skladu - top 10 položek podle spotřeby
+        load("warehouse_usage", lambda: [tuple(r) for r in db.fetch_all("""
+            SELECT
+                w.name,
+                w.quantity as current_stock,
+                COALESCE(SUM(wm.quantity), 0) as total_issued
+            FROM warehouse w
+            LEFT JOIN warehouse_movements wm ON w.id = wm.item_id
+                AND wm.movement_type = 'Výdej'
+                AND wm.date >= date('now', '-3 months')
+            GROUP BY w.id, w.name, w.quantity
+            HAVING total_issued > 0
+            ORDER BY total_issued DESC
+            LIMIT 10
+        """)])
+        return data
+
+    def apply_data(self, data):
+        """Vykreslení všech záložek z načtených dat (GUI vlákno)"""
+        self.load_trend_metrics(data)
+        self.load_time_trends(data)
+        self.load_seasonality(data)
+        self.load_comparison(data)
+        self.load_revenue_prediction(data)
+        self.load_orders_prediction(data)
+        self.load_warehouse_prediction(data)
+
+    def load_trend_metrics(self, data):
+        """Metriky trendů"""
         try:
-            # Získání dat za poslední rok
-            query = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    SUM(total_price) as revenue
-                FROM orders
-                WHERE created_date >= date('now', '-12 months')
-                AND status != 'Zrušeno'
-                GROUP BY strftime('%Y-%m', created_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            # Data za poslední rok
+            results = data["monthly_revenue"]
 
             if len(results) >= 2:
                 revenues = [r[1] for r in results]
@@ -472,15 +572,7 @@ class ManagementTrends(QWidget):
                     self.metric_seasonality.set_value(f"{seasonal_index:.2f}")
 
             # YoY růst
-            current_year = datetime.now().year
-            query_yoy = f"""
-                SELECT
-                    SUM(CASE WHEN strftime('%Y', created_date) = '{current_year}' THEN total_price ELSE 0 END) as current,
-                    SUM(CASE WHEN strftime('%Y', created_date) = '{current_year-1}' THEN total_price ELSE 0 END) as last
-                FROM orders
-                WHERE status != 'Zrušeno'
-            """
-            result = db.fetch_one(query_yoy)
+            result = data["yoy_total"][0] if data["yoy_total"] else None
             if result:
                 current_year_rev = result[0] or 0
                 last_year_rev = result[1] or 0
@@ -502,53 +594,22 @@ class ManagementTrends(QWidget):
         except Exception as e:
             print(f"Chyba při načítání metrik trendů: {e}")
 
-    def load_time_trends(self):
-        """Načtení časových trendů"""
+    def load_time_trends(self, data):
+        """Časové trendy podle zvoleného typu analýzy"""
         try:
-            analysis_type = self.filter_analysis_type.currentText()
-
-            # Určení formátu podle typu
-            if analysis_type == "Denní":
-                date_format = "%Y-%m-%d"
-                period = "-30 days"
-            elif analysis_type == "Týdenní":
-                date_format = "%Y-%W"
-                period = "-24 weeks"
-            elif analysis_type == "Čtvrtletní":
-                date_format = "%Y-Q"
-                period = "-24 months"
-            else:  # Měsíční
-                date_format = "%Y-%m"
-                period = "-12 months"
+            # Období, zakázky, obrat, průměr/zakázka
+            results = data["trend_detail"]
 
             # Trend obratu
-            query = f"""
-                SELECT
-                    strftime('{date_format}', created_date) as period,
-                    SUM(total_price) as revenue
-                FROM orders
-                WHERE created_date >= date('now', '{period}')
-                AND status != 'Zrušeno'
-                GROUP BY period
-                ORDER BY period
-            """
-            results = db.fetch_all(query)
-
             if results:
                 periods = [r[0] for r in results]
-                revenues = [r[1] for r in results]
+                revenues = [r[2] for r in results]
 
                 self.chart_revenue_trend.plot(periods, revenues, "Období", "Obrat (Kč)", "#3498db")
 
                 # Klouzavý průměr
                 if len(revenues) >= 3:
-                    moving_avg = []
-                    for i in range(len(revenues)):
-                        if i < 2:
-                            moving_avg.append(revenues[i])
-                        else:
-                            avg = (revenues[i-2] + revenues[i-1] + revenues[i]) / 3
-                            moving_avg.append(avg)
+                    moving_avg = moving_average(revenues, 3)
 
                     self.chart_moving_average.plot_multiple([
                         (periods, revenues, "Skutečnost"),
@@ -556,26 +617,11 @@ class ManagementTrends(QWidget):
                     ], "Období", "Kč")
 
                 # Růstová křivka
-                growth_curve = [revenues[0]]
-                for i in range(1, len(revenues)):
-                    growth = ((revenues[i] - revenues[i-1]) / revenues[i-1] * 100) if revenues[i-1] > 0 else 0
-                    growth_curve.append(growth)
+                growth_curve = growth_rates(revenues)
 
                 self.chart_growth_curve.plot(periods, growth_curve, "Období", "Růst (%)", "#27ae60")
 
             # Trend zakázek
-            query_orders = f"""
-                SELECT
-                    strftime('{date_format}', created_date) as period,
-                    COUNT(*) as order_count
-                FROM orders
-                WHERE created_date >= date('now', '{period}')
-                AND status != 'Zrušeno'
-                GROUP BY period
-                ORDER BY period
-            """
-            results = db.fetch_all(query_orders)
-
             if results:
                 periods = [r[0] for r in results]
                 counts = [r[1] for r in results]
@@ -584,26 +630,12 @@ class ManagementTrends(QWidget):
             # Tabulka trendů
             if results:
                 headers = ["Období", "Zakázky", "Obrat", "Průměr/zakázka", "Růst %"]
-                data = []
-
-                query_detail = f"""
-                    SELECT
-                        strftime('{date_format}', created_date) as period,
-                        COUNT(*) as orders,
-                        SUM(total_price) as revenue,
-                        AVG(total_price) as avg_value
-                    FROM orders
-                    WHERE created_date >= date('now', '{period}')
-                    AND status != 'Zrušeno'
-                    GROUP BY period
-                    ORDER BY period
-                """
-                results = db.fetch_all(query_detail)
+                rows = []
 
                 prev_revenue = 0
                 for r in results:
                     growth = ((r[2] - prev_revenue) / prev_revenue * 100) if prev_revenue > 0 else 0
-                    data.append([
+                    rows.append([
                         r[0],
                         r[1],
                         f"{r[2]:,.0f} Kč",
@@ -612,30 +644,19 @@ class ManagementTrends(QWidget):
                     ])
                     prev_revenue = r[2]
 
-                self.table_trends.set_data(headers, data)
+                self.table_trends.set_data(headers, rows)
 
         except Exception as e:
             print(f"Chyba při načítání trendů: {e}")
 
-    def load_seasonality(self):
-        """Načtení sezónnosti"""
+    def load_seasonality(self, data):
+        """Sezónnost"""
         try:
             # Měsíční vzorec
-            query = """
-                SELECT
-                    CAST(strftime('%m', created_date) AS INTEGER) as month_num,
-                    AVG(total_price) as avg_revenue,
-                    COUNT(*) as order_count
-                FROM orders
-                WHERE status != 'Zrušeno'
-                GROUP BY month_num
-                ORDER BY month_num
-            """
-            results = db.fetch_all(query)
+            results = data["monthly_pattern"]
 
             if results:
-                month_names = ["Led", "Úno", "Bře", "Dub", "Kvě", "Čer",
-                              "Čvc", "Srp", "Zář", "Říj", "Lis", "Pro"]
+                month_names = self.MONTH_NAMES
                 months = [month_names[r[0]-1] if r[0] <= 12 else f"M{r[0]}" for r in results]
                 avg_revenues = [r[1] for r in results]
 
@@ -648,7 +669,7 @@ class ManagementTrends(QWidget):
 
                 # Tabulka sezónnosti
                 headers = ["Měsíc", "Průměrný obrat", "Zakázek", "Sezónní index", "Kategorie"]
-                data = []
+                rows = []
 
                 for i, r in enumerate(results):
                     index = seasonal_indices[i]
@@ -659,7 +680,7 @@ class ManagementTrends(QWidget):
                     else:
                         category = "❄️ Nízká sezóna"
 
-                    data.append([
+                    rows.append([
                         months[i],
                         f"{r[1]:,.0f} Kč",
                         r[2],
@@ -667,19 +688,10 @@ class ManagementTrends(QWidget):
                         category
                     ])
 
-                self.table_seasonality.set_data(headers, data)
+                self.table_seasonality.set_data(headers, rows)
 
             # Týdenní vzorec (den v týdnu)
-            query_weekly = """
-                SELECT
-                    CAST(strftime('%w', created_date) AS INTEGER) as day_of_week,
-                    COUNT(*) as order_count
-                FROM orders
-                WHERE status != 'Zrušeno'
-                GROUP BY day_of_week
-                ORDER BY day_of_week
-            """
-            results = db.fetch_all(query_weekly)
+            results = data["weekly_pattern"]
 
             if results:
                 day_names = ["Ne", "Po", "Út", "St", "Čt", "Pá", "So"]
@@ -692,28 +704,16 @@ class ManagementTrends(QWidget):
         except Exception as e:
             print(f"Chyba při načítání sezónnosti: {e}")
 
-    def load_comparison(self):
-        """Načtení srovnání"""
+    def load_comparison(self, data):
+        """Srovnání YoY a QoQ"""
         try:
-            current_year = datetime.now().year
+            current_year = data["params"]["current_year"]
+            month_names = self.MONTH_NAMES
 
             # YoY srovnání
-            query_yoy = f"""
-                SELECT
-                    CAST(strftime('%m', created_date) AS INTEGER) as month_num,
-                    SUM(CASE WHEN strftime('%Y', created_date) = '{current_year}' THEN total_price ELSE 0 END) as current_year,
-                    SUM(CASE WHEN strftime('%Y', created_date) = '{current_year-1}' THEN total_price ELSE 0 END) as last_year
-                FROM orders
-                WHERE status != 'Zrušeno'
-                AND strftime('%Y', created_date) IN ('{current_year}', '{current_year-1}')
-                GROUP BY month_num
-                ORDER BY month_num
-            """
-            results = db.fetch_all(query_yoy)
+            results = data["yoy_monthly"]
 
             if results:
-                month_names = ["Led", "Úno", "Bře", "Dub", "Kvě", "Čer",
-                              "Čvc", "Srp", "Zář", "Říj", "Lis", "Pro"]
                 months = [month_names[r[0]-1] for r in results if r[0] <= 12]
                 current = [r[1] for r in results if r[0] <= 12]
 
@@ -722,19 +722,7 @@ class ManagementTrends(QWidget):
                                               "Měsíc", f"Obrat {current_year} (Kč)", "#3498db")
 
             # QoQ srovnání (poslední 4 kvartály)
-            query_qoq = """
-                SELECT
-                    strftime('%Y', created_date) || '-Q' ||
-                    CAST((CAST(strftime('%m', created_date) AS INTEGER) - 1) / 3 + 1 AS TEXT) as quarter,
-                    SUM(total_price) as revenue
-                FROM orders
-                WHERE created_date >= date('now', '-18 months')
-                AND status != 'Zrušeno'
-                GROUP BY quarter
-                ORDER BY quarter DESC
-                LIMIT 4
-            """
-            results = db.fetch_all(query_qoq)
+            results = data["quarters"]
 
             if results:
                 quarters = [r[0] for r in reversed(results)]
@@ -745,22 +733,9 @@ class ManagementTrends(QWidget):
 
             # Srovnávací tabulka
             headers = ["Měsíc", f"{current_year}", f"{current_year-1}", "Změna", "% změna"]
-            data = []
-
-            query_detail = f"""
-                SELECT
-                    CAST(strftime('%m', created_date) AS INTEGER) as month_num,
-                    SUM(CASE WHEN strftime('%Y', created_date) = '{current_year}' THEN total_price ELSE 0 END) as current_year,
-                    SUM(CASE WHEN strftime('%Y', created_date) = '{current_year-1}' THEN total_price ELSE 0 END) as last_year
-                FROM orders
-                WHERE status != 'Zrušeno'
-                AND strftime('%Y', created_date) IN ('{current_year}', '{current_year-1}')
-                GROUP BY month_num
-                ORDER BY month_num
-            """
-            results = db.fetch_all(query_detail)
-
-            for r in results:
+            rows = []
+
+            for r in data["yoy_monthly"]:
                 if r[0] <= 12:
                     month_name = month_names[r[0]-1]
                     current_val = r[1]
@@ -768,7 +743,7 @@ class ManagementTrends(QWidget):
                     change = current_val - last_val
                     pct_change = (change / last_val * 100) if last_val > 0 else 0
 
-                    data.append([
+                    rows.append([
                         month_name,
                         f"{current_val:,.0f} Kč",
                         f"{last_val:,.0f} Kč",
@@ -776,47 +751,23 @@ class ManagementTrends(QWidget):
                         f"{pct_change:+.1f}%"
                     ])
 
-            self.table_comparison.set_data(headers, data)
+            self.table_comparison.set_data(headers, rows)
 
         except Exception as e:
             print(f"Chyba při načítání srovnání: {e}")
 
-    def load_revenue_prediction(self):
-        """Načtení predikce obratu"""
+    def load_revenue_prediction(self, data):
+        """Predikce obratu"""
         try:
             # Historická data za 12 měsíců
-            query = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    SUM(total_price) as revenue
-                FROM orders
-                WHERE created_date >= date('now', '-12 months')
-                AND status != 'Zrušeno'
-                GROUP BY strftime('%Y-%m', created_date)
-                ORDER BY month
-            """
-            results = db.fetch_all(query)
+            results = data["monthly_revenue"]
 
             if len(results) >= 3:
                 revenues = [r[1] for r in results]
 
-                # Jednoduchá lineární predikce
-                n = len(revenues)
-                sum_x = sum(range(n))
-                sum_y = sum(revenues)
-                sum_xy = sum(i * revenues[i] for i in range(n))
-                sum_x2 = sum(i * i for i in range(n))
-
-                # Koeficienty lineární regrese
-                slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x) if (n * sum_x2 - sum_x * sum_x) != 0 else 0
-                intercept = (sum_y - slope * sum_x) / n
-
-                # Predikce na příštích N období
-                periods = self.spin_prediction_periods.value()
-                predictions = []
-                for i in range(n, n + periods):
-                    pred = slope * i + intercept
-                    predictions.append(max(0, pred))  # Zabránit záporným hodnotám
+                # Lineární predikce na příštích N období
+                periods = data["params"]["prediction_periods"]
+                predictions = linear_forecast(revenues, periods)
 
                 # Metriky
                 if predictions:
@@ -830,10 +781,7 @@ class ManagementTrends(QWidget):
                     self.pred_revenue_year.set_value(f"{year_pred:,.0f} Kč")
 
                     # Spolehlivost (zjednodušená - na základě variability dat)
-                    avg = sum(revenues) / len(revenues)
-                    variance = sum((r - avg) ** 2 for r in revenues) / len(revenues)
-                    cv = (variance ** 0.5) / avg if avg > 0 else 0
-                    confidence = max(0, 100 - cv * 100)
+                    confidence = max(0, 100 - coefficient_of_variation(revenues) * 100)
                     self.pred_revenue_confidence.set_value(f"{confidence:.0f}%")
 
                 # Graf s predikcí
@@ -849,38 +797,30 @@ class ManagementTrends(QWidget):
 
                 # Tabulka predikce
                 headers = ["Období", "Predikovaný obrat", "Dolní interval", "Horní interval"]
-                data = []
+                rows = []
 
                 for i, pred in enumerate(predictions):
                     # Interval spolehlivosti ±15%
                     lower = pred * 0.85
                     upper = pred * 1.15
 
-                    data.append([
+                    rows.append([
                         future_months[i],
                         f"{pred:,.0f} Kč",
                         f"{lower:,.0f} Kč",
                         f"{upper:,.0f} Kč"
                     ])
 
-                self.table_revenue_prediction.set_data(headers, data)
+                self.table_revenue_prediction.set_data(headers, rows)
 
         except Exception as e:
             print(f"Chyba při načítání predikce obratu: {e}")
 
-    def load_orders_prediction(self):
-        """Načtení predikce zakázek"""
+    def load_orders_prediction(self, data):
+        """Predikce zakázek"""
         try:
             # Historická data
-            query = """
-                SELECT
-                    COUNT(*) as order_count,
-                    AVG(total_price) as avg_value
-                FROM orders
-                WHERE created_date >= date('now', '-3 months')
-                AND status != 'Zrušeno'
-            """
-            result = db.fetch_one(query)
+            result = data["orders_recent"][0] if data["orders_recent"] else None
 
             if result:
                 # Průměrný počet zakázek za měsíc
@@ -898,17 +838,7 @@ class ManagementTrends(QWidget):
                 self.pred_orders_capacity.set_value(f"{capacity:.0f}%")
 
             # Graf predikce počtu
-            query_trend = """
-                SELECT
-                    strftime('%Y-%m', created_date) as month,
-                    COUNT(*) as order_count
-                FROM orders
-                WHERE created_date >= date('now', '-6 months')
-                AND status != 'Zrušeno'
-                GROUP BY month
-                ORDER BY month
-            """
-            results = db.fetch_all(query_trend)
+            results = data["orders_monthly"]
 
             if len(results) >= 3:
                 months = [r[0] for r in results]
@@ -932,16 +862,7 @@ class ManagementTrends(QWidget):
                 ], "Měsíc", "Počet zakázek")
 
             # Rozdělení podle typů
-            query_types = """
-                SELECT
-                    order_type,
-                    COUNT(*) as count
-                FROM orders
-                WHERE created_date >= date('now', '-3 months')
-                AND status != 'Zrušeno'
-                GROUP BY order_type
-            """
-            results = db.fetch_all(query_types)
+            results = data["orders_types"]
 
             if results:
                 labels = [r[0] for r in results]
@@ -951,25 +872,11 @@ class ManagementTrends(QWidget):
         except Exception as e:
             print(f"Chyba při načítání predikce zakázek: {e}")
 
-    def load_warehouse_prediction(self):
-        """Načtení predikce skladu"""
+    def load_warehouse_prediction(self, data):
+        """Predikce skladu"""
         try:
             # Top 10 položek podle spotřeby
-            query = """
-                SELECT
-                    w.name,
-                    w.quantity as current_stock,
-                    COALESCE(SUM(wm.quantity), 0) as total_issued
-                FROM warehouse w
-                LEFT JOIN warehouse_movements wm ON w.id = wm.item_id
-                    AND wm.movement_type = 'Výdej'
-                    AND wm.date >= date('now', '-3 months')
-                GROUP BY w.id, w.name, w.quantity
-                HAVING total_issued > 0
-                ORDER BY total_issued DESC
-                LIMIT 10
-            """
-            results = db.fetch_all(query)
+            results = data["warehouse_usage"]
 
             if results:
                 # Graf predikce
@@ -981,7 +888,7 @@ class ManagementTrends(QWidget):
 
                 # Tabulka doporučení
                 headers = ["Položka", "Aktuální stav", "Spotřeba/měsíc", "Dní zásoby", "Doporučení"]
-                data = []
+                rows = []
 
                 for r in results:
                     name = r[0]
@@ -1002,7 +909,7 @@ class ManagementTrends(QWidget):
                     else:
                         recommendation = "🟢 Dostatečná zásoba"
 
-                    data.append([
+                    rows.append([
                         name,
                         f"{current:.1f}",
                         f"{monthly_consumption:.1f}",
@@ -1010,7 +917,7 @@ class ManagementTrends(QWidget):
                         recommendation
                     ])
 
-                self.table_warehouse_prediction.set_data(headers, data)
+                self.table_warehouse_prediction.set_data(headers, rows)
 
         except Exception as e:
             print(f"Chyba při načítání predikce skladu: {e}")
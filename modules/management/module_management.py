@@ -2,12 +2,15 @@
 """
 Manažerský modul - Hlavní vstupní bod
 """
+import importlib
+
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QLabel, QFrame, QStackedWidget, QScrollArea, QMessageBox)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont
 from .management_widgets import DateRangeFilter, MetricCard
 from database_manager import db
+from utils.utils_loader import BackgroundLoader, refresh_async
 
 
 class ManagementModule(QWidget):
@@ -18,6 +21,8 @@ class ManagementModule(QWidget):
         self.current_section = None
         self.sections = {}
         self.section_buttons = {}
+        # Data sekcí se načítají na pozadí; přepnutí sekce zahodí rozpracované načítání
+        self.loader = BackgroundLoader(self)
         self.init_ui()
 
     def init_ui(self):
@@ -142,8 +147,7 @@ class ManagementModule(QWidget):
         self.section_stack = QStackedWidget()
         self.section_stack.setObjectName("sectionStack")
 
-        # Vytvoření všech sekcí
-        self.create_sections()
+        # Sekce se do stacku přidávají až při prvním otevření (get_section)
 
         content_layout.addWidget(self.section_stack)
 
@@ -191,70 +195,36 @@ class ManagementModule(QWidget):
 
         parent_layout.addWidget(top_bar)
 
-    def create_sections(self):
-        """Vytvoření všech sekcí"""
-        # Importy sekcí (zatím používáme placeholder, později je nahradíme skutečnými moduly)
-        try:
-            from .management_dashboard import ManagementDashboard
-            dashboard = ManagementDashboard(self)
-        except ImportError:
-            dashboard = self.create_placeholder_section("Dashboard", "📊")
-
-        try:
-            from .management_orders_analysis import ManagementOrdersAnalysis
-            orders = ManagementOrdersAnalysis(self)
-        except ImportError:
-            orders = self.create_placeholder_section("Analýza zakázek", "📋")
-
-        try:
-            from .management_mechanic_performance import ManagementMechanicPerformance
-            mechanics = ManagementMechanicPerformance(self)
-        except ImportError:
-            mechanics = self.create_placeholder_section("Výkon mechaniků", "👨‍🔧")
-
-        try:
-            from .management_warehouse_overview import ManagementWarehouseOverview
-            warehouse = ManagementWarehouseOverview(self)
-        except ImportError:
-            warehouse = self.create_placeholder_section("Přehled skladu", "📦")
-
-        try:
-            from .management_financial import ManagementFinancial
-            financial = ManagementFinancial(self)
-        except ImportError:
-            financial = self.create_placeholder_section("Finance", "💰")
-
-        try:
-            from .management_trends import ManagementTrends
-            trends = ManagementTrends(self)
-        except ImportError:
-            trends = self.create_placeholder_section("Trendy & Predikce", "📈")
+    # Sekce: id -> (modul, třída, název placeholderu, ikona)
+    # Sekce (a matplotlib grafy v nich) se vytváří až při prvním otevření
+    SECTION_CLASSES = {
+        "dashboard": ("management_dashboard", "ManagementDashboard", "Dashboard", "📊"),
+        "orders": ("management_orders_analysis", "ManagementOrdersAnalysis", "Analýza zakázek", "📋"),
+        "mechanics": ("management_mechanic_performance", "ManagementMechanicPerformance", "Výkon mechaniků", "👨‍🔧"),
+        "warehouse": ("management_warehouse_overview", "ManagementWarehouseOverview", "Přehled skladu", "📦"),
+        "financial": ("management_financial", "ManagementFinancial", "Finance", "💰"),
+        "trends": ("management_trends", "ManagementTrends", "Trendy & Predikce", "📈"),
+        "kpi": ("management_kpi", "ManagementKPI", "KPI Monitoring", "🎯"),
+        "reports": ("management_reports", "ManagementReports", "Reporty", "📄"),
+    }
+
+    def get_section(self, section_id):
+        """Instance sekce - při prvním přístupu ji naimportuje a vytvoří"""
+        if section_id in self.sections:
+            return self.sections[section_id]
+        if section_id not in self.SECTION_CLASSES:
+            return None
 
+        module_name, class_name, title, icon = self.SECTION_CLASSES[section_id]
         try:
-            from .management_kpi import ManagementKPI
-            kpi = ManagementKPI(self)
+            module = importlib.import_module(f".{module_name}", __package__)
+            section = getattr(module, class_name)(self)
         except ImportError:
-            kpi = self.create_placeholder_section("KPI Monitoring", "🎯")
+            section = self.create_placeholder_section(title, icon)
 
-        try:
-            from .management_reports import ManagementReports
-            reports = ManagementReports(self)
-        except ImportError:
-            reports = self.create_placeholder_section("Reporty", "📄")
-
-        # Registrace sekcí
-        self.sections["dashboard"] = dashboard
-        self.sections["orders"] = orders
-        self.sections["mechanics"] = mechanics
-        self.sections["warehouse"] = warehouse
-        self.sections["financial"] = financial
-        self.sections["trends"] = trends
-        self.sections["kpi"] = kpi
-        self.sections["reports"] = reports
-
-        # Přidání do stacku
-        for section in self.sections.values():
-            self.section_stack.addWidget(section)
+        self.sections[section_id] = section
+        self.section_stack.addWidget(section)
+        return section
 
     def create_placeholder_section(self, title, icon):
         """Vytvoření placeholder sekce (dokud nevytvoříme skutečný modul)"""
@@ -285,7 +255,8 @@ class ManagementModule(QWidget):
 
     def switch_section(self, section_id):
         """Přepnutí mezi sekcemi"""
-        if section_id in self.sections:
+        section = self.get_section(section_id)
+        if section is not None:
             # Aktualizace aktivního tlačítka
             for btn_id, btn in self.section_buttons.items():
                 btn.setProperty("active", btn_id == section_id)
@@ -293,7 +264,7 @@ class ManagementModule(QWidget):
                 btn.style().polish(btn)
 
             # Přepnutí stacku
-            self.section_stack.setCurrentWidget(self.sections[section_id])
+            self.section_stack.setCurrentWidget(section)
             self.current_section = section_id
 
             # Aktualizace titulku
@@ -309,9 +280,8 @@ class ManagementModule(QWidget):
             }
             self.section_title.setText(section_names.get(section_id, "Management"))
 
-            # Refresh dat sekce (pokud má metodu refresh)
-            if hasattr(self.sections[section_id], 'refresh'):
-                self.sections[section_id].refresh()
+            # Refresh dat sekce
+            self.refresh_section(section)
 
     def on_date_range_changed(self, date_from, date_to):
         """Změna filtru období"""
@@ -320,15 +290,17 @@ class ManagementModule(QWidget):
             section = self.sections[self.current_section]
             if hasattr(section, 'set_date_range'):
                 section.set_date_range(date_from, date_to)
-            if hasattr(section, 'refresh'):
-                section.refresh()
+            self.refresh_section(section)
+
+    def refresh_section(self, section):
+        """Obnovení sekce - na pozadí, pokud sekce podporuje fetch_data/apply_data"""
+        refresh_async(self.loader, "section", section)
 
     def refresh(self):
         """Refresh celého modulu"""
         # Refresh aktivní sekce
         if self.current_section in self.sections:
-            if hasattr(self.sections[self.current_section], 'refresh'):
-                self.sections[self.current_section].refresh()
+            self.refresh_section(self.sections[self.current_section])
 
     def get_date_range(self):
         """Získání aktuálně vybraného období"""
@@ -5,14 +5,14 @@ Modul Zakázky - Hlavní seznam zakázek (OPRAVENÝ + VYLEPŠENÝ)
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QTableWidget, QTableWidgetItem, QLineEdit, QComboBox,
-    QLabel, QHeaderView, QMessageBox, QMenu, QGroupBox,
+    QLineEdit, QComboBox, QLabel, QMessageBox, QMenu, QGroupBox,
     QApplication
 )
 from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QColor, QClipboard
 import config
 from database_manager import db
+from utils.utils_table_model import LazyTableView, TableColumn, ALIGN_RIGHT
+from utils.utils_sql_search import SqlFilter, PagedQuery, DebouncedQuery
 from .order_form import OrderFormDialog
 from .order_detail import OrderDetailWindow
 
@@ -22,12 +22,43 @@ class OrdersModule(QWidget):
 
     order_selected = pyqtSignal(int)  # Signal při výběru zakázky
 
+    # Seznam zakázek - pořadí sloupců odpovídá indexům v tabulce
+    FROM_SQL = """
+        FROM orders o
+        LEFT JOIN customers c ON o.customer_id = c.id
+        LEFT JOIN vehicles v ON o.vehicle_id = v.id
+    """
+    SELECT_SQL = """
+        SELECT
+            o.id,
+            o.order_number,
+            o.order_type,
+            o.status,
+            c.first_name || ' ' || c.last_name as customer_name,
+            v.brand || ' ' || v.model || ' (' || v.license_plate || ')' as vehicle_info,
+            o.created_date,
+            o.completed_date,
+            o.total_price,
+            o.note
+    """ + FROM_SQL
+    COUNT_SQL = "SELECT COUNT(*) " + FROM_SQL
+
+    # Sloupce prohledávané vyhledávacím polem
+    SEARCH_COLUMNS = [
+        "o.order_number", "c.first_name", "c.last_name", "c.company_name",
+        "v.brand", "v.model", "v.license_plate", "o.note",
+    ]
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_vehicle_id = None  # Pro filtrování podle motorky
         self.detail_windows = []  # Seznam otevřených detailů
+        self.orders_count = 0  # Počet všech zakázek (pro "Zobrazeno: x / y")
+        self.search_query = DebouncedQuery(self)
+        self.search_query.results_ready.connect(self.display_orders)
+        self.search_query.failed.connect(self.on_search_failed)
         self.init_ui()
-        self.load_orders()
+        # Data se načtou na pozadí při zobrazení modulu (MainWindow.switch_module)
 
     def init_ui(self):
         """Inicializace UI"""
@@ -60,9 +91,14 @@ class OrdersModule(QWidget):
         self.btn_offer.setStyleSheet(self.get_button_style(config.COLOR_WARNING))
         self.btn_offer.clicked.connect(lambda: self.create_order("Nabídka"))
 
+        self.btn_batch_print = QPushButton("🖨️ Tisk dávky")
+        self.btn_batch_print.setStyleSheet(self.get_button_style("#34495e"))
+        self.btn_batch_print.clicked.connect(self.print_batch)
+
         header.addWidget(self.btn_new_order)
         header.addWidget(self.btn_free_sale)
         header.addWidget(self.btn_offer)
+        header.addWidget(self.btn_batch_print)
 
         layout.addLayout(header)
 
@@ -76,7 +112,7 @@ class OrdersModule(QWidget):
         # Vyhledávání
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("🔍 Hledat podle čísla, zákazníka, motorky...")
-        self.search_input.textChanged.connect(self.filter_orders)
+        self.search_input.textChanged.connect(self.schedule_filter)
         self.search_input.setStyleSheet("""
             QLineEdit {
                 padding: 8px;
@@ -114,33 +150,37 @@ class OrdersModule(QWidget):
 
         layout.addLayout(filters)
 
-        # Tabulka zakázek
-        self.table = QTableWidget()
-        self.table.setColumnCount(10)
-        self.table.setHorizontalHeaderLabels([
-            "Číslo", "Typ", "Stav", "Zákazník", "Motorka",
-            "Datum vytvoření", "Datum dokončení", "Cena celkem", "Poznámka", "ID"
-        ])
-
-        # Skrytý sloupec ID
-        self.table.setColumnHidden(9, True)
+        # Tabulka zakázek (řádky = tuple z load_orders, index 0 = ID)
+        dash = lambda v: v or "---"
+        columns = [
+            TableColumn("Číslo", 1, formatter=lambda v: str(v)),
+            TableColumn("Typ", 2),
+            TableColumn("Stav", 3,
+                        background=lambda o: config.ORDER_STATUS_COLORS.get(o[3], "#95a5a6"),
+                        foreground=lambda o: "white"),
+            TableColumn("Zákazník", 4, formatter=dash),
+            TableColumn("Motorka", 5, formatter=dash),
+            TableColumn("Datum vytvoření", 6, formatter=dash),
+            TableColumn("Datum dokončení", 7, formatter=dash),
+            TableColumn("Cena celkem", 8, formatter=lambda v: f"{v:.2f} Kč" if v else "0.00 Kč",
+                        align=ALIGN_RIGHT),
+            TableColumn("Poznámka", 9, formatter=lambda v: v[:50] + "..." if v and len(v) > 50 else (v or "---"),
+                        stretch=True),
+            TableColumn("ID", 0, hidden=True),
+        ]
+        self.table = LazyTableView(columns)
 
         # Nastavení tabulky
-        self.table.setAlternatingRowColors(True)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #ddd;
                 border-radius: 5px;
                 background-color: white;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #3498db;
                 color: white;
             }
@@ -202,34 +242,34 @@ class OrdersModule(QWidget):
 
     def update_stats(self):
         """Aktualizace statistik"""
-        try:
-            # Celkový počet
-            total = db.execute_query("SELECT COUNT(*) FROM orders")
-            total_count = total[0][0] if total else 0
-
-            # Podle stavů
-            preparation = db.execute_query(
-                "SELECT COUNT(*) FROM orders WHERE status = 'V přípravě'"
-            )
-            open_orders = db.execute_query(
-                "SELECT COUNT(*) FROM orders WHERE status = 'Otevřená'"
-            )
-            working = db.execute_query(
-                "SELECT COUNT(*) FROM orders WHERE status = 'Rozpracovaná'"
-            )
-
-            prep_count = preparation[0][0] if preparation else 0
-            open_count = open_orders[0][0] if open_orders else 0
-            work_count = working[0][0] if working else 0
-
-            # Aktualizace labelů
-            self.lbl_stat_total.setText(f"Celkem: {total_count}")
-            self.lbl_stat_preparation.setText(f"V přípravě: {prep_count}")
-            self.lbl_stat_open.setText(f"Otevřená: {open_count}")
-            self.lbl_stat_working.setText(f"Rozpracovaná: {work_count}")
+        self.show_stats(self.fetch_stats())
 
+    def fetch_stats(self):
+        """Počty zakázek podle stavů jedním dotazem (lze volat z vlákna)"""
+        stats = {"total": 0, "preparation": 0, "open": 0, "working": 0}
+        try:
+            row = db.fetch_one("""
+                SELECT
+                    COUNT(*),
+                    SUM(CASE WHEN status = 'V přípravě' THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN status = 'Otevřená' THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN status = 'Rozpracovaná' THEN 1 ELSE 0 END)
+                FROM orders
+            """)
+            if row:
+                for key, value in zip(("total", "preparation", "open", "working"), row):
+                    stats[key] = value or 0
         except Exception as e:
             print(f"Chyba při aktualizaci statistik: {e}")
+        return stats
+
+    def show_stats(self, stats):
+        """Aktualizace labelů statistik"""
+        self.orders_count = stats["total"]
+        self.lbl_stat_total.setText(f"Celkem: {stats['total']}")
+        self.lbl_stat_preparation.setText(f"V přípravě: {stats['preparation']}")
+        self.lbl_stat_open.setText(f"Otevřená: {stats['open']}")
+        self.lbl_stat_working.setText(f"Rozpracovaná: {stats['working']}")
 
     def get_button_style(self, color):
         """Styl pro tlačítka"""
@@ -285,154 +325,97 @@ class OrdersModule(QWidget):
             self.load_orders()
             QMessageBox.information(self, "Úspěch", f"{order_type} byla úspěšně vytvořena!")
 
+    def print_batch(self):
+        """Dávkový tisk zakázkových listů / proforem za den"""
+        from .order_batch_export import BatchPdfDialog
+        BatchPdfDialog(self).exec()
+
     def load_orders(self):
         """Načtení zakázek z databáze"""
-        try:
-            query = """
-                SELECT
-                    o.id,
-                    o.order_number,
-                    o.order_type,
-                    o.status,
-                    c.first_name || ' ' || c.last_name as customer_name,
-                    v.brand || ' ' || v.model || ' (' || v.license_plate || ')' as vehicle_info,
-                    o.created_date,
-                    o.completed_date,
-                    o.total_price,
-                    o.note
-                FROM orders o
-                LEFT JOIN customers c ON o.customer_id = c.id
-                LEFT JOIN vehicles v ON o.vehicle_id = v.id
-            """
-
-            # Filtrování podle motorky
-            params = []
-            if self.current_vehicle_id:
-                query += " WHERE o.vehicle_id = ?"
-                params.append(self.current_vehicle_id)
-
-            query += " ORDER BY o.created_date DESC"
-
-            orders = db.execute_query(query, params)
-            self.display_orders(orders)
-            self.update_stats()
-
-        except Exception as e:
-            QMessageBox.critical(self, "Chyba", f"Chyba při načítání zakázek:\n{str(e)}")
+        self.update_stats()
+        self.filter_orders()
 
     def refresh(self):
-        """Obnovení dat - volá se při přepnutí na modul"""
+        """Obnovení dat (synchronně)"""
         self.load_orders()
-        self.update_stats()
-
-
-    def display_orders(self, orders):
-        """Zobrazení zakázek v tabulce"""
-        self.table.setRowCount(0)
 
-        for order in orders:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
+    # ------------------------- NAČÍTÁNÍ NA POZADÍ -------------------------
 
-            # Číslo zakázky
-            self.table.setItem(row, 0, QTableWidgetItem(str(order[1])))
+    def fetch_data(self, params=None):
+        """Statistiky modulu (pracovní vlákno) - volá se při přepnutí na modul"""
+        return self.fetch_stats()
 
-            # Typ
-            type_item = QTableWidgetItem(order[2])
-            self.table.setItem(row, 1, type_item)
+    def apply_data(self, stats):
+        """Zobrazení statistik a spuštění dotazu seznamu (ten běží ve vlastním vlákně)"""
+        self.show_stats(stats)
+        self.filter_orders()
 
-            # Stav
-            status_item = QTableWidgetItem(order[3])
-            status_color = config.ORDER_STATUS_COLORS.get(order[3], "#95a5a6")
-            status_item.setBackground(QColor(status_color))
-            status_item.setForeground(QColor("white"))
-            self.table.setItem(row, 2, status_item)
+    def build_query(self):
+        """Sestavení stránkovaného dotazu z vyhledávání a filtrů"""
+        flt = SqlFilter()
 
-            # Zákazník
-            self.table.setItem(row, 3, QTableWidgetItem(order[4] or "---"))
+        # Filtrování podle motorky
+        if self.current_vehicle_id:
+            flt.add("o.vehicle_id = ?", self.current_vehicle_id)
 
-            # Motorka
-            self.table.setItem(row, 4, QTableWidgetItem(order[5] or "---"))
+        filter_type = self.filter_type.currentText()
+        if filter_type != "Vše":
+            flt.add("o.order_type = ?", filter_type)
 
-            # Datum vytvoření
-            self.table.setItem(row, 5, QTableWidgetItem(order[6] or "---"))
+        filter_status = self.filter_status.currentText()
+        if filter_status != "Vše":
+            flt.add("o.status = ?", filter_status)
 
-            # Datum dokončení
-            self.table.setItem(row, 6, QTableWidgetItem(order[7] or "---"))
+        flt.add_search(self.search_input.text(), self.SEARCH_COLUMNS)
 
-            # Cena
-            price = f"{order[8]:.2f} Kč" if order[8] else "0.00 Kč"
-            price_item = QTableWidgetItem(price)
-            price_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.table.setItem(row, 7, price_item)
+        return PagedQuery(self.SELECT_SQL, self.COUNT_SQL, flt.where(),
+                          order_by="o.created_date DESC")
 
-            # Poznámka
-            note_text = order[9][:50] + "..." if order[9] and len(order[9]) > 50 else (order[9] or "---")
-            self.table.setItem(row, 8, QTableWidgetItem(note_text))
+    def display_orders(self, total, orders, query):
+        """Zobrazení první stránky zakázek, další se dotahují při scrollu"""
+        self.table.set_rows(orders, total=total, page_loader=query.page_loader())
 
-            # ID (skryté)
-            self.table.setItem(row, 9, QTableWidgetItem(str(order[0])))
+        # Aktualizace počtu
+        if query.where_sql:
+            self.lbl_total.setText(f"Zobrazeno: {total} / {self.orders_count}")
+        else:
+            self.lbl_total.setText(f"Celkem: {total}")
 
-        # Aktualizace statistik
-        self.lbl_total.setText(f"Celkem: {len(orders)}")
+    def on_search_failed(self, message):
+        """Chyba dotazu na pozadí"""
+        self.lbl_total.setText("Chyba při načítání zakázek")
 
-        # Automatické přizpůsobení šířky sloupců
-        for i in range(8):
-            self.table.resizeColumnToContents(i)
+    def schedule_filter(self):
+        """Vyhledávání při psaní - dotaz až po dopsání, běžící dotaz se zruší"""
+        self.search_query.schedule(self.build_query)
 
     def filter_orders(self):
-        """Filtrování zakázek"""
-        search_text = self.search_input.text().lower()
-        filter_type = self.filter_type.currentText()
-        filter_status = self.filter_status.currentText()
-
-        for row in range(self.table.rowCount()):
-            show = True
-
-            # Filtr vyhledávání
-            if search_text:
-                row_text = ""
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    if item:
-                        row_text += item.text().lower() + " "
-                show = search_text in row_text
-
-            # Filtr typu
-            if show and filter_type != "Vše":
-                type_item = self.table.item(row, 1)
-                if type_item and type_item.text() != filter_type:
-                    show = False
-
-            # Filtr stavu
-            if show and filter_status != "Vše":
-                status_item = self.table.item(row, 2)
-                if status_item and status_item.text() != filter_status:
-                    show = False
-
-            self.table.setRowHidden(row, not show)
-
-        # Aktualizace počtu
-        visible = sum(1 for row in range(self.table.rowCount()) if not self.table.isRowHidden(row))
-        self.lbl_total.setText(f"Zobrazeno: {visible} / {self.table.rowCount()}")
+        """Filtrování zakázek - dotaz do databáze ihned"""
+        self.search_query.run_now(self.build_query)
 
     def reset_filters(self):
         """Reset filtrů"""
+        widgets = [self.search_input, self.filter_type, self.filter_status]
+        for widget in widgets:
+            widget.blockSignals(True)
         self.search_input.clear()
         self.filter_type.setCurrentIndex(0)
         self.filter_status.setCurrentIndex(0)
+        for widget in widgets:
+            widget.blockSignals(False)
         self.current_vehicle_id = None
         self.load_orders()
 
     def open_order_detail(self):
         """Otevření detailu zakázky"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        order = self.table.current_record()
+        if order is None:
             return
 
-        order_id = int(self.table.item(current_row, 9).text())
+        self.open_record(int(order[0]))
 
-        # Otevření detailu v novém okně
+    def open_record(self, order_id):
+        """Otevření detailu zakázky podle ID (např. z globálního vyhledávání)"""
         detail_window = OrderDetailWindow(order_id, parent=self)
         detail_window.order_updated.connect(self.load_orders)
         detail_window.show()
@@ -440,7 +423,7 @@ class OrdersModule(QWidget):
 
     def show_context_menu(self, position):
         """Kontextové menu pravým tlačítkem - VYLEPŠENÉ"""
-        if self.table.currentRow() < 0:
+        if self.table.current_record() is None:
             return
 
         menu = QMenu(self)
@@ -484,11 +467,11 @@ class OrdersModule(QWidget):
 
     def copy_order_number(self):
         """Kopírování čísla zakázky do schránky"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        order = self.table.current_record()
+        if order is None:
             return
 
-        order_number = self.table.item(current_row, 0).text()
+        order_number = str(order[1])
         clipboard = QApplication.clipboard()
         clipboard.setText(order_number)
 
@@ -500,12 +483,12 @@ class OrdersModule(QWidget):
 
     def quick_change_status(self, new_status):
         """Rychlá změna stavu zakázky"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        order = self.table.current_record()
+        if order is None:
             return
 
-        order_id = int(self.table.item(current_row, 9).text())
-        order_number = self.table.item(current_row, 0).text()
+        order_id = int(order[0])
+        order_number = str(order[1])
 
         try:
             db.execute_query(
@@ -526,11 +509,11 @@ class OrdersModule(QWidget):
 
     def edit_order(self):
         """Úprava zakázky"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        order = self.table.current_record()
+        if order is None:
             return
 
-        order_id = int(self.table.item(current_row, 9).text())
+        order_id = int(order[0])
 
         dialog = OrderFormDialog(order_id=order_id, parent=self)
         if dialog.exec():
@@ -538,12 +521,12 @@ class OrdersModule(QWidget):
 
     def delete_order(self):
         """Smazání zakázky"""
-        current_row = self.table.currentRow()
-        if current_row < 0:
+        order = self.table.current_record()
+        if order is None:
             return
 
-        order_number = self.table.item(current_row, 0).text()
-        order_id = int(self.table.item(current_row, 9).text())
+        order_number = str(order[1])
+        order_id = int(order[0])
 
         reply = QMessageBox.question(
             self,
@@ -555,8 +538,10 @@ class OrdersModule(QWidget):
 
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                db.execute_query("DELETE FROM order_items WHERE order_id = ?", [order_id])
-                db.execute_query("DELETE FROM orders WHERE id = ?", [order_id])
+                # Položky i hlavička zakázky v jedné transakci
+                with db.transaction():
+                    db.execute_query("DELETE FROM order_items WHERE order_id = ?", [order_id])
+                    db.execute_query("DELETE FROM orders WHERE id = ?", [order_id])
                 self.load_orders()
                 QMessageBox.information(self, "Úspěch", "Zakázka byla smazána.")
             except Exception as e:
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+Dávkové generování dokumentů zakázek do PDF
+- DocumentJob: jeden dokument (zakázkový list / proforma / faktura)
+- order_jobs(), work_order_jobs(den), invoice_jobs(id faktur / období): výběr dokladů
+- render_batch(): data všech dokladů se načtou dávkově (get_orders_data),
+  PDF se vykreslí v ProcessPoolExecutor a zapíší do ZIP nebo jednoho PDF
+- run_batch_pdf(): totéž na pozadí s QProgressDialog
+
+Procesy dávky nesahají do databáze - dostanou hotová data zakázky včetně
+nastavení firmy a šablon, fonty registrují a loga načtou jednou při startu.
+Malé dávky se vykreslí přímo ve vlákně (start procesů by byl dražší).
+Sloučení do jednoho PDF potřebuje knihovnu pypdf, ZIP funguje vždy.
+"""
+
+import importlib.util
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Union
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QHBoxLayout, QComboBox,
+                             QDateEdit, QPushButton, QFileDialog, QMessageBox,
+                             QProgressDialog, QWidget)
+from PyQt6.QtCore import Qt, QDate, QObject, QRunnable, QThreadPool, QStandardPaths, pyqtSignal
+
+from database_manager import db
+from utils.utils_documents import document_resources
+from utils.utils_export import ExportCancelled, ProgressCallback
+from .order_export import OrderExporter, DOCUMENT_TEMPLATE_TYPES, preload_logos
+
+MERGE_AVAILABLE = importlib.util.find_spec("pypdf") is not None
+
+# Od kolika dokumentů se vyplatí spouštět procesy
+PROCESS_POOL_MIN_JOBS = 8
+# Dokumentů na jedno předání procesu
+POOL_CHUNK_SIZE = 4
+
+DOCUMENT_NAMES = {
+    'work_order': "Zakázkové listy",
+    'proforma': "Proformy",
+    'invoice': "Faktury",
+}
+
+
+@dataclass(frozen=True)
+class DocumentJob:
+    """Jeden dokument dávky"""
+    document: str                       # 'work_order' / 'proforma' / 'invoice'
+    order_id: int
+    file_name: str
+    invoice_number: Optional[str] = None
+
+
+def _safe_name(text) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", str(text)).strip("_") or "dokument"
+
+
+# -----------------------
+# Výběr dokladů
+# -----------------------
+def order_jobs(document: str, order_ids: Iterable[int]) -> List[DocumentJob]:
+    """Zakázkové listy / proformy vybraných zakázek (v pořadí čísel zakázek)"""
+    ids = list(dict.fromkeys(order_ids))
+    if not ids:
+        return []
+    prefix = "zakazkovy_list" if document == 'work_order' else document
+    jobs = []
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        rows = db.fetch_all(
+            f"SELECT id, order_number FROM orders WHERE id IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        jobs.extend(DocumentJob(document, row[0], f"{prefix}_{_safe_name(row[1])}.pdf")
+                    for row in rows)
+    jobs.sort(key=lambda job: job.file_name)
+    return jobs
+
+
+def work_order_jobs(day, document: str = 'work_order') -> List[DocumentJob]:
+    """Zakázkové listy (nebo proformy) zakázek vytvořených v daný den (date)"""
+    next_day = day.fromordinal(day.toordinal() + 1)
+    rows = db.fetch_all(
+        "SELECT id FROM orders WHERE created_date >= ? AND created_date < ? ORDER BY order_number",
+        (day.isoformat(), next_day.isoformat())
+    )
+    return order_jobs(document, [row[0] for row in rows])
+
+
+def invoice_jobs(invoice_ids: Optional[Sequence[int]] = None,
+                 date_from: Optional[str] = None,
+                 date_to: Optional[str] = None) -> List[DocumentJob]:
+    """
+    Vydané faktury podle id nebo data vystavení (ISO, včetně)
+
+    Dokument se skládá z dat zakázky, faktury bez zakázky se přeskočí.
+    """
+    conditions = ["i.invoice_type = 'issued'", "i.order_id IS NOT NULL"]
+    params: list = []
+    if date_from:
+        conditions.append("i.issue_date >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("substr(i.issue_date, 1, 10) <= ?")
+        params.append(date_to)
+
+    if invoice_ids is None:
+        chunks = [None]
+    else:
+        ids = list(dict.fromkeys(invoice_ids))
+        chunks = [ids[start:start + 500] for start in range(0, len(ids), 500)]
+
+    rows = []
+    for chunk in chunks:
+        where = list(conditions)
+        if chunk is not None:
+            where.append(f"i.id IN ({','.join('?' * len(chunk))})")
+        rows.extend(db.fetch_all(f"""
+            SELECT i.order_id, i.invoice_number, i.issue_date
+            FROM invoices i
+            WHERE {' AND '.join(where)}
+        """, params + (chunk or [])))
+
+    rows.sort(key=lambda row: (row[2] or "", row[1] or ""))
+    return [DocumentJob('invoice', row[0], f"faktura_{_safe_name(row[1])}.pdf", row[1])
+            for row in rows]
+
+
+# -----------------------
+# Procesy dávky
+# -----------------------
+_worker_exporter: Optional[OrderExporter] = None
+
+
+def _init_worker(logos):
+    """Start procesu: fonty a loga jednou pro všechny jeho dokumenty"""
+    global _worker_exporter
+    preload_logos(logos)
+    _worker_exporter = OrderExporter()
+
+
+def _render(task):
+    document, data, invoice_number = task
+    return _worker_exporter.render_document(document, data, invoice_number)
+
+
+def _pool_workers(jobs: int) -> int:
+    return max(1, min(os.cpu_count() or 1, 4, jobs // POOL_CHUNK_SIZE))
+
+
+def render_batch(jobs: Sequence[DocumentJob], file_path: Union[str, Path],
+                 progress: Optional[ProgressCallback] = None) -> int:
+    """
+    Vygeneruje dokumenty do jednoho souboru
+
+    Args:
+        jobs: dokumenty v pořadí výstupu
+        file_path: .zip (PDF soubory) nebo .pdf (sloučené, potřebuje pypdf)
+        progress: progress(hotovo, celkem) -> False zruší generování
+
+    Returns:
+        int: počet zapsaných dokumentů
+
+    Raises:
+        ExportCancelled: zrušeno (rozpracovaný soubor je smazán)
+    """
+    file_path = Path(file_path)
+    merge = file_path.suffix.lower() == ".pdf"
+    if merge and not MERGE_AVAILABLE:
+        raise RuntimeError("Pro sloučení do jednoho PDF je potřeba:\n\npip install pypdf\n\n"
+                           "Dokumenty lze uložit jako ZIP.")
+
+    # Data všech zakázek najednou (jeden dotaz na dávku, nastavení a šablony z cache)
+    exporter = OrderExporter()
+    data = exporter.get_orders_data([job.order_id for job in jobs])
+    jobs = [job for job in jobs if job.order_id in data]
+    tasks = [(job.document, data[job.order_id], job.invoice_number) for job in jobs]
+    total = len(tasks)
+
+    if progress is not None and progress(0, total) is False:
+        raise ExportCancelled()
+
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    executor = None
+    written = 0
+    try:
+        if total >= PROCESS_POOL_MIN_JOBS:
+            logos = {}
+            for template_type in set(DOCUMENT_TEMPLATE_TYPES.values()):
+                logo_path = document_resources.template(template_type).logo_path
+                logo = document_resources.logo_bytes(logo_path)
+                if logo:
+                    logos[logo_path] = logo
+            executor = ProcessPoolExecutor(max_workers=_pool_workers(total),
+                                           initializer=_init_worker, initargs=(logos,))
+            pdfs = executor.map(_render, tasks, chunksize=POOL_CHUNK_SIZE)
+        else:
+            pdfs = (exporter.render_document(*task) for task in tasks)
+
+        if merge:
+            from pypdf import PdfReader, PdfWriter
+
+            writer = PdfWriter()
+            for pdf in pdfs:
+                writer.append(PdfReader(BytesIO(pdf)))
+                written += 1
+                if progress is not None and progress(written, total) is False:
+                    raise ExportCancelled()
+            with open(file_path, "wb") as f:
+                writer.write(f)
+        else:
+            used = set()
+            with zipfile.ZipFile(file_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+                for job, pdf in zip(jobs, pdfs):
+                    name = job.file_name
+                    # Stejné číslo u více dokladů - soubory se nesmí přepsat
+                    suffix = 2
+                    while name in used:
+                        name = f"{Path(job.file_name).stem}_{suffix}.pdf"
+                        suffix += 1
+                    used.add(name)
+                    zipf.writestr(name, pdf)
+                    written += 1
+                    if progress is not None and progress(written, total) is False:
+                        raise ExportCancelled()
+    except BaseException:
+        # Nedokončený soubor nenechávat (zrušení i chyba)
+        try:
+            file_path.unlink()
+        except OSError:
+            pass
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    return written
+
+
+# -----------------------
+# Běh na pozadí
+# -----------------------
+class _BatchSignals(QObject):
+    """Signály úlohy (QRunnable není QObject)"""
+    progress = pyqtSignal(int, int)     # hotovo, celkem
+    finished = pyqtSignal(str, int)     # soubor, počet dokumentů
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class BatchPdfTask(QRunnable):
+    """Spustí render_batch ve vlákně z poolu (načtení dat má vlastní WAL spojení)"""
+
+    def __init__(self, jobs: Sequence[DocumentJob], file_path: Union[str, Path]):
+        super().__init__()
+        self.jobs = list(jobs)
+        self.file_path = Path(file_path)
+        self.signals = _BatchSignals()
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _progress(self, done: int, total: int) -> bool:
+        self.signals.progress.emit(done, total)
+        return not self._cancelled
+
+    def run(self):
+        try:
+            count = render_batch(self.jobs, self.file_path, self._progress)
+            self.signals.finished.emit(str(self.file_path), count)
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        finally:
+            db.release_thread_connection()
+
+
+def run_batch_pdf(parent: QWidget, jobs: Sequence[DocumentJob],
+                  file_path: Union[str, Path], title: str = "Generování PDF") -> BatchPdfTask:
+    """Spustí dávkové generování na pozadí s dialogem průběhu"""
+    task = BatchPdfTask(jobs, file_path)
+
+    dialog = QProgressDialog("Načítání dokladů...", "Zrušit", 0, 0, parent)
+    dialog.setWindowTitle(title)
+    dialog.setWindowModality(Qt.WindowModality.WindowModal)
+    dialog.setMinimumDuration(300)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+    # Úloha musí žít, dokud neskončí (signály), drží ji dialog
+    dialog.batch_task = task
+
+    def progress(done: int, total: int):
+        dialog.setMaximum(total)
+        dialog.setValue(done)
+        dialog.setLabelText(f"Vygenerováno dokumentů: {done} z {total}")
+
+    def finished(path: str, count: int):
+        dialog.close()
+        QMessageBox.information(parent, "Úspěch",
+                                f"Vygenerováno {count} dokumentů.\n\nSoubor: {path}")
+
+    def failed(message: str):
+        dialog.close()
+        QMessageBox.critical(parent, "Chyba", f"Generování PDF se nezdařilo:\n{message}")
+
+    task.signals.progress.connect(progress)
+    task.signals.finished.connect(finished)
+    task.signals.failed.connect(failed)
+    task.signals.cancelled.connect(dialog.close)
+    dialog.canceled.connect(task.cancel)
+
+    QThreadPool.globalInstance().start(task)
+    return task
+
+
+def save_batch_pdf(parent: QWidget, jobs: Sequence[DocumentJob], default_name: str,
+                   title: str = "Generování PDF") -> Optional[BatchPdfTask]:
+    """Zeptá se na cílový soubor (ZIP / sloučené PDF) a spustí generování"""
+    if not jobs:
+        QMessageBox.information(parent, title, "Pro zvolený výběr nejsou žádné doklady.")
+        return None
+
+    default_dir = QStandardPaths.writableLocation(
+        QStandardPaths.StandardLocation.DocumentsLocation
+    )
+    filters = "ZIP archiv (*.zip)"
+    if MERGE_AVAILABLE:
+        filters += ";;Jeden PDF soubor (*.pdf)"
+    file_path, selected = QFileDialog.getSaveFileName(
+        parent, f"Uložit {len(jobs)} dokumentů",
+        os.path.join(default_dir, f"{default_name}.zip"), filters
+    )
+    if not file_path:
+        return None
+
+    path = Path(file_path)
+    if path.suffix.lower() not in (".zip", ".pdf"):
+        path = path.with_suffix(".pdf" if "*.pdf" in selected else ".zip")
+    return run_batch_pdf(parent, jobs, path, title)
+
+
+class BatchPdfDialog(QDialog):
+    """Tisk dávky: doklady zakázek vytvořených v jeden den"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Dávkový tisk dokladů")
+        self.setMinimumWidth(350)
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        self.document_combo = QComboBox()
+        for document in ('work_order', 'proforma'):
+            self.document_combo.addItem(DOCUMENT_NAMES[document], document)
+        form.addRow("Doklady:", self.document_combo)
+
+        self.day_edit = QDateEdit(QDate.currentDate())
+        self.day_edit.setCalendarPopup(True)
+        self.day_edit.setDisplayFormat("dd.MM.yyyy")
+        form.addRow("Zakázky ze dne:", self.day_edit)
+        layout.addLayout(form)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        btn_ok = QPushButton("Generovat")
+        btn_ok.clicked.connect(self.generate)
+        btn_cancel = QPushButton("Zrušit")
+        btn_cancel.clicked.connect(self.reject)
+        buttons.addWidget(btn_ok)
+        buttons.addWidget(btn_cancel)
+        layout.addLayout(buttons)
+
+    def generate(self):
+        document = self.document_combo.currentData()
+        day = self.day_edit.date().toPyDate()
+        jobs = work_order_jobs(day, document)
+        name = "zakazkove_listy" if document == 'work_order' else "proformy"
+        if save_batch_pdf(self.parentWidget(), jobs, f"{name}_{day.isoformat()}",
+                          DOCUMENT_NAMES[document]) is not None:
+            self.accept()
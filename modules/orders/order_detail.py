@@ -623,8 +623,10 @@ class OrderDetailWindow(QMainWindow):
 
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                db.execute_query("DELETE FROM order_items WHERE order_id = ?", [self.order_id])
-                db.execute_query("DELETE FROM orders WHERE id = ?", [self.order_id])
+                # Položky i hlavička zakázky v jedné transakci
+                with db.transaction():
+                    db.execute_query("DELETE FROM order_items WHERE order_id = ?", [self.order_id])
+                    db.execute_query("DELETE FROM orders WHERE id = ?", [self.order_id])
                 QMessageBox.information(self, "Smazáno", "Zakázka smazána")
                 self.order_updated.emit()
                 self.close()
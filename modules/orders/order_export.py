@@ -13,27 +13,62 @@ from reportlab.lib import colors
 from reportlab.platypus import Table, TableStyle
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib.utils import ImageReader
 from datetime import datetime
+from io import BytesIO
 import os
 import config
 from database_manager import db
+from utils.utils_documents import DocumentTemplate, document_resources
 
 
-class OrderExporter:
-    """Třída pro export zakázek do PDF"""
+# Typ šablony (Administrativa -> Šablony) pro jednotlivé dokumenty
+DOCUMENT_TEMPLATE_TYPES = {
+    'work_order': 'protocol',
+    'proforma': 'invoice',
+    'invoice': 'invoice',
+}
 
-    def __init__(self):
-        # Registrace fontu pro češtinu
+# Fonty a loga registrované v tomto procesu (dávkové generování je sdílí mezi dokumenty)
+_fonts = None
+_logo_readers = {}
+
+
+def register_fonts():
+    """Registrace fontu pro češtinu - jednou za proces; vrací (font, tučný font)"""
+    global _fonts
+    if _fonts is None:
         try:
             # Pokus o registraci DejaVu fontu
             pdfmetrics.registerFont(TTFont('DejaVu', 'DejaVuSans.ttf'))
             pdfmetrics.registerFont(TTFont('DejaVu-Bold', 'DejaVuSans-Bold.ttf'))
-            self.font_name = 'DejaVu'
-            self.font_bold = 'DejaVu-Bold'
-        except:
+            _fonts = ('DejaVu', 'DejaVu-Bold')
+        except Exception:
             # Fallback na standardní font
-            self.font_name = 'Helvetica'
-            self.font_bold = 'Helvetica-Bold'
+            _fonts = ('Helvetica', 'Helvetica-Bold')
+    return _fonts
+
+
+def preload_logos(logos):
+    """Předá procesu načtená loga {cesta: bytes} (inicializace procesu dávky)"""
+    for path, data in (logos or {}).items():
+        if path not in _logo_readers:
+            _logo_readers[path] = ImageReader(BytesIO(data))
+
+
+def _logo_reader(path):
+    """ImageReader loga (načte se jednou za proces)"""
+    if path not in _logo_readers:
+        data = document_resources.logo_bytes(path)
+        _logo_readers[path] = ImageReader(BytesIO(data)) if data else None
+    return _logo_readers[path]
+
+
+class OrderExporter:
+    """Třída pro export zakázek do PDF"""
+
+    def __init__(self):
+        self.font_name, self.font_bold = register_fonts()
 
     def export_work_order(self, order_id, parent=None):
         """Export zakázkového listu"""
@@ -170,109 +205,111 @@ class OrderExporter:
 
     def get_order_data(self, order_id):
         """Načtení kompletních dat zakázky"""
-        try:
-            # Základní info o zakázce
-            order = db.execute_query(
-                """SELECT
-                    o.order_number, o.order_type, o.status,
-                    o.created_date, o.completed_date, o.note, o.total_price,
-                    c.first_name, c.last_name, c.phone, c.email,
-                    c.address, c.city, c.postal_code, c.ico, c.dic, c.company,
-                    v.brand, v.model, v.license_plate, v.vin,
-                    v.year, v.color, v.engine_type, v.mileage
-                FROM orders o
-                LEFT JOIN customers c ON o.customer_id = c.id
-                LEFT JOIN vehicles v ON o.vehicle_id = v.id
-                WHERE o.id = ?""",
-                [order_id]
-            )
+        return self.get_orders_data([order_id]).get(order_id)
 
-            if not order or len(order) == 0:
-                return None
+    def get_orders_data(self, order_ids):
+        """
+        Načtení kompletních dat více zakázek najednou (dávkový export)
 
-            order = order[0]
+        Zakázky i položky se načtou jedním dotazem po dávkách, nastavení firmy
+        a šablony z cache. Výsledek obsahuje jen obyčejná data, lze ho tedy
+        předat do jiného procesu.
 
-            # Položky zakázky
-            items = db.execute_query(
-                """SELECT item_type, name, quantity, unit, unit_price, vat_rate, total_price
-                   FROM order_items WHERE order_id = ? ORDER BY item_type, id""",
-                [order_id]
-            )
-
-            # Nastavení firmy
+        Returns:
+            {order_id: data} - chybějící zakázky ve výsledku nejsou
+        """
+        result = {}
+        try:
             settings = self.get_company_settings()
-
-            return {
-                'order_number': order[0],
-                'order_type': order[1],
-                'status': order[2],
-                'created_date': order[3] or datetime.now().strftime('%Y-%m-%d'),
-                'completed_date': order[4] or '',
-                'note': order[5] or '',
-                'total_price': order[6] or 0,
-                'customer': {
-                    'first_name': order[7] or '',
-                    'last_name': order[8] or '',
-                    'name': f"{order[7] or ''} {order[8] or ''}".strip(),
-                    'phone': order[9] or '',
-                    'email': order[10] or '',
-                    'address': order[11] or '',
-                    'city': order[12] or '',
-                    'postal_code': order[13] or '',
-                    'full_address': self._format_address(order[11], order[12], order[13]),
-                    'ico': order[14] or '',
-                    'dic': order[15] or '',
-                    'company': order[16] or ''
-                },
-                'vehicle': {
-                    'brand': order[17] or '',
-                    'model': order[18] or '',
-                    'license_plate': order[19] or '',
-                    'vin': order[20] or '',
-                    'year': order[21] or '',
-                    'color': order[22] or '',
-                    'engine_type': order[23] or '',
-                    'mileage': order[24] or 0,
-                    'full_name': f"{order[17] or ''} {order[18] or ''}".strip()
-                },
-                'items': items or [],
-                'settings': settings
-            }
+            templates = {template_type: document_resources.template(template_type)
+                         for template_type in set(DOCUMENT_TEMPLATE_TYPES.values())}
+
+            ids = list(dict.fromkeys(order_ids))
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+
+                # Základní info o zakázkách
+                orders = db.execute_query(
+                    f"""SELECT
+                        o.order_number, o.order_type, o.status,
+                        o.created_date, o.completed_date, o.note, o.total_price,
+                        c.first_name, c.last_name, c.phone, c.email,
+                        c.address, c.city, c.postal_code, c.ico, c.dic, c.company,
+                        v.brand, v.model, v.license_plate, v.vin,
+                        v.year, v.color, v.engine_type, v.mileage,
+                        o.id
+                    FROM orders o
+                    LEFT JOIN customers c ON o.customer_id = c.id
+                    LEFT JOIN vehicles v ON o.vehicle_id = v.id
+                    WHERE o.id IN ({placeholders})""",
+                    chunk
+                ) or []
+
+                # Položky zakázek
+                items = {}
+                for item in db.execute_query(
+                    f"""SELECT order_id, item_type, name, quantity, unit, unit_price, vat_rate, total_price
+                       FROM order_items WHERE order_id IN ({placeholders})
+                       ORDER BY order_id, item_type, id""",
+                    chunk
+                ) or []:
+                    items.setdefault(item[0], []).append(tuple(item[1:]))
+
+                for order in orders:
+                    result[order[25]] = self._order_data(order, items.get(order[25], []),
+                                                         settings, templates)
 
         except Exception as e:
             print(f"Chyba při načítání dat: {e}")
             import traceback
             traceback.print_exc()
-            return None
+
+        return result
+
+    def _order_data(self, order, items, settings, templates):
+        """Slovník dat zakázky z řádku dotazu get_orders_data"""
+        return {
+            'order_number': order[0],
+            'order_type': order[1],
+            'status': order[2],
+            'created_date': order[3] or datetime.now().strftime('%Y-%m-%d'),
+            'completed_date': order[4] or '',
+            'note': order[5] or '',
+            'total_price': order[6] or 0,
+            'customer': {
+                'first_name': order[7] or '',
+                'last_name': order[8] or '',
+                'name': f"{order[7] or ''} {order[8] or ''}".strip(),
+                'phone': order[9] or '',
+                'email': order[10] or '',
+                'address': order[11] or '',
+                'city': order[12] or '',
+                'postal_code': order[13] or '',
+                'full_address': self._format_address(order[11], order[12], order[13]),
+                'ico': order[14] or '',
+                'dic': order[15] or '',
+                'company': order[16] or ''
+            },
+            'vehicle': {
+                'brand': order[17] or '',
+                'model': order[18] or '',
+                'license_plate': order[19] or '',
+                'vin': order[20] or '',
+                'year': order[21] or '',
+                'color': order[22] or '',
+                'engine_type': order[23] or '',
+                'mileage': order[24] or 0,
+                'full_name': f"{order[17] or ''} {order[18] or ''}".strip()
+            },
+            'items': items,
+            'settings': settings,
+            'templates': templates
+        }
 
     def get_company_settings(self):
-        """Načtení nastavení firmy"""
-        try:
-            settings_data = db.execute_query("SELECT key, value FROM settings")
-            settings = {}
-
-            if settings_data:
-                for s in settings_data:
-                    settings[s[0]] = s[1] or ''
-
-            # Výchozí hodnoty
-            return {
-                'company_name': settings.get('company_name', 'Motoservis DMS'),
-                'company_address': settings.get('company_address', ''),
-                'company_phone': settings.get('company_phone', ''),
-                'company_email': settings.get('company_email', ''),
-                'company_ico': settings.get('company_ico', ''),
-                'company_dic': settings.get('company_dic', ''),
-            }
-        except:
-            return {
-                'company_name': 'Motoservis DMS',
-                'company_address': '',
-                'company_phone': '',
-                'company_email': '',
-                'company_ico': '',
-                'company_dic': ''
-            }
+        """Načtení nastavení firmy (z cache - jeden dotaz za běh aplikace)"""
+        return document_resources.company_settings()
 
     def _format_address(self, address, city, postal_code):
         """Formátování adresy"""
@@ -285,6 +322,49 @@ class OrderExporter:
             parts.append(city)
         return ', '.join(parts) if parts else ''
 
+    def _template(self, data, document):
+        """Šablona dokumentu (work_order / proforma / invoice) z dat zakázky"""
+        template_type = DOCUMENT_TEMPLATE_TYPES[document]
+        return data.get('templates', {}).get(template_type) or DocumentTemplate(template_type)
+
+    def _header_color(self, data, document, default):
+        """Barva záhlaví tabulek - primární barva šablony, jinak výchozí"""
+        color = self._template(data, document).primary_color or default
+        try:
+            return colors.HexColor(color)
+        except ValueError:
+            return colors.HexColor(default)
+
+    def _draw_logo(self, c, data, document):
+        """Logo šablony uprostřed hlavičky"""
+        logo_path = self._template(data, document).logo_path
+        reader = _logo_reader(logo_path) if logo_path else None
+        if reader is None:
+            return
+        width, height = A4
+        c.drawImage(reader, width / 2 - 60, height - 68, width=120, height=48,
+                    preserveAspectRatio=True, anchor='c', mask='auto')
+
+    def render_document(self, document, data, invoice_number=None):
+        """
+        Vytvoření PDF dokumentu do paměti (bez dialogů - dávkové generování)
+
+        Args:
+            document: 'work_order', 'proforma' nebo 'invoice'
+            data: data zakázky z get_orders_data
+            invoice_number: číslo faktury (jen 'invoice')
+        """
+        buffer = BytesIO()
+        if document == 'work_order':
+            self.create_work_order_pdf(buffer, data)
+        elif document == 'proforma':
+            self.create_proforma_pdf(buffer, data)
+        elif document == 'invoice':
+            self.create_invoice_pdf(buffer, data, invoice_number)
+        else:
+            raise ValueError(f"Neznámý typ dokumentu: {document}")
+        return buffer.getvalue()
+
     def create_work_order_pdf(self, file_path, data):
         """Vytvoření zakázkového listu - PROFESIONÁLNÍ"""
         c = canvas.Canvas(file_path, pagesize=A4)
@@ -296,6 +376,7 @@ class OrderExporter:
 
         c.setFont(self.font_name, 10)
         c.drawString(30, height - 58, f"Zakázka č.: {data['order_number']}")
+        self._draw_logo(c, data, 'work_order')
 
         # Datum a čas
         c.setFont(self.font_name, 9)
@@ -405,7 +486,7 @@ class OrderExporter:
 
         table = Table(table_data, colWidths=[25, 50, 200, 45, 35, 60, 70])
         table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+            ('BACKGROUND', (0, 0), (-1, 0), self._header_color(data, 'work_order', '#34495e')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
             ('ALIGN', (3, 0), (6, -1), 'RIGHT'),
@@ -478,6 +559,7 @@ class OrderExporter:
         c.setFont(self.font_name, 10)
         c.drawString(30, height - 60, f"K zakázce č.: {data['order_number']}")
         c.drawString(width - 150, height - 40, f"Datum: {datetime.now().strftime('%d.%m.%Y')}")
+        self._draw_logo(c, data, 'proforma')
 
         # Linka
         c.setLineWidth(2)
@@ -532,7 +614,7 @@ class OrderExporter:
 
         table = Table(table_data, colWidths=[280, 60, 50, 80, 90])
         table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+            ('BACKGROUND', (0, 0), (-1, 0), self._header_color(data, 'proforma', '#2c3e50')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
             ('FONTNAME', (0, 0), (-1, 0), self.font_bold),
@@ -583,6 +665,7 @@ class OrderExporter:
         c.setFont(self.font_name, 9)
         c.drawString(width - 180, height - 40, f"Datum vystavení: {datetime.now().strftime('%d.%m.%Y')}")
         c.drawString(width - 180, height - 54, f"Datum splatnosti: ___________")
+        self._draw_logo(c, data, 'invoice')
 
         # Zbytek podobný jako proforma, ale s bankovním spojením, atd.
 
@@ -690,6 +773,7 @@ class OrderExporter:
         # Datum
         c.setFont(self.font_name, 9)
         c.drawString(width - 150, height - 40, f"Datum: {form_data.get('date_received', '')}")
+        self._draw_logo(c, order_data, 'work_order')
 
         # Linka
         c.setLineWidth(2)
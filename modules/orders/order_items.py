@@ -18,6 +18,7 @@ from PyQt6.QtCore import Qt, pyqtSignal
 import math
 import config
 from database_manager import db
+from utils.utils_codebooks import codebooks
 
 
 def _safe_round(value: float, ndigits: int = 2) -> float:
@@ -329,7 +330,7 @@ class ItemDialog(QDialog):
 
         # Jednotka
         self.combo_unit = QComboBox()
-        self.combo_unit.addItems(["ks", "hod", "m", "l", "kg", "m²", "set"])
+        codebooks.fill_combo(self.combo_unit, "units", ["ks", "hod", "m", "l", "kg", "m²", "set"])
         self.combo_unit.setEditable(True)
         form.addRow("Jednotka:", self.combo_unit)
 
@@ -343,8 +344,8 @@ class ItemDialog(QDialog):
 
         # DPH
         self.combo_vat = QComboBox()
-        self.combo_vat.addItems(["21%", "15%", "12%", "0%"])
-        self.combo_vat.setCurrentText("21%")
+        codebooks.fill_combo(self.combo_vat, "vat_rates", ["21%", "15%", "12%", "0%"])
+        self.combo_vat.setCurrentIndex(0)
         self.combo_vat.currentTextChanged.connect(self.calculate_total)
         form.addRow("Sazba DPH:", self.combo_vat)
 
@@ -429,7 +430,13 @@ class ItemDialog(QDialog):
                 self.spin_quantity.setValue(float(it["quantity"] or 1))
                 self.combo_unit.setCurrentText(it["unit"] or "ks")
                 self.spin_unit_price.setValue(float(it["unit_price"] or 0))
-                self.combo_vat.setCurrentText(f"{float(it['vat_rate'] or 21):.0f}%")
+                rate = it["vat_rate"]
+                vat_text = f"{float(rate if rate is not None else codebooks.default_vat_rate()):g}%"
+                if self.combo_vat.findText(vat_text) < 0:
+                    # Sazba už neplatí (není v číselníku) - doplnit, jinak by se
+                    # při uložení přepsala na výchozí
+                    self.combo_vat.addItem(vat_text)
+                self.combo_vat.setCurrentText(vat_text)
                 self.calculate_total()
 
         except Exception as e:
@@ -14,6 +14,9 @@ from PyQt6.QtCore import Qt, pyqtSignal, QDate
 from PyQt6.QtGui import QPixmap
 import config
 from database_manager import db
+from utils.utils_codebooks import codebooks
+from utils.utils_stock import stock_ledger, ISSUE
+from utils.utils_scheduler import reminder_scheduler
 import os
 from datetime import datetime
 
@@ -236,7 +239,7 @@ class OrderItemDialog(QDialog):
         if self.item_type == "Práce":
             self.combo_unit.addItems(["hod", "ks"])
         else:
-            self.combo_unit.addItems(["ks", "m", "l", "kg", "m²", "m³"])
+            codebooks.fill_combo(self.combo_unit, "units", ["ks", "m", "l", "kg", "m²", "m³"])
         self.combo_unit.setEditable(True)
         form.addRow("Jednotka:", self.combo_unit)
 
@@ -257,7 +260,7 @@ class OrderItemDialog(QDialog):
 
         # DPH
         self.combo_vat = QComboBox()
-        self.combo_vat.addItems(["21%", "15%", "12%", "0%"])
+        codebooks.fill_combo(self.combo_vat, "vat_rates", ["21%", "15%", "12%", "0%"])
         self.combo_vat.currentTextChanged.connect(self.calculate_total)
         form.addRow("DPH:", self.combo_vat)
 
@@ -358,13 +361,8 @@ class OrderItemDialog(QDialog):
     def load_labor_types(self):
         """Načtení typů prací z číselníku"""
         try:
-            items = db.execute_query(
-                "SELECT id, name, price FROM codebook_repair_types WHERE active = 1 ORDER BY name"
-            )
-
-            if items:
-                for item in items:
-                    self.combo_labor.addItem(f"{item[1]} - {item[2]:.2f} Kč/hod", item[0])
+            for item in codebooks.repair_types():
+                self.combo_labor.addItem(f"{item['name']} - {item.get('price') or 0:.2f} Kč/hod", item["id"])
 
         except Exception as e:
             print(f"Chyba při načítání prací: {e}")
@@ -391,14 +389,11 @@ class OrderItemDialog(QDialog):
         item_id = self.combo_labor.currentData()
         if item_id:
             try:
-                item = db.execute_query(
-                    "SELECT name, price FROM codebook_repair_types WHERE id = ?",
-                    [item_id]
-                )
-                if item and len(item) > 0:
-                    self.input_name.setText(item[0][0])
+                item = codebooks.get("repair_types", item_id)
+                if item:
+                    self.input_name.setText(item["name"])
                     self.combo_unit.setCurrentText("hod")
-                    self.spin_price.setValue(item[0][1])
+                    self.spin_price.setValue(item.get("price") or 0)
                     self.calculate_total()
             except Exception as e:
                 print(f"Chyba: {e}")
@@ -479,59 +474,62 @@ class OrderItemDialog(QDialog):
         try:
             name = self.input_name.text()
 
-            if self.item_type == "Cizí výkon":
-                # Uložení cizího výkonu
-                sale_price = self.spin_sale_price.value()
-                discount = self.spin_discount.value()
-                final_price = sale_price * (1 - discount / 100)
-
-                if self.is_edit_mode:
-                    db.execute_query(
-                        """UPDATE order_items SET
-                           name = ?, quantity = 1, unit = 'ks',
-                           unit_price = ?, total_price = ?
-                           WHERE id = ?""",
-                        [name, sale_price, final_price, self.item_id]
-                    )
-                else:
-                    db.execute_query(
-                        """INSERT INTO order_items
-                           (order_id, item_type, item_name, name, quantity, unit, unit_price, total_price)
-                           VALUES (?, ?, ?, ?, 1, 'ks', ?, ?)""",
-                        [self.order_id, self.item_type, name, name, sale_price, final_price]
-                    )
+            # Položka zakázky a odpis ze skladu v jedné transakci
+            with db.transaction():
+                if self.item_type == "Cizí výkon":
+                    # Uložení cizího výkonu
+                    sale_price = self.spin_sale_price.value()
+                    discount = self.spin_discount.value()
+                    final_price = sale_price * (1 - discount / 100)
+
+                    if self.is_edit_mode:
+                        db.execute_query(
+                            """UPDATE order_items SET
+                               name = ?, quantity = 1, unit = 'ks',
+                               unit_price = ?, total_price = ?
+                               WHERE id = ?""",
+                            [name, sale_price, final_price, self.item_id]
+                        )
+                    else:
+                        db.execute_query(
+                            """INSERT INTO order_items
+                               (order_id, item_type, item_name, name, quantity, unit, unit_price, total_price)
+                               VALUES (?, ?, ?, ?, 1, 'ks', ?, ?)""",
+                            [self.order_id, self.item_type, name, name, sale_price, final_price]
+                        )
 
-            else:
-                # Standardní uložení
-                quantity = self.spin_quantity.value()
-                unit = self.combo_unit.currentText()
-                unit_price = self.spin_price.value()
-                discount = self.spin_discount.value()
-                total = (quantity * unit_price) * (1 - discount / 100)
-
-                if self.is_edit_mode:
-                    db.execute_query(
-                        """UPDATE order_items SET
-                           name = ?, quantity = ?, unit = ?, unit_price = ?, total_price = ?
-                           WHERE id = ?""",
-                        [name, quantity, unit, unit_price, total, self.item_id]
-                    )
                 else:
-                    db.execute_query(
-                        """INSERT INTO order_items
-                           (order_id, item_type, name, quantity, unit, unit_price, total_price)
-                           VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                        [self.order_id, self.item_type, name, quantity, unit, unit_price, total]
-                    )
-
-                # Pokud je materiál ze skladu, odečti ze skladu
-                if self.item_type == "Materiál" and hasattr(self, 'combo_warehouse'):
-                    warehouse_id = self.combo_warehouse.currentData()
-                    if warehouse_id:
+                    # Standardní uložení
+                    quantity = self.spin_quantity.value()
+                    unit = self.combo_unit.currentText()
+                    unit_price = self.spin_price.value()
+                    discount = self.spin_discount.value()
+                    total = (quantity * unit_price) * (1 - discount / 100)
+
+                    if self.is_edit_mode:
                         db.execute_query(
-                            "UPDATE warehouse SET quantity = quantity - ? WHERE id = ?",
-                            [quantity, warehouse_id]
+                            """UPDATE order_items SET
+                               name = ?, quantity = ?, unit = ?, unit_price = ?, total_price = ?
+                               WHERE id = ?""",
+                            [name, quantity, unit, unit_price, total, self.item_id]
                         )
+                    else:
+                        db.execute_query(
+                            """INSERT INTO order_items
+                               (order_id, item_type, name, quantity, unit, unit_price, total_price)
+                               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                            [self.order_id, self.item_type, name, quantity, unit, unit_price, total]
+                        )
+
+                    # Pokud je materiál ze skladu, odečti ze skladu
+                    if self.item_type == "Materiál" and hasattr(self, 'combo_warehouse'):
+                        warehouse_id = self.combo_warehouse.currentData()
+                        if warehouse_id:
+                            stock_ledger.post(
+                                warehouse_id, ISSUE, -quantity, quantity=quantity,
+                                note=f"Zakázka #{self.order_id}", created_by="admin"
+                            )
+                            reminder_scheduler.refresh("stock", warehouse_id)
 
             self.accept()
 
@@ -646,6 +644,7 @@ class LaborTypesDialog(QDialog):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 db.execute_query("DELETE FROM codebook_repair_types WHERE id = ?", [labor_id])
+                codebooks.invalidate("repair_types")
                 self.load_data()
             except Exception as e:
                 QMessageBox.critical(self, "Chyba", f"Chyba:\n{str(e)}")
@@ -740,6 +739,7 @@ class LaborTypeEditDialog(QDialog):
                     [name, price, active]
                 )
 
+            codebooks.invalidate("repair_types")
             self.accept()
 
         except Exception as e:
@@ -13,87 +13,41 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QTime, QThread, pyqtSignal
 from PyQt6.QtGui import QFont
 from database_manager import db
+from utils.utils_backup import BackupStore
 import config
 import json
-import zipfile
 from pathlib import Path
 from datetime import datetime
 
 
 class BackupThread(QThread):
-    """Vlákno pro zálohování"""
+    """Vlákno pro zálohování (online snímek databáze + deduplikované soubory)"""
     progress = pyqtSignal(int, str)
     finished = pyqtSignal(bool, str)
 
-    def __init__(self, backup_options, backup_path):
+    def __init__(self, backup_options, backup_path, keep=None):
         super().__init__()
         self.backup_options = backup_options
         self.backup_path = backup_path
+        self.keep = keep
 
     def run(self):
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"backup_{timestamp}.zip"
-            backup_file = Path(self.backup_path) / backup_name
-
-            with zipfile.ZipFile(backup_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-                total_steps = sum(self.backup_options.values())
-                current_step = 0
-
-                if self.backup_options.get("database", False):
-                    self.progress.emit(int(current_step / total_steps * 100), "Zálohování databáze...")
-                    db_path = config.DATABASE_PATH
-                    if db_path.exists():
-                        zf.write(db_path, "database/motoservis.db")
-                    current_step += 1
-
-                if self.backup_options.get("documents", False):
-                    self.progress.emit(int(current_step / total_steps * 100), "Zálohování dokumentů...")
-                    docs_dir = config.DATA_DIR / "documents"
-                    if docs_dir.exists():
-                        for file in docs_dir.rglob("*"):
-                            if file.is_file():
-                                arcname = f"documents/{file.relative_to(docs_dir)}"
-                                zf.write(file, arcname)
-                    current_step += 1
-
-                if self.backup_options.get("photos", False):
-                    self.progress.emit(int(current_step / total_steps * 100), "Zálohování fotek...")
-                    photos_dir = config.DATA_DIR / "photos"
-                    if photos_dir.exists():
-                        for file in photos_dir.rglob("*"):
-                            if file.is_file():
-                                arcname = f"photos/{file.relative_to(photos_dir)}"
-                                zf.write(file, arcname)
-                    current_step += 1
-
-                if self.backup_options.get("settings", False):
-                    self.progress.emit(int(current_step / total_steps * 100), "Zálohování nastavení...")
-                    conn = db.get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT key, value FROM app_settings")
-                    settings = {row[0]: row[1] for row in cursor.fetchall()}
-                    settings_json = json.dumps(settings, ensure_ascii=False, indent=2)
-                    zf.writestr("settings/app_settings.json", settings_json)
-                    current_step += 1
-
-                if self.backup_options.get("templates", False):
-                    self.progress.emit(int(current_step / total_steps * 100), "Zálohování šablon...")
-                    templates_dir = config.DATA_DIR / "templates"
-                    if templates_dir.exists():
-                        for file in templates_dir.rglob("*"):
-                            if file.is_file():
-                                arcname = f"templates/{file.relative_to(templates_dir)}"
-                                zf.write(file, arcname)
-                    current_step += 1
-
-            backup_size = backup_file.stat().st_size / (1024 * 1024)
-
-            self.progress.emit(100, "Hotovo!")
-            self.finished.emit(True, f"Záloha vytvořena: {backup_name}\nVelikost: {backup_size:.2f} MB")
+            store = BackupStore(self.backup_path)
+            result = store.create(self.backup_options, self.progress.emit)
+            message = result.summary()
+
+            if self.keep:
+                removed = store.prune(self.keep)
+                if removed:
+                    message += f"\nSmazáno starých záloh: {removed}"
+
+            self.finished.emit(True, message)
 
         except Exception as e:
             self.finished.emit(False, str(e))
+        finally:
+            db.release_thread_connection()
 
 
 class BackupSettingsWidget(QWidget):
@@ -308,7 +262,8 @@ class BackupSettingsWidget(QWidget):
         self.backup_progress.setValue(0)
         self.backup_progress.setFormat("%p% - Zahajuji zálohu...")
 
-        self.backup_thread = BackupThread(options, backup_path)
+        keep = self.max_backups.value() if self.rotate_backups.isChecked() else None
+        self.backup_thread = BackupThread(options, backup_path, keep)
         self.backup_thread.progress.connect(self.on_backup_progress)
         self.backup_thread.finished.connect(self.on_backup_finished)
         self.backup_thread.start()
@@ -355,7 +310,7 @@ class BackupSettingsWidget(QWidget):
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
 
         self.backups_table.setColumnWidth(0, 150)
-        self.backups_table.setColumnWidth(1, 100)
+        self.backups_table.setColumnWidth(1, 190)
         self.backups_table.setColumnWidth(2, 100)
         self.backups_table.setMaximumHeight(180)
         self.backups_table.setAlternatingRowColors(True)
@@ -389,29 +344,38 @@ class BackupSettingsWidget(QWidget):
         return group
 
     def load_backup_list(self):
-        """Načtení seznamu záloh"""
+        """Načtení seznamu záloh (generace se snímkem + starší ZIP zálohy)"""
         backup_path = Path(self.backup_path.text())
 
         if not backup_path.exists():
             self.backups_table.setRowCount(0)
             return
 
-        backups = list(backup_path.glob("backup_*.zip"))
-        backups.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-
-        self.backups_table.setRowCount(len(backups))
-
-        for i, backup_file in enumerate(backups):
-            mtime = datetime.fromtimestamp(backup_file.stat().st_mtime)
-            date_item = QTableWidgetItem(mtime.strftime("%d.%m.%Y %H:%M"))
-            self.backups_table.setItem(i, 0, date_item)
+        store = BackupStore(backup_path)
+        backups = []
+        for generation in store.generations():
+            manifest = store.manifest(generation)
+            stats = manifest.get("stats", {})
+            size_mb = (stats.get("database_bytes", 0) + stats.get("files_bytes", 0)) / (1024 * 1024)
+            new_mb = (stats.get("database_bytes", 0) + stats.get("new_bytes", 0)) / (1024 * 1024)
+            try:
+                created = datetime.fromisoformat(manifest["created"])
+            except (KeyError, ValueError):
+                created = datetime.fromtimestamp(generation.stat().st_mtime)
+            backups.append((created, f"{size_mb:.2f} MB (nově {new_mb:.2f} MB)", "Snímek", generation))
 
+        for backup_file in backup_path.glob("backup_*.zip"):
             size_mb = backup_file.stat().st_size / (1024 * 1024)
-            size_item = QTableWidgetItem(f"{size_mb:.2f} MB")
-            self.backups_table.setItem(i, 1, size_item)
+            backups.append((datetime.fromtimestamp(backup_file.stat().st_mtime),
+                            f"{size_mb:.2f} MB", "ZIP", backup_file))
+
+        backups.sort(key=lambda backup: backup[0], reverse=True)
+        self.backups_table.setRowCount(len(backups))
 
-            type_item = QTableWidgetItem("Manuální")
-            self.backups_table.setItem(i, 2, type_item)
+        for i, (created, size_text, backup_type, backup_file) in enumerate(backups):
+            self.backups_table.setItem(i, 0, QTableWidgetItem(created.strftime("%d.%m.%Y %H:%M")))
+            self.backups_table.setItem(i, 1, QTableWidgetItem(size_text))
+            self.backups_table.setItem(i, 2, QTableWidgetItem(backup_type))
 
             file_item = QTableWidgetItem(backup_file.name)
             file_item.setData(Qt.ItemDataRole.UserRole, str(backup_file))
@@ -465,7 +429,11 @@ class BackupSettingsWidget(QWidget):
 
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                backup_file.unlink()
+                if backup_file.is_dir():
+                    # Generace: smazat i soubory, na které už žádná záloha neodkazuje
+                    BackupStore(backup_file.parent).delete(backup_file)
+                else:
+                    backup_file.unlink()
                 self.load_backup_list()
                 QMessageBox.information(self, "Hotovo", "Záloha byla smazána.")
             except Exception as e:
@@ -57,10 +57,19 @@ class DatabaseMaintenanceThread(QThread):
                 cursor.execute("ANALYZE")
                 self.finished.emit(True, "Statistiky byly aktualizovány.")
 
+            elif self.operation == "summaries":
+                self.progress.emit("Přepočet souhrnů zákazníků a vyhledávacího indexu...")
+                customers = db.rebuild_customer_stats()
+                entries = db.rebuild_search_index()
+                self.finished.emit(True, f"Souhrny přepočítány ({customers} zákazníků, "
+                                         f"{entries} záznamů ve vyhledávání).")
+
             conn.commit()
 
         except Exception as e:
             self.finished.emit(False, str(e))
+        finally:
+            db.release_thread_connection()
 
 
 class DatabaseSettingsWidget(QWidget):
@@ -89,6 +98,9 @@ class DatabaseSettingsWidget(QWidget):
         # Údržba databáze
         main_layout.addWidget(self.create_maintenance_section())
 
+        # Index advisor
+        main_layout.addWidget(self.create_index_advisor_section())
+
         # Archivace
         main_layout.addWidget(self.create_archive_section())
 
@@ -210,10 +222,16 @@ class DatabaseSettingsWidget(QWidget):
         analyze_btn.clicked.connect(lambda: self.run_maintenance("analyze"))
         analyze_btn.setCursor(Qt.CursorShape.PointingHandCursor)
 
+        summaries_btn = QPushButton("♻️ Přepočítat souhrny")
+        summaries_btn.setToolTip("Přepočítá souhrny zákazníků (customer_stats) a vyhledávací index")
+        summaries_btn.clicked.connect(lambda: self.run_maintenance("summaries"))
+        summaries_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+
         buttons_layout.addWidget(vacuum_btn)
         buttons_layout.addWidget(integrity_btn)
         buttons_layout.addWidget(reindex_btn)
         buttons_layout.addWidget(analyze_btn)
+        buttons_layout.addWidget(summaries_btn)
 
         layout.addLayout(buttons_layout)
 
@@ -241,6 +259,54 @@ class DatabaseSettingsWidget(QWidget):
 
         return group
 
+    def create_index_advisor_section(self):
+        """Sekce index advisoru (EXPLAIN QUERY PLAN nad horkými dotazy)"""
+        group = QGroupBox("🔎 Index advisor")
+        group.setObjectName("settingsGroup")
+        layout = QVBoxLayout(group)
+        layout.setSpacing(10)
+        layout.setContentsMargins(15, 20, 15, 15)
+
+        info_label = QLabel(
+            "Zkontroluje plány nejčastějších dotazů aplikace a upozorní na plné průchody tabulek."
+        )
+        info_label.setStyleSheet("color: #7f8c8d; font-size: 11px;")
+        info_label.setWordWrap(True)
+        layout.addWidget(info_label)
+
+        buttons_layout = QHBoxLayout()
+
+        advisor_btn = QPushButton("🔎 Analyzovat dotazy")
+        advisor_btn.clicked.connect(self.run_index_advisor)
+        advisor_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+
+        create_btn = QPushButton("➕ Vytvořit chybějící indexy")
+        create_btn.clicked.connect(self.create_missing_indexes)
+        create_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+
+        buttons_layout.addWidget(advisor_btn)
+        buttons_layout.addWidget(create_btn)
+        buttons_layout.addStretch()
+
+        layout.addLayout(buttons_layout)
+
+        self.advisor_table = QTableWidget()
+        self.advisor_table.setColumnCount(3)
+        self.advisor_table.setHorizontalHeaderLabels(["Dotaz", "Stav", "Plán dotazu"])
+
+        header = self.advisor_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+
+        self.advisor_table.setMaximumHeight(220)
+        self.advisor_table.setAlternatingRowColors(True)
+        self.advisor_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+
+        layout.addWidget(self.advisor_table)
+
+        return group
+
     def create_archive_section(self):
         """Sekce archivace"""
         group = QGroupBox("📦 Archivace starých dat")
@@ -502,7 +568,8 @@ class DatabaseSettingsWidget(QWidget):
             "vacuum": "optimalizaci",
             "integrity": "kontrolu integrity",
             "reindex": "reindexaci",
-            "analyze": "analýzu"
+            "analyze": "analýzu",
+            "summaries": "přepočet souhrnů"
         }
 
         reply = QMessageBox.question(
@@ -540,6 +607,53 @@ class DatabaseSettingsWidget(QWidget):
 
         self.load_database_info()
 
+    def run_index_advisor(self):
+        """Spuštění index advisoru a zobrazení výsledků"""
+        try:
+            report = db.index_advisor()
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Analýza dotazů selhala:\n{str(e)}")
+            return
+
+        self.advisor_table.setRowCount(len(report))
+        problems = 0
+        for i, entry in enumerate(report):
+            self.advisor_table.setItem(i, 0, QTableWidgetItem(entry["name"]))
+
+            if entry["error"]:
+                status_text, color = f"❌ {entry['error']}", "#e74c3c"
+                problems += 1
+            elif entry["full_scans"]:
+                status_text = "⚠️ Plný průchod: " + ", ".join(sorted(set(entry["full_scans"])))
+                color = "#e74c3c"
+                problems += 1
+            elif entry["temp_btree"]:
+                status_text, color = "ℹ️ Řazení přes dočasný B-tree", "#f39c12"
+            else:
+                status_text, color = "✅ Index použit", "#27ae60"
+
+            status_item = QTableWidgetItem(status_text)
+            status_item.setForeground(QColor(color))
+            self.advisor_table.setItem(i, 1, status_item)
+            self.advisor_table.setItem(i, 2, QTableWidgetItem(" | ".join(entry["plan"])))
+
+        if problems:
+            self.maintenance_status.setText(f"⚠️ Index advisor: {problems} dotazů prochází celé tabulky")
+            self.maintenance_status.setStyleSheet("color: #e74c3c; font-style: italic;")
+        else:
+            self.maintenance_status.setText("✅ Index advisor: všechny horké dotazy používají indexy")
+            self.maintenance_status.setStyleSheet("color: #27ae60; font-style: italic;")
+
+    def create_missing_indexes(self):
+        """Vytvoření chybějících výkonnostních indexů"""
+        try:
+            created = db.ensure_performance_indexes()
+            db.connection.commit()
+            QMessageBox.information(self, "Hotovo", f"Vytvořeno indexů: {created}")
+            self.run_index_advisor()
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Nepodařilo se vytvořit indexy:\n{str(e)}")
+
     def cleanup_temp_files(self):
         """Vyčištění dočasných souborů"""
         QMessageBox.information(
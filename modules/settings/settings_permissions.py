@@ -13,6 +13,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QDateTime
 from PyQt6.QtGui import QFont, QColor, QBrush
 from database_manager import db
+from utils.utils_permissions import permission_cache
 import config
 import json
 
@@ -567,6 +568,7 @@ class PermissionsSettingsWidget(QWidget):
             """, (json.dumps(permissions, ensure_ascii=False), role_id))
 
             conn.commit()
+            permission_cache.invalidate()
 
             QMessageBox.information(self, "Uloženo", "Oprávnění byla uložena.")
             self.refresh_matrix()
@@ -696,6 +698,7 @@ class PermissionsSettingsWidget(QWidget):
             try:
                 cursor.execute("DELETE FROM roles WHERE id = ?", (role_id,))
                 conn.commit()
+                permission_cache.invalidate()
                 self.load_roles()
                 QMessageBox.information(self, "Hotovo", "Role byla smazána.")
             except Exception as e:
@@ -721,6 +724,7 @@ class PermissionsSettingsWidget(QWidget):
                 conn.commit()
 
                 self.insert_default_roles()
+                permission_cache.invalidate()
                 self.load_roles()
 
                 QMessageBox.information(self, "Hotovo", "Výchozí role byly obnoveny.")
@@ -990,6 +994,7 @@ class RoleDialog(QDialog):
                 ))
 
             conn.commit()
+            permission_cache.invalidate()
             self.accept()
 
         except Exception as e:
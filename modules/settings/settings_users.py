@@ -13,6 +13,7 @@ from PyQt6.QtGui import QFont, QColor
 import hashlib
 import secrets
 from database_manager import db
+from utils.utils_permissions import permission_cache
 import config
 
 
@@ -703,6 +704,8 @@ class UserDialog(QDialog):
                 ))
 
             conn.commit()
+            if self.user_id:
+                permission_cache.invalidate(self.user_id)
             self.accept()
 
         except Exception as e:
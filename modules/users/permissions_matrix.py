@@ -11,7 +11,7 @@ from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QColor
 from database_manager import db
 from utils.utils_auth import get_current_user_id
-from utils.utils_permissions import has_permission
+from utils.utils_permissions import has_permission, permission_cache
 import config
 
 
@@ -226,19 +226,7 @@ class PermissionsMatrix(QWidget):
                 self.matrix_table.setItem(row, 0, module_item)
 
                 for col, role in enumerate(roles, start=1):
-                    perm = db.fetch_one(
-                        "SELECT id FROM permissions WHERE module_id = ? AND action = ?",
-                        (module['id'], action)
-                    )
-
-                    if perm:
-                        rp = db.fetch_one(
-                            "SELECT allowed FROM role_permissions WHERE role_id = ? AND permission_id = ?",
-                            (role['id'], perm['id'])
-                        )
-                        is_allowed = bool(rp and rp['allowed'])
-                    else:
-                        is_allowed = False
+                    is_allowed = permission_cache.role_allows(role['id'], module['id'], action)
 
                     status_text = "✅" if is_allowed else "❌"
                     status_item = QTableWidgetItem(status_text)
@@ -370,19 +358,7 @@ class PermissionsMatrix(QWidget):
                 self.matrix_table.setItem(row, 0, action_item)
 
                 for col, role in enumerate(roles, start=1):
-                    perm = db.fetch_one(
-                        "SELECT id FROM permissions WHERE module_id = ? AND action = ?",
-                        (module['id'], action)
-                    )
-
-                    if perm:
-                        rp = db.fetch_one(
-                            "SELECT allowed FROM role_permissions WHERE role_id = ? AND permission_id = ?",
-                            (role['id'], perm['id'])
-                        )
-                        is_allowed = bool(rp and rp['allowed'])
-                    else:
-                        is_allowed = False
+                    is_allowed = permission_cache.role_allows(role['id'], module['id'], action)
 
                     status_text = "✅" if is_allowed else "❌"
                     status_item = QTableWidgetItem(status_text)
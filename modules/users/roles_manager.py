@@ -14,7 +14,7 @@ from PyQt6.QtGui import QFont, QColor
 from datetime import datetime
 from database_manager import db
 from utils.utils_auth import get_current_user_id
-from utils.utils_permissions import has_permission
+from utils.utils_permissions import has_permission, permission_cache
 import config
 
 
@@ -440,6 +440,7 @@ class RolesManager(QWidget):
                                         (self.selected_role_id, perm['id'], is_allowed)
                                     )
 
+            permission_cache.invalidate()
             QMessageBox.information(self, "Úspěch", "Oprávnění role byla uložena.")
             self.role_updated.emit()
 
@@ -527,6 +528,7 @@ class RolesManager(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             db.execute_query("DELETE FROM role_permissions WHERE role_id = ?", (self.selected_role_id,))
             db.execute_query("DELETE FROM roles WHERE id = ?", (self.selected_role_id,))
+            permission_cache.invalidate()
 
             self.selected_role_id = None
             self.load_roles()
@@ -686,6 +688,7 @@ class RoleDialog(QDialog):
                     (name, description, is_default, self.role_id)
                 )
 
+            permission_cache.invalidate()
             self.accept()
 
         except Exception as e:
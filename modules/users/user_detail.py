@@ -14,7 +14,7 @@ from PyQt6.QtGui import QFont
 from datetime import datetime
 from database_manager import db
 from utils.utils_auth import hash_password, get_current_user_id
-from utils.utils_permissions import has_permission
+from utils.utils_permissions import has_permission, permission_cache
 import config
 
 
@@ -512,6 +512,7 @@ class UserDetailDialog(QDialog):
                         role = ?, active = ?, note = ?, updated_at = ?
                     WHERE id = ?
                 """, (username, full_name, email, phone, role, active, note, now, self.user_id))
+                permission_cache.invalidate(self.user_id)
 
                 if hasattr(self, 'txt_new_password') and self.txt_new_password.text():
                     new_hash = hash_password(self.txt_new_password.text())
@@ -13,7 +13,7 @@ from PyQt6.QtGui import QFont, QColor, QIcon
 from datetime import datetime
 from database_manager import db
 from utils.utils_auth import get_current_user_id, hash_password
-from utils.utils_permissions import has_permission
+from utils.utils_permissions import has_permission, permission_cache
 import config
 
 
@@ -520,6 +520,7 @@ class UsersList(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             db.execute_query("DELETE FROM user_permissions WHERE user_id = ?", (user_id,))
             db.execute_query("DELETE FROM users WHERE id = ?", (user_id,))
+            permission_cache.invalidate(user_id)
 
             self.load_users()
             self.user_deleted.emit(user_id)
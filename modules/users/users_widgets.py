@@ -13,7 +13,7 @@ from PyQt6.QtGui import QFont
 from datetime import datetime
 from database_manager import db
 from utils.utils_auth import hash_password, get_current_user_id
-from utils.utils_permissions import has_permission
+from utils.utils_permissions import has_permission, permission_cache
 import config
 
 
@@ -488,6 +488,7 @@ class UserPermissionsDialog(QDialog):
                                         (self.user_id, perm['id'], allowed)
                                     )
 
+            permission_cache.invalidate(self.user_id)
             QMessageBox.information(self, "Úspěch", "Uživatelská oprávnění byla uložena.")
             self.accept()
 
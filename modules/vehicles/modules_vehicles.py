@@ -13,6 +13,7 @@ from PyQt6.QtGui import QFont, QColor, QBrush, QAction, QCursor
 from datetime import datetime, date, timedelta
 import config
 from database_manager import db
+from utils.utils_scheduler import reminder_scheduler
 
 
 class VehiclesModule(QWidget):
@@ -729,6 +730,10 @@ class VehiclesModule(QWidget):
             QMessageBox.warning(self, "Upozornění", "Vyberte vozidlo pro zobrazení detailu.")
             return
 
+        self.open_record(vehicle_id)
+
+    def open_record(self, vehicle_id):
+        """Otevření detailu vozidla podle ID (např. z globálního vyhledávání)"""
         from .vehicle_detail import VehicleDetailWindow
 
         dialog = VehicleDetailWindow(self, vehicle_id=vehicle_id)
@@ -768,6 +773,7 @@ class VehiclesModule(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 db.execute_query("DELETE FROM vehicles WHERE id = ?", (vehicle_id,))
+                reminder_scheduler.refresh("vehicles", vehicle_id)
                 self.refresh()
                 QMessageBox.information(self, "Úspěch", "Vozidlo bylo smazáno.")
             except Exception as e:
@@ -521,16 +521,21 @@ class VehicleExporter:
             with open(json_path, 'w', encoding='utf-8') as f:
                 json.dump(vehicle_json, f, ensure_ascii=False, indent=2)
 
-            # Kopírování fotek
-            photos_dir = Path(config.DATA_DIR) / "vehicle_photos" / str(self.vehicle_id)
-            if photos_dir.exists():
+            # Kopírování fotek (soubory jsou ve sdíleném úložišti - podle záznamů v DB)
+            photos = db.fetch_all(
+                "SELECT id, file_name, file_path FROM vehicle_photos WHERE vehicle_id = ? ORDER BY id",
+                (self.vehicle_id,)
+            )
+            photos = [p for p in photos if p['file_path'] and Path(p['file_path']).is_file()]
+            if photos:
                 export_photos_dir = temp_dir / "fotografie"
                 export_photos_dir.mkdir(exist_ok=True)
 
                 import shutil
-                for photo_file in photos_dir.glob("*"):
-                    if photo_file.is_file() and not photo_file.name.startswith("thumb_"):
-                        shutil.copy2(photo_file, export_photos_dir / photo_file.name)
+                for photo in photos:
+                    source = Path(photo['file_path'])
+                    name = f"{photo['id']}_{photo['file_name'] or source.name}"
+                    shutil.copy2(source, export_photos_dir / name)
 
             # Kopírování dokumentů
             docs_dir = Path(config.DATA_DIR) / "vehicle_documents" / str(self.vehicle_id)
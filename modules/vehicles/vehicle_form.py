@@ -14,6 +14,7 @@ from PyQt6.QtGui import QFont
 from datetime import datetime
 import config
 from database_manager import db
+from utils.utils_scheduler import reminder_scheduler
 
 
 class VehicleFormDialog(QDialog):
@@ -498,6 +499,8 @@ class VehicleFormDialog(QDialog):
                 """, (spz, brand, model, year, vin, color, engine, fuel, mileage,
                       stk_date, notes, customer_id))
 
+            # Změna platnosti STK -> plánovač připomínek
+            reminder_scheduler.refresh("vehicles", self.vehicle_id)
             self.accept()
 
         except Exception as e:
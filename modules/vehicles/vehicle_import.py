@@ -13,16 +13,17 @@ from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QBrush
 from datetime import datetime
 from pathlib import Path
-import csv
 import json
 import config
 from database_manager import db
+from utils.utils_import import run_import, load_lookup, upper_key, TableReader
 
 
 class VehicleImporter:
     """Třída pro import vozidel"""
 
     def __init__(self):
+        self.reader = None  # TableReader (CSV/Excel), JSON je v self.data
         self.data = []
         self.headers = []
         self.column_mapping = {}
@@ -33,60 +34,32 @@ class VehicleImporter:
             'errors': []
         }
 
-    def load_csv(self, file_path, delimiter=',', encoding='utf-8'):
-        """Načtení dat z CSV"""
+    def load_csv(self, file_path, delimiter=',', encoding=None):
+        """Otevření CSV - načte se jen hlavička, řádky se čtou proudově při importu"""
         try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                # Automatická detekce oddělovače
-                sample = f.read(1024)
-                f.seek(0)
-
-                if delimiter == 'auto':
-                    sniffer = csv.Sniffer()
-                    try:
-                        dialect = sniffer.sniff(sample)
-                        delimiter = dialect.delimiter
-                    except:
-                        delimiter = ',' if sample.count(',') > sample.count(';') else ';'
-
-                reader = csv.reader(f, delimiter=delimiter)
-                rows = list(reader)
-
-                if rows:
-                    self.headers = rows[0]
-                    self.data = rows[1:]
-                    return True, f"Načteno {len(self.data)} řádků"
-                else:
-                    return False, "Soubor je prázdný"
-
-        except UnicodeDecodeError:
-            # Zkusit jiné kódování
-            return self.load_csv(file_path, delimiter, 'cp1250')
+            # encoding=None: UTF-8, případně cp1250; delimiter='auto': detekce oddělovače
+            return self._open_table(TableReader(file_path, delimiter=delimiter, encoding=encoding))
         except Exception as e:
             return False, f"Chyba při načítání CSV: {e}"
 
     def load_excel(self, file_path):
-        """Načtení dat z Excelu"""
+        """Otevření Excelu (read-only režim, řádky se čtou proudově)"""
         try:
-            import openpyxl
-
-            wb = openpyxl.load_workbook(file_path, data_only=True)
-            ws = wb.active
-
-            rows = list(ws.iter_rows(values_only=True))
-
-            if rows:
-                self.headers = [str(h) if h else f"Sloupec_{i}" for i, h in enumerate(rows[0], 1)]
-                self.data = [[str(cell) if cell else '' for cell in row] for row in rows[1:]]
-                return True, f"Načteno {len(self.data)} řádků"
-            else:
-                return False, "List je prázdný"
-
+            return self._open_table(TableReader(file_path))
         except ImportError:
             return False, "Pro import z Excelu je potřeba nainstalovat openpyxl:\npip install openpyxl"
         except Exception as e:
             return False, f"Chyba při načítání Excelu: {e}"
 
+    def _open_table(self, reader):
+        """Převzetí hlavičky z TableReaderu"""
+        if not reader.headers:
+            return False, "Soubor je prázdný"
+        self.reader = reader
+        self.data = []
+        self.headers = [h if h else f"Sloupec_{i}" for i, h in enumerate(reader.headers, 1)]
+        return True, f"Soubor {reader.describe()} připraven k importu"
+
     def load_json(self, file_path):
         """Načtení dat z JSON"""
         try:
@@ -95,6 +68,7 @@ class VehicleImporter:
 
             if isinstance(json_data, list) and len(json_data) > 0:
                 if isinstance(json_data[0], dict):
+                    self.reader = None
                     self.headers = list(json_data[0].keys())
                     self.data = [[str(item.get(h, '')) for h in self.headers] for item in json_data]
                     return True, f"Načteno {len(self.data)} záznamů"
@@ -108,8 +82,26 @@ class VehicleImporter:
 
     def get_preview(self, num_rows=10):
         """Získání náhledu dat"""
+        if self.reader is not None:
+            return self.reader.preview(num_rows)
         return self.data[:num_rows]
 
+    def rows(self):
+        """Datové řádky (CSV/Excel se čtou ze souboru postupně)"""
+        if self.reader is not None:
+            return self.reader.rows()
+        return iter(self.data)
+
+    def describe(self):
+        """Popis zdroje pro potvrzovací dialog"""
+        if self.reader is not None:
+            return f"soubor {self.reader.describe()}"
+        return f"{len(self.data)} záznamů"
+
+    @property
+    def progress_percent(self):
+        return self.reader.progress_percent if self.reader is not None else 0
+
     def set_column_mapping(self, mapping):
         """Nastavení mapování sloupců"""
         self.column_mapping = mapping
@@ -168,8 +160,13 @@ class VehicleImporter:
 
         return data
 
-    def find_or_create_customer(self, customer_name):
-        """Vyhledání nebo vytvoření zákazníka"""
+    def find_or_create_customer(self, customer_name, customers=None):
+        """
+        Vyhledání nebo vytvoření zákazníka
+
+        customers: {(jméno, příjmení): id} načtené předem jedním dotazem;
+        nově vytvoření zákazníci se do něj doplní.
+        """
         if not customer_name:
             return None
 
@@ -178,14 +175,12 @@ class VehicleImporter:
         first_name = parts[0] if parts else customer_name
         last_name = parts[1] if len(parts) > 1 else ''
 
-        # Hledání existujícího zákazníka
-        existing = db.fetch_one("""
-            SELECT id FROM customers
-            WHERE first_name = ? AND last_name = ?
-        """, (first_name, last_name))
+        if customers is None:
+            customers = self.load_customers()
 
-        if existing:
-            return existing['id']
+        key = (first_name, last_name)
+        if key in customers:
+            return customers[key]
 
         # Vytvoření nového zákazníka
         try:
@@ -193,31 +188,51 @@ class VehicleImporter:
                 INSERT INTO customers (first_name, last_name)
                 VALUES (?, ?)
             """, (first_name, last_name))
-
-            new_customer = db.fetch_one(
-                "SELECT id FROM customers ORDER BY id DESC LIMIT 1"
-            )
-            return new_customer['id'] if new_customer else None
+            customers[key] = db.cursor.lastrowid
+            return customers[key]
         except:
             return None
 
-    def import_vehicles(self, conflict_mode='skip'):
-        """Import vozidel do databáze"""
-        self.import_results = {
-            'imported': 0,
-            'updated': 0,
-            'skipped': 0,
-            'errors': []
-        }
-
-        for row_num, row in enumerate(self.data, 2):  # 2 protože první řádek je hlavička
+    @staticmethod
+    def load_customers():
+        """Zákazníci {(jméno, příjmení): id} jedním dotazem"""
+        return load_lookup("SELECT first_name, last_name, id FROM customers ORDER BY id")
+
+    def import_vehicles(self, conflict_mode='skip', progress=None):
+        """Import vozidel do databáze (jedna transakce, zápis po dávkách)"""
+        # Existující SPZ a zákazníci - jeden dotaz na tabulku
+        plates = load_lookup("SELECT license_plate, id FROM vehicles ORDER BY id", key=upper_key)
+        customers = self.load_customers()
+
+        insert_sql = """
+            INSERT INTO vehicles (
+                license_plate, brand, model, year, vin, color,
+                engine_type, fuel_type, mileage, notes, customer_id
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        update_sql = """
+            UPDATE vehicles SET
+                brand = ?,
+                model = ?,
+                year = ?,
+                vin = ?,
+                color = ?,
+                engine_type = ?,
+                fuel_type = ?,
+                mileage = ?,
+                notes = ?,
+                customer_id = COALESCE(?, customer_id),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """
+
+        def import_row(row_num, row, writer):
             row_data = self.get_row_data(row)
 
             # Validace
             errors = self.validate_row(row_data)
             if errors:
-                self.import_results['errors'].append(f"Řádek {row_num}: {', '.join(errors)}")
-                continue
+                raise ValueError(', '.join(errors))
 
             # Příprava dat
             spz = dict(row_data).get('license_plate', '').strip().upper()
@@ -248,63 +263,41 @@ class VehicleImporter:
             # Zákazník
             customer_id = None
             if dict(row_data).get('customer_name'):
-                customer_id = self.find_or_create_customer(row_data['customer_name'])
-
-            # Kontrola existence
-            existing = db.fetch_one(
-                "SELECT id FROM vehicles WHERE license_plate = ?",
-                (spz,)
-            )
-
-            try:
-                if existing:
-                    if conflict_mode == 'skip':
-                        self.import_results['skipped'] += 1
-                        continue
-                    elif conflict_mode == 'update':
-                        # Aktualizace existujícího
-                        db.execute_query("""
-                            UPDATE vehicles SET
-                                brand = ?,
-                                model = ?,
-                                year = ?,
-                                vin = ?,
-                                color = ?,
-                                engine_type = ?,
-                                fuel_type = ?,
-                                mileage = ?,
-                                notes = ?,
-                                customer_id = COALESCE(?, customer_id),
-                                updated_at = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                        """, (brand, model, year, vin, color, engine_type, fuel_type,
-                              mileage, notes, customer_id, existing['id']))
-                        self.import_results['updated'] += 1
-                    else:  # duplicate
-                        # Vytvoření duplikátu s upravenou SPZ
-                        new_spz = f"{spz}_DUP"
-                        db.execute_query("""
-                            INSERT INTO vehicles (
-                                license_plate, brand, model, year, vin, color,
-                                engine_type, fuel_type, mileage, notes, customer_id
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (new_spz, brand, model, year, vin, color, engine_type,
-                              fuel_type, mileage, notes, customer_id))
-                        self.import_results['imported'] += 1
-                else:
-                    # Nové vozidlo
-                    db.execute_query("""
-                        INSERT INTO vehicles (
-                            license_plate, brand, model, year, vin, color,
-                            engine_type, fuel_type, mileage, notes, customer_id
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (spz, brand, model, year, vin, color, engine_type,
-                          fuel_type, mileage, notes, customer_id))
-                    self.import_results['imported'] += 1
-
-            except Exception as e:
-                self.import_results['errors'].append(f"Řádek {row_num}: {e}")
-
+                customer_id = self.find_or_create_customer(row_data['customer_name'], customers)
+
+            values = (brand, model, year, vin, color, engine_type, fuel_type,
+                      mileage, notes, customer_id)
+
+            # Kontrola existence (None = vozidlo vložené dříve v tomto souboru)
+            if spz in plates:
+                vehicle_id = plates[spz]
+                if conflict_mode == 'skip':
+                    return 'skipped'
+                elif conflict_mode == 'update':
+                    if vehicle_id is None:
+                        return 'skipped'
+                    # Aktualizace existujícího
+                    writer.add(update_sql, values + (vehicle_id,))
+                    return 'updated'
+                else:  # duplicate
+                    # Vytvoření duplikátu s upravenou SPZ
+                    spz = f"{spz}_DUP"
+                    if spz in plates:
+                        raise ValueError(f"SPZ {spz} již existuje")
+
+            # Nové vozidlo
+            writer.add(insert_sql, (spz,) + values)
+            plates[spz] = None
+            return 'imported'
+
+        # 2 protože první řádek je hlavička
+        stats = run_import(self.rows(), import_row, start_row=2, progress=progress)
+        self.import_results = {
+            'imported': stats.imported,
+            'updated': stats.updated,
+            'skipped': stats.skipped,
+            'errors': stats.errors
+        }
         return self.import_results
 
     def create_report(self):
@@ -487,9 +480,9 @@ class ImportDialog(QDialog):
             self,
             "Vybrat soubor pro import",
             "",
-            "Všechny podporované (*.csv *.xlsx *.xls *.json);;"
+            "Všechny podporované (*.csv *.xlsx *.json);;"
             "CSV soubory (*.csv);;"
-            "Excel soubory (*.xlsx *.xls);;"
+            "Excel soubory (*.xlsx);;"
             "JSON soubory (*.json);;"
             "Všechny soubory (*.*)"
         )
@@ -510,7 +503,7 @@ class ImportDialog(QDialog):
 
         if path.suffix.lower() == '.csv':
             success, message = self.importer.load_csv(self.file_path, delimiter='auto')
-        elif path.suffix.lower() in ['.xlsx', '.xls']:
+        elif path.suffix.lower() == '.xlsx':
             success, message = self.importer.load_excel(self.file_path)
         elif path.suffix.lower() == '.json':
             success, message = self.importer.load_json(self.file_path)
@@ -641,7 +634,7 @@ class ImportDialog(QDialog):
         errors = []
         valid_count = 0
 
-        for row_num, row in enumerate(self.importer.data, 2):
+        for row_num, row in enumerate(self.importer.rows(), 2):
             row_data = self.importer.get_row_data(row)
             row_errors = self.importer.validate_row(row_data)
 
@@ -709,7 +702,7 @@ class ImportDialog(QDialog):
         reply = QMessageBox.question(
             self,
             "Potvrzení importu",
-            f"Chystáte se importovat {len(self.importer.data)} vozidel.\n\n"
+            f"Chystáte se importovat vozidla ({self.importer.describe()}).\n\n"
             f"Chcete pokračovat?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
@@ -727,7 +720,12 @@ class ImportDialog(QDialog):
         QApplication.processEvents()
 
         try:
-            results = self.importer.import_vehicles(conflict_mode)
+            def on_progress(done):
+                self.progress.setValue(self.importer.progress_percent)
+                self.status_label.setText(f"Probíhá import... ({done} řádků)")
+                QApplication.processEvents()
+
+            results = self.importer.import_vehicles(conflict_mode, progress=on_progress)
 
             self.progress.setValue(100)
 
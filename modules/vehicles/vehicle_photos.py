@@ -8,13 +8,15 @@ from PyQt6.QtWidgets import (
     QPushButton, QLabel, QComboBox, QFrame, QMessageBox, QDialog,
     QFormLayout, QLineEdit, QTextEdit, QFileDialog, QMenu, QApplication
 )
-from PyQt6.QtCore import Qt, QSize, QMimeData, pyqtSignal
+from PyQt6.QtCore import Qt, QSize, QMimeData, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QPixmap, QIcon, QDrag, QPainter, QColor, QCursor
 from datetime import datetime
 from pathlib import Path
 import shutil
 import config
 from database_manager import db
+from utils.utils_blobs import blob_store
+from utils.utils_thumbnails import thumbnails, MEDIUM, LARGE
 
 
 class VehiclePhotosWidget(QWidget):
@@ -28,7 +30,11 @@ class VehiclePhotosWidget(QWidget):
         self.photos_dir = self.ensure_photos_directory()
         self.photos = []
         self.selected_photo_id = None
+        # Náhledy galerie: (frame, label, zdroj) - načítají se, až jsou vidět
+        self.thumb_frames = []
+        self.thumb_labels = {}
         self.init_ui()
+        thumbnails.ready.connect(self.on_thumbnail_ready)
         self.ensure_photos_table()
         self.load_photos()
 
@@ -88,22 +94,23 @@ class VehiclePhotosWidget(QWidget):
         layout.addWidget(self.main_photo_info)
 
         # Scrollovací oblast pro fotky
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("""
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setStyleSheet("""
             QScrollArea {
                 border: none;
                 background-color: white;
             }
         """)
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.load_visible_thumbnails)
 
         self.photos_container = QWidget()
         self.photos_layout = QGridLayout(self.photos_container)
         self.photos_layout.setSpacing(15)
         self.photos_layout.setContentsMargins(10, 10, 10, 10)
 
-        scroll_area.setWidget(self.photos_container)
-        layout.addWidget(scroll_area)
+        self.scroll_area.setWidget(self.photos_container)
+        layout.addWidget(self.scroll_area)
 
         # Drop area info
         self.drop_info = QLabel("📷 Přetáhněte sem fotky pro nahrání")
@@ -228,6 +235,8 @@ class VehiclePhotosWidget(QWidget):
             item = self.photos_layout.takeAt(0)
             if item.widget():
                 item.widget().deleteLater()
+        self.thumb_frames = []
+        self.thumb_labels = {}
 
         if not photos:
             self.drop_info.show()
@@ -254,6 +263,48 @@ class VehiclePhotosWidget(QWidget):
                 spacer = QWidget()
                 self.photos_layout.addWidget(spacer, last_row, (len(photos) % columns) + i)
 
+        # Náhledy až po rozložení mřížky (pozice rámečků)
+        QTimer.singleShot(0, self.load_visible_thumbnails)
+
+    def load_visible_thumbnails(self, *args):
+        """Požádá o náhledy rámečků ve viditelné části (+ jedna obrazovka navíc)"""
+        viewport = self.scroll_area.viewport().height()
+        top = self.scroll_area.verticalScrollBar().value() - viewport
+        bottom = top + 3 * viewport
+
+        waiting = []
+        for frame, label, source in self.thumb_frames:
+            geometry = frame.geometry()
+            if geometry.bottom() < top or geometry.top() > bottom:
+                waiting.append((frame, label, source))
+            else:
+                thumbnails.request(source, MEDIUM)
+        self.thumb_frames = waiting
+
+    def on_thumbnail_ready(self, source, size, image):
+        """Hotový náhled z pozadí -> popisky fotek se stejným souborem"""
+        if size != MEDIUM:
+            return
+        for label in self.thumb_labels.pop(source, []):
+            self.set_thumbnail(label, image)
+
+    @staticmethod
+    def set_thumbnail(label, image):
+        if image.isNull():
+            label.setText("🖼️\nNáhled není k dispozici")
+            return
+        pixmap = QPixmap.fromImage(image).scaled(
+            160, 120,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        )
+        label.setPixmap(pixmap)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.thumb_frames:
+            QTimer.singleShot(0, self.load_visible_thumbnails)
+
     def create_photo_thumbnail(self, photo):
         """Vytvoření thumbnail widgetu pro fotku"""
         frame = QFrame()
@@ -286,20 +337,12 @@ class VehiclePhotosWidget(QWidget):
             }
         """)
 
-        # Načtení thumbnail nebo vytvoření z originálu
-        pixmap = None
-        if photo['thumbnail_path'] and Path(photo['thumbnail_path']).exists():
-            pixmap = QPixmap(photo['thumbnail_path'])
-        elif photo['file_path'] and Path(photo['file_path']).exists():
-            pixmap = QPixmap(photo['file_path'])
-
-        if pixmap and not pixmap.isNull():
-            scaled_pixmap = pixmap.scaled(
-                160, 120,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            photo_label.setPixmap(scaled_pixmap)
+        # Náhled se načte na pozadí, až bude rámeček vidět (load_visible_thumbnails)
+        source = photo['file_path']
+        if source and Path(source).exists():
+            photo_label.setText("⏳")
+            self.thumb_frames.append((frame, photo_label, source))
+            self.thumb_labels.setdefault(source, []).append(photo_label)
         else:
             photo_label.setText("🖼️\nNáhled není k dispozici")
 
@@ -441,68 +484,43 @@ class VehiclePhotosWidget(QWidget):
                 )
 
     def save_photo(self, source_path, metadata):
-        """Uložení fotky"""
+        """Uložení fotky (úložiště podle obsahu, náhledy se vytvoří na pozadí)"""
         try:
             source = Path(source_path)
             if not source.exists():
                 return False
 
-            # Vytvoření unikátního názvu
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            new_filename = f"{timestamp}{source.suffix}"
-            dest_path = self.photos_dir / new_filename
-
-            # Kopírování souboru
-            shutil.copy2(source, dest_path)
+            # Stejný obsah se ukládá jen jednou (i napříč vozidly)
+            dest_path = blob_store.put(source)
 
-            # Vytvoření thumbnail
-            thumbnail_path = self.create_thumbnail(dest_path)
+            duplicate = db.fetch_one(
+                "SELECT id FROM vehicle_photos WHERE vehicle_id = ? AND file_path = ?",
+                (self.vehicle_id, str(dest_path))
+            )
+            if duplicate:
+                return True
 
             # Uložení do databáze
             db.execute_query("""
                 INSERT INTO vehicle_photos (
                     vehicle_id, file_name, file_path, thumbnail_path,
                     category, description, taken_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ) VALUES (?, ?, ?, NULL, ?, ?, ?)
             """, (
                 self.vehicle_id,
                 source.name,
                 str(dest_path),
-                str(thumbnail_path) if thumbnail_path else None,
                 metadata['category'],
                 metadata['description'],
                 metadata['taken_at']
             ))
 
+            thumbnails.prefetch(dest_path)
             return True
         except Exception as e:
             print(f"Chyba při ukládání fotky: {e}")
             return False
 
-    def create_thumbnail(self, image_path):
-        """Vytvoření thumbnail"""
-        try:
-            pixmap = QPixmap(str(image_path))
-            if pixmap.isNull():
-                return None
-
-            # Zmenšení na 150x150
-            thumbnail = pixmap.scaled(
-                150, 150,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-
-            # Uložení thumbnail
-            thumb_filename = f"thumb_{Path(image_path).name}"
-            thumb_path = self.photos_dir / "thumbnails" / thumb_filename
-            thumbnail.save(str(thumb_path), "JPEG", 85)
-
-            return thumb_path
-        except Exception as e:
-            print(f"Chyba při vytváření thumbnail: {e}")
-            return None
-
     def remove_photo(self, photo_id):
         """Smazání fotky"""
         reply = QMessageBox.question(
@@ -521,23 +539,21 @@ class VehiclePhotosWidget(QWidget):
                 )
 
                 if photo:
-                    # Smazání souborů
-                    if photo['file_path']:
-                        file_path = Path(photo['file_path'])
-                        if file_path.exists():
-                            file_path.unlink()
-
-                    if photo['thumbnail_path']:
-                        thumb_path = Path(photo['thumbnail_path'])
-                        if thumb_path.exists():
-                            thumb_path.unlink()
-
                     # Smazání z DB
                     db.execute_query(
                         "DELETE FROM vehicle_photos WHERE id = ?",
                         (photo_id,)
                     )
 
+                    # Soubor se smaže, jen pokud ho nepoužívá jiná fotka / dokument
+                    if photo['file_path']:
+                        if blob_store.release(photo['file_path']):
+                            thumbnails.remove(photo['file_path'])
+
+                    # Náhled ze starší verze (data/vehicle_photos/<id>/thumbnails)
+                    if photo['thumbnail_path']:
+                        Path(photo['thumbnail_path']).unlink(missing_ok=True)
+
                     self.load_photos()
                     QMessageBox.information(self, "Úspěch", "Fotka byla smazána.")
 
@@ -925,7 +941,12 @@ class PhotoLightboxDialog(QDialog):
 
         # Načtení a zobrazení fotky
         if photo['file_path'] and Path(photo['file_path']).exists():
-            pixmap = QPixmap(photo['file_path'])
+            # Velký náhled stačí, pokud okno není větší; originál jen pro velká okna
+            label_size = self.photo_label.size()
+            if max(label_size.width(), label_size.height()) <= LARGE:
+                pixmap = thumbnails.pixmap(photo['file_path'], LARGE)
+            else:
+                pixmap = QPixmap(photo['file_path'])
             if not pixmap.isNull():
                 # Škálování na velikost okna
                 scaled = pixmap.scaled(
@@ -14,6 +14,7 @@ from PyQt6.QtGui import QFont, QColor, QBrush
 from datetime import datetime, date, timedelta
 import config
 from database_manager import db
+from utils.utils_scheduler import reminder_scheduler, STK, INSURANCE
 
 
 class VehicleRemindersWidget(QWidget):
@@ -26,7 +27,8 @@ class VehicleRemindersWidget(QWidget):
         self.init_ui()
         self.ensure_reminders_table()
         self.load_reminders()
-        self.check_automatic_reminders()
+        # Konec STK / pojištění hlídá plánovač pro všechna vozidla - bez dotazů při otevření
+        reminder_scheduler.summary_changed.connect(self.check_critical_reminders)
 
     def ensure_reminders_table(self):
         """Zajištění existence tabulky pro připomínky"""
@@ -294,6 +296,11 @@ class VehicleRemindersWidget(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Chyba", f"Nepodařilo se načíst připomínky:\n{e}")
 
+    def reminders_changed(self):
+        """Po změně připomínek: plánovač + tabulka"""
+        reminder_scheduler.refresh("vehicle_reminders")
+        self.load_reminders()
+
     def populate_table(self, reminders):
         """Naplnění tabulky daty"""
         self.table.setRowCount(0)
@@ -518,11 +525,18 @@ class VehicleRemindersWidget(QWidget):
         self.stat_critical.setText(f"<b>Kritických:</b> {critical}")
         self.stat_upcoming.setText(f"<b>Blížících se:</b> {upcoming}")
 
-    def check_critical_reminders(self):
+    def check_critical_reminders(self, *args):
         """Kontrola kritických připomínek"""
         today = date.today()
         critical_list = []
 
+        # STK a pojištění z vozidla (plánovač), pokud na ně není vlastní připomínka
+        own_types = {r['reminder_type'] for r in self.reminders if r['status'] == 'active'}
+        for item in reminder_scheduler.due_items(vehicle_id=self.vehicle_id):
+            if (item.kind == STK and "STK" not in own_types) or \
+                    (item.kind == INSURANCE and "Pojištění" not in own_types):
+                critical_list.append(f"🔴 {item.text()}")
+
         for r in self.reminders:
             if r['status'] == 'active' and r['due_date']:
                 try:
@@ -578,7 +592,7 @@ class VehicleRemindersWidget(QWidget):
                         30  # Notifikace 30 dní předem
                     ))
 
-                    self.load_reminders()
+                    self.reminders_changed()
         except Exception as e:
             print(f"Chyba při automatické kontrole: {e}")
 
@@ -642,7 +656,7 @@ class VehicleRemindersWidget(QWidget):
                     data['notify_days_before']
                 ))
 
-                self.load_reminders()
+                self.reminders_changed()
                 QMessageBox.information(self, "Úspěch", "Připomínka byla vytvořena.")
 
             except Exception as e:
@@ -657,7 +671,7 @@ class VehicleRemindersWidget(QWidget):
                 WHERE id = ?
             """, (reminder_id,))
 
-            self.load_reminders()
+            self.reminders_changed()
             QMessageBox.information(self, "Úspěch", "Připomínka byla označena jako splněná.")
 
         except Exception as e:
@@ -677,7 +691,7 @@ class VehicleRemindersWidget(QWidget):
                     WHERE id = ?
                 """, (snooze_until.strftime("%Y-%m-%d"), reminder_id))
 
-                self.load_reminders()
+                self.reminders_changed()
                 QMessageBox.information(
                     self,
                     "Úspěch",
@@ -703,7 +717,7 @@ class VehicleRemindersWidget(QWidget):
                     (reminder_id,)
                 )
 
-                self.load_reminders()
+                self.reminders_changed()
                 QMessageBox.information(self, "Úspěch", "Připomínka byla smazána.")
 
             except Exception as e:
@@ -11,11 +11,12 @@ from PyQt6.QtWidgets import (
     QGroupBox
 )
 from PyQt6.QtCore import Qt, QDate, QStringListModel, pyqtSignal
-from PyQt6.QtGui import QFont, QColor, QBrush, QPixmap
+from PyQt6.QtGui import QFont, QColor, QBrush
 from datetime import datetime, date, timedelta
 from pathlib import Path
 import config
 from database_manager import db
+from utils.utils_thumbnails import thumbnails, SMALL
 
 
 class VehicleDialog(QDialog):
@@ -782,18 +783,17 @@ class VehicleCard(QFrame):
 
                 # Načtení hlavní fotky pokud existuje
                 main_photo = db.fetch_one("""
-                    SELECT thumbnail_path FROM vehicle_photos
+                    SELECT file_path FROM vehicle_photos
                     WHERE vehicle_id = ? AND is_main = 1
                     LIMIT 1
                 """, (self.vehicle_id,))
 
-                if main_photo and main_photo['thumbnail_path']:
-                    path = Path(main_photo['thumbnail_path'])
-                    if path.exists():
-                        pixmap = QPixmap(str(path))
-                        if not pixmap.isNull():
-                            scaled = pixmap.scaled(80, 60, Qt.AspectRatioMode.KeepAspectRatio)
-                            self.photo_label.setPixmap(scaled)
+                if main_photo and main_photo['file_path'] and Path(main_photo['file_path']).exists():
+                    # Malý náhled z cache (originál se nedekóduje)
+                    pixmap = thumbnails.pixmap(main_photo['file_path'], SMALL)
+                    if not pixmap.isNull():
+                        scaled = pixmap.scaled(80, 60, Qt.AspectRatioMode.KeepAspectRatio)
+                        self.photo_label.setPixmap(scaled)
         except Exception as e:
             print(f"Chyba při načítání karty vozidla: {e}")
 
@@ -5,14 +5,14 @@ Seznam položek, filtry, příjem, výdej, inventura
 """
 
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QTableWidget, QTableWidgetItem, QHeaderView, QLineEdit,
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit,
     QLabel, QComboBox, QMessageBox, QMenu
 )
 from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QColor
 import config
 from database_manager import db
+from utils.utils_table_model import LazyTableView, TableColumn, ALIGN_RIGHT
+from utils.utils_scheduler import reminder_scheduler
 
 class WarehouseModule(QWidget):
     """Hlavní modul skladu"""
@@ -73,8 +73,9 @@ class WarehouseModule(QWidget):
         self.btn_alerts.clicked.connect(self.show_alerts)
         action_layout.addWidget(self.btn_alerts)
 
-        # Aktualizace počtu upozornění
+        # Aktualizace počtu upozornění (plánovač hlásí změny stavu skladu)
         self.update_alert_badge()
+        reminder_scheduler.summary_changed.connect(self.update_alert_badge)
 
         # === TLAČÍTKO NOVÁ POLOŽKA ===
         btn_new = QPushButton("➕ Nová položka")
@@ -159,23 +160,28 @@ class WarehouseModule(QWidget):
 
     def create_table(self, parent_layout):
         """Tabulka položek"""
-        self.table = QTableWidget()
-        self.table.setColumnCount(11)
-        self.table.setHorizontalHeaderLabels([
-            "Kód", "Název", "Kategorie", "Množství", "Jedn.",
-            "Min. stav", "Cena nákup", "Cena prodej", "Marže %", "Dodavatel", "ID"
-        ])
-
-        # Skrytí ID
-        self.table.setColumnHidden(10, True)
+        # Řádek = tuple z load_warehouse_items:
+        # (id, code, name, quantity, unit, min_quantity, price_purchase, price_sale, category, supplier)
+        columns = [
+            TableColumn("Kód", 1, formatter=lambda v: v or ""),
+            TableColumn("Název", 2),
+            TableColumn("Kategorie", 8, formatter=lambda v: v or "---"),
+            TableColumn("Množství", 3, formatter=lambda v: f"{v or 0:.2f}", align=ALIGN_RIGHT,
+                        background=self.stock_color,
+                        foreground=lambda it: "white" if (it[3] or 0) < (it[5] or 0) else "black"),
+            TableColumn("Jedn.", 4),
+            TableColumn("Min. stav", 5, formatter=lambda v: f"{v or 0:.2f}", align=ALIGN_RIGHT),
+            TableColumn("Cena nákup", 6, formatter=lambda v: f"{v or 0:.2f} Kč", align=ALIGN_RIGHT),
+            TableColumn("Cena prodej", 7, formatter=lambda v: f"{v or 0:.2f} Kč", align=ALIGN_RIGHT),
+            TableColumn("Marže %", self.item_margin, formatter=lambda v: f"{v:.1f}%", align=ALIGN_RIGHT),
+            TableColumn("Dodavatel", 9, formatter=lambda v: v or "---", stretch=True),
+            TableColumn("ID", 0, hidden=True),
+        ]
+        self.table = LazyTableView(columns)
 
         # Nastavení
-        self.table.setAlternatingRowColors(True)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
-        self.table.horizontalHeader().setStretchLastSection(True)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #ddd;
                 background-color: white;
             }
@@ -186,7 +192,7 @@ class WarehouseModule(QWidget):
                 font-weight: bold;
                 border: none;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #3498db;
                 color: white;
             }
@@ -313,97 +319,49 @@ class WarehouseModule(QWidget):
             query += " ORDER BY w.name"
 
             items = db.execute_query(query, params)
-
-            # Vyčištění tabulky
-            self.table.setRowCount(0)
+            self.table.set_rows(items or [])
 
             if not items:
                 self.update_stats(0, 0, 0)
                 return
 
-            # Vyplnění tabulky
+            # Statistiky nad tuple (bez widgetů)
             total_value = 0
             below_minimum = 0
-
             for item in items:
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-
-                item_id = item[0]
-                code = item[1] or ""
-                name = item[2]
-                quantity = item[3]
-                unit = item[4]
-                min_qty = item[5]
-                price_purchase = item[6] or 0
-                price_sale = item[7] or 0
-                category = item[8] or "---"
-                supplier = item[9] or "---"
-
-                # Marže
-                if price_purchase > 0:
-                    margin = ((price_sale - price_purchase) / price_purchase) * 100
-                else:
-                    margin = 0
-
-                # Hodnota
-                total_value += quantity * price_purchase
-
-                # Kontrola minima
-                is_below_min = quantity < min_qty
-                if is_below_min:
+                quantity = item[3] or 0
+                total_value += quantity * (item[6] or 0)
+                if quantity < (item[5] or 0):
                     below_minimum += 1
 
-                # Vyplnění buněk
-                self.table.setItem(row, 0, QTableWidgetItem(code))
-                self.table.setItem(row, 1, QTableWidgetItem(name))
-                self.table.setItem(row, 2, QTableWidgetItem(category))
-
-                qty_item = QTableWidgetItem(f"{quantity:.2f}")
-                qty_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(row, 3, qty_item)
-
-                self.table.setItem(row, 4, QTableWidgetItem(unit))
-
-                min_item = QTableWidgetItem(f"{min_qty:.2f}")
-                min_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(row, 5, min_item)
-
-                purchase_item = QTableWidgetItem(f"{price_purchase:.2f} Kč")
-                purchase_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(row, 6, purchase_item)
-
-                sale_item = QTableWidgetItem(f"{price_sale:.2f} Kč")
-                sale_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(row, 7, sale_item)
-
-                margin_item = QTableWidgetItem(f"{margin:.1f}%")
-                margin_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table.setItem(row, 8, margin_item)
-
-                self.table.setItem(row, 9, QTableWidgetItem(supplier))
-                self.table.setItem(row, 10, QTableWidgetItem(str(item_id)))
-
-                # Barevné zvýraznění řádku
-                if quantity == 0:
-                    color = QColor(config.STOCK_ZERO)
-                elif is_below_min:
-                    color = QColor(config.STOCK_CRITICAL)
-                elif quantity < min_qty * 1.5:
-                    color = QColor(config.STOCK_WARNING)
-                else:
-                    color = QColor(config.STOCK_OK)
-
-                # Zvýraznění sloupce s množstvím
-                qty_item.setBackground(color)
-                qty_item.setForeground(QColor("white") if quantity < min_qty else QColor("black"))
-
             # Aktualizace statistik
             self.update_stats(len(items), total_value, below_minimum)
 
         except Exception as e:
             QMessageBox.critical(self, "Chyba", f"Chyba při načítání skladu:\n{str(e)}")
 
+    @staticmethod
+    def item_margin(item):
+        """Marže položky v %"""
+        price_purchase = item[6] or 0
+        price_sale = item[7] or 0
+        if price_purchase > 0:
+            return ((price_sale - price_purchase) / price_purchase) * 100
+        return 0
+
+    @staticmethod
+    def stock_color(item):
+        """Barva buňky množství podle stavu vůči minimu"""
+        quantity = item[3] or 0
+        min_qty = item[5] or 0
+        if quantity == 0:
+            return config.STOCK_ZERO
+        if quantity < min_qty:
+            return config.STOCK_CRITICAL
+        if quantity < min_qty * 1.5:
+            return config.STOCK_WARNING
+        return config.STOCK_OK
+
     def update_stats(self, total_items, total_value, below_minimum):
         """Aktualizace statistik"""
         self.lbl_total_items.setText(f"Celkem položek: {total_items}")
@@ -455,10 +413,14 @@ class WarehouseModule(QWidget):
 
     def open_detail(self):
         """Otevření detailu položky"""
-        if self.table.currentRow() < 0:
+        item = self.table.current_record()
+        if item is None:
             return
 
-        item_id = int(self.table.item(self.table.currentRow(), 10).text())
+        self.open_record(int(item[0]))
+
+    def open_record(self, item_id):
+        """Otevření detailu položky podle ID (např. z globálního vyhledávání)"""
         from .warehouse_detail import WarehouseDetailWindow
         dialog = WarehouseDetailWindow(item_id, self)
         dialog.item_updated.connect(self.load_warehouse_items)
@@ -466,7 +428,7 @@ class WarehouseModule(QWidget):
 
     def show_context_menu(self, position):
         """Kontextové menu"""
-        if self.table.currentRow() < 0:
+        if self.table.current_record() is None:
             return
 
         menu = QMenu()
@@ -491,11 +453,12 @@ class WarehouseModule(QWidget):
 
     def delete_item(self):
         """Smazání položky"""
-        if self.table.currentRow() < 0:
+        item = self.table.current_record()
+        if item is None:
             return
 
-        item_id = int(self.table.item(self.table.currentRow(), 10).text())
-        item_name = self.table.item(self.table.currentRow(), 1).text()
+        item_id = int(item[0])
+        item_name = item[2]
 
         reply = QMessageBox.question(
             self,
@@ -771,7 +734,7 @@ class WarehouseModule(QWidget):
             else:
                 QMessageBox.critical(self, "Chyba", "Nepodařilo se exportovat")
 
-    def update_alert_badge(self):
+    def update_alert_badge(self, *args):
         """Aktualizace počtu upozornění na tlačítku"""
         try:
             from .warehouse_stock_alert import StockAlertChecker
@@ -802,25 +765,21 @@ class WarehouseModule(QWidget):
         from .warehouse_stock_alert import WarehouseStockAlertWindow
         dialog = WarehouseStockAlertWindow(self)
         dialog.alert_resolved.connect(self.load_warehouse_items)
-        dialog.alert_resolved.connect(self.update_alert_badge)
+        dialog.alert_resolved.connect(lambda item_id: reminder_scheduler.refresh("stock", item_id))
         dialog.show()
 
     def refresh(self):
         """Refresh modulu (voláno při přepnutí)"""
         self.load_warehouse_items()
         self.update_alert_badge()
+        reminder_scheduler.refresh("stock")
 
     def print_labels(self):
         """Tisk štítků"""
         from .warehouse_labels import WarehouseLabelsDialog
 
         # Získání vybraných položek
-        selected = []
-        for item in self.table.selectedItems():
-            if item.column() == 8:  # ID sloupec
-                item_id = int(item.text())
-                if item_id not in selected:
-                    selected.append(item_id)
+        selected = [int(item[0]) for item in self.table.selected_records()]
 
         if not selected:
             QMessageBox.warning(self, "Info", "Nejprve vyberte položky pro tisk štítků")
@@ -2,6 +2,9 @@
 """
 Analýzy skladu - PROFESIONÁLNÍ
 ABC, obratovost, marže, dead stock, predikce, grafy
+
+Výpočty dělá utils.utils_stock_analytics (jedno načtení historie pohybů,
+cache podle posledního pohybu); okno výsledky jen zobrazuje a exportuje.
 """
 
 from PyQt6.QtWidgets import (
@@ -14,7 +17,8 @@ from PyQt6.QtCore import Qt, QDate, pyqtSignal
 from PyQt6.QtGui import QColor
 import config
 from database_manager import db
-from datetime import datetime, timedelta
+from utils.utils_stock_analytics import stock_analytics
+from datetime import datetime
 import json
 
 
@@ -27,6 +31,8 @@ class WarehouseAnalyticsWindow(QMainWindow):
         self.setWindowTitle("📊 Analýzy skladu")
         self.setMinimumSize(1200, 800)
 
+        self.analytics = None
+
         self.init_ui()
         self.load_analytics()
 
@@ -109,7 +115,7 @@ class WarehouseAnalyticsWindow(QMainWindow):
         # Tlačítka
         btn_refresh = QPushButton("↻ Obnovit")
         btn_refresh.setStyleSheet(self.get_button_style(config.COLOR_SUCCESS))
-        btn_refresh.clicked.connect(self.load_analytics)
+        btn_refresh.clicked.connect(lambda: self.load_analytics(force=True))
         action_layout.addWidget(btn_refresh)
 
         btn_export = QPushButton("📤 Export")
@@ -189,81 +195,33 @@ class WarehouseAnalyticsWindow(QMainWindow):
 
         return widget
 
-    def load_abc_analysis(self):
-        """Načtení ABC analýzy"""
-        try:
-            # Data z výdejů
-            movements = db.execute_query("""
-                SELECT w.id, w.name,
-                       SUM(wm.quantity) as total_quantity,
-                       SUM(wm.quantity * wm.unit_price) as total_value
-                FROM warehouse_movements wm
-                LEFT JOIN warehouse w ON wm.item_id = w.id
-                WHERE wm.movement_type = 'Výdej'
-                GROUP BY w.id, w.name
-                HAVING total_value > 0
-                ORDER BY total_value DESC
-            """)
-
-            self.table_abc.setRowCount(0)
-
-            if not movements:
-                return
-
-            # Výpočet celkové hodnoty
-            total_value = sum(m[3] for m in movements)
-
-            cumulative = 0
-            count_a = 0
-            count_b = 0
-            count_c = 0
-
-            for mov in movements:
-                row = self.table_abc.rowCount()
-                self.table_abc.insertRow(row)
-
-                item_id = mov[0]
-                name = mov[1]
-                quantity = mov[2]
-                value = mov[3]
-                percent = (value / total_value * 100) if total_value > 0 else 0
-                cumulative += percent
-
-                # Určení ABC kategorie
-                if cumulative <= 80:
-                    category = "A"
-                    color = QColor("#c8e6c9")
-                    count_a += 1
-                elif cumulative <= 95:
-                    category = "B"
-                    color = QColor("#fff9c4")
-                    count_b += 1
-                else:
-                    category = "C"
-                    color = QColor("#ffccbc")
-                    count_c += 1
-
-                # Vyplnění řádku
-                self.table_abc.setItem(row, 0, QTableWidgetItem(name))
-                self.table_abc.setItem(row, 1, QTableWidgetItem(f"{quantity:.2f}"))
-                self.table_abc.setItem(row, 2, QTableWidgetItem(f"{value:,.2f} Kč"))
-                self.table_abc.setItem(row, 3, QTableWidgetItem(f"{percent:.2f}%"))
-                self.table_abc.setItem(row, 4, QTableWidgetItem(f"{cumulative:.2f}%"))
-
-                cat_item = QTableWidgetItem(category)
-                cat_item.setBackground(color)
-                cat_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table_abc.setItem(row, 5, cat_item)
-
-                self.table_abc.setItem(row, 6, QTableWidgetItem(str(item_id)))
-
-            # Aktualizace statistik
-            self.lbl_abc_a_count.setText(f"Kategorie A: {count_a} položek (80% hodnoty)")
-            self.lbl_abc_b_count.setText(f"Kategorie B: {count_b} položek (15% hodnoty)")
-            self.lbl_abc_c_count.setText(f"Kategorie C: {count_c} položek (5% hodnoty)")
-
-        except Exception as e:
-            print(f"Chyba: {e}")
+    def render_abc(self, analytics):
+        """Zobrazení ABC analýzy"""
+        rows = analytics.abc
+        colors = {"A": QColor("#c8e6c9"), "B": QColor("#fff9c4"), "C": QColor("#ffccbc")}
+
+        self.table_abc.setUpdatesEnabled(False)
+        self.table_abc.setRowCount(len(rows))
+        for row, data in enumerate(rows):
+            self.table_abc.setItem(row, 0, QTableWidgetItem(data.name))
+            self.table_abc.setItem(row, 1, QTableWidgetItem(f"{data.quantity:.2f}"))
+            self.table_abc.setItem(row, 2, QTableWidgetItem(f"{data.value:,.2f} Kč"))
+            self.table_abc.setItem(row, 3, QTableWidgetItem(f"{data.percent:.2f}%"))
+            self.table_abc.setItem(row, 4, QTableWidgetItem(f"{data.cumulative:.2f}%"))
+
+            cat_item = QTableWidgetItem(data.category)
+            cat_item.setBackground(colors[data.category])
+            cat_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.table_abc.setItem(row, 5, cat_item)
+
+            self.table_abc.setItem(row, 6, QTableWidgetItem(str(data.item_id)))
+        self.table_abc.setUpdatesEnabled(True)
+
+        # Aktualizace statistik
+        counts = analytics.abc_counts()
+        self.lbl_abc_a_count.setText(f"Kategorie A: {counts['A']} položek (80% hodnoty)")
+        self.lbl_abc_b_count.setText(f"Kategorie B: {counts['B']} položek (15% hodnoty)")
+        self.lbl_abc_c_count.setText(f"Kategorie C: {counts['C']} položek (5% hodnoty)")
 
     # ========================================
     # ZÁLOŽKA: OBRATOVOST
@@ -294,7 +252,7 @@ class WarehouseAnalyticsWindow(QMainWindow):
         period_layout.addWidget(self.spin_turnover_months)
 
         btn_calc_turnover = QPushButton("Přepočítat")
-        btn_calc_turnover.clicked.connect(self.load_turnover_analysis)
+        btn_calc_turnover.clicked.connect(lambda: self.load_analytics())
         period_layout.addWidget(btn_calc_turnover)
 
         period_layout.addStretch()
@@ -315,65 +273,33 @@ class WarehouseAnalyticsWindow(QMainWindow):
 
         return widget
 
-    def load_turnover_analysis(self):
-        """Načtení analýzy obratovosti"""
-        try:
-            months = self.spin_turnover_months.value()
-            date_from = (datetime.now() - timedelta(days=months * 30)).strftime('%Y-%m-%d')
-
-            items = db.execute_query("""
-                SELECT w.id, w.name, w.quantity,
-                       COALESCE(SUM(CASE WHEN wm.movement_type = 'Výdej' THEN wm.quantity ELSE 0 END), 0) as total_issued
-                FROM warehouse w
-                LEFT JOIN warehouse_movements wm ON w.id = wm.item_id AND wm.date >= ?
-                GROUP BY w.id, w.name, w.quantity
-                HAVING total_issued > 0
-                ORDER BY total_issued DESC
-            """, [date_from])
-
-            self.table_turnover.setRowCount(0)
-
-            if not items:
-                return
-
-            for item in items:
-                row = self.table_turnover.rowCount()
-                self.table_turnover.insertRow(row)
-
-                item_id = item[0]
-                name = item[1]
-                current_stock = item[2]
-                total_issued = item[3]
-
-                # Výpočty
-                avg_stock = current_stock + (total_issued / 2)  # Zjednodušený průměr
-                turnover = (total_issued / avg_stock) if avg_stock > 0 else 0
-                sales_per_month = total_issued / months
-                days_to_stockout = (current_stock / sales_per_month * 30) if sales_per_month > 0 else 999
+    def render_turnover(self, analytics):
+        """Zobrazení analýzy obratovosti"""
+        rows = analytics.turnover
 
-                # Vyplnění
-                self.table_turnover.setItem(row, 0, QTableWidgetItem(name))
-                self.table_turnover.setItem(row, 1, QTableWidgetItem(f"{avg_stock:.2f}"))
-                self.table_turnover.setItem(row, 2, QTableWidgetItem(f"{total_issued:.2f}"))
+        self.table_turnover.setUpdatesEnabled(False)
+        self.table_turnover.setRowCount(len(rows))
+        for row, data in enumerate(rows):
+            self.table_turnover.setItem(row, 0, QTableWidgetItem(data.name))
+            self.table_turnover.setItem(row, 1, QTableWidgetItem(f"{data.avg_stock:.2f}"))
+            self.table_turnover.setItem(row, 2, QTableWidgetItem(f"{data.issued:.2f}"))
 
-                turnover_item = QTableWidgetItem(f"{turnover:.2f}x")
-                turnover_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table_turnover.setItem(row, 3, turnover_item)
+            turnover_item = QTableWidgetItem(f"{data.turnover:.2f}x")
+            turnover_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table_turnover.setItem(row, 3, turnover_item)
 
-                self.table_turnover.setItem(row, 4, QTableWidgetItem(f"{sales_per_month:.2f}"))
+            self.table_turnover.setItem(row, 4, QTableWidgetItem(f"{data.per_month:.2f}"))
 
-                days_item = QTableWidgetItem(f"{days_to_stockout:.0f} dní")
-                if days_to_stockout < 30:
-                    days_item.setBackground(QColor(config.STOCK_CRITICAL))
-                    days_item.setForeground(QColor("white"))
-                elif days_to_stockout < 60:
-                    days_item.setBackground(QColor(config.STOCK_WARNING))
-                self.table_turnover.setItem(row, 5, days_item)
+            days_item = QTableWidgetItem(f"{data.days_to_stockout:.0f} dní")
+            if data.days_to_stockout < 30:
+                days_item.setBackground(QColor(config.STOCK_CRITICAL))
+                days_item.setForeground(QColor("white"))
+            elif data.days_to_stockout < 60:
+                days_item.setBackground(QColor(config.STOCK_WARNING))
+            self.table_turnover.setItem(row, 5, days_item)
 
-                self.table_turnover.setItem(row, 6, QTableWidgetItem(str(item_id)))
-
-        except Exception as e:
-            print(f"Chyba: {e}")
+            self.table_turnover.setItem(row, 6, QTableWidgetItem(str(data.item_id)))
+        self.table_turnover.setUpdatesEnabled(True)
 
     # ========================================
     # ZÁLOŽKA: MARŽE
@@ -419,72 +345,38 @@ class WarehouseAnalyticsWindow(QMainWindow):
 
         return widget
 
-    def load_margin_analysis(self):
-        """Načtení analýzy marže"""
-        try:
-            items = db.execute_query("""
-                SELECT id, name, quantity, price_purchase, price_sale
-                FROM warehouse
-                WHERE quantity > 0 AND price_purchase > 0
-                ORDER BY (price_sale - price_purchase) * quantity DESC
-            """)
-
-            self.table_margin.setRowCount(0)
-
-            if not items:
-                return
-
-            total_purchase_value = 0
-            total_sale_value = 0
-            total_margin = 0
-
-            for item in items:
-                row = self.table_margin.rowCount()
-                self.table_margin.insertRow(row)
-
-                item_id = item[0]
-                name = item[1]
-                quantity = item[2]
-                purchase = item[3]
-                sale = item[4]
-
-                margin_czk = (sale - purchase) * quantity
-                margin_pct = ((sale - purchase) / purchase * 100) if purchase > 0 else 0
-
-                total_purchase_value += purchase * quantity
-                total_sale_value += sale * quantity
-                total_margin += margin_czk
-
-                # Vyplnění
-                self.table_margin.setItem(row, 0, QTableWidgetItem(name))
-                self.table_margin.setItem(row, 1, QTableWidgetItem(f"{quantity:.2f}"))
-                self.table_margin.setItem(row, 2, QTableWidgetItem(f"{purchase:.2f} Kč"))
-                self.table_margin.setItem(row, 3, QTableWidgetItem(f"{sale:.2f} Kč"))
-
-                margin_czk_item = QTableWidgetItem(f"{margin_czk:,.2f} Kč")
-                margin_czk_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                if margin_czk < 0:
-                    margin_czk_item.setForeground(QColor(config.COLOR_DANGER))
-                else:
-                    margin_czk_item.setForeground(QColor(config.COLOR_SUCCESS))
-                self.table_margin.setItem(row, 4, margin_czk_item)
-
-                margin_pct_item = QTableWidgetItem(f"{margin_pct:.1f}%")
-                margin_pct_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table_margin.setItem(row, 5, margin_pct_item)
-
-                self.table_margin.setItem(row, 6, QTableWidgetItem(str(item_id)))
-
-            # Aktualizace statistik
-            avg_margin = (total_margin / total_purchase_value * 100) if total_purchase_value > 0 else 0
-
-            self.lbl_total_purchase.setText(f"{total_purchase_value:,.2f} Kč")
-            self.lbl_total_sale.setText(f"{total_sale_value:,.2f} Kč")
-            self.lbl_total_margin.setText(f"{total_margin:,.2f} Kč")
-            self.lbl_avg_margin.setText(f"{avg_margin:.1f}%")
-
-        except Exception as e:
-            print(f"Chyba: {e}")
+    def render_margin(self, analytics):
+        """Zobrazení analýzy marže"""
+        rows = analytics.margin
+
+        self.table_margin.setUpdatesEnabled(False)
+        self.table_margin.setRowCount(len(rows))
+        for row, data in enumerate(rows):
+            self.table_margin.setItem(row, 0, QTableWidgetItem(data.name))
+            self.table_margin.setItem(row, 1, QTableWidgetItem(f"{data.quantity:.2f}"))
+            self.table_margin.setItem(row, 2, QTableWidgetItem(f"{data.purchase:.2f} Kč"))
+            self.table_margin.setItem(row, 3, QTableWidgetItem(f"{data.sale:.2f} Kč"))
+
+            margin_czk_item = QTableWidgetItem(f"{data.margin:,.2f} Kč")
+            margin_czk_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            if data.margin < 0:
+                margin_czk_item.setForeground(QColor(config.COLOR_DANGER))
+            else:
+                margin_czk_item.setForeground(QColor(config.COLOR_SUCCESS))
+            self.table_margin.setItem(row, 4, margin_czk_item)
+
+            margin_pct_item = QTableWidgetItem(f"{data.margin_pct:.1f}%")
+            margin_pct_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table_margin.setItem(row, 5, margin_pct_item)
+
+            self.table_margin.setItem(row, 6, QTableWidgetItem(str(data.item_id)))
+        self.table_margin.setUpdatesEnabled(True)
+
+        # Aktualizace statistik
+        self.lbl_total_purchase.setText(f"{analytics.purchase_value:,.2f} Kč")
+        self.lbl_total_sale.setText(f"{analytics.sale_value:,.2f} Kč")
+        self.lbl_total_margin.setText(f"{analytics.margin_value:,.2f} Kč")
+        self.lbl_avg_margin.setText(f"{analytics.avg_margin:.1f}%")
 
     # ========================================
     # ZÁLOŽKA: DEAD STOCK
@@ -515,7 +407,7 @@ class WarehouseAnalyticsWindow(QMainWindow):
         settings_layout.addWidget(self.spin_dead_stock_months)
 
         btn_calc_dead = QPushButton("Přepočítat")
-        btn_calc_dead.clicked.connect(self.load_dead_stock)
+        btn_calc_dead.clicked.connect(lambda: self.load_analytics())
         settings_layout.addWidget(btn_calc_dead)
 
         settings_layout.addStretch()
@@ -541,75 +433,36 @@ class WarehouseAnalyticsWindow(QMainWindow):
 
         return widget
 
-    def load_dead_stock(self):
-        """Načtení dead stock"""
-        try:
-            months = self.spin_dead_stock_months.value()
-            date_limit = (datetime.now() - timedelta(days=months * 30)).strftime('%Y-%m-%d')
-
-            items = db.execute_query("""
-                SELECT w.id, w.name, w.quantity, w.price_purchase, w.location,
-                       MAX(wm.date) as last_movement
-                FROM warehouse w
-                LEFT JOIN warehouse_movements wm ON w.id = wm.item_id
-                WHERE w.quantity > 0
-                GROUP BY w.id, w.name, w.quantity, w.price_purchase, w.location
-                HAVING last_movement IS NULL OR last_movement < ?
-                ORDER BY last_movement ASC
-            """, [date_limit])
-
-            self.table_dead_stock.setRowCount(0)
-
-            total_value = 0
-
-            if not items:
-                self.lbl_dead_stock_value.setText("Hodnota: 0 Kč (žádný dead stock)")
-                return
-
-            for item in items:
-                row = self.table_dead_stock.rowCount()
-                self.table_dead_stock.insertRow(row)
-
-                item_id = item[0]
-                name = item[1]
-                quantity = item[2]
-                price = item[3]
-                location = item[4] or "---"
-                last_movement = item[5]
-
-                value = quantity * price
-                total_value += value
+    def render_dead_stock(self, analytics):
+        """Zobrazení dead stock"""
+        rows = analytics.dead_stock
 
-                if last_movement:
-                    last_date = datetime.strptime(last_movement, '%Y-%m-%d %H:%M:%S')
-                    days_without = (datetime.now() - last_date).days
-                    last_text = last_movement.split()[0]
-                else:
-                    days_without = 9999
-                    last_text = "Nikdy"
+        self.table_dead_stock.setUpdatesEnabled(False)
+        self.table_dead_stock.setRowCount(len(rows))
+        for row, data in enumerate(rows):
+            self.table_dead_stock.setItem(row, 0, QTableWidgetItem(data.name))
+            self.table_dead_stock.setItem(row, 1, QTableWidgetItem(f"{data.quantity:.2f}"))
 
-                # Vyplnění
-                self.table_dead_stock.setItem(row, 0, QTableWidgetItem(name))
-                self.table_dead_stock.setItem(row, 1, QTableWidgetItem(f"{quantity:.2f}"))
+            value_item = QTableWidgetItem(f"{data.value:,.2f} Kč")
+            value_item.setForeground(QColor(config.COLOR_DANGER))
+            self.table_dead_stock.setItem(row, 2, value_item)
 
-                value_item = QTableWidgetItem(f"{value:,.2f} Kč")
-                value_item.setForeground(QColor(config.COLOR_DANGER))
-                self.table_dead_stock.setItem(row, 2, value_item)
+            self.table_dead_stock.setItem(row, 3, QTableWidgetItem(data.last_movement or "Nikdy"))
 
-                self.table_dead_stock.setItem(row, 3, QTableWidgetItem(last_text))
+            days_item = QTableWidgetItem(f"{data.days_without} dní")
+            days_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table_dead_stock.setItem(row, 4, days_item)
 
-                days_item = QTableWidgetItem(f"{days_without} dní")
-                days_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table_dead_stock.setItem(row, 4, days_item)
+            self.table_dead_stock.setItem(row, 5, QTableWidgetItem(data.location))
+            self.table_dead_stock.setItem(row, 6, QTableWidgetItem(str(data.item_id)))
+        self.table_dead_stock.setUpdatesEnabled(True)
 
-                self.table_dead_stock.setItem(row, 5, QTableWidgetItem(location))
-                self.table_dead_stock.setItem(row, 6, QTableWidgetItem(str(item_id)))
-
-            # Aktualizace hodnoty
-            self.lbl_dead_stock_value.setText(f"Hodnota dead stock: {total_value:,.2f} Kč ({len(items)} položek)")
-
-        except Exception as e:
-            print(f"Chyba: {e}")
+        # Aktualizace hodnoty
+        if rows:
+            self.lbl_dead_stock_value.setText(
+                f"Hodnota dead stock: {analytics.dead_stock_value:,.2f} Kč ({len(rows)} položek)")
+        else:
+            self.lbl_dead_stock_value.setText("Hodnota: 0 Kč (žádný dead stock)")
 
     # ========================================
     # ZÁLOŽKA: PREDIKCE
@@ -640,7 +493,7 @@ class WarehouseAnalyticsWindow(QMainWindow):
         settings_layout.addWidget(self.spin_prediction_days)
 
         btn_calc_prediction = QPushButton("Přepočítat")
-        btn_calc_prediction.clicked.connect(self.load_prediction)
+        btn_calc_prediction.clicked.connect(lambda: self.load_analytics())
         settings_layout.addWidget(btn_calc_prediction)
 
         settings_layout.addStretch()
@@ -661,83 +514,41 @@ class WarehouseAnalyticsWindow(QMainWindow):
 
         return widget
 
-    def load_prediction(self):
-        """Načtení predikce"""
-        try:
-            days = self.spin_prediction_days.value()
-
-            # Historická spotřeba za posledních 90 dní
-            date_from = (datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d')
-
-            items = db.execute_query("""
-                SELECT w.id, w.name, w.quantity, w.min_quantity,
-                       COALESCE(SUM(CASE WHEN wm.movement_type = 'Výdej' THEN wm.quantity ELSE 0 END), 0) as total_issued,
-                       s.name as supplier
-                FROM warehouse w
-                LEFT JOIN warehouse_movements wm ON w.id = wm.item_id AND wm.date >= ?
-                LEFT JOIN warehouse_suppliers s ON w.supplier_id = s.id
-                GROUP BY w.id, w.name, w.quantity, w.min_quantity, s.name
-                HAVING total_issued > 0
-                ORDER BY w.name
-            """, [date_from])
-
-            self.table_prediction.setRowCount(0)
-
-            if not items:
-                return
+    def render_prediction(self, analytics):
+        """Zobrazení predikce"""
+        rows = sorted(analytics.prediction, key=lambda r: r.name)
+        statuses = {
+            "ok": ("✓ Dostatek", QColor(config.STOCK_OK)),
+            "low": ("⚠️ Nízký", QColor(config.STOCK_WARNING)),
+            "short": ("❌ Nedostatek", QColor(config.STOCK_CRITICAL)),
+        }
 
-            for item in items:
-                row = self.table_prediction.rowCount()
-                self.table_prediction.insertRow(row)
-
-                item_id = item[0]
-                name = item[1]
-                current_stock = item[2]
-                min_qty = item[3]
-                total_issued = item[4]
-                supplier = item[5] or "---"
-
-                # Výpočty
-                consumption_per_day = total_issued / 90
-                predicted_consumption = consumption_per_day * days
-                recommended_purchase = max(0, predicted_consumption - current_stock + min_qty)
-
-                # Status
-                if current_stock >= predicted_consumption + min_qty:
-                    status = "✓ Dostatek"
-                    status_color = QColor(config.STOCK_OK)
-                elif current_stock >= predicted_consumption:
-                    status = "⚠️ Nízký"
-                    status_color = QColor(config.STOCK_WARNING)
-                else:
-                    status = "❌ Nedostatek"
-                    status_color = QColor(config.STOCK_CRITICAL)
-
-                # Vyplnění
-                self.table_prediction.setItem(row, 0, QTableWidgetItem(name))
-                self.table_prediction.setItem(row, 1, QTableWidgetItem(f"{current_stock:.2f}"))
-                self.table_prediction.setItem(row, 2, QTableWidgetItem(f"{consumption_per_day:.2f}"))
-                self.table_prediction.setItem(row, 3, QTableWidgetItem(f"{predicted_consumption:.2f}"))
-
-                purchase_item = QTableWidgetItem(f"{recommended_purchase:.2f}")
-                if recommended_purchase > 0:
-                    purchase_item.setBackground(QColor("#fff3cd"))
-                    purchase_item.setForeground(QColor("#856404"))
-                purchase_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.table_prediction.setItem(row, 4, purchase_item)
-
-                self.table_prediction.setItem(row, 5, QTableWidgetItem(supplier))
-
-                status_item = QTableWidgetItem(status)
-                status_item.setBackground(status_color)
-                if status == "❌ Nedostatek":
-                    status_item.setForeground(QColor("white"))
-                self.table_prediction.setItem(row, 6, status_item)
-
-                self.table_prediction.setItem(row, 7, QTableWidgetItem(str(item_id)))
-
-        except Exception as e:
-            print(f"Chyba: {e}")
+        self.table_prediction.setUpdatesEnabled(False)
+        self.table_prediction.setRowCount(len(rows))
+        for row, data in enumerate(rows):
+            self.table_prediction.setItem(row, 0, QTableWidgetItem(data.name))
+            self.table_prediction.setItem(row, 1, QTableWidgetItem(f"{data.stock:.2f}"))
+            self.table_prediction.setItem(row, 2, QTableWidgetItem(f"{data.per_day:.2f}"))
+            self.table_prediction.setItem(row, 3, QTableWidgetItem(f"{data.predicted:.2f}"))
+
+            purchase_item = QTableWidgetItem(f"{data.recommended:.2f}")
+            if data.recommended > 0:
+                purchase_item.setBackground(QColor("#fff3cd"))
+                purchase_item.setForeground(QColor("#856404"))
+            purchase_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table_prediction.setItem(row, 4, purchase_item)
+
+            self.table_prediction.setItem(row, 5, QTableWidgetItem(data.supplier))
+
+            status_text, status_color = statuses[data.status]
+            status_item = QTableWidgetItem(status_text)
+            status_item.setBackground(status_color)
+            if data.status == "short":
+                status_item.setForeground(QColor("white"))
+            self.table_prediction.setItem(row, 6, status_item)
+
+            self.table_prediction.setItem(row, 7, QTableWidgetItem(str(data.item_id)))
+        self.table_prediction.setUpdatesEnabled(True)
 
     # ========================================
     # ZÁLOŽKA: GRAFY
@@ -791,23 +602,15 @@ class WarehouseAnalyticsWindow(QMainWindow):
         try:
             import matplotlib.pyplot as plt
 
-            # Data
-            items = db.execute_query("""
-                SELECT w.name, SUM(wm.quantity) as total
-                FROM warehouse_movements wm
-                LEFT JOIN warehouse w ON wm.item_id = w.id
-                WHERE wm.movement_type = 'Výdej'
-                GROUP BY w.id, w.name
-                ORDER BY total DESC
-                LIMIT 10
-            """)
+            items = sorted(self.analytics.abc if self.analytics else [],
+                           key=lambda r: r.quantity, reverse=True)[:10]
 
             if not items:
                 QMessageBox.information(self, "Info", "Žádná data k zobrazení")
                 return
 
-            names = [item[1][:30] for item in items]
-            values = [item[2] for item in items]
+            names = [item.name[:30] for item in items]
+            values = [item.quantity for item in items]
 
             plt.figure(figsize=(12, 6))
             plt.barh(names, values, color='#3498db')
@@ -879,20 +682,15 @@ class WarehouseAnalyticsWindow(QMainWindow):
         try:
             import matplotlib.pyplot as plt
 
-            # Počty kategorií
-            movements = db.execute_query("""
-                SELECT SUM(wm.quantity * wm.unit_price) as value
-                FROM warehouse_movements wm
-                WHERE wm.movement_type = 'Výdej'
-            """)
-
-            if not movements or not movements[0][0]:
+            if not self.analytics or not self.analytics.abc:
                 QMessageBox.information(self, "Info", "Žádná data k zobrazení")
                 return
 
-            # Pro zjednodušení použijeme pevné rozdělení
-            sizes = [80, 15, 5]
-            labels = ['Kategorie A\n(80% hodnoty)', 'Kategorie B\n(15% hodnoty)', 'Kategorie C\n(5% hodnoty)']
+            # Hodnota výdejů po kategoriích
+            values = self.analytics.abc_values()
+            counts = self.analytics.abc_counts()
+            sizes = [values[cat] for cat in "ABC"]
+            labels = [f'Kategorie {cat}\n({counts[cat]} položek)' for cat in "ABC"]
             colors = ['#c8e6c9', '#fff9c4', '#ffccbc']
 
             plt.figure(figsize=(8, 8))
@@ -915,13 +713,24 @@ class WarehouseAnalyticsWindow(QMainWindow):
     # SPOLEČNÉ FUNKCE
     # ========================================
 
-    def load_analytics(self):
-        """Načtení všech analýz"""
-        self.load_abc_analysis()
-        self.load_turnover_analysis()
-        self.load_margin_analysis()
-        self.load_dead_stock()
-        self.load_prediction()
+    def load_analytics(self, force=False):
+        """Výpočet všech analýz (jedno načtení dat) a zobrazení v záložkách"""
+        try:
+            self.analytics = stock_analytics.compute(
+                turnover_months=self.spin_turnover_months.value(),
+                dead_stock_months=self.spin_dead_stock_months.value(),
+                prediction_days=self.spin_prediction_days.value(),
+                force=force
+            )
+        except Exception as e:
+            print(f"Chyba při výpočtu analýz: {e}")
+            return
+
+        self.render_abc(self.analytics)
+        self.render_turnover(self.analytics)
+        self.render_margin(self.analytics)
+        self.render_dead_stock(self.analytics)
+        self.render_prediction(self.analytics)
 
     def export_analytics(self):
         """Export analýz"""
@@ -936,15 +745,14 @@ class WarehouseAnalyticsWindow(QMainWindow):
             if not file_path:
                 return
 
-            # Sestavení exportu
-            export_data = {
-                'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'abc_analysis': self.get_abc_data(),
-                'turnover': self.get_turnover_data(),
-                'margin': self.get_margin_data(),
-                'dead_stock': self.get_dead_stock_data(),
-                'prediction': self.get_prediction_data()
-            }
+            if self.analytics is None:
+                self.load_analytics()
+            if self.analytics is None:
+                return
+
+            # Sestavení exportu z výsledku analýz
+            export_data = self.analytics.as_dict()
+            export_data['generated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
             # Uložení
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -954,56 +762,3 @@ class WarehouseAnalyticsWindow(QMainWindow):
 
         except Exception as e:
             QMessageBox.critical(self, "Chyba", f"Chyba při exportu:\n{str(e)}")
-
-    def get_abc_data(self):
-        """Získání ABC dat pro export"""
-        data = []
-        for row in range(self.table_abc.rowCount()):
-            data.append({
-                'name': self.table_abc.item(row, 0).text(),
-                'quantity': self.table_abc.item(row, 1).text(),
-                'value': self.table_abc.item(row, 2).text(),
-                'category': self.table_abc.item(row, 5).text()
-            })
-        return data
-
-    def get_turnover_data(self):
-        """Získání dat obratovosti"""
-        data = []
-        for row in range(self.table_turnover.rowCount()):
-            data.append({
-                'name': self.table_turnover.item(row, 0).text(),
-                'turnover': self.table_turnover.item(row, 3).text(),
-                'sales_per_month': self.table_turnover.item(row, 4).text()
-            })
-        return data
-
-    def get_margin_data(self):
-        """Získání dat marže"""
-        return {
-            'total_margin': self.lbl_total_margin.text(),
-            'avg_margin': self.lbl_avg_margin.text()
-        }
-
-    def get_dead_stock_data(self):
-        """Získání dead stock dat"""
-        data = []
-        for row in range(self.table_dead_stock.rowCount()):
-            data.append({
-                'name': self.table_dead_stock.item(row, 0).text(),
-                'value': self.table_dead_stock.item(row, 2).text(),
-                'days_without': self.table_dead_stock.item(row, 4).text()
-            })
-        return data
-
-    def get_prediction_data(self):
-        """Získání dat predikce"""
-        data = []
-        for row in range(self.table_prediction.rowCount()):
-            data.append({
-                'name': self.table_prediction.item(row, 0).text(),
-                'current_stock': self.table_prediction.item(row, 1).text(),
-                'recommended_purchase': self.table_prediction.item(row, 4).text(),
-                'status': self.table_prediction.item(row, 6).text()
-            })
-        return data
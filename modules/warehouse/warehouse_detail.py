@@ -14,6 +14,8 @@ from PyQt6.QtCore import Qt, pyqtSignal, QDate
 from PyQt6.QtGui import QPixmap, QColor
 import config
 from database_manager import db
+from utils.utils_stock import stock_ledger, OPENING
+from utils.utils_scheduler import reminder_scheduler
 from datetime import datetime
 import os
 
@@ -772,25 +774,33 @@ class WarehouseDetailWindow(QMainWindow):
                 'price_sale': self.spin_price_sale.value()
             }
 
+            # Ruční změna množství se zapíše do skladové knihy jako pohyb
+            with db.transaction():
+                if self.is_new:
+                    # Nová položka
+                    db.execute_query(
+                        """INSERT INTO warehouse
+                           (name, code, ean, category_id, supplier_id, description, notes,
+                            quantity, unit, min_quantity, location, price_purchase, price_sale)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                        list(data.values())
+                    )
+                    stock_ledger.fix_drift([db.cursor.lastrowid], OPENING, "Počáteční stav")
+                else:
+                    # Aktualizace
+                    db.execute_query(
+                        """UPDATE warehouse SET
+                           name=?, code=?, ean=?, category_id=?, supplier_id=?, description=?, notes=?,
+                           quantity=?, unit=?, min_quantity=?, location=?, price_purchase=?, price_sale=?
+                           WHERE id=?""",
+                        list(data.values()) + [self.item_id]
+                    )
+                    stock_ledger.fix_drift([self.item_id], note="Ruční úprava karty")
+            reminder_scheduler.refresh("stock", None if self.is_new else self.item_id)
+
             if self.is_new:
-                # Nová položka
-                db.execute_query(
-                    """INSERT INTO warehouse
-                       (name, code, ean, category_id, supplier_id, description, notes,
-                        quantity, unit, min_quantity, location, price_purchase, price_sale)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    list(data.values())
-                )
                 QMessageBox.information(self, "Úspěch", "Položka byla přidána do skladu")
             else:
-                # Aktualizace
-                db.execute_query(
-                    """UPDATE warehouse SET
-                       name=?, code=?, ean=?, category_id=?, supplier_id=?, description=?, notes=?,
-                       quantity=?, unit=?, min_quantity=?, location=?, price_purchase=?, price_sale=?
-                       WHERE id=?""",
-                    list(data.values()) + [self.item_id]
-                )
                 QMessageBox.information(self, "Úspěch", "Položka byla aktualizována")
 
             self.item_updated.emit()
@@ -811,6 +821,7 @@ class WarehouseDetailWindow(QMainWindow):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 db.execute_query("DELETE FROM warehouse WHERE id = ?", [self.item_id])
+                reminder_scheduler.refresh("stock", self.item_id)
                 QMessageBox.information(self, "Smazáno", "Položka byla smazána")
                 self.item_updated.emit()
                 self.close()
@@ -14,7 +14,8 @@ from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QColor
 import config
 from database_manager import db
-import csv
+from utils.utils_import import run_import, load_lookup, ImportCancelled, TableReader, READABLE_FORMATS
+from utils.utils_stock import stock_ledger, OPENING
 import os
 
 
@@ -27,7 +28,7 @@ class WarehouseImportDialog(QDialog):
         super().__init__(parent)
 
         self.file_path = None
-        self.file_data = []
+        self.reader = None
         self.headers = []
         self.column_mapping = {}
 
@@ -170,7 +171,7 @@ class WarehouseImportDialog(QDialog):
             self,
             "Vyberte soubor k importu",
             "",
-            "CSV soubory (*.csv);;Excel soubory (*.xlsx *.xls);;Všechny soubory (*.*)"
+            "CSV soubory (*.csv);;Excel soubory (*.xlsx);;Všechny soubory (*.*)"
         )
 
         if not file_path:
@@ -187,59 +188,30 @@ class WarehouseImportDialog(QDialog):
             self.log("✓ Soubor byl načten")
 
     def load_file_data(self):
-        """Načtení dat ze souboru"""
+        """Otevření souboru - načte se jen hlavička, řádky se čtou až při náhledu/importu"""
         try:
             ext = os.path.splitext(self.file_path)[1].lower()
 
-            if ext == '.csv':
-                self.load_csv()
-            elif ext in ['.xlsx', '.xls']:
-                self.load_excel()
-            else:
+            if ext not in READABLE_FORMATS:
                 QMessageBox.warning(self, "Chyba", "Nepodporovaný formát souboru")
                 return False
 
+            # CSV ze skladových exportů používá středník
+            self.reader = TableReader(self.file_path, delimiter=';' if ext == '.csv' else 'auto')
+            self.headers = self.reader.headers
             return True
 
-        except Exception as e:
-            QMessageBox.critical(self, "Chyba", f"Chyba při načítání souboru:\n{str(e)}")
-            return False
-
-    def load_csv(self):
-        """Načtení CSV souboru"""
-        with open(self.file_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f, delimiter=';')
-            self.file_data = list(reader)
-
-        # První řádek jako hlavičky
-        if self.file_data:
-            self.headers = self.file_data[0]
-
-    def load_excel(self):
-        """Načtení Excel souboru"""
-        try:
-            from openpyxl import load_workbook
-
-            wb = load_workbook(self.file_path, read_only=True)
-            ws = wb.active
-
-            self.file_data = []
-            for row in ws.iter_rows(values_only=True):
-                self.file_data.append([str(cell) if cell is not None else "" for cell in row])
-
-            # První řádek jako hlavičky
-            if self.file_data:
-                self.headers = self.file_data[0]
-
-            wb.close()
-
         except ImportError:
             QMessageBox.warning(
                 self,
                 "Chybí knihovna",
                 "Pro import z Excelu je potřeba:\n\npip install openpyxl"
             )
-            raise
+            return False
+
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Chyba při načítání souboru:\n{str(e)}")
+            return False
 
     def setup_column_mapping(self):
         """Nastavení mapování sloupců"""
@@ -285,12 +257,11 @@ class WarehouseImportDialog(QDialog):
 
     def update_preview(self):
         """Aktualizace náhledu dat"""
-        if not self.file_data:
+        if not self.reader:
             return
 
-        # Určení řádků k zobrazení
-        start_row = 1 if self.check_skip_first_row.isChecked() else 0
-        preview_data = self.file_data[start_row:start_row + 5]
+        # Náhled čte jen začátek souboru
+        preview_data = self.reader.preview(5, skip_header=self.check_skip_first_row.isChecked())
 
         # Nastavení tabulky
         self.preview_table.setRowCount(len(preview_data))
@@ -317,7 +288,7 @@ class WarehouseImportDialog(QDialog):
             reply = QMessageBox.question(
                 self,
                 "Potvrdit import",
-                f"Připraveno {len(self.file_data) - (1 if self.check_skip_first_row.isChecked() else 0)} řádků k importu.\n\n"
+                f"Soubor {self.reader.describe()} bude importován.\n\n"
                 "Spustit import?",
                 QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
             )
@@ -359,7 +330,7 @@ class WarehouseImportDialog(QDialog):
         return True
 
     def perform_import(self):
-        """Provedení importu"""
+        """Provedení importu (jedna transakce, zápis po dávkách)"""
         try:
             # Vytvoření mapování
             self.column_mapping = {}
@@ -368,72 +339,78 @@ class WarehouseImportDialog(QDialog):
                 if col_idx is not None:
                     self.column_mapping[field_id] = col_idx
 
-            # Určení řádků k importu
-            start_row = 1 if self.check_skip_first_row.isChecked() else 0
-            data_rows = self.file_data[start_row:]
-
-            # Statistiky
-            stats = {
-                'total': len(data_rows),
-                'imported': 0,
-                'updated': 0,
-                'skipped': 0,
-                'errors': 0
-            }
+            # Řádky se čtou ze souboru postupně (paměť nezávisí na velikosti)
+            skip_header = self.check_skip_first_row.isChecked()
+            start_row = 1 if skip_header else 0
+            data_rows = self.reader.rows(skip_header=skip_header)
 
-            # Progress dialog
-            progress = QProgressDialog("Import dat...", "Zrušit", 0, len(data_rows), self)
+            # Progress dialog - průběh podle přečtených bajtů
+            progress = QProgressDialog("Import dat...", "Zrušit", 0, 100, self)
             progress.setWindowModality(Qt.WindowModality.WindowModal)
             progress.setMinimumDuration(0)
 
-            # Načtení kategorií a dodavatelů pro mapování
+            def on_progress(done):
+                progress.setLabelText(f"Import dat... ({done} řádků)")
+                progress.setValue(self.reader.progress_percent)
+                return not progress.wasCanceled()
+
+            # Číselníky a existující položky - jeden dotaz na tabulku
             categories = self.load_categories()
             suppliers = self.load_suppliers()
+            existing = {
+                'code': load_lookup("SELECT code, id FROM warehouse ORDER BY id"),
+                'ean': load_lookup("SELECT ean, id FROM warehouse ORDER BY id"),
+            }
+            # Dotčené položky: aktualizované + nové (id nad dosavadním maximem)
+            updated_ids = set()
+            last_row = db.fetch_one("SELECT COALESCE(MAX(id), 0) FROM warehouse")
+            last_id = last_row[0] if last_row else 0
+
+            try:
+                stats = run_import(
+                    data_rows,
+                    lambda row_num, row_data, writer: self.import_row(
+                        row_data, categories, suppliers, existing, writer, updated_ids),
+                    start_row=start_row + 1,
+                    progress=on_progress
+                )
+            except ImportCancelled:
+                progress.close()
+                self.log("⚠️ Import byl zrušen - žádné změny nebyly uloženy")
+                return
 
-            # Import po řádcích
-            for row_idx, row_data in enumerate(data_rows):
-                progress.setValue(row_idx)
-
-                if progress.wasCanceled():
-                    self.log("⚠️ Import byl zrušen")
-                    break
-
-                try:
-                    result = self.import_row(row_data, categories, suppliers)
-
-                    if result == 'imported':
-                        stats['imported'] += 1
-                    elif result == 'updated':
-                        stats['updated'] += 1
-                    elif result == 'skipped':
-                        stats['skipped'] += 1
+            # Množství z importu se do skladové knihy zapíšou jako počáteční stavy
+            if not self.check_validate_only.isChecked():
+                new_ids = [row['id'] for row in db.fetch_all(
+                    "SELECT id FROM warehouse WHERE id > ?", (last_id,))]
+                stock_ledger.fix_drift(sorted(updated_ids) + new_ids,
+                                       movement_type=OPENING, note="Import skladu")
 
-                except Exception as e:
-                    stats['errors'] += 1
-                    self.log(f"❌ Řádek {row_idx + 1}: {str(e)}")
+            progress.setValue(100)
 
-            progress.setValue(len(data_rows))
+            for error in stats.errors:
+                self.log(f"❌ {error}")
 
             # Výsledky
             self.log("\n" + "="*50)
             self.log("VÝSLEDKY IMPORTU:")
-            self.log(f"Celkem řádků: {stats['total']}")
-            self.log(f"✓ Importováno: {stats['imported']}")
-            self.log(f"↻ Aktualizováno: {stats['updated']}")
-            self.log(f"⊘ Přeskočeno: {stats['skipped']}")
-            self.log(f"✗ Chyby: {stats['errors']}")
+            self.log(f"Celkem řádků: {stats.total}")
+            self.log(f"✓ Importováno: {stats.imported}")
+            self.log(f"↻ Aktualizováno: {stats.updated}")
+            self.log(f"⊘ Přeskočeno: {stats.skipped}")
+            self.log(f"✗ Chyby: {len(stats.errors)}")
 
             if not self.check_validate_only.isChecked():
                 QMessageBox.information(
                     self,
                     "Import dokončen",
                     f"Import byl dokončen!\n\n"
-                    f"Importováno: {stats['imported']}\n"
-                    f"Aktualizováno: {stats['updated']}\n"
-                    f"Chyby: {stats['errors']}"
+                    f"Importováno: {stats.imported}\n"
+                    f"Aktualizováno: {stats.updated}\n"
+                    f"Chyby: {len(stats.errors)}"
                 )
 
-                if stats['imported'] > 0 or stats['updated'] > 0:
+                if stats.imported > 0 or stats.updated > 0:
                     self.items_imported.emit()
                     self.accept()
             else:
@@ -441,15 +418,21 @@ class WarehouseImportDialog(QDialog):
                     self,
                     "Validace dokončena",
                     f"Validace byla dokončena!\n\n"
-                    f"Platných řádků: {stats['imported'] + stats['updated']}\n"
-                    f"Chyby: {stats['errors']}"
+                    f"Platných řádků: {stats.imported + stats.updated}\n"
+                    f"Chyby: {len(stats.errors)}"
                 )
 
         except Exception as e:
             QMessageBox.critical(self, "Chyba", f"Chyba při importu:\n{str(e)}")
 
-    def import_row(self, row_data, categories, suppliers):
-        """Import jednoho řádku"""
+    def import_row(self, row_data, categories, suppliers, existing, writer, updated_ids):
+        """
+        Import jednoho řádku - zápis se jen zařadí do dávky (writer)
+
+        existing: {'code': {kód: id}, 'ean': {ean: id}} - doplňuje se o nové
+        položky, takže duplicitní kód v souboru se podruhé nevloží.
+        updated_ids: doplňuje se o id aktualizovaných položek
+        """
         # Extrakce dat
         item_data = {}
 
@@ -472,6 +455,19 @@ class WarehouseImportDialog(QDialog):
         if not item_data.get('name'):
             raise ValueError("Chybí název položky")
 
+        # Existence podle kódu, bez kódu podle EAN
+        code = item_data.get('code') or None
+        ean = item_data.get('ean') or None
+        if code:
+            found = code in existing['code']
+            item_id = existing['code'].get(code)
+        else:
+            found = bool(ean) and ean in existing['ean']
+            item_id = existing['ean'].get(ean) if found else None
+
+        if not found and not code:
+            raise ValueError("Chybí kód položky")
+
         # Validace v režimu "pouze validace"
         if self.check_validate_only.isChecked():
             return 'imported'
@@ -488,65 +484,49 @@ class WarehouseImportDialog(QDialog):
             supplier_name = item_data['supplier'].lower()
             supplier_id = suppliers.get(supplier_name)
 
-        # Kontrola existence podle kódu
-        existing = None
-        if item_data.get('code'):
-            existing = db.execute_query(
-                "SELECT id FROM warehouse WHERE code = ?",
-                [item_data['code']]
-            )
-
-        if existing and self.check_update_existing.isChecked():
+        values = [
+            item_data.get('name'),
+            ean,
+            category_id,
+            supplier_id,
+            item_data.get('quantity', 0),
+            item_data.get('unit', 'ks'),
+            item_data.get('min_quantity', 0),
+            item_data.get('location'),
+            item_data.get('price_purchase', 0),
+            item_data.get('price_sale', 0),
+            item_data.get('description'),
+        ]
+
+        if item_id is not None and self.check_update_existing.isChecked():
             # Aktualizace existující položky
-            db.execute_query(
+            writer.add(
                 """UPDATE warehouse SET
                    name=?, ean=?, category_id=?, supplier_id=?, quantity=?,
                    unit=?, min_quantity=?, location=?, price_purchase=?, price_sale=?,
                    description=?
                    WHERE id=?""",
-                [
-                    item_data.get('name'),
-                    item_data.get('ean'),
-                    category_id,
-                    supplier_id,
-                    item_data.get('quantity', 0),
-                    item_data.get('unit', 'ks'),
-                    item_data.get('min_quantity', 0),
-                    item_data.get('location'),
-                    item_data.get('price_purchase', 0),
-                    item_data.get('price_sale', 0),
-                    item_data.get('description'),
-                    existing[0][0]
-                ]
+                values + [item_id]
             )
+            updated_ids.add(item_id)
             return 'updated'
 
-        elif existing:
-            # Existuje, ale neaktualizujeme
+        elif found:
+            # Existuje (nebo je v souboru podruhé), neaktualizujeme
             return 'skipped'
 
         else:
             # Nová položka
-            db.execute_query(
+            writer.add(
                 """INSERT INTO warehouse
-                   (name, code, ean, category_id, supplier_id, quantity, unit,
+                   (code, name, ean, category_id, supplier_id, quantity, unit,
                     min_quantity, location, price_purchase, price_sale, description)
                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                [
-                    item_data.get('name'),
-                    item_data.get('code'),
-                    item_data.get('ean'),
-                    category_id,
-                    supplier_id,
-                    item_data.get('quantity', 0),
-                    item_data.get('unit', 'ks'),
-                    item_data.get('min_quantity', 0),
-                    item_data.get('location'),
-                    item_data.get('price_purchase', 0),
-                    item_data.get('price_sale', 0),
-                    item_data.get('description')
-                ]
+                [code] + values
             )
+            existing['code'][code] = None
+            if ean:
+                existing['ean'].setdefault(ean, None)
             return 'imported'
 
     def load_categories(self):
@@ -13,6 +13,10 @@ from PyQt6.QtCore import Qt, pyqtSignal, QDate
 from PyQt6.QtGui import QColor
 import config
 from database_manager import db
+from utils.utils_stock import stock_ledger
+from utils.utils_scheduler import reminder_scheduler
+from utils.utils_export import EXCEL_AVAILABLE, ExportSheet
+from utils.utils_export_task import run_export
 from datetime import datetime, timedelta
 
 
@@ -92,6 +96,12 @@ class WarehouseMovementsWindow(QMainWindow):
         btn_inventory.clicked.connect(self.new_inventory)
         action_layout.addWidget(btn_inventory)
 
+        # Kontrola stavů proti skladové knize
+        btn_reconcile = QPushButton("🧮 Kontrola stavů")
+        btn_reconcile.setStyleSheet(self.get_button_style("#16a085"))
+        btn_reconcile.clicked.connect(self.check_stock_ledger)
+        action_layout.addWidget(btn_reconcile)
+
         # Export
         btn_export = QPushButton("📤 Export do Excel")
         btn_export.setStyleSheet(self.get_button_style("#8e44ad"))
@@ -329,64 +339,68 @@ class WarehouseMovementsWindow(QMainWindow):
         except Exception as e:
             print(f"Chyba při načítání filtrů: {e}")
 
+    def movements_query(self):
+        """Dotaz na pohyby podle filtrů (bez řazení a limitu) a jeho parametry"""
+        query = """
+            SELECT
+                wm.id, wm.date, wm.movement_type, wm.quantity, wm.unit_price,
+                wm.document_number, wm.note,
+                w.name as item_name, w.unit,
+                ws.name as supplier_name
+            FROM warehouse_movements wm
+            LEFT JOIN warehouse w ON wm.item_id = w.id
+            LEFT JOIN warehouse_suppliers ws ON wm.supplier_id = ws.id
+            WHERE 1=1
+        """
+
+        params = []
+
+        # Filtr data od
+        date_from = self.date_from.date().toString("yyyy-MM-dd")
+        query += " AND wm.date >= ?"
+        params.append(date_from)
+
+        # Filtr data do
+        date_to = self.date_to.date().toString("yyyy-MM-dd")
+        query += " AND wm.date <= ?"
+        params.append(date_to)
+
+        # Filtr typu pohybu
+        type_index = self.combo_movement_type.currentIndex()
+        if type_index == 1:  # Příjem
+            query += " AND wm.movement_type = 'Příjem'"
+        elif type_index == 2:  # Výdej
+            query += " AND wm.movement_type = 'Výdej'"
+        elif type_index == 3:  # Inventura
+            query += " AND wm.movement_type = 'Inventura'"
+        elif type_index == 4:  # Storno
+            query += " AND wm.movement_type = 'Storno'"
+
+        # Filtr položky
+        item_id = self.combo_item.currentData()
+        if item_id:
+            query += " AND wm.item_id = ?"
+            params.append(item_id)
+
+        # Filtr dodavatele
+        supplier_id = self.combo_supplier.currentData()
+        if supplier_id:
+            query += " AND wm.supplier_id = ?"
+            params.append(supplier_id)
+
+        # Vyhledávání
+        search_text = self.input_search.text().strip()
+        if search_text:
+            query += " AND (wm.note LIKE ? OR wm.document_number LIKE ?)"
+            search_param = f"%{search_text}%"
+            params.extend([search_param, search_param])
+
+        return query, params
+
     def load_movements(self):
         """Načtení pohybů"""
         try:
-            # Sestavení SQL dotazu
-            query = """
-                SELECT
-                    wm.id, wm.date, wm.movement_type, wm.quantity, wm.unit_price,
-                    wm.document_number, wm.note,
-                    w.name as item_name, w.unit,
-                    ws.name as supplier_name
-                FROM warehouse_movements wm
-                LEFT JOIN warehouse w ON wm.item_id = w.id
-                LEFT JOIN warehouse_suppliers ws ON wm.supplier_id = ws.id
-                WHERE 1=1
-            """
-
-            params = []
-
-            # Filtr data od
-            date_from = self.date_from.date().toString("yyyy-MM-dd")
-            query += " AND wm.date >= ?"
-            params.append(date_from)
-
-            # Filtr data do
-            date_to = self.date_to.date().toString("yyyy-MM-dd")
-            query += " AND wm.date <= ?"
-            params.append(date_to)
-
-            # Filtr typu pohybu
-            type_index = self.combo_movement_type.currentIndex()
-            if type_index == 1:  # Příjem
-                query += " AND wm.movement_type = 'Příjem'"
-            elif type_index == 2:  # Výdej
-                query += " AND wm.movement_type = 'Výdej'"
-            elif type_index == 3:  # Inventura
-                query += " AND wm.movement_type = 'Inventura'"
-            elif type_index == 4:  # Storno
-                query += " AND wm.movement_type = 'Storno'"
-
-            # Filtr položky
-            item_id = self.combo_item.currentData()
-            if item_id:
-                query += " AND wm.item_id = ?"
-                params.append(item_id)
-
-            # Filtr dodavatele
-            supplier_id = self.combo_supplier.currentData()
-            if supplier_id:
-                query += " AND wm.supplier_id = ?"
-                params.append(supplier_id)
-
-            # Vyhledávání
-            search_text = self.input_search.text().strip()
-            if search_text:
-                query += " AND (wm.note LIKE ? OR wm.document_number LIKE ?)"
-                search_param = f"%{search_text}%"
-                params.extend([search_param, search_param])
-
+            query, params = self.movements_query()
             query += " ORDER BY wm.date DESC, wm.id DESC LIMIT 1000"
 
             movements = db.execute_query(query, params)
@@ -542,6 +556,40 @@ class WarehouseMovementsWindow(QMainWindow):
         dialog = InventoryDialog(parent=self)
         dialog.inventory_done.connect(self.load_movements)
         dialog.exec()
+
+    def check_stock_ledger(self):
+        """Kontrola skladových karet proti knize pohybů"""
+        try:
+            issues = stock_ledger.reconcile()
+            if not issues:
+                QMessageBox.information(self, "Kontrola stavů",
+                                        "✅ Stavy všech položek odpovídají skladové knize.")
+                return
+
+            lines = [
+                f"{i['code'] or '-'} {i['name']}: karta {i['quantity']:.2f}, kniha {i['ledger']:.2f}"
+                for i in issues[:20]
+            ]
+            if len(issues) > 20:
+                lines.append(f"... a dalších {len(issues) - 20} položek")
+
+            reply = QMessageBox.question(
+                self,
+                "Kontrola stavů",
+                f"Nesoulad u {len(issues)} položek:\n\n" + "\n".join(lines) +
+                "\n\nZapsat korekční pohyby podle skladových karet?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                stock_ledger.rebuild_balances()
+                count = stock_ledger.fix_drift([i["item_id"] for i in issues])
+                QMessageBox.information(self, "Kontrola stavů", f"Zapsáno korekcí: {count}")
+                self.movement_changed.emit()
+                self.load_movements()
+
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Chyba při kontrole stavů:\n{str(e)}")
+
     def view_movement_detail(self):
         """Zobrazení detailu pohybu"""
         if self.table.currentRow() < 0:
@@ -630,38 +678,9 @@ Vytvořil: {m[6] or '---'}
 
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                # Načtení pohybu
-                mov = db.execute_query(
-                    "SELECT item_id, movement_type, quantity FROM warehouse_movements WHERE id = ?",
-                    [mov_id]
-                )
-
-                if not mov:
-                    return
-
-                item_id = mov[0][0]
-                original_type = mov[0][1]
-                quantity = mov[0][2]
-
-                # Zpětný pohyb na skladě
-                if original_type == "Příjem":
-                    # Storno příjmu = odečíst ze skladu
-                    db.execute_query(
-                        "UPDATE warehouse SET quantity = quantity - ? WHERE id = ?",
-                        [quantity, item_id]
-                    )
-                elif original_type == "Výdej":
-                    # Storno výdeje = přidat na sklad
-                    db.execute_query(
-                        "UPDATE warehouse SET quantity = quantity + ? WHERE id = ?",
-                        [quantity, item_id]
-                    )
-
-                # Označení pohybu jako stornovaný
-                db.execute_query(
-                    "UPDATE warehouse_movements SET movement_type = 'Storno', note = note || ' [STORNOVÁNO]' WHERE id = ?",
-                    [mov_id]
-                )
+                # Protipohyb ve skladové knize, původní pohyb se označí jako stornovaný
+                stock_ledger.reverse(mov_id, created_by="admin")
+                reminder_scheduler.refresh("stock")
 
                 QMessageBox.information(self, "Úspěch", "Pohyb byl stornován")
                 self.movement_changed.emit()
@@ -670,82 +689,63 @@ Vytvořil: {m[6] or '---'}
             except Exception as e:
                 QMessageBox.critical(self, "Chyba", f"Chyba při stornování:\n{str(e)}")
 
-    def export_to_excel(self):
-        """Export do Excelu"""
+    @staticmethod
+    def export_row(mov):
+        """Řádek pohybu pro export (běží v pracovním vlákně exportu)"""
+        mov_id, date, mov_type, quantity, unit_price, document, note, item_name, unit, supplier = mov
+        quantity = quantity or 0
+        unit_price = unit_price or 0
         try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, Alignment, PatternFill
+            date_obj = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+            date_str, time_str = date_obj.strftime("%d.%m.%Y"), date_obj.strftime("%H:%M")
+        except (TypeError, ValueError):
+            date_str, time_str = date or "", ""
+        return [
+            date_str, time_str, mov_type, item_name or "---", quantity, unit or "",
+            unit_price, quantity * unit_price, supplier or "---", document or "", note or "",
+        ]
 
-            # Dialog pro uložení
-            file_path, _ = QFileDialog.getSaveFileName(
+    def export_to_excel(self):
+        """Export do Excelu - všechny pohyby podle filtrů, proudově na pozadí"""
+        if not EXCEL_AVAILABLE:
+            QMessageBox.warning(
                 self,
-                "Uložit jako Excel",
-                f"pohyby_skladu_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                "Excel soubory (*.xlsx)"
+                "Chybí knihovna",
+                "Pro export do Excelu je potřeba nainstalovat:\n\npip install openpyxl"
             )
+            return
 
-            if not file_path:
-                return
-
-            # Vytvoření workbooku
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Skladové pohyby"
+        # Dialog pro uložení
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Uložit jako Excel",
+            f"pohyby_skladu_{datetime.now().strftime('%Y%m%d')}.xlsx",
+            "Excel soubory (*.xlsx)"
+        )
 
-            # Hlavička
-            headers = [
-                "Datum", "Čas", "Typ pohybu", "Položka", "Množství", "Jednotka",
-                "Cena/jedn.", "Celkem", "Dodavatel", "Doklad", "Poznámka"
-            ]
+        if not file_path:
+            return
 
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.fill = PatternFill(start_color="34495e", end_color="34495e", fill_type="solid")
-                cell.alignment = Alignment(horizontal="center")
-
-            # Data
-            row_num = 2
-            for row in range(self.table.rowCount()):
-                for col in range(11):  # Bez ID sloupce
-                    value = self.table.item(row, col).text() if self.table.item(row, col) else ""
-                    ws.cell(row=row_num, column=col + 1, value=value)
-                row_num += 1
-
-            # Auto-šířka sloupců
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(cell.value)
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            # Uložení
-            wb.save(file_path)
+        headers = [
+            "Datum", "Čas", "Typ pohybu", "Položka", "Množství", "Jednotka",
+            "Cena/jedn.", "Celkem", "Dodavatel", "Doklad", "Poznámka"
+        ]
+        query, params = self.movements_query()
+        query += " ORDER BY wm.date DESC, wm.id DESC"
+        sheet = ExportSheet("Skladové pohyby", query, params, headers, self.export_row)
 
+        def finished(path, rows):
             QMessageBox.information(
                 self,
                 "Úspěch",
-                f"Data byla vyexportována do:\n{file_path}"
+                f"Vyexportováno {rows} pohybů do:\n{path}"
             )
 
             # Otevření souboru
             try:
                 import os
-                os.startfile(file_path)
+                os.startfile(path)
             except:
                 pass
 
-        except ImportError:
-            QMessageBox.warning(
-                self,
-                "Chybí knihovna",
-                "Pro export do Excelu je potřeba nainstalovat:\n\npip install openpyxl"
-            )
-        except Exception as e:
-            QMessageBox.critical(self, "Chyba", f"Chyba při exportu:\n{str(e)}")
+        run_export(self, [sheet], file_path, finished, "Export skladových pohybů")
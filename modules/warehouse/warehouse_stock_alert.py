@@ -14,6 +14,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtGui import QColor, QFont
 import config
 from database_manager import db
+from utils.utils_scheduler import reminder_scheduler, STOCK
 from datetime import datetime, timedelta
 
 
@@ -717,11 +718,7 @@ class StockAlertChecker:
         """Kontrola a notifikace o položkách pod minimem"""
         try:
             # Počet kritických položek
-            critical = db.execute_query("""
-                SELECT COUNT(*) FROM warehouse WHERE quantity < min_quantity
-            """)
-
-            critical_count = critical[0][0] if critical else 0
+            critical_count = StockAlertChecker.get_alert_badge_count()
 
             if critical_count > 0:
                 # Zobrazení notifikace
@@ -750,7 +747,9 @@ class StockAlertChecker:
 
     @staticmethod
     def get_alert_badge_count():
-        """Získání počtu upozornění pro badge"""
+        """Získání počtu upozornění pro badge (z plánovače, dokud nenačetl, dotazem)"""
+        if reminder_scheduler.is_loaded("stock"):
+            return reminder_scheduler.count(STOCK)
         try:
             critical = db.execute_query("""
                 SELECT COUNT(*) FROM warehouse WHERE quantity < min_quantity
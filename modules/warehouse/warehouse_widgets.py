@@ -13,7 +13,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QDate, pyqtSignal
 import config
 from database_manager import db
-from datetime import datetime
+from utils.utils_stock import stock_ledger, RECEIPT, ISSUE
+from utils.utils_scheduler import reminder_scheduler
 
 class ReceiveStockDialog(QDialog):
     """Dialog pro příjem na sklad"""
@@ -279,27 +280,21 @@ class ReceiveStockDialog(QDialog):
             date = self.date_received.date().toString("yyyy-MM-dd")
             note = self.text_note.toPlainText()
 
-            # Záznam pohybu
-            db.execute_query(
-                """INSERT INTO warehouse_movements
-                   (item_id, movement_type, quantity, unit_price, supplier_id,
-                    document_number, date, note, created_by)
-                   VALUES (?, 'Příjem', ?, ?, ?, ?, ?, ?, ?)""",
-                [item_id, quantity, price, supplier_id, document,
-                 f"{date} {datetime.now().strftime('%H:%M:%S')}", note, "admin"]
-            )
-
-            # Aktualizace množství na skladě
-            db.execute_query(
-                "UPDATE warehouse SET quantity = quantity + ? WHERE id = ?",
-                [quantity, item_id]
-            )
+            # Pohyb + stav skladu v jedné transakci
+            with db.transaction():
+                # Pohyb ve skladové knize (aktualizuje i stav položky)
+                stock_ledger.post(
+                    item_id, RECEIPT, quantity, unit_price=price,
+                    supplier_id=supplier_id, document_number=document,
+                    date=date, note=note, created_by="admin"
+                )
 
-            # Aktualizace nákupní ceny (průměr)
-            db.execute_query(
-                "UPDATE warehouse SET price_purchase = ? WHERE id = ?",
-                [price, item_id]
-            )
+                # Aktualizace nákupní ceny (průměr)
+                db.execute_query(
+                    "UPDATE warehouse SET price_purchase = ? WHERE id = ?",
+                    [price, item_id]
+                )
+            reminder_scheduler.refresh("stock", item_id)
 
             QMessageBox.information(
                 self,
@@ -587,20 +582,12 @@ class IssueStockDialog(QDialog):
 
             date = self.date_issued.date().toString("yyyy-MM-dd")
 
-            # Záznam pohybu
-            db.execute_query(
-                """INSERT INTO warehouse_movements
-                   (item_id, movement_type, quantity, unit_price, date, note, created_by)
-                   VALUES (?, 'Výdej', ?, 0, ?, ?, ?)""",
-                [item_id, quantity, f"{date} {datetime.now().strftime('%H:%M:%S')}",
-                 full_note, "admin"]
-            )
-
-            # Aktualizace množství
-            db.execute_query(
-                "UPDATE warehouse SET quantity = quantity - ? WHERE id = ?",
-                [quantity, item_id]
+            # Pohyb ve skladové knize (aktualizuje i stav položky)
+            stock_ledger.post(
+                item_id, ISSUE, -quantity, quantity=quantity,
+                date=date, note=full_note, created_by="admin"
             )
+            reminder_scheduler.refresh("stock", item_id)
 
             QMessageBox.information(
                 self,
@@ -833,20 +820,9 @@ class InventoryDialog(QDialog):
 
             date = self.date_inventory.date().toString("yyyy-MM-dd")
 
-            # Záznam pohybu
-            db.execute_query(
-                """INSERT INTO warehouse_movements
-                   (item_id, movement_type, quantity, unit_price, date, note, created_by)
-                   VALUES (?, 'Inventura', ?, 0, ?, ?, ?)""",
-                [item_id, difference, f"{date} {datetime.now().strftime('%H:%M:%S')}",
-                 full_note, "admin"]
-            )
-
-            # Aktualizace skutečného stavu
-            db.execute_query(
-                "UPDATE warehouse SET quantity = ? WHERE id = ?",
-                [actual, item_id]
-            )
+            # Inventurní pohyb o rozdíl mezi knihou a skutečným stavem
+            stock_ledger.count(item_id, actual, date=date, note=full_note, created_by="admin")
+            reminder_scheduler.refresh("stock", item_id)
 
             QMessageBox.information(
                 self,
@@ -1212,51 +1188,48 @@ class BulkEditDialog(QDialog):
         action = self.combo_action.currentText()
 
         try:
+            # Jeden executemany v jedné transakci místo UPDATE + commit na položku
             if action == "Změnit kategorii":
                 category_id = self.combo_category.currentData()
-                for item_id in selected:
-                    db.execute_query(
-                        "UPDATE warehouse SET category_id = ? WHERE id = ?",
-                        [category_id, item_id]
-                    )
+                db.execute_many(
+                    "UPDATE warehouse SET category_id = ? WHERE id = ?",
+                    [(category_id, item_id) for item_id in selected]
+                )
 
             elif action == "Upravit ceny (navýšení %)":
                 percent = self.spin_percent.value()
-                for item_id in selected:
-                    db.execute_query(
-                        """UPDATE warehouse
-                           SET price_purchase = price_purchase * (1 + ?/100),
-                               price_sale = price_sale * (1 + ?/100)
-                           WHERE id = ?""",
-                        [percent, percent, item_id]
-                    )
+                db.execute_many(
+                    """UPDATE warehouse
+                       SET price_purchase = price_purchase * (1 + ?/100),
+                           price_sale = price_sale * (1 + ?/100)
+                       WHERE id = ?""",
+                    [(percent, percent, item_id) for item_id in selected]
+                )
 
             elif action == "Upravit ceny (snížení %)":
                 percent = self.spin_percent.value()
-                for item_id in selected:
-                    db.execute_query(
-                        """UPDATE warehouse
-                           SET price_purchase = price_purchase * (1 - ?/100),
-                               price_sale = price_sale * (1 - ?/100)
-                           WHERE id = ?""",
-                        [percent, percent, item_id]
-                    )
+                db.execute_many(
+                    """UPDATE warehouse
+                       SET price_purchase = price_purchase * (1 - ?/100),
+                           price_sale = price_sale * (1 - ?/100)
+                       WHERE id = ?""",
+                    [(percent, percent, item_id) for item_id in selected]
+                )
 
             elif action == "Nastavit minimální stav":
                 min_qty = self.spin_min.value()
-                for item_id in selected:
-                    db.execute_query(
-                        "UPDATE warehouse SET min_quantity = ? WHERE id = ?",
-                        [min_qty, item_id]
-                    )
+                db.execute_many(
+                    "UPDATE warehouse SET min_quantity = ? WHERE id = ?",
+                    [(min_qty, item_id) for item_id in selected]
+                )
+                reminder_scheduler.refresh("stock")
 
             elif action == "Změnit dodavatele":
                 supplier_id = self.combo_supplier.currentData()
-                for item_id in selected:
-                    db.execute_query(
-                        "UPDATE warehouse SET supplier_id = ? WHERE id = ?",
-                        [supplier_id, item_id]
-                    )
+                db.execute_many(
+                    "UPDATE warehouse SET supplier_id = ? WHERE id = ?",
+                    [(supplier_id, item_id) for item_id in selected]
+                )
 
             QMessageBox.information(
                 self,
@@ -559,7 +559,7 @@ class DatabaseTester:
         # 2. Vytvoření tabulek (pokud neexistují)
         try:
             print("\n⏳ Spouštím create_tables() a initialize_default_data()...")
-            db.create_tables()
+            db.create_tables(force=True)
             db.initialize_default_data()
             print("✅ Schéma databáze připraveno")
         except Exception as e:
@@ -4,11 +4,53 @@ Utils - Společné utility pro Motoservis DMS
 """
 
 from .utils_vat import VATCalculator
-from .utils_export import ExportManager
+from .utils_export import ExportManager, ExportSheet
 from .utils_formatters import CzechFormatter
+from .utils_table_model import LazyTableModel, LazyTableView, TableColumn
+from .utils_sql_search import SqlFilter, PagedQuery, DebouncedQuery
+from .utils_metrics import MetricsEngine
+from .utils_loader import BackgroundLoader, LoadingOverlay
+from .utils_import import BulkWriter, ImportStats, run_import
+from .utils_stock import StockLedger
+from .utils_stock_analytics import StockAnalyticsEngine
+from .utils_rollups import RollupEngine
+from .utils_codebooks import CodebookCache
+from .utils_recurrence import RecurrenceExpander
+from .utils_calendar import CalendarRangeService
+from .utils_export_task import run_export
+from .utils_documents import DocumentResources
+from .utils_backup import BackupStore
+from .utils_blobs import BlobStore
+from .utils_thumbnails import ThumbnailCache
+from .utils_scheduler import ReminderScheduler
 
 __all__ = [
     'VATCalculator',
     'ExportManager',
+    'ExportSheet',
     'CzechFormatter',
+    'LazyTableModel',
+    'LazyTableView',
+    'TableColumn',
+    'SqlFilter',
+    'PagedQuery',
+    'DebouncedQuery',
+    'MetricsEngine',
+    'BackgroundLoader',
+    'LoadingOverlay',
+    'BulkWriter',
+    'ImportStats',
+    'run_import',
+    'StockLedger',
+    'StockAnalyticsEngine',
+    'RollupEngine',
+    'CodebookCache',
+    'RecurrenceExpander',
+    'CalendarRangeService',
+    'run_export',
+    'DocumentResources',
+    'BackupStore',
+    'BlobStore',
+    'ThumbnailCache',
+    'ReminderScheduler',
 ]
@@ -4,6 +4,7 @@ Autentizace: správa aktuálního uživatele a hashování hesel (bcrypt).
 """
 import bcrypt
 from database_manager import db
+from utils.utils_permissions import permission_cache
 
 # Jednoduchý "globální" stav aktuálního uživatele
 _CURRENT_USER_ID = None
@@ -13,6 +14,9 @@ def set_current_user(user_id: int, username: str):
     global _CURRENT_USER_ID, _CURRENT_USERNAME
     _CURRENT_USER_ID = user_id
     _CURRENT_USERNAME = username
+    # Matice oprávnění přihlášeného uživatele (navigace a akce už bez dotazů)
+    if user_id:
+        permission_cache.load(user_id)
 
 def get_current_user_id():
     return _CURRENT_USER_ID
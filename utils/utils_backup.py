@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Zálohy s deduplikací souborů
+- Generace zálohy = složka backup_RRRRMMDD_HHMMSS/ se snímkem databáze
+  (db.snapshot_to - online, po krocích), nastavením a manifest.json
+- Dokumenty, fotky a šablony se ukládají do sdíleného úložiště
+  objects/<2 znaky>/<sha256> - stejný obsah jen jednou pro všechny generace;
+  manifest generace mapuje relativní cestu -> hash
+- Nezměněné soubory (stejná velikost a mtime jako v poslední generaci) se
+  znovu nečtou ani nehashují, nové se hashují při kopírování (jedno čtení)
+- delete() / prune() smažou generaci a objekty, na které už nic neodkazuje
+
+    store = BackupStore(config.BACKUP_DIR)
+    result = store.create({"database": True, "photos": True}, progress)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import config
+from database_manager import db
+
+# Zdrojové složky souborů zálohy (volba -> složky; název složky = prefix v manifestu).
+# Úložiště blobs obsahuje fotky i dokumenty - zálohuje se s kteroukoli z voleb.
+FILE_SOURCES = {
+    "documents": (config.DATA_DIR / "documents", config.BLOB_DIR),
+    "photos": (config.DATA_DIR / "photos", config.DATA_DIR / "vehicle_photos", config.BLOB_DIR),
+    "templates": (config.DATA_DIR / "templates",),
+}
+
+GENERATION_PREFIX = "backup_"
+MANIFEST_NAME = "manifest.json"
+DATABASE_NAME = "database/motoservis.db"
+COPY_BUFFER = 1024 * 1024
+
+# Průběh: progress(procenta, zpráva)
+BackupProgress = Callable[[int, str], None]
+
+
+@dataclass
+class BackupResult:
+    """Výsledek jedné zálohy"""
+    path: Path
+    database_bytes: int = 0
+    files: int = 0
+    files_bytes: int = 0
+    new_files: int = 0
+    new_bytes: int = 0
+
+    def summary(self) -> str:
+        mb = 1024 * 1024
+        lines = [f"Záloha vytvořena: {self.path.name}"]
+        if self.database_bytes:
+            lines.append(f"Databáze: {self.database_bytes / mb:.2f} MB")
+        if self.files:
+            lines.append(f"Soubory: {self.files} ({self.files_bytes / mb:.2f} MB), "
+                         f"nově uloženo {self.new_files} ({self.new_bytes / mb:.2f} MB)")
+        return "\n".join(lines)
+
+
+class BackupStore:
+    """Složka záloh: generace + sdílené úložiště objektů"""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+
+    # -----------------------
+    # Generace
+    # -----------------------
+    def generations(self) -> List[Path]:
+        """Dokončené generace (nejnovější první)"""
+        if not self.root.exists():
+            return []
+        return sorted(
+            (p for p in self.root.glob(f"{GENERATION_PREFIX}*")
+             if p.is_dir() and (p / MANIFEST_NAME).exists()),
+            key=lambda p: p.name, reverse=True
+        )
+
+    @staticmethod
+    def manifest(generation: Path) -> dict:
+        try:
+            return json.loads((Path(generation) / MANIFEST_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Chyba při čtení manifestu zálohy {generation}: {e}")
+            return {}
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    # -----------------------
+    # Vytvoření
+    # -----------------------
+    def create(self, options: Dict[str, bool],
+               progress: Optional[BackupProgress] = None) -> BackupResult:
+        """
+        Nová generace zálohy
+
+        Args:
+            options: {"database", "settings", "documents", "photos", "templates": bool}
+            progress: progress(procenta, zpráva)
+        """
+        def report(step: int, fraction: float, message: str):
+            if progress is not None:
+                progress(int((step + fraction) / total_steps * 100), message)
+
+        total_steps = max(1, sum(1 for value in options.values() if value))
+        generation = self.root / f"{GENERATION_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        suffix = 2
+        while generation.exists():
+            generation = generation.with_name(f"{generation.name.split('-')[0]}-{suffix}")
+            suffix += 1
+        generation.mkdir(parents=True)
+
+        result = BackupResult(generation)
+        manifest = {"created": datetime.now().isoformat(timespec="seconds"), "files": {}}
+        step = 0
+        try:
+            if options.get("database"):
+                report(step, 0, "Zálohování databáze...")
+                target = generation / DATABASE_NAME
+                db.snapshot_to(target, lambda done, total: report(
+                    step, done / total if total else 1, "Zálohování databáze..."))
+                result.database_bytes = target.stat().st_size
+                manifest["database"] = DATABASE_NAME
+                step += 1
+
+            if options.get("settings"):
+                report(step, 0, "Zálohování nastavení...")
+                rows = db.fetch_all("SELECT key, value FROM app_settings")
+                target = generation / "settings" / "app_settings.json"
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(json.dumps({row[0]: row[1] for row in rows},
+                                             ensure_ascii=False, indent=2), encoding="utf-8")
+                manifest["settings"] = "settings/app_settings.json"
+                step += 1
+
+            previous = self._previous_files()
+            for name, source_dirs in FILE_SOURCES.items():
+                if not options.get(name):
+                    continue
+                message = {"documents": "Zálohování dokumentů...",
+                           "photos": "Zálohování fotek...",
+                           "templates": "Zálohování šablon..."}[name]
+                report(step, 0, message)
+                files = [
+                    (f"{source_dir.name}/{f.relative_to(source_dir).as_posix()}", f)
+                    for source_dir in source_dirs if source_dir.exists()
+                    for f in source_dir.rglob("*") if f.is_file()
+                ]
+                files = [(key, f) for key, f in files if key not in manifest["files"]]
+                for index, (key, file) in enumerate(files, 1):
+                    manifest["files"][key] = self._store_file(file, previous.get(key), result)
+                    if index % 50 == 0:
+                        report(step, index / len(files), message)
+                step += 1
+
+            manifest["stats"] = {
+                "database_bytes": result.database_bytes,
+                "files": result.files,
+                "files_bytes": result.files_bytes,
+                "new_files": result.new_files,
+                "new_bytes": result.new_bytes,
+            }
+            # Manifest jako poslední - generace bez něj se nepovažuje za dokončenou
+            (generation / MANIFEST_NAME).write_text(
+                json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+        except BaseException:
+            shutil.rmtree(generation, ignore_errors=True)
+            raise
+
+        if progress is not None:
+            progress(100, "Hotovo!")
+        return result
+
+    def _previous_files(self) -> Dict[str, dict]:
+        """Soubory poslední generace (pro přeskočení nezměněných souborů)"""
+        for generation in self.generations():
+            files = self.manifest(generation).get("files")
+            if files is not None:
+                return files
+        return {}
+
+    def _store_file(self, file: Path, previous: Optional[dict], result: BackupResult) -> dict:
+        """Uloží soubor do úložiště objektů, vrátí záznam manifestu"""
+        stat = file.stat()
+        result.files += 1
+        result.files_bytes += stat.st_size
+
+        if (previous and previous.get("size") == stat.st_size
+                and previous.get("mtime_ns") == stat.st_mtime_ns
+                and self._object_path(previous["sha256"]).exists()):
+            return previous
+
+        # Hash při kopírování do dočasného souboru - soubor se čte jen jednou
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.objects_dir / f".tmp_{os.getpid()}_{file.name}"
+        sha = hashlib.sha256()
+        try:
+            with open(file, "rb") as src, open(tmp_path, "wb") as dst:
+                for chunk in iter(lambda: src.read(COPY_BUFFER), b""):
+                    sha.update(chunk)
+                    dst.write(chunk)
+            digest = sha.hexdigest()
+            target = self._object_path(digest)
+            if target.exists():
+                tmp_path.unlink()
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path.replace(target)
+                result.new_files += 1
+                result.new_bytes += stat.st_size
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        return {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    # -----------------------
+    # Obnova souborů, mazání
+    # -----------------------
+    def extract_files(self, generation: Path, target_dir: Union[str, Path]) -> int:
+        """Obnoví soubory generace do složky (documents/, photos/, blobs/, templates/...)"""
+        target_dir = Path(target_dir)
+        files = self.manifest(generation).get("files", {})
+        for key, entry in files.items():
+            target = target_dir / key
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(self._object_path(entry["sha256"]), target)
+        return len(files)
+
+    def delete(self, generation: Path) -> int:
+        """Smaže generaci a nepoužívané objekty; vrací počet smazaných objektů"""
+        shutil.rmtree(generation, ignore_errors=True)
+        return self.collect_garbage()
+
+    def prune(self, keep: int) -> int:
+        """Ponechá `keep` nejnovějších generací; vrací počet smazaných generací"""
+        old = self.generations()[keep:]
+        for generation in old:
+            shutil.rmtree(generation, ignore_errors=True)
+        if old:
+            self.collect_garbage()
+        return len(old)
+
+    def collect_garbage(self) -> int:
+        """Smaže objekty, na které neodkazuje žádná generace"""
+        if not self.objects_dir.exists():
+            return 0
+        referenced = set()
+        for generation in self.generations():
+            manifest = self.manifest(generation)
+            if not manifest:
+                # Nečitelný manifest - raději nic nemazat
+                return 0
+            referenced.update(entry["sha256"] for entry in manifest.get("files", {}).values())
+
+        removed = 0
+        for obj in self.objects_dir.glob("*/*"):
+            if obj.name not in referenced:
+                try:
+                    obj.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
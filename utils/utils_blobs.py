@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Úložiště souborů podle obsahu (fotky vozidel, dokumenty)
+- put(soubor): uloží soubor jako objects/<2 znaky>/<sha256><přípona>;
+  stejný obsah (i u jiného vozidla / dokumentu) se uloží jen jednou
+- release(cesta): smaže soubor, pokud na něj už neodkazuje žádný záznam
+  (vehicle_photos.file_path, documents.file_path)
+- digest(cesta): hash souboru z úložiště (= název bez přípony), klíč náhledů
+
+Starší soubory mimo úložiště (data/vehicle_photos, data/documents) dál fungují,
+jen se nededuplikují.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import config
+from database_manager import db
+
+COPY_BUFFER = 1024 * 1024
+
+# Sloupce, které odkazují na soubory v úložišti
+REFERENCES = (
+    ("vehicle_photos", "file_path"),
+    ("documents", "file_path"),
+)
+
+
+class BlobStore:
+    """Soubory pojmenované SHA-256 obsahu"""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+
+    def _find(self, digest: str) -> Optional[Path]:
+        """Uložený objekt s daným hashem (přípona může být libovolná)"""
+        folder = self.objects_dir / digest[:2]
+        if folder.exists():
+            for path in folder.glob(f"{digest}*"):
+                return path
+        return None
+
+    def contains(self, path: Union[str, Path]) -> bool:
+        """Je soubor uložen v tomto úložišti?"""
+        try:
+            Path(path).resolve().relative_to(self.objects_dir.resolve())
+            return True
+        except ValueError:
+            return False
+
+    def digest(self, path: Union[str, Path]) -> Optional[str]:
+        """Hash souboru z úložiště (None pro soubory mimo úložiště)"""
+        return Path(path).stem if self.contains(path) else None
+
+    def put(self, source: Union[str, Path]) -> Path:
+        """
+        Uloží soubor (hash se počítá při kopírování - jedno čtení)
+
+        Returns:
+            Path: cesta k objektu (existující objekt, pokud už obsah známe)
+        """
+        source = Path(source)
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.objects_dir / f".tmp_{os.getpid()}_{threading.get_ident()}"
+        sha = hashlib.sha256()
+        try:
+            with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+                for chunk in iter(lambda: src.read(COPY_BUFFER), b""):
+                    sha.update(chunk)
+                    dst.write(chunk)
+            digest = sha.hexdigest()
+
+            existing = self._find(digest)
+            if existing is not None:
+                tmp_path.unlink()
+                return existing
+
+            target = self.objects_dir / digest[:2] / f"{digest}{source.suffix.lower()}"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.replace(target)
+            return target
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def references(self, path: Union[str, Path]) -> int:
+        """Počet záznamů v databázi, které na soubor odkazují"""
+        count = 0
+        for table, column in REFERENCES:
+            # Starší databáze mohou mít tabulku s jinými sloupci
+            columns = {row[1] for row in db.fetch_all(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                continue
+            row = db.fetch_one(f"SELECT COUNT(*) FROM {table} WHERE {column} = ?", (str(path),))
+            if row is None:
+                # Dotaz selhal - nevíme jistě, soubor raději ponechat
+                return 1
+            count += row[0]
+        return count
+
+    def release(self, path: Union[str, Path]) -> bool:
+        """
+        Smaže soubor úložiště, pokud už na něj nic neodkazuje
+        (volat po smazání záznamu). Soubory mimo úložiště smaže vždy.
+
+        Returns:
+            bool: soubor byl smazán
+        """
+        path = Path(path)
+        if not path.exists():
+            return False
+        if self.contains(path) and self.references(path) > 0:
+            return False
+        try:
+            path.unlink()
+            return True
+        except OSError as e:
+            print(f"Chyba při mazání souboru {path}: {e}")
+            return False
+
+
+# Globální instance
+blob_store = BlobStore(config.BLOB_DIR)
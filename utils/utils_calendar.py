@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+Obsazenost kalendáře (události a rezervace) pro kapacitu mechaniků a volné termíny
+
+CalendarRangeService.load() načte všechny události a rezervace okna jedním
+rozsahovým dotazem přes index na start_datetime (+ jeden dotaz na rezervace)
+a postaví intervalový strom pro každého mechanika (včetně výskytů opakujících
+se pravidel z utils_recurrence). Volné sloty, překryvy,
+počty a vytížení se pak počítají z paměti - bez dotazu na den a mechanika.
+
+    index = calendar_service.load(date.today(), date.today() + timedelta(days=60))
+    index.free_slots(mechanic_id, date.today(), 60, limit=6)
+    index.overlaps(mechanic_id, start, end)
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from database_manager import db
+from utils.utils_recurrence import recurrence
+
+
+# Nejdelší událost, kterou okno zachytí i když začala před ním (všechny
+# vícedenní události kratší než měsíc) - drží rozsah indexu na start_datetime
+MAX_EVENT_SPAN_DAYS = 31
+
+# Stavy, které kapacitu neblokují
+CANCELLED_EVENT_STATUSES = ("cancelled",)
+ACTIVE_BOOKING_STATUSES = ("pending", "approved")
+
+WorkBlocks = List[Tuple[int, int]]
+
+
+def default_work_blocks(day: date) -> WorkBlocks:
+    """Pracovní doba dílny: Po-Pá 8-12 a 13-17, So 8-12, Ne zavřeno"""
+    if day.weekday() == 6:
+        return []
+    if day.weekday() == 5:
+        return [(8, 12)]
+    return [(8, 12), (13, 17)]
+
+
+def _parse(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+# -----------------------
+# Intervalový strom
+# -----------------------
+@dataclass
+class Interval:
+    """Obsazený úsek času (událost nebo rezervace)"""
+    start: datetime
+    end: datetime
+    mechanic_id: Optional[int] = None
+    source: str = "event"          # 'event' / 'recurring' / 'booking'
+    ref_id: Optional[int] = None
+    status: str = ""
+    title: str = ""
+
+    @property
+    def hours(self) -> float:
+        return (self.end - self.start).total_seconds() / 3600
+
+
+class IntervalTree:
+    """
+    Statický intervalový strom: intervaly seřazené podle začátku uložené jako
+    vyvážený strom v poli (kořen = prostředek úseku), každý uzel zná nejpozdější
+    konec ve svém podstromu. Dotaz na překryv je O(log n + počet výsledků).
+    """
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._items: List[Interval] = sorted(intervals, key=lambda i: (i.start, i.end))
+        self._max_end: List[Optional[datetime]] = [None] * len(self._items)
+        self._build(0, len(self._items))
+
+    def _build(self, lo: int, hi: int) -> Optional[datetime]:
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        max_end = self._items[mid].end
+        for child in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child is not None and child > max_end:
+                max_end = child
+        self._max_end[mid] = max_end
+        return max_end
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Interval]:
+        """Intervaly, které se s [start, end) překrývají (seřazené podle začátku)"""
+        found: List[Interval] = []
+        stack = [(0, len(self._items))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start:
+                continue                        # vše v podstromu končí před oknem
+            stack.append((lo, mid))
+            item = self._items[mid]
+            if item.start < end:
+                if item.end > start:
+                    found.append(item)
+                stack.append((mid + 1, hi))     # vpravo jen pozdější začátky
+        found.sort(key=lambda i: (i.start, i.end))
+        return found
+
+    def starting_between(self, start: datetime, end: datetime) -> List[Interval]:
+        """Intervaly se začátkem v [start, end)"""
+        return [i for i in self.overlapping(start, end) if i.start >= start]
+
+
+# -----------------------
+# Obsazenost okna
+# -----------------------
+@dataclass
+class CalendarIndex:
+    """Události a rezervace jednoho okna po mechanicích"""
+    date_from: date
+    date_to: date
+    trees: Dict[Optional[int], IntervalTree] = field(default_factory=dict)
+    bookings: IntervalTree = field(default_factory=IntervalTree)
+
+    def tree(self, mechanic_id: Optional[int]) -> IntervalTree:
+        return self.trees.get(mechanic_id) or IntervalTree()
+
+    def mechanic_ids(self) -> List[int]:
+        return [m for m in self.trees if m is not None]
+
+    def overlaps(self, mechanic_id: Optional[int], start: datetime, end: datetime,
+                 exclude_id: Optional[int] = None) -> List[Interval]:
+        """Kolize s navrhovaným termínem (exclude_id = upravovaná událost)"""
+        return [i for i in self.tree(mechanic_id).overlapping(start, end)
+                if exclude_id is None or i.ref_id != exclude_id]
+
+    def is_free(self, mechanic_id: Optional[int], start: datetime, end: datetime) -> bool:
+        return not self.tree(mechanic_id).overlapping(start, end)
+
+    def count(self, mechanic_id: Optional[int], day_from: date, day_to: Optional[date] = None) -> int:
+        """Počet událostí začínajících ve dnech day_from..day_to"""
+        day_to = day_to or day_from
+        return len(self.tree(mechanic_id).starting_between(
+            _day_start(day_from), _day_start(day_to + timedelta(days=1))))
+
+    def _covered(self, tree: IntervalTree, start: datetime, end: datetime) -> float:
+        """Sekundy v úseku start..end pokryté intervaly (překryvy se nepočítají dvakrát)"""
+        total = 0.0
+        cur_start = cur_end = None
+        for i in tree.overlapping(start, end):
+            s, e = max(i.start, start), min(i.end, end)
+            if cur_end is None or s > cur_end:
+                if cur_end is not None:
+                    total += (cur_end - cur_start).total_seconds()
+                cur_start, cur_end = s, e
+            elif e > cur_end:
+                cur_end = e
+        if cur_end is not None:
+            total += (cur_end - cur_start).total_seconds()
+        return total
+
+    def busy_hours(self, mechanic_id: Optional[int], day_from: date, day_to: Optional[date] = None,
+                   work_blocks: Callable[[date], WorkBlocks] = default_work_blocks) -> float:
+        """Obsazené hodiny v pracovní době dnů day_from..day_to"""
+        day_to = day_to or day_from
+        tree = self.tree(mechanic_id)
+        total = 0.0
+        for n in range((day_to - day_from).days + 1):
+            day = day_from + timedelta(days=n)
+            for start_h, end_h in work_blocks(day):
+                total += self._covered(tree, _day_start(day) + timedelta(hours=start_h),
+                                       _day_start(day) + timedelta(hours=end_h))
+        return total / 3600
+
+    def utilization(self, mechanic_id: Optional[int], day_from: date, day_to: Optional[date] = None,
+                    work_blocks: Callable[[date], WorkBlocks] = default_work_blocks) -> float:
+        """Obsazené hodiny / pracovní hodiny v %"""
+        day_to = day_to or day_from
+        capacity = sum(end - start
+                       for n in range((day_to - day_from).days + 1)
+                       for start, end in work_blocks(day_from + timedelta(days=n)))
+        return self.busy_hours(mechanic_id, day_from, day_to, work_blocks) / capacity * 100 if capacity else 0.0
+
+    def free_slots(self, mechanic_id: Optional[int], day_from: date, days: int,
+                   limit: Optional[int] = None, slot_minutes: int = 60,
+                   work_blocks: Callable[[date], WorkBlocks] = default_work_blocks,
+                   include_bookings: bool = False) -> List[datetime]:
+        """Začátky volných slotů v pracovní době"""
+        slot = timedelta(minutes=slot_minutes)
+        tree = self.tree(mechanic_id)
+        slots: List[datetime] = []
+        for n in range(days):
+            day = day_from + timedelta(days=n)
+            for start_h, end_h in work_blocks(day):
+                cur = _day_start(day) + timedelta(hours=start_h)
+                block_end = _day_start(day) + timedelta(hours=end_h)
+                while cur + slot <= block_end:
+                    if not tree.overlapping(cur, cur + slot) and not (
+                            include_bookings and self.bookings.overlapping(cur, cur + slot)):
+                        slots.append(cur)
+                        if limit is not None and len(slots) >= limit:
+                            return slots
+                    cur += slot
+        return slots
+
+    def booking_slots(self, day_from: date, days: int, slot_minutes: int = 60,
+                      work_blocks: Callable[[date], WorkBlocks] = default_work_blocks
+                      ) -> List[Tuple[datetime, bool]]:
+        """Všechny sloty pracovní doby s příznakem obsazení rezervací [(začátek, volný)]"""
+        slot = timedelta(minutes=slot_minutes)
+        result = []
+        for n in range(days):
+            day = day_from + timedelta(days=n)
+            for start_h, end_h in work_blocks(day):
+                cur = _day_start(day) + timedelta(hours=start_h)
+                block_end = _day_start(day) + timedelta(hours=end_h)
+                while cur + slot <= block_end:
+                    result.append((cur, not self.bookings.overlapping(cur, cur + slot)))
+                    cur += slot
+        return result
+
+
+# -----------------------
+# Služba
+# -----------------------
+class CalendarRangeService:
+    """Načítání událostí kalendáře po oknech (rozsahové dotazy přes index)"""
+
+    EVENT_COLUMNS = """
+        e.id, e.title, e.description, e.event_type,
+        e.start_datetime, e.end_datetime, e.all_day,
+        e.customer_id, e.vehicle_id, e.order_id,
+        e.mechanic_id, e.priority, e.color, e.status,
+        c.first_name || ' ' || c.last_name as customer_name,
+        v.brand || ' ' || v.model || ' (' || v.license_plate || ')' as vehicle_info,
+        v.license_plate,
+        u.full_name as mechanic_name
+    """
+
+    @staticmethod
+    def day_range(day_from: date, day_to: date) -> Tuple[str, str]:
+        """Parametry pro 'start_datetime >= ? AND start_datetime < ?' (dny včetně)"""
+        return day_from.isoformat(), (day_to + timedelta(days=1)).isoformat()
+
+    def event_rows(self, day_from: date, day_to: date, mechanic_id: Optional[int] = None,
+                   event_type: Optional[str] = None) -> List[dict]:
+        """
+        Události začínající ve dnech day_from..day_to i se jmény (pro zobrazení)
+        včetně výskytů opakujících se pravidel (ty mají záporné id)
+        """
+        query = f"""
+            SELECT {self.EVENT_COLUMNS}
+            FROM calendar_events e
+            LEFT JOIN customers c ON e.customer_id = c.id
+            LEFT JOIN vehicles v ON e.vehicle_id = v.id
+            LEFT JOIN users u ON e.mechanic_id = u.id
+            WHERE e.start_datetime >= ? AND e.start_datetime < ?
+              AND NOT (e.recurring_rule_id IS NOT NULL AND e.status = 'cancelled')
+        """
+        params = list(self.day_range(day_from, day_to))
+        if mechanic_id:
+            query += " AND e.mechanic_id = ?"
+            params.append(mechanic_id)
+        if event_type:
+            query += " AND e.event_type = ?"
+            params.append(event_type)
+        query += " ORDER BY e.start_datetime"
+        events = [dict(row) for row in db.fetch_all(query, tuple(params))]
+
+        occurrences = recurrence.expand(day_from, day_to, mechanic_id, event_type)
+        if occurrences:
+            events += [occ.as_event() for occ in occurrences]
+            events.sort(key=lambda e: e["start_datetime"] or "")
+        return events
+
+    def status_counts(self, day_from: date, day_to: date) -> Dict[str, int]:
+        """Počty událostí podle stavu ve dnech day_from..day_to"""
+        rows = db.fetch_all("""
+            SELECT COALESCE(status, ''), COUNT(*)
+            FROM calendar_events
+            WHERE start_datetime >= ? AND start_datetime < ?
+              AND NOT (recurring_rule_id IS NOT NULL AND status = 'cancelled')
+            GROUP BY status
+        """, self.day_range(day_from, day_to))
+        counts = {row[0]: row[1] for row in rows}
+        planned = len(recurrence.expand(day_from, day_to))
+        if planned:
+            counts["scheduled"] = counts.get("scheduled", 0) + planned
+        return counts
+
+    def load(self, day_from: date, day_to: date,
+             mechanic_ids: Optional[Sequence[int]] = None,
+             include_bookings: bool = True) -> CalendarIndex:
+        """Obsazenost okna day_from..day_to (dny včetně)"""
+        window_start = _day_start(day_from)
+        window_end = _day_start(day_to + timedelta(days=1))
+        earliest = window_start - timedelta(days=MAX_EVENT_SPAN_DAYS)
+
+        marks = ", ".join("?" for _ in CANCELLED_EVENT_STATUSES)
+        query = f"""
+            SELECT id, mechanic_id, start_datetime, end_datetime, status, title
+            FROM calendar_events
+            WHERE start_datetime >= ? AND start_datetime < ?
+              AND COALESCE(status, '') NOT IN ({marks})
+        """
+        # Hranice jako samotné datum - funguje pro "T" i mezeru v uloženém čase
+        params: list = [earliest.date().isoformat(), window_end.date().isoformat(),
+                        *CANCELLED_EVENT_STATUSES]
+        if mechanic_ids:
+            query += f" AND mechanic_id IN ({', '.join('?' for _ in mechanic_ids)})"
+            params += list(mechanic_ids)
+
+        by_mechanic: Dict[Optional[int], List[Interval]] = {}
+        for row in db.fetch_all(query, tuple(params)):
+            start = _parse(row["start_datetime"])
+            if start is None:
+                continue
+            end = _parse(row["end_datetime"])
+            if end is None or end <= start:
+                end = start + timedelta(hours=1)
+            if end <= window_start:
+                continue
+            by_mechanic.setdefault(row["mechanic_id"], []).append(Interval(
+                start, end, row["mechanic_id"], "event", row["id"], row["status"] or "", row["title"] or ""))
+
+        # Výskyty opakujících se pravidel (jen ty bez uložené výjimky)
+        for occ in recurrence.expand(window_start.date() - timedelta(days=1), day_to):
+            if mechanic_ids and occ.rule.mechanic_id not in mechanic_ids:
+                continue
+            if occ.end <= window_start:
+                continue
+            by_mechanic.setdefault(occ.rule.mechanic_id, []).append(Interval(
+                occ.start, occ.end, occ.rule.mechanic_id, "recurring", occ.virtual_id,
+                "scheduled", occ.title))
+
+        index = CalendarIndex(day_from, day_to,
+                              {m: IntervalTree(items) for m, items in by_mechanic.items()})
+        if include_bookings:
+            index.bookings = IntervalTree(self._load_bookings(day_from, day_to))
+        return index
+
+    def _load_bookings(self, day_from: date, day_to: date) -> List[Interval]:
+        marks = ", ".join("?" for _ in ACTIVE_BOOKING_STATUSES)
+        rows = db.fetch_all(f"""
+            SELECT id, mechanic_id, booking_date, COALESCE(booking_time, start_time) AS start_time,
+                   end_time, status, service_type
+            FROM calendar_bookings
+            WHERE booking_date BETWEEN ? AND ? AND status IN ({marks})
+        """, (day_from.isoformat(), day_to.isoformat(), *ACTIVE_BOOKING_STATUSES))
+
+        intervals = []
+        for row in rows:
+            start = _parse(f"{row['booking_date']}T{row['start_time']}") if row["start_time"] else None
+            if start is None:
+                continue
+            end = _parse(f"{row['booking_date']}T{row['end_time']}") if row["end_time"] else None
+            if end is None or end <= start:
+                end = start + timedelta(hours=1)
+            intervals.append(Interval(start, end, row["mechanic_id"], "booking", row["id"],
+                                      row["status"] or "", row["service_type"] or ""))
+        return intervals
+
+
+# Globální instance
+calendar_service = CalendarRangeService()
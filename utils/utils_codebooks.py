@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Sdílená cache číselníků (tabulky codebook_*)
+- CodebookCache.rows(): aktivní řádky číselníku - jeden dotaz za běh aplikace
+- typované dotazy: vat_rates(), default_vat_rate(), unit_codes(), payment_method_names(), ...
+- model(): QStandardItemModel pro comboboxy, po změně číselníku se sám přenačte
+- fill_combo(): naplnění comboboxu; prázdný číselník = výchozí hodnoty formuláře
+
+Widgety číselníků po uložení (signál data_changed) volají codebooks.invalidate(název),
+cache pak vyšle signál changed(název).
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
+
+from database_manager import db
+
+
+def _name(row: dict) -> str:
+    return row.get("name") or ""
+
+
+def _unit(row: dict) -> str:
+    return row.get("symbol") or row.get("abbreviation") or row.get("code") or ""
+
+
+def _rate(row: dict) -> str:
+    return f"{row.get('rate') or 0:g}%"
+
+
+@dataclass(frozen=True)
+class CodebookSpec:
+    """Popis číselníku: tabulka, řazení, zobrazovaný text"""
+    table: str
+    order_by: str = "name"
+    label: Callable[[dict], str] = _name
+    where: str = ""
+
+
+# Sazby s datem platnosti - jen platné k dnešku
+_VALID_NOW = " AND (valid_to IS NULL OR valid_to = '' OR valid_to >= DATE('now'))"
+
+CODEBOOKS: Dict[str, CodebookSpec] = {
+    "brands": CodebookSpec("codebook_brands"),
+    "vehicle_types": CodebookSpec("codebook_vehicle_types"),
+    "fuel_types": CodebookSpec("codebook_fuel_types"),
+    "colors": CodebookSpec("codebook_colors"),
+    "repair_types": CodebookSpec("codebook_repair_types"),
+    "positions": CodebookSpec("codebook_positions"),
+    "hourly_rates": CodebookSpec("codebook_hourly_rates", "valid_from DESC, name", where=_VALID_NOW),
+    "customer_groups": CodebookSpec("codebook_customer_groups", "priority, name"),
+    "payment_methods": CodebookSpec("codebook_payment_methods", "is_default DESC, name"),
+    "vat_rates": CodebookSpec("codebook_vat_rates", "is_default DESC, rate DESC", _rate, _VALID_NOW),
+    "order_statuses": CodebookSpec("codebook_order_statuses", "sort_order, name"),
+    "units": CodebookSpec("codebook_units", "code", _unit),
+    "currencies": CodebookSpec("codebook_currencies", "is_default DESC, code"),
+}
+
+
+class CodebookCache(QObject):
+    """Číselníky v paměti pro formuláře a comboboxy"""
+
+    changed = pyqtSignal(str)   # název číselníku ("" = všechny)
+
+    def __init__(self):
+        super().__init__()
+        self._rows: Dict[str, List[dict]] = {}
+        self._models: Dict[Tuple[str, Tuple[str, ...]], QStandardItemModel] = {}
+
+    # -----------------------
+    # Načtení
+    # -----------------------
+    def rows(self, name: str) -> List[dict]:
+        """Aktivní řádky číselníku (slovníky sloupec -> hodnota)"""
+        rows = self._rows.get(name)
+        if rows is None:
+            spec = CODEBOOKS[name]
+            try:
+                rows = [dict(row) for row in db.fetch_all(
+                    f"SELECT * FROM {spec.table} WHERE COALESCE(active, 1) = 1{spec.where} "
+                    f"ORDER BY {spec.order_by}"
+                )]
+            except Exception as e:
+                print(f"Chyba při načítání číselníku {name}: {e}")
+                rows = []
+            self._rows[name] = rows
+        return rows
+
+    def get(self, name: str, row_id: int) -> Optional[dict]:
+        """Řádek číselníku podle id"""
+        return next((row for row in self.rows(name) if row.get("id") == row_id), None)
+
+    def by_code(self, name: str) -> Dict[str, dict]:
+        """Řádky číselníku podle kódu"""
+        return {row["code"]: row for row in self.rows(name) if row.get("code")}
+
+    def labels(self, name: str, fallback: Sequence[str] = ()) -> List[str]:
+        """Texty položek pro combobox; prázdný číselník = fallback"""
+        label = CODEBOOKS[name].label
+        return [label(row) for row in self.rows(name)] or list(fallback)
+
+    def invalidate(self, name: Optional[str] = None):
+        """Zahodí načtený číselník (None = všechny) a přenačte sdílené modely"""
+        if name is None:
+            self._rows.clear()
+        elif name in CODEBOOKS:
+            self._rows.pop(name, None)
+        else:
+            return
+
+        for (model_name, fallback), model in self._models.items():
+            if name is None or model_name == name:
+                self._fill_model(model, model_name, fallback)
+        self.changed.emit(name or "")
+
+    # -----------------------
+    # Typované dotazy
+    # -----------------------
+    def vat_rates(self, fallback: Sequence[float] = (21.0, 12.0, 0.0)) -> List[float]:
+        """Platné sazby DPH v % (výchozí sazba první)"""
+        return [float(row["rate"]) for row in self.rows("vat_rates")] or list(fallback)
+
+    def default_vat_rate(self) -> float:
+        return self.vat_rates()[0]
+
+    def unit_codes(self, fallback: Sequence[str] = ()) -> List[str]:
+        return self.labels("units", fallback)
+
+    def payment_method_names(self, fallback: Sequence[str] = ()) -> List[str]:
+        return self.labels("payment_methods", fallback)
+
+    def customer_group_names(self, fallback: Sequence[str] = ()) -> List[str]:
+        return self.labels("customer_groups", fallback)
+
+    def order_status_names(self, fallback: Sequence[str] = ()) -> List[str]:
+        return self.labels("order_statuses", fallback)
+
+    def brand_names(self) -> List[str]:
+        return self.labels("brands")
+
+    def repair_types(self) -> List[dict]:
+        return self.rows("repair_types")
+
+    # -----------------------
+    # Qt modely a comboboxy
+    # -----------------------
+    def _fill_model(self, model: QStandardItemModel, name: str, fallback: Tuple[str, ...]):
+        model.clear()
+        rows = self.rows(name)
+        if rows:
+            label = CODEBOOKS[name].label
+            for row in rows:
+                item = QStandardItem(label(row))
+                item.setData(row.get("id"), Qt.ItemDataRole.UserRole)
+                model.appendRow(item)
+        else:
+            for text in fallback:
+                model.appendRow(QStandardItem(text))
+
+    def model(self, name: str, fallback: Sequence[str] = ()) -> QStandardItemModel:
+        """
+        Sdílený model číselníku (text = zobrazovaný název, UserRole = id řádku)
+
+        Model patří cache - nepoužívat v editovatelném comboboxu, ten by do
+        modelu vkládal napsané texty. Tam použijte fill_combo().
+        """
+        key = (name, tuple(fallback))
+        model = self._models.get(key)
+        if model is None:
+            model = QStandardItemModel(self)
+            self._fill_model(model, name, key[1])
+            self._models[key] = model
+        return model
+
+    def fill_combo(self, combo, name: str, fallback: Sequence[str] = (),
+                   current: Optional[str] = None):
+        """Naplní combobox texty z číselníku (zachová nebo nastaví aktuální text)"""
+        text = combo.currentText() if current is None else current
+        combo.clear()
+        combo.addItems(self.labels(name, fallback))
+        if text:
+            combo.setCurrentText(text)
+
+
+# Globální instance
+codebooks = CodebookCache()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Cache podkladů pro tiskové dokumenty (PDF)
+- company_settings(): údaje firmy z tabulky settings - jeden dotaz za běh aplikace
+- template(typ): výchozí šablona z document_templates (Administrativa -> Šablony)
+  s rozparsovaným JSON obsahem (barva tabulek, logo)
+- logo_bytes(cesta): obsah loga načtený jednou
+
+Šablony a logo se předávají do procesů dávkového generování, proto jsou
+DocumentTemplate i výsledky obyčejná (picklovatelná) data.
+Po uložení šablony / nastavení volejte document_resources.invalidate().
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from database_manager import db
+
+
+DEFAULT_COMPANY_SETTINGS = {
+    'company_name': 'Motoservis DMS',
+    'company_address': '',
+    'company_phone': '',
+    'company_email': '',
+    'company_ico': '',
+    'company_dic': '',
+}
+
+
+@dataclass(frozen=True)
+class DocumentTemplate:
+    """Rozparsovaná šablona dokumentu (None = výchozí vzhled exportéru)"""
+    template_type: str
+    name: str = ""
+    primary_color: Optional[str] = None
+    logo_path: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, template_type: str, row: dict) -> "DocumentTemplate":
+        try:
+            content = json.loads(row.get("content") or "{}")
+        except (TypeError, ValueError):
+            content = {}
+        if not isinstance(content, dict):
+            content = {}
+        styles = content.get("styles") or {}
+
+        logo_path = row.get("logo_path")
+        if logo_path and not Path(logo_path).is_file():
+            logo_path = None
+
+        return cls(
+            template_type=template_type,
+            name=row.get("name") or "",
+            primary_color=styles.get("primary_color") or None,
+            logo_path=logo_path,
+        )
+
+
+class DocumentResources:
+    """Nastavení firmy, šablony a loga pro generování dokumentů"""
+
+    def __init__(self):
+        self._settings: Optional[Dict[str, str]] = None
+        self._templates: Dict[str, DocumentTemplate] = {}
+        self._logos: Dict[str, bytes] = {}
+
+    # -----------------------
+    # Nastavení firmy
+    # -----------------------
+    def company_settings(self) -> Dict[str, str]:
+        """Údaje firmy pro hlavičky dokumentů (kopie - volající ji smí upravit)"""
+        if self._settings is None:
+            settings = {}
+            try:
+                for row in db.fetch_all("SELECT key, value FROM settings"):
+                    settings[row[0]] = row[1] or ''
+            except Exception as e:
+                print(f"Chyba při načítání nastavení firmy: {e}")
+            self._settings = {key: settings.get(key, default)
+                              for key, default in DEFAULT_COMPANY_SETTINGS.items()}
+        return dict(self._settings)
+
+    # -----------------------
+    # Šablony
+    # -----------------------
+    def template(self, template_type: str) -> DocumentTemplate:
+        """Výchozí aktivní šablona daného typu (prázdná, pokud žádná není)"""
+        template = self._templates.get(template_type)
+        if template is None:
+            template = DocumentTemplate(template_type)
+            try:
+                # Starší databáze nemají sloupce is_default / is_active
+                rows = [dict(row) for row in db.fetch_all(
+                    "SELECT * FROM document_templates WHERE template_type = ? ORDER BY id",
+                    (template_type,)
+                )]
+                rows = [row for row in rows if row.get("is_active", 1) != 0]
+                rows.sort(key=lambda row: not row.get("is_default"))
+                if rows:
+                    template = DocumentTemplate.from_row(template_type, rows[0])
+            except Exception as e:
+                print(f"Chyba při načítání šablony {template_type}: {e}")
+            self._templates[template_type] = template
+        return template
+
+    def logo_bytes(self, logo_path: Optional[str]) -> Optional[bytes]:
+        """Obsah souboru loga (None = bez loga nebo nečitelný soubor)"""
+        if not logo_path:
+            return None
+        data = self._logos.get(logo_path)
+        if data is None:
+            try:
+                data = Path(logo_path).read_bytes()
+            except OSError as e:
+                print(f"Chyba při načítání loga {logo_path}: {e}")
+                return None
+            self._logos[logo_path] = data
+        return data
+
+    def invalidate(self):
+        """Zahodí načtené nastavení, šablony i loga"""
+        self._settings = None
+        self._templates.clear()
+        self._logos.clear()
+
+
+# Globální instance
+document_resources = DocumentResources()
@@ -2,40 +2,146 @@
 """
 Export Manager pro Motoservis DMS
 Exporty do PDF, Excel, CSV s českým formátováním
+
+Velké exporty (pohyby skladu, faktury za rok) jdou proudově: ExportSheet čte
+řádky z kurzoru databáze po dávkách a ExportManager.stream_to_file je zapisuje
+do .xlsx (openpyxl write-only) nebo .csv, šířky sloupců se odhadnou ze vzorku.
+V paměti je tak jen jedna dávka řádků. Běh na pozadí s průběhem a zrušením:
+utils_export_task.run_export.
 """
 
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Union, Optional
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Dict, Sequence, Union, Optional
 import csv
+import importlib.util
 import config
+from database_manager import db
 
-# Import openpyxl (pro Excel)
-try:
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from openpyxl.utils import get_column_letter
-    EXCEL_AVAILABLE = True
-except ImportError:
-    EXCEL_AVAILABLE = False
+# openpyxl (Excel) a reportlab (PDF) se importují až při exportu - zjištění
+# dostupnosti přes find_spec knihovny nenačítá a nezdržuje start aplikace
+EXCEL_AVAILABLE = importlib.util.find_spec("openpyxl") is not None
+if not EXCEL_AVAILABLE:
     print("⚠️ openpyxl není nainstalován. Spusť: pip install openpyxl")
 
-# Import reportlab (pro PDF)
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import colors
-    from reportlab.lib.units import cm
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
+PDF_AVAILABLE = importlib.util.find_spec("reportlab") is not None
+if not PDF_AVAILABLE:
     print("⚠️ reportlab není nainstalován. Spusť: pip install reportlab")
 
 
+# Řádků na jedno fetchmany z kurzoru
+CHUNK_SIZE = 2000
+# Řádků pro odhad šířky sloupců
+WIDTH_SAMPLE_ROWS = 200
+MAX_COLUMN_WIDTH = 50
+
+# Průběh: progress(zapsáno, celkem) -> False pro zrušení exportu
+ProgressCallback = Callable[[int, int], Optional[bool]]
+
+
+class ExportCancelled(Exception):
+    """Export zrušen uživatelem (rozpracovaný soubor se smaže)"""
+
+
+@dataclass
+class ExportSheet:
+    """
+    List exportu načítaný přímo z databáze
+
+    Args:
+        title: název listu
+        query: SELECT s řádky listu (ORDER BY určuje pořadí)
+        params: parametry dotazu
+        headers: hlavičky sloupců
+        convert: převod řádku dotazu na hodnoty buněk (běží v pracovním vlákně,
+                 nesmí sahat na widgety); None = řádek beze změny
+    """
+    title: str
+    query: str
+    params: Sequence = ()
+    headers: Sequence[str] = ()
+    convert: Optional[Callable[[Sequence], Sequence]] = None
+
+    def count(self) -> int:
+        row = db.fetch_one(f"SELECT COUNT(*) FROM ({self.query})", tuple(self.params))
+        return row[0] if row else 0
+
+    def rows(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Sequence]:
+        """Řádky listu po dávkách z vlastního kurzoru (připojení volajícího vlákna)"""
+        cursor = db.get_connection().cursor()
+        try:
+            cursor.execute(self.query, tuple(self.params))
+            convert = self.convert
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                for row in chunk:
+                    yield convert(row) if convert is not None else tuple(row)
+        finally:
+            cursor.close()
+
+
+def estimate_column_widths(headers: Sequence[str], sample: Iterable[Sequence]) -> List[int]:
+    """Šířky sloupců podle hlaviček a vzorku řádků (max MAX_COLUMN_WIDTH)"""
+    widths = [len(str(h)) for h in headers]
+    for row in sample:
+        if len(row) > len(widths):
+            widths.extend([0] * (len(row) - len(widths)))
+        for i, value in enumerate(row):
+            if value is not None:
+                widths[i] = max(widths[i], len(str(value)))
+    return [min(w + 2, MAX_COLUMN_WIDTH) for w in widths]
+
+
+def _write_xlsx_sheet(wb, title: str, headers: Sequence[str], rows: Iterable[Sequence],
+                      on_row: Optional[Callable[[], None]] = None) -> int:
+    """Zapíše list do write-only workbooku, vrací počet datových řádků"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    from openpyxl.utils import get_column_letter
+
+    ws = wb.create_sheet(title=title[:31])
+    rows = iter(rows)
+
+    # Šířky se ve write-only režimu musí nastavit před prvním řádkem
+    sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+    for col_num, width in enumerate(estimate_column_widths(headers, sample), 1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+
+    if headers:
+        header_font = Font(bold=True, color="FFFFFF", size=11)
+        header_fill = PatternFill(start_color="2c3e50", end_color="2c3e50", fill_type="solid")
+        header_alignment = Alignment(horizontal="center", vertical="center")
+        side = Side(style='thin')
+        border_thin = Border(left=side, right=side, top=side, bottom=side)
+
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            cell.border = border_thin
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+    written = 0
+    for row in sample:
+        ws.append(list(row))
+        written += 1
+        if on_row is not None:
+            on_row()
+    for row in rows:
+        ws.append(list(row))
+        written += 1
+        if on_row is not None:
+            on_row()
+    return written
+
+
 class ExportManager:
     """
     Správce exportů do různých formátů
@@ -125,6 +231,8 @@ class ExportManager:
             print("❌ openpyxl není k dispozici")
             return None
 
+        from openpyxl import Workbook
+
         try:
             # Příprava složky
             if directory is None:
@@ -136,63 +244,16 @@ class ExportManager:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             file_path = directory / f"{filename}_{timestamp}.xlsx"
 
-            # Vytvoření workbooku
-            wb = Workbook()
-            ws = wb.active
-            ws.title = sheet_name
-
-            # Styly
-            header_font = Font(bold=True, color="FFFFFF", size=11)
-            header_fill = PatternFill(start_color="2c3e50", end_color="2c3e50", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-
-            border_thin = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-
-            # Hlavičky
-            if headers:
-                for col_num, header in enumerate(headers, 1):
-                    cell = ws.cell(row=1, column=col_num)
-                    cell.value = header
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = header_alignment
-                    cell.border = border_thin
-
-                start_row = 2
-            else:
-                start_row = 1
-
-            # Data
-            for row_num, row_data in enumerate(data, start_row):
-                for col_num, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=row_num, column=col_num)
-                    cell.value = value
-                    cell.border = border_thin
-
-                    # Zarovnání čísel doprava
-                    if isinstance(value, (int, float)):
-                        cell.alignment = Alignment(horizontal="right")
-
-            # Automatická šířka sloupců
+            # Write-only workbook - buňky se neudržují v paměti, šířky ze vzorku
+            wb = Workbook(write_only=True)
             if auto_width:
-                for col in ws.columns:
-                    max_length = 0
-                    column = col[0].column_letter
-
-                    for cell in col:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-
-                    adjusted_width = min(max_length + 2, 50)
-                    ws.column_dimensions[column].width = adjusted_width
+                _write_xlsx_sheet(wb, sheet_name, headers or [], data)
+            else:
+                ws = wb.create_sheet(title=sheet_name)
+                if headers:
+                    ws.append(list(headers))
+                for row_data in data:
+                    ws.append(list(row_data))
 
             # Uložení
             wb.save(file_path)
@@ -239,6 +300,8 @@ class ExportManager:
             print("❌ openpyxl není k dispozici")
             return None
 
+        from openpyxl import Workbook
+
         try:
             # Příprava složky
             if directory is None:
@@ -250,67 +313,11 @@ class ExportManager:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             file_path = directory / f"{filename}_{timestamp}.xlsx"
 
-            # Vytvoření workbooku
-            wb = Workbook()
-            wb.remove(wb.active)  # Odstranění defaultního listu
-
-            # Vytvoření každého listu
+            # Write-only workbook (bez výchozího listu)
+            wb = Workbook(write_only=True)
             for sheet_name, sheet_data in sheets.items():
-                ws = wb.create_sheet(title=sheet_name)
-
-                data = sheet_data.get('data', [])
-                headers = sheet_data.get('headers', None)
-
-                # Styly
-                header_font = Font(bold=True, color="FFFFFF", size=11)
-                header_fill = PatternFill(start_color="2c3e50", end_color="2c3e50", fill_type="solid")
-                header_alignment = Alignment(horizontal="center", vertical="center")
-
-                border_thin = Border(
-                    left=Side(style='thin'),
-                    right=Side(style='thin'),
-                    top=Side(style='thin'),
-                    bottom=Side(style='thin')
-                )
-
-                # Hlavičky
-                if headers:
-                    for col_num, header in enumerate(headers, 1):
-                        cell = ws.cell(row=1, column=col_num)
-                        cell.value = header
-                        cell.font = header_font
-                        cell.fill = header_fill
-                        cell.alignment = header_alignment
-                        cell.border = border_thin
-
-                    start_row = 2
-                else:
-                    start_row = 1
-
-                # Data
-                for row_num, row_data in enumerate(data, start_row):
-                    for col_num, value in enumerate(row_data, 1):
-                        cell = ws.cell(row=row_num, column=col_num)
-                        cell.value = value
-                        cell.border = border_thin
-
-                        if isinstance(value, (int, float)):
-                            cell.alignment = Alignment(horizontal="right")
-
-                # Auto šířka
-                for col in ws.columns:
-                    max_length = 0
-                    column = col[0].column_letter
-
-                    for cell in col:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-
-                    adjusted_width = min(max_length + 2, 50)
-                    ws.column_dimensions[column].width = adjusted_width
+                _write_xlsx_sheet(wb, sheet_name, sheet_data.get('headers') or [],
+                                  sheet_data.get('data', []))
 
             # Uložení
             wb.save(file_path)
@@ -349,6 +356,15 @@ class ExportManager:
             print("❌ reportlab není k dispozici")
             return None
 
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib import colors
+        from reportlab.lib.units import cm
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+
         try:
             # Příprava složky
             if directory is None:
@@ -453,6 +469,71 @@ class ExportManager:
             print(f"❌ Chyba při exportu do PDF: {e}")
             return None
 
+    @staticmethod
+    def stream_to_file(sheets: Sequence[ExportSheet],
+                       file_path: Union[str, Path],
+                       progress: Optional[ProgressCallback] = None,
+                       progress_every: int = 1000) -> int:
+        """
+        Proudový export listů z databáze do .xlsx nebo .csv (podle přípony)
+
+        Args:
+            sheets: listy exportu (CSV umí jen jeden list)
+            file_path: cílový soubor
+            progress: progress(zapsáno, celkem) -> False zruší export
+            progress_every: po kolika řádcích se volá progress
+
+        Returns:
+            int: počet zapsaných datových řádků
+
+        Raises:
+            ExportCancelled: export zrušen (rozpracovaný soubor je smazán)
+        """
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        total = sum(sheet.count() for sheet in sheets) if progress is not None else 0
+        written = 0
+
+        def on_row():
+            nonlocal written
+            written += 1
+            if progress is not None and written % progress_every == 0:
+                if progress(written, total) is False:
+                    raise ExportCancelled()
+
+        try:
+            if file_path.suffix.lower() == ".csv":
+                if len(sheets) != 1:
+                    raise ValueError("CSV export umí jen jeden list")
+                sheet = sheets[0]
+                with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+                    writer = csv.writer(f, delimiter=';')
+                    if sheet.headers:
+                        writer.writerow(sheet.headers)
+                    for row in sheet.rows():
+                        writer.writerow(['' if cell is None else cell for cell in row])
+                        on_row()
+            else:
+                if not EXCEL_AVAILABLE:
+                    raise RuntimeError("openpyxl není k dispozici")
+                from openpyxl import Workbook
+
+                wb = Workbook(write_only=True)
+                for sheet in sheets:
+                    _write_xlsx_sheet(wb, sheet.title, sheet.headers, sheet.rows(), on_row)
+                wb.save(file_path)
+        except BaseException:
+            # Nedokončený soubor nenechávat (zrušení i chyba)
+            try:
+                file_path.unlink()
+            except OSError:
+                pass
+            raise
+
+        if progress is not None:
+            progress(written, total)
+        return written
+
     @staticmethod
     def generate_filename(prefix: str, extension: str) -> str:
         """
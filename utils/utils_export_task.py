@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Proudový export na pozadí (QThreadPool) s průběhem a možností zrušení
+- ExportTask: ExportManager.stream_to_file v pracovním vlákně s vlastním WAL spojením
+- run_export: spustí export a zobrazí QProgressDialog (tlačítko Zrušit export přeruší)
+
+    run_export(self, [ExportSheet("Faktury", query, params, headers, convert)], file_path,
+               on_finished=lambda path, rows: ...)
+"""
+
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Union
+
+from PyQt6.QtWidgets import QMessageBox, QProgressDialog, QWidget
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+
+from database_manager import db
+from utils.utils_export import ExportCancelled, ExportManager, ExportSheet
+
+
+class _ExportSignals(QObject):
+    """Signály úlohy (QRunnable není QObject)"""
+    progress = pyqtSignal(int, int)     # zapsáno, celkem
+    finished = pyqtSignal(str, int)     # soubor, počet řádků
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class ExportTask(QRunnable):
+    """Spustí proudový export ve vlákně z poolu"""
+
+    def __init__(self, sheets: Sequence[ExportSheet], file_path: Union[str, Path]):
+        super().__init__()
+        self.sheets = list(sheets)
+        self.file_path = Path(file_path)
+        self.signals = _ExportSignals()
+        self._conn = None
+        self._cancelled = False
+
+    def cancel(self):
+        """Zruší export (i rozběhnutý dotaz - sqlite3 interrupt lze volat z jiného vlákna)"""
+        self._cancelled = True
+        conn = self._conn
+        if conn is not None:
+            try:
+                conn.interrupt()
+            except Exception:
+                pass
+
+    def _progress(self, written: int, total: int) -> bool:
+        self.signals.progress.emit(written, total)
+        return not self._cancelled
+
+    def run(self):
+        try:
+            self._conn = db.get_connection()
+            if self._cancelled:
+                raise ExportCancelled()
+            rows = ExportManager.stream_to_file(self.sheets, self.file_path, self._progress)
+            self.signals.finished.emit(str(self.file_path), rows)
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            if self._cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.failed.emit(str(e))
+        finally:
+            self._conn = None
+            db.release_thread_connection()
+
+
+def run_export(parent: QWidget, sheets: Sequence[ExportSheet], file_path: Union[str, Path],
+               on_finished: Optional[Callable[[str, int], None]] = None,
+               title: str = "Export") -> ExportTask:
+    """
+    Spustí export na pozadí s dialogem průběhu
+
+    Args:
+        parent: rodičovský widget (dialog průběhu, hlášení chyb)
+        sheets: listy exportu
+        file_path: cílový soubor (.xlsx / .csv)
+        on_finished: on_finished(soubor, počet řádků) po dokončení (GUI vlákno);
+                     None = informační hláška
+    """
+    task = ExportTask(sheets, file_path)
+
+    dialog = QProgressDialog("Příprava exportu...", "Zrušit export", 0, 0, parent)
+    dialog.setWindowTitle(title)
+    dialog.setWindowModality(Qt.WindowModality.WindowModal)
+    dialog.setMinimumDuration(300)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+    # Úloha musí žít, dokud neskončí (signály), drží ji dialog
+    dialog.export_task = task
+
+    def progress(written: int, total: int):
+        if total:
+            dialog.setMaximum(total)
+            dialog.setValue(min(written, total))
+        dialog.setLabelText(f"Exportováno řádků: {written:,}".replace(",", " ")
+                            + (f" z {total:,}".replace(",", " ") if total else ""))
+
+    def finished(path: str, rows: int):
+        dialog.close()
+        if on_finished is not None:
+            on_finished(path, rows)
+        else:
+            QMessageBox.information(parent, "Úspěch",
+                                    f"Export {rows} řádků byl dokončen.\n\nSoubor: {path}")
+
+    def failed(message: str):
+        dialog.close()
+        QMessageBox.critical(parent, "Chyba", f"Export se nezdařil:\n{message}")
+
+    task.signals.progress.connect(progress)
+    task.signals.finished.connect(finished)
+    task.signals.failed.connect(failed)
+    task.signals.cancelled.connect(dialog.close)
+    dialog.canceled.connect(task.cancel)
+
+    QThreadPool.globalInstance().start(task)
+    return task
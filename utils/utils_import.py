@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+Hromadný import dat (sklad, zákazníci, vozidla)
+- load_lookup: klíče existujících záznamů (kód, EAN, email, IČO, SPZ) jedním dotazem
+- BulkWriter: zápis po dávkách přes executemany
+- run_import: průchod řádky v jedné transakci s průběhem a možností zrušení
+- TableReader: proudové čtení CSV/XLSX (řádky líně, průběh podle přečtených bajtů)
+
+Celý import běží v jedné transakci - chyba databáze nebo zrušení vrátí
+všechny změny. Chyby jednotlivých řádků (ValueError) se jen zaznamenají.
+"""
+
+import codecs
+import csv
+import io
+import os
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from database_manager import db
+
+
+# Po kolika řádcích se volá callback průběhu
+PROGRESS_EVERY = 250
+
+
+class ImportCancelled(Exception):
+    """Import zrušen uživatelem (transakce se vrátí)"""
+
+
+@dataclass
+class ImportStats:
+    """Souhrn importu"""
+    total: int = 0
+    imported: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def count(self, result: Optional[str]):
+        """Započítá výsledek řádku ('imported' / 'updated' / 'skipped')"""
+        if result in ("imported", "updated", "skipped"):
+            setattr(self, result, getattr(self, result) + 1)
+
+    def error(self, row_num: int, message: str):
+        self.errors.append(f"Řádek {row_num}: {message}")
+
+
+# -----------------------
+# Klíče existujících záznamů
+# -----------------------
+def text_key(value) -> str:
+    """Klíč bez okrajových mezer (kód, EAN, IČO)"""
+    return str(value).strip() if value is not None else ""
+
+
+def lower_key(value) -> str:
+    """Klíč bez ohledu na velikost písmen (email)"""
+    return text_key(value).lower()
+
+
+def upper_key(value) -> str:
+    """Klíč velkými písmeny (SPZ, VIN)"""
+    return text_key(value).upper()
+
+
+def load_lookup(query: str, params: Optional[tuple] = None,
+                key: Callable[[Any], Any] = text_key) -> Dict[Any, int]:
+    """
+    Slovník {klíč: id} z dotazu "SELECT klíč, id ..." - jeden dotaz místo
+    SELECTu na každý importovaný řádek.
+
+    Při více klíčových sloupcích ("SELECT jméno, příjmení, id") je klíčem
+    n-tice. Prázdné klíče se vynechají, při duplicitě platí první řádek.
+    """
+    lookup: Dict[Any, int] = {}
+    for row in db.fetch_all(query, params):
+        if len(row) > 2:
+            k = tuple(key(v) for v in row[:-1])
+            if not any(k):
+                continue
+        else:
+            k = key(row[0])
+            if not k:
+                continue
+        lookup.setdefault(k, row[-1])
+    return lookup
+
+
+def table_columns(table: str) -> set:
+    """Sloupce tabulky (import zapisuje jen sloupce, které existují)"""
+    return {row[1] for row in db.fetch_all(f"PRAGMA table_info({table})")}
+
+
+# -----------------------
+# Dávkový zápis
+# -----------------------
+class BulkWriter:
+    """
+    Sbírá řádky podle SQL a zapisuje je přes executemany po dávkách
+
+    Pořadí mezi různými SQL příkazy se nezachovává - do jednoho writeru
+    dávejte jen zápisy, které na sobě nezávisí (INSERT nových a UPDATE
+    existujících záznamů).
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.written = 0
+        self._pending: Dict[str, list] = {}
+
+    def add(self, sql: str, params: Iterable):
+        rows = self._pending.setdefault(sql, [])
+        rows.append(tuple(params))
+        if len(rows) >= self.batch_size:
+            self._flush(sql)
+
+    def flush(self):
+        for sql in list(self._pending):
+            self._flush(sql)
+
+    def _flush(self, sql: str):
+        rows = self._pending.pop(sql, None)
+        if rows:
+            db.execute_many(sql, rows)
+            self.written += len(rows)
+
+
+def run_import(rows: Iterable, process: Callable[[int, Any, BulkWriter], Optional[str]],
+               start_row: int = 1, batch_size: int = 1000,
+               progress: Optional[Callable[[int], bool]] = None) -> ImportStats:
+    """
+    Import řádků v jedné transakci
+
+    Args:
+        rows: řádky souboru (seznam nebo iterátor)
+        process: process(číslo_řádku, řádek, writer) -> 'imported' / 'updated' / 'skipped';
+                 ValueError = chyba řádku (zaznamená se, import pokračuje)
+        start_row: číslo prvního řádku v souboru (pro hlášení chyb)
+        progress: progress(zpracováno) -> False pro zrušení importu
+
+    Raises:
+        ImportCancelled: uživatel import zrušil (nic se neuložilo)
+    """
+    stats = ImportStats()
+    writer = BulkWriter(batch_size)
+
+    with db.transaction():
+        for row_num, row in enumerate(rows, start_row):
+            stats.total += 1
+            try:
+                stats.count(process(row_num, row, writer))
+            except ValueError as e:
+                stats.error(row_num, str(e))
+
+            if progress is not None and stats.total % PROGRESS_EVERY == 0:
+                if progress(stats.total) is False:
+                    raise ImportCancelled()
+
+        writer.flush()
+
+    return stats
+
+
+# -----------------------
+# Proudové čtení souborů
+# -----------------------
+READABLE_FORMATS = (".csv", ".xlsx")
+
+
+def _cell_text(value) -> str:
+    """Hodnota buňky jako text (prázdná buňka = "")"""
+    return "" if value is None else str(value)
+
+
+class TableReader:
+    """
+    Proudové čtení tabulky z CSV nebo XLSX
+
+    Řádky se čtou líně - paměť nezávisí na velikosti souboru. Každé
+    rows()/preview() čte soubor znovu od začátku; průběh importu je
+    podle přečtených bajtů (progress_percent).
+
+        reader = TableReader("cenik.csv")
+        reader.headers                  # první řádek
+        reader.preview(5)               # prvních 5 datových řádků
+        for row in reader.rows(): ...   # datové řádky (seznamy textů)
+    """
+
+    def __init__(self, path, delimiter: str = "auto", encoding: Optional[str] = None):
+        self.path = str(path)
+        self.ext = os.path.splitext(self.path)[1].lower()
+        if self.ext not in READABLE_FORMATS:
+            raise ValueError(f"Nepodporovaný formát: {self.ext}")
+
+        self.size = os.path.getsize(self.path)
+        self.bytes_read = 0
+        self.encoding = encoding
+        self.delimiter = delimiter
+
+        if self.ext == ".csv":
+            sample = self._read_sample()
+            if self.delimiter == "auto":
+                self.delimiter = self._detect_delimiter(sample)
+
+        self.headers = self._first_row()
+
+    # --- CSV ---
+    def _read_sample(self, size: int = 64 * 1024) -> str:
+        """Začátek souboru; určí kódování (UTF-8, jinak cp1250)"""
+        with open(self.path, "rb") as f:
+            raw = f.read(size)
+        if self.encoding is None:
+            try:
+                # Inkrementální dekodér snese znak useknutý na konci vzorku
+                codecs.getincrementaldecoder("utf-8-sig")().decode(raw, final=len(raw) < size)
+                self.encoding = "utf-8-sig"
+            except UnicodeDecodeError:
+                self.encoding = "cp1250"
+        return raw.decode(self.encoding, errors="ignore")
+
+    @staticmethod
+    def _detect_delimiter(sample: str) -> str:
+        try:
+            return csv.Sniffer().sniff(sample[:4096], delimiters=";,\t").delimiter
+        except csv.Error:
+            return ";" if sample.count(";") >= sample.count(",") else ","
+
+    def _iter_csv(self) -> Iterator[List[str]]:
+        with open(self.path, "rb") as raw:
+            text = io.TextIOWrapper(raw, encoding=self.encoding, newline="")
+            for row in csv.reader(text, delimiter=self.delimiter):
+                self.bytes_read = raw.tell()
+                yield row
+
+    # --- XLSX ---
+    def _iter_xlsx(self) -> Iterator[List[str]]:
+        from openpyxl import load_workbook
+
+        # read_only: list se čte z XML po řádcích, pozice v souboru = průběh
+        with open(self.path, "rb") as raw:
+            wb = load_workbook(raw, read_only=True, data_only=True)
+            try:
+                for values in wb.active.iter_rows(values_only=True):
+                    self.bytes_read = raw.tell()
+                    yield [_cell_text(v) for v in values]
+            finally:
+                wb.close()
+
+    # --- Řádky ---
+    def _iter_all(self) -> Iterator[List[str]]:
+        self.bytes_read = 0
+        rows = self._iter_csv() if self.ext == ".csv" else self._iter_xlsx()
+        yield from rows
+        self.bytes_read = self.size
+
+    def _first_row(self) -> List[str]:
+        rows = self._iter_all()
+        try:
+            return next(rows, [])
+        finally:
+            rows.close()
+
+    def rows(self, skip_header: bool = True) -> Iterator[List[str]]:
+        """Řádky souboru (bez hlavičky), čtené líně"""
+        rows = self._iter_all()
+        if skip_header:
+            next(rows, None)
+        yield from rows
+
+    def preview(self, count: int = 10, skip_header: bool = True) -> List[List[str]]:
+        """Prvních count řádků (čte jen začátek souboru)"""
+        rows = self.rows(skip_header)
+        try:
+            return list(islice(rows, count))
+        finally:
+            rows.close()
+
+    @property
+    def progress_percent(self) -> int:
+        """Průběh čtení 0-100 podle přečtených bajtů"""
+        if not self.size:
+            return 100
+        return min(100, int(self.bytes_read * 100 / self.size))
+
+    def describe(self) -> str:
+        """Název a velikost souboru pro dialogy"""
+        size = self.size / 1024
+        unit = "kB"
+        if size >= 1024:
+            size /= 1024
+            unit = "MB"
+        return f"{os.path.basename(self.path)} ({size:.1f} {unit})"
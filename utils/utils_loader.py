@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Načítání dat modulů na pozadí (QThreadPool)
+- BackgroundLoader: spustí dotazy modulu v pracovním vlákně, zastaralé výsledky zahodí
+- LoadingOverlay: poloprůhledná vrstva "Načítání..." přes obsah modulu
+- refresh_async: jednotné obnovení modulu (na pozadí, pokud to modul podporuje)
+
+Modul, který chce obnovovat data na pozadí, implementuje:
+    load_params()       -> parametry z widgetů (GUI vlákno, volitelné)
+    fetch_data(params)  -> data z DB (pracovní vlákno, NESMÍ sahat na widgety)
+    apply_data(data)    -> naplnění widgetů (GUI vlákno)
+Moduly bez těchto metod se obnovují synchronně přes refresh().
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout
+from PyQt6.QtCore import (
+    Qt, QObject, QRunnable, QThreadPool, QTimer, QEvent, pyqtSignal
+)
+
+from database_manager import db
+
+
+# -----------------------
+# Pracovní úloha
+# -----------------------
+class _LoadSignals(QObject):
+    """Signály úlohy (QRunnable není QObject)"""
+    finished = pyqtSignal(str, int, object)   # klíč, generace, data
+    failed = pyqtSignal(str, int, str)        # klíč, generace, chyba
+
+
+class LoadTask(QRunnable):
+    """Spustí fetch(params) ve vlákně z poolu s vlastním WAL spojením"""
+
+    def __init__(self, key: str, generation: int, fetch: Callable, params: Any = None):
+        super().__init__()
+        self.key = key
+        self.generation = generation
+        self.fetch = fetch
+        self.params = params
+        self.signals = _LoadSignals()
+        self._conn = None
+        self._cancelled = False
+
+    def cancel(self):
+        """Přeruší běžící dotaz (sqlite3 interrupt lze volat z jiného vlákna)"""
+        self._cancelled = True
+        conn = self._conn
+        if conn is not None:
+            try:
+                conn.interrupt()
+            except Exception:
+                pass
+
+    def run(self):
+        try:
+            self._conn = db.get_connection()
+            if self._cancelled:
+                return
+            data = self.fetch(self.params)
+            if not self._cancelled:
+                self.signals.finished.emit(self.key, self.generation, data)
+        except Exception as e:
+            if not self._cancelled:
+                self.signals.failed.emit(self.key, self.generation, str(e))
+        finally:
+            self._conn = None
+            db.release_thread_connection()
+
+
+# -----------------------
+# Loader
+# -----------------------
+class BackgroundLoader(QObject):
+    """
+    Načítání na pozadí s generacemi podle klíče
+
+    Každé load() pro daný klíč zvýší generaci a přeruší předchozí úlohu
+    stejného klíče; výsledek se aplikuje jen tehdy, pokud je stále aktuální
+    (uživatel mezitím nepřepnul modul/sekci ani nezměnil filtr).
+    """
+
+    loading_changed = pyqtSignal(str, bool)   # klíč, probíhá načítání
+
+    def __init__(self, parent=None, pool: Optional[QThreadPool] = None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._generations: Dict[str, int] = {}
+        self._tasks: Dict[str, LoadTask] = {}
+        self._callbacks: Dict[str, tuple] = {}
+
+    def load(self, key: str, fetch: Callable[[Any], Any], apply: Callable[[Any], None],
+             params: Any = None, on_error: Optional[Callable[[str], None]] = None,
+             on_cancel: Optional[Callable[[], None]] = None) -> int:
+        """Spustí fetch(params) na pozadí, apply(data) proběhne v GUI vlákně"""
+        self.cancel(key)
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+
+        task = LoadTask(key, generation, fetch, params)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        self._tasks[key] = task
+        self._callbacks[key] = (apply, on_error, on_cancel)
+        self.loading_changed.emit(key, True)
+        self.pool.start(task)
+        return generation
+
+    def cancel(self, key: Optional[str] = None):
+        """Zruší načítání klíče (nebo všech klíčů); výsledek se zahodí"""
+        keys = [key] if key is not None else list(self._tasks)
+        for k in keys:
+            task = self._tasks.pop(k, None)
+            if task is None:
+                continue
+            task.cancel()
+            self._generations[k] = self._generations.get(k, 0) + 1
+            _, _, on_cancel = self._callbacks.pop(k, (None, None, None))
+            self.loading_changed.emit(k, False)
+            if on_cancel is not None:
+                on_cancel()
+
+    def is_loading(self, key: str) -> bool:
+        return key in self._tasks
+
+    def _is_current(self, key: str, generation: int) -> bool:
+        return self._generations.get(key) == generation and key in self._tasks
+
+    def _on_finished(self, key: str, generation: int, data):
+        if not self._is_current(key, generation):
+            return
+        self._tasks.pop(key, None)
+        apply, _, _ = self._callbacks.pop(key, (None, None, None))
+        self.loading_changed.emit(key, False)
+        if apply is None:
+            return
+        try:
+            apply(data)
+        except Exception as e:
+            print(f"Chyba při zobrazení dat ({key}): {e}")
+
+    def _on_failed(self, key: str, generation: int, message: str):
+        if not self._is_current(key, generation):
+            return
+        self._tasks.pop(key, None)
+        _, on_error, _ = self._callbacks.pop(key, (None, None, None))
+        self.loading_changed.emit(key, False)
+        print(f"Chyba při načítání dat ({key}): {message}")
+        if on_error is not None:
+            on_error(message)
+
+
+# -----------------------
+# Indikace načítání
+# -----------------------
+class LoadingOverlay(QWidget):
+    """Vrstva přes obsah modulu zobrazená během načítání (bez blokování okna)"""
+
+    def __init__(self, parent: QWidget, text: str = "⏳ Načítání dat"):
+        super().__init__(parent)
+        self._text = text
+        self._dots = 0
+        self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
+        self.setStyleSheet("background-color: rgba(255, 255, 255, 170);")
+
+        layout = QVBoxLayout(self)
+        self.label = QLabel(text)
+        self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label.setStyleSheet("""
+            background-color: #ffffff;
+            border: 1px solid #dcdde1;
+            border-radius: 8px;
+            padding: 12px 24px;
+            font-size: 14px;
+            color: #2c3e50;
+        """)
+        layout.addWidget(self.label, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(400)
+        self._timer.timeout.connect(self._animate)
+
+        parent.installEventFilter(self)
+        self.hide()
+
+    def eventFilter(self, obj, event):
+        if obj is self.parent() and event.type() == QEvent.Type.Resize:
+            self.setGeometry(obj.rect())
+        return super().eventFilter(obj, event)
+
+    def _animate(self):
+        self._dots = (self._dots + 1) % 4
+        self.label.setText(self._text + "." * self._dots)
+
+    def start(self):
+        self.setGeometry(self.parent().rect())
+        self.raise_()
+        self.show()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._dots = 0
+        self.label.setText(self._text)
+        self.hide()
+
+
+def supports_background_load(widget) -> bool:
+    """Modul implementuje fetch_data/apply_data"""
+    return callable(getattr(widget, "fetch_data", None)) and \
+        callable(getattr(widget, "apply_data", None))
+
+
+def refresh_async(loader: BackgroundLoader, key: str, widget: QWidget) -> bool:
+    """
+    Obnoví widget: na pozadí s překryvem "Načítání...", pokud podporuje
+    fetch_data/apply_data, jinak synchronně přes refresh()
+
+    Returns:
+        True pokud bylo načítání spuštěno na pozadí
+    """
+    if not supports_background_load(widget):
+        if hasattr(widget, "refresh"):
+            widget.refresh()
+        return False
+
+    overlay = getattr(widget, "_loading_overlay", None)
+    if overlay is None:
+        overlay = LoadingOverlay(widget)
+        widget._loading_overlay = overlay
+
+    params = widget.load_params() if callable(getattr(widget, "load_params", None)) else None
+
+    def apply(data):
+        overlay.stop()
+        widget.apply_data(data)
+
+    overlay.start()
+    loader.load(key, widget.fetch_data, apply, params,
+                on_error=lambda _msg: overlay.stop(), on_cancel=overlay.stop)
+    return True
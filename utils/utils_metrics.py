@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Metriky (KPI) pro dashboardy Motoservis DMS
+Všechny karty za období i srovnávací období se počítají jedním dotazem
+na tabulku (podmíněná agregace SUM(CASE ...)), místo dvojice dotazů na kartu.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Tuple, Union
+
+from database_manager import db
+
+
+DateLike = Union[str, date, datetime]
+
+
+def _iso(value: DateLike) -> str:
+    """Datum jako 'YYYY-MM-DD'"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+def previous_period(date_from: DateLike, date_to: DateLike) -> Tuple[str, str]:
+    """Předchozí období stejné délky končící den před date_from"""
+    start = date.fromisoformat(_iso(date_from))
+    end = date.fromisoformat(_iso(date_to))
+    prev_to = start - timedelta(days=1)
+    prev_from = prev_to - (end - start)
+    return prev_from.isoformat(), prev_to.isoformat()
+
+
+# -----------------------
+# Výsledky
+# -----------------------
+@dataclass
+class Metric:
+    """Hodnota metriky za období a srovnávací období"""
+    current: float = 0.0
+    previous: float = 0.0
+
+    @property
+    def diff(self) -> float:
+        return self.current - self.previous
+
+    @property
+    def change_pct(self) -> float:
+        """Relativní změna v % (0, pokud předchozí období nemá data)"""
+        if not self.previous:
+            return 0.0
+        return (self.current - self.previous) / self.previous * 100
+
+
+def _ratio(numerator: Metric, denominator: Metric, scale: float = 1.0) -> Metric:
+    """Podíl dvou metrik po obdobích (0 při nulovém jmenovateli)"""
+    cur = numerator.current / denominator.current * scale if denominator.current else 0.0
+    prev = numerator.previous / denominator.previous * scale if denominator.previous else 0.0
+    return Metric(cur, prev)
+
+
+@dataclass
+class HomeStats:
+    """Karty úvodní obrazovky"""
+    active_orders: int = 0
+    waiting_orders: int = 0
+    completed_today: int = 0
+    customers_total: int = 0
+    vehicles_in_service: int = 0
+    stock_items: int = 0
+
+
+@dataclass
+class ManagementMetrics:
+    """Karty management dashboardu"""
+    period: Tuple[str, str]
+    previous_period: Tuple[str, str]
+    revenue: Metric = field(default_factory=Metric)
+    orders: Metric = field(default_factory=Metric)
+    material_cost: Metric = field(default_factory=Metric)
+    hours: Metric = field(default_factory=Metric)
+    mechanic_count: int = 0
+    warehouse_value: float = 0.0
+    low_stock_count: int = 0
+
+    @property
+    def avg_order(self) -> Metric:
+        return _ratio(self.revenue, self.orders)
+
+    @property
+    def margin(self) -> Metric:
+        """Marže v % (tržby - materiál) / tržby"""
+        profit = Metric(self.revenue.current - self.material_cost.current,
+                        self.revenue.previous - self.material_cost.previous)
+        return _ratio(profit, self.revenue, 100)
+
+
+@dataclass
+class InvoiceMetrics:
+    """Finanční metriky z faktur (reporty administrativy)"""
+    period: Tuple[str, str]
+    previous_period: Tuple[str, str]
+    revenue: Metric = field(default_factory=Metric)
+    costs: Metric = field(default_factory=Metric)
+    invoices_count: Metric = field(default_factory=Metric)
+    customers_count: Metric = field(default_factory=Metric)
+
+    @property
+    def profit(self) -> Metric:
+        return Metric(self.revenue.current - self.costs.current,
+                      self.revenue.previous - self.costs.previous)
+
+    @property
+    def margin(self) -> Metric:
+        return _ratio(self.profit, self.revenue, 100)
+
+    @property
+    def avg_invoice_value(self) -> Metric:
+        return _ratio(self.revenue, self.invoices_count)
+
+    def as_dict(self, previous: bool = False) -> dict:
+        """Hodnoty jednoho období ve tvaru, který používají šablony reportů"""
+        pick = (lambda m: m.previous) if previous else (lambda m: m.current)
+        return {
+            "revenue": pick(self.revenue),
+            "costs": pick(self.costs),
+            "profit": pick(self.profit),
+            "margin": pick(self.margin),
+            "invoices_count": int(pick(self.invoices_count)),
+            "customers_count": int(pick(self.customers_count)),
+            "avg_invoice_value": pick(self.avg_invoice_value),
+        }
+
+
+# -----------------------
+# Engine
+# -----------------------
+class MetricsEngine:
+    """Výpočet KPI - jeden dotaz s podmíněnou agregací na tabulku"""
+
+    # Stavy, které se na úvodní obrazovce nepočítají jako aktivní
+    CLOSED_STATUSES = ("dokončeno", "archiv")
+    WAITING_STATUS = "čeká na součástky"
+    CANCELLED_STATUS = "cancelled"
+
+    def home_stats(self) -> HomeStats:
+        """Karty úvodní obrazovky (3 dotazy místo 6)"""
+        stats = HomeStats()
+        closed = ", ".join("?" for _ in self.CLOSED_STATUSES)
+
+        row = db.fetch_one(f"""
+            SELECT
+                SUM(CASE WHEN status NOT IN ({closed}) THEN 1 ELSE 0 END),
+                SUM(CASE WHEN status = ? THEN 1 ELSE 0 END),
+                SUM(CASE WHEN DATE(completed_date) = DATE('now') THEN 1 ELSE 0 END),
+                COUNT(DISTINCT CASE WHEN status NOT IN ({closed}) THEN vehicle_id END)
+            FROM orders
+        """, self.CLOSED_STATUSES + (self.WAITING_STATUS,) + self.CLOSED_STATUSES)
+        if row:
+            stats.active_orders = row[0] or 0
+            stats.waiting_orders = row[1] or 0
+            stats.completed_today = row[2] or 0
+            stats.vehicles_in_service = row[3] or 0
+
+        row = db.fetch_one("SELECT COUNT(*) FROM customers")
+        if row:
+            stats.customers_total = row[0] or 0
+
+        row = db.fetch_one("SELECT COUNT(*) FROM warehouse WHERE quantity > 0")
+        if row:
+            stats.stock_items = row[0] or 0
+
+        return stats
+
+    def management_metrics(self, date_from: DateLike, date_to: DateLike) -> ManagementMetrics:
+        """Karty management dashboardu za období + předchozí období stejné délky"""
+        cur = (_iso(date_from), _iso(date_to))
+        prev = previous_period(*cur)
+        result = ManagementMetrics(period=cur, previous_period=prev)
+        both = (prev[0], cur[1])  # rozsah pro WHERE (využije index na datu)
+
+        # Zakázky: tržby, počet, materiál - obě období jedním průchodem
+        row = db.fetch_one("""
+            SELECT
+                SUM(CASE WHEN created_date BETWEEN ? AND ? THEN total_price ELSE 0 END),
+                SUM(CASE WHEN created_date BETWEEN ? AND ? THEN 1 ELSE 0 END),
+                SUM(CASE WHEN created_date BETWEEN ? AND ? THEN material_cost ELSE 0 END),
+                SUM(CASE WHEN created_date BETWEEN ? AND ? THEN total_price ELSE 0 END),
+                SUM(CASE WHEN created_date BETWEEN ? AND ? THEN 1 ELSE 0 END),
+                SUM(CASE WHEN created_date BETWEEN ? AND ? THEN material_cost ELSE 0 END)
+            FROM orders
+            WHERE created_date BETWEEN ? AND ?
+              AND status != ?
+        """, cur * 3 + prev * 3 + both + (self.CANCELLED_STATUS,))
+        if row:
+            result.revenue = Metric(row[0] or 0, row[3] or 0)
+            result.orders = Metric(row[1] or 0, row[4] or 0)
+            result.material_cost = Metric(row[2] or 0, row[5] or 0)
+
+        # Odpracované hodiny
+        row = db.fetch_one("""
+            SELECT
+                SUM(CASE WHEN date BETWEEN ? AND ? THEN hours_worked ELSE 0 END),
+                SUM(CASE WHEN date BETWEEN ? AND ? THEN hours_worked ELSE 0 END)
+            FROM order_work_log
+            WHERE date BETWEEN ? AND ?
+        """, cur + prev + both)
+        if row:
+            result.hours = Metric(row[0] or 0, row[1] or 0)
+
+        row = db.fetch_one("SELECT COUNT(*) FROM users WHERE role = 'mechanic' AND active = 1")
+        result.mechanic_count = row[0] if row else 0
+
+        # Sklad: hodnota a položky pod minimem jedním průchodem
+        row = db.fetch_one("""
+            SELECT
+                COALESCE(SUM(quantity * purchase_price), 0),
+                SUM(CASE WHEN quantity <= min_quantity THEN 1 ELSE 0 END)
+            FROM warehouse
+        """)
+        if row:
+            result.warehouse_value = row[0] or 0
+            result.low_stock_count = row[1] or 0
+
+        return result
+
+    def invoice_metrics(self, date_from: DateLike, date_to: DateLike) -> InvoiceMetrics:
+        """Finanční metriky z faktur za období + předchozí období stejné délky"""
+        cur = (_iso(date_from), _iso(date_to))
+        prev = previous_period(*cur)
+        result = InvoiceMetrics(period=cur, previous_period=prev)
+        both = (prev[0], cur[1])
+
+        paid = "status IN ('paid', 'partial')"
+        issued = "invoice_type = 'issued'"
+        received = "invoice_type = 'received'"
+        columns = []
+        params: tuple = ()
+        for period in (cur, prev):
+            in_period = "issue_date BETWEEN ? AND ?"
+            columns += [
+                f"SUM(CASE WHEN {in_period} AND {issued} AND {paid} THEN total_with_vat ELSE 0 END)",
+                f"SUM(CASE WHEN {in_period} AND {received} AND {paid} THEN total_with_vat ELSE 0 END)",
+                f"SUM(CASE WHEN {in_period} AND {issued} THEN 1 ELSE 0 END)",
+                f"COUNT(DISTINCT CASE WHEN {in_period} AND {issued} THEN customer_id END)",
+            ]
+            params += period * 4
+
+        row = db.fetch_one(f"""
+            SELECT {", ".join(columns)}
+            FROM invoices
+            WHERE issue_date BETWEEN ? AND ?
+        """, params + both)
+        if row:
+            result.revenue = Metric(row[0] or 0, row[4] or 0)
+            result.costs = Metric(row[1] or 0, row[5] or 0)
+            result.invoices_count = Metric(row[2] or 0, row[6] or 0)
+            result.customers_count = Metric(row[3] or 0, row[7] or 0)
+
+        return result
+
+
+# Globální instance
+metrics = MetricsEngine()
@@ -1,26 +1,116 @@
 # -*- coding: utf-8 -*-
 """
 Kontrola oprávnění: role → role_permissions, uživatelské výjimky → user_permissions.
+
+Matice oprávnění se drží v paměti (PermissionCache): role se načtou jedním
+dotazem, uživatel (role + výjimky) jedním dotazem při prvním dotazu na něj.
+has_permission je pak jen vyhledání v množině. Po uložení rolí, výjimek nebo
+uživatele je potřeba zavolat permission_cache.invalidate().
 """
+from typing import Dict, FrozenSet, Optional, Tuple
+
 from database_manager import db
 
+PermKey = Tuple[str, str]
+
+
+class PermissionCache:
+    """Oprávnění uživatelů v paměti {user_id: {(modul, akce), ...}}"""
+
+    def __init__(self):
+        self._permissions: Optional[Dict[int, PermKey]] = None
+        self._roles: Dict[str, FrozenSet[PermKey]] = {}
+        self._role_ids: Dict[int, FrozenSet[PermKey]] = {}
+        self._users: Dict[int, FrozenSet[PermKey]] = {}
+
+    def _load_roles(self):
+        """Seznam oprávnění a povolení všech rolí"""
+        self._permissions = {
+            row[0]: (row[1], row[2])
+            for row in db.fetch_all("SELECT id, module_id, action FROM permissions")
+        }
+        by_id: Dict[int, set] = {}
+        names: Dict[int, str] = {}
+        for role_id, name, permission_id, allowed in db.fetch_all("""
+            SELECT r.id, r.name, rp.permission_id, rp.allowed
+            FROM roles r
+            LEFT JOIN role_permissions rp ON rp.role_id = r.id
+        """):
+            names[role_id] = name
+            granted = by_id.setdefault(role_id, set())
+            key = self._permissions.get(permission_id)
+            if key and allowed == 1:
+                granted.add(key)
+
+        self._role_ids = {role_id: frozenset(keys) for role_id, keys in by_id.items()}
+        self._roles = {names[role_id]: keys for role_id, keys in self._role_ids.items()}
+
+    def _load_user(self, user_id: int) -> FrozenSet[PermKey]:
+        """Oprávnění role uživatele upravená jeho výjimkami"""
+        rows = db.fetch_all("""
+            SELECT u.role, up.permission_id, up.allowed
+            FROM users u
+            LEFT JOIN user_permissions up ON up.user_id = u.id
+            WHERE u.id = ?
+        """, (user_id,))
+
+        granted = set(self._roles.get(rows[0][0], ())) if rows and rows[0][0] else set()
+        # Výjimky mají přednost před rolí (platí i pro uživatele bez role)
+        for _, permission_id, allowed in rows:
+            key = self._permissions.get(permission_id)
+            if key is None:
+                continue
+            if allowed:
+                granted.add(key)
+            else:
+                granted.discard(key)
+
+        result = frozenset(granted)
+        self._users[user_id] = result
+        return result
+
+    def load(self, user_id: int) -> FrozenSet[PermKey]:
+        """Načte (znovu) oprávnění uživatele - volá se při přihlášení"""
+        self.invalidate()
+        return self.user_permissions(user_id)
+
+    def user_permissions(self, user_id: int) -> FrozenSet[PermKey]:
+        if self._permissions is None:
+            self._load_roles()
+        granted = self._users.get(user_id)
+        if granted is None:
+            granted = self._load_user(user_id)
+        return granted
+
+    def has_permission(self, user_id: int, module_id: str, action: str) -> bool:
+        return (module_id, action) in self.user_permissions(user_id)
+
+    def role_allows(self, role_id: int, module_id: str, action: str) -> bool:
+        """Povolení akce roli (bez uživatelských výjimek)"""
+        if self._permissions is None:
+            self._load_roles()
+        return (module_id, action) in self._role_ids.get(role_id, ())
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """
+        Zahodí načtená oprávnění
+
+        Args:
+            user_id: jen výjimky/role jednoho uživatele; None = celá matice
+                     (po změně rolí nebo jejich oprávnění)
+        """
+        if user_id is not None:
+            self._users.pop(user_id, None)
+            return
+        self._permissions = None
+        self._roles = {}
+        self._role_ids = {}
+        self._users = {}
+
+
+# Globální instance
+permission_cache = PermissionCache()
+
+
 def has_permission(user_id: int, module_id: str, action: str) -> bool:
-    perm = db.fetch_one("SELECT id FROM permissions WHERE module_id=? AND action=?", (module_id, action))
-    if not perm:
-        return False
-    pid = perm['id']
-
-    # Uživatelská výjimka?
-    up = db.fetch_one("SELECT allowed FROM user_permissions WHERE user_id=? AND permission_id=?", (user_id, pid))
-    if up is not None:
-        return bool(up['allowed'])
-
-    # Z role
-    u = db.fetch_one("SELECT role FROM users WHERE id=?", (user_id,))
-    if not u or not u['role']:
-        return False
-    role = db.fetch_one("SELECT id FROM roles WHERE name=?", (u['role'],))
-    if not role:
-        return False
-    rp = db.fetch_one("SELECT allowed FROM role_permissions WHERE role_id=? AND permission_id=?", (role['id'], pid))
-    return bool(rp and rp['allowed'] == 1)
+    return permission_cache.has_permission(user_id, module_id, action)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Rychlé globální vyhledávání pro horní lištu hlavního okna
+Dotazuje FTS5 index (db.global_search) - zákazníci, vozidla, zakázky, faktury, sklad
+"""
+
+from PyQt6.QtWidgets import QLineEdit, QCompleter
+from PyQt6.QtCore import Qt, QTimer, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QStandardItemModel, QStandardItem
+
+from database_manager import db
+
+
+# Ikona a modul hlavního okna pro každý typ výsledku
+SEARCH_ENTITIES = {
+    "customer": ("👥", "customers"),
+    "vehicle": ("🏍️", "vehicles"),
+    "order": ("📋", "orders"),
+    "invoice": ("🧾", "administration"),
+    "warehouse": ("📦", "warehouse"),
+}
+
+ENTITY_ROLE = Qt.ItemDataRole.UserRole
+ID_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class QuickSearchBox(QLineEdit):
+    """Vyhledávací pole s našeptávačem výsledků z globálního indexu"""
+
+    # entity, id záznamu, titulek výsledku
+    result_selected = pyqtSignal(str, int, str)
+
+    def __init__(self, parent=None, delay: int = 150, limit: int = 20):
+        super().__init__(parent)
+        self.limit = limit
+        self.setPlaceholderText("🔍 SPZ, VIN, telefon, zakázka, kód dílu...")
+        self.setClearButtonEnabled(True)
+        self.setMinimumWidth(320)
+
+        self.results_model = QStandardItemModel(self)
+        self._completer = QCompleter(self.results_model, self)
+        self._completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self._completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self._completer.setMaxVisibleItems(12)
+        self.setCompleter(self._completer)
+        self._completer.activated[QModelIndex].connect(self.on_result_activated)
+
+        # Debounce - dotaz až po krátké pauze v psaní
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay)
+        self._timer.timeout.connect(self.run_search)
+
+        self.textEdited.connect(lambda _: self._timer.start())
+        self.returnPressed.connect(self.open_first_result)
+
+    def run_search(self):
+        """Dotaz do FTS indexu a naplnění našeptávače"""
+        self.results_model.clear()
+        for result in db.global_search(self.text(), limit=self.limit):
+            icon = SEARCH_ENTITIES.get(result["entity"], ("🔎", None))[0]
+            item = QStandardItem(f"{icon}  {result['title']}")
+            item.setData(result["entity"], ENTITY_ROLE)
+            item.setData(int(result["id"]), ID_ROLE)
+            self.results_model.appendRow(item)
+
+        if self.results_model.rowCount():
+            self._completer.complete()
+        else:
+            self._completer.popup().hide()
+
+    def on_result_activated(self, index):
+        """Výběr výsledku z našeptávače"""
+        entity = index.data(ENTITY_ROLE)
+        record_id = index.data(ID_ROLE)
+        title = index.data(Qt.ItemDataRole.DisplayRole) or ""
+        if entity is None or record_id is None:
+            return
+        self._completer.popup().hide()
+        self.clear()
+        self.result_selected.emit(entity, int(record_id), title.split("  ", 1)[-1])
+
+    def open_first_result(self):
+        """Enter bez výběru otevře nejrelevantnější výsledek"""
+        self._timer.stop()
+        if not self.results_model.rowCount():
+            self.run_search()
+        if self.results_model.rowCount():
+            self.on_result_activated(self.results_model.index(0, 0))
@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+"""
+Opakující se události bez ukládání jednotlivých výskytů
+
+Pravidlo (calendar_recurring_rules) se rozvine až pro okno, které si pohled
+vyžádá (iterátor ve stylu RRULE). V calendar_events se ukládají jen výjimky:
+upravený výskyt je běžná událost s recurring_rule_id a recurrence_date
+(původní den výskytu), zrušený výskyt má navíc status 'cancelled'.
+Úprava pravidla se tak projeví okamžitě bez přegenerování řádků.
+
+    for occ in recurrence.expand(date(2025, 3, 1), date(2025, 3, 31)):
+        print(occ.day, occ.title)
+
+Rozvinutá okna se cachují, po změně pravidel nebo svátků je potřeba
+zavolat recurrence.invalidate().
+"""
+
+import calendar
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from database_manager import db
+
+
+# Výchozí hodnoty výskytu (odpovídají dřívějšímu generování 9:00-10:00)
+DEFAULT_START_TIME = "09:00"
+DEFAULT_DURATION_MINUTES = 60
+
+
+def _to_date(value) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _to_time(value) -> time:
+    try:
+        return time.fromisoformat(str(value or DEFAULT_START_TIME)[:5])
+    except ValueError:
+        return time.fromisoformat(DEFAULT_START_TIME)
+
+
+def _add_months(day: date, months: int, day_of_month: int) -> date:
+    """Den day_of_month v měsíci o months dál (oříznutý na konec měsíce)"""
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    return date(year, month + 1, min(day_of_month, calendar.monthrange(year, month + 1)[1]))
+
+
+# -----------------------
+# Pravidlo
+# -----------------------
+@dataclass
+class RecurrenceRule:
+    """Pravidlo opakování načtené z calendar_recurring_rules"""
+    id: int
+    name: str
+    frequency: str
+    interval: int
+    start_date: date
+    end_date: Optional[date] = None
+    count: Optional[int] = None
+    days_of_week: Tuple[int, ...] = ()
+    day_of_month: Optional[int] = None
+    skip_weekends: bool = False
+    skip_holidays: bool = False
+    custom_dates: FrozenSet[str] = frozenset()
+    start_time: time = field(default_factory=lambda: _to_time(DEFAULT_START_TIME))
+    duration_minutes: int = DEFAULT_DURATION_MINUTES
+    event_type: str = "service"
+    mechanic_id: Optional[int] = None
+    mechanic_name: Optional[str] = None
+    color: str = "#3498db"
+
+    @classmethod
+    def from_row(cls, row) -> "RecurrenceRule":
+        row = dict(row)
+        exceptions = json.loads(row.get("exceptions") or "{}")
+        days = json.loads(row.get("days_of_week") or "[]")
+        start = (_to_date(row.get("start_date")) or _to_date(row.get("created_at"))
+                 or date.today())
+        return cls(
+            id=row["id"],
+            name=row.get("name") or "Opakovaná událost",
+            frequency=row.get("frequency") or "daily",
+            interval=max(1, row.get("interval_value") or 1),
+            start_date=start,
+            end_date=_to_date(row.get("end_date")),
+            count=row.get("occurrence_count") or None,
+            days_of_week=tuple(sorted(int(d) for d in days)),
+            day_of_month=row.get("day_of_month") or None,
+            skip_weekends=bool(exceptions.get("skip_weekends")),
+            skip_holidays=bool(exceptions.get("skip_holidays")),
+            custom_dates=frozenset(exceptions.get("custom_dates") or ()),
+            start_time=_to_time(row.get("start_time")),
+            duration_minutes=row.get("duration_minutes") or DEFAULT_DURATION_MINUTES,
+            event_type=row.get("event_type") or "service",
+            mechanic_id=row.get("mechanic_id"),
+            mechanic_name=row.get("mechanic_name"),
+            color=row.get("color") or "#3498db",
+        )
+
+    # -----------------------
+    # Iterátor dnů
+    # -----------------------
+    def _candidates(self, from_day: date) -> Iterator[date]:
+        """
+        Dny podle frekvence od start_date (bez výjimek), vzestupně a nekonečně.
+        from_day přeskočí celé periody před oknem (jen bez occurrence_count).
+        """
+        start, step = self.start_date, self.interval
+        skip = max(0, (from_day - start).days)
+
+        if self.frequency == "weekdays":
+            day = start + timedelta(days=skip)
+            while True:
+                if day.weekday() < 5:
+                    yield day
+                day += timedelta(days=1)
+
+        elif self.frequency == "weekly":
+            week0 = start - timedelta(days=start.weekday())
+            weekdays = self.days_of_week or (start.weekday(),)
+            n = skip // (7 * step)
+            while True:
+                week = week0 + timedelta(weeks=n * step)
+                for wd in weekdays:
+                    day = week + timedelta(days=wd)
+                    if day >= start:
+                        yield day
+                n += 1
+
+        elif self.frequency == "monthly":
+            dom = self.day_of_month or start.day
+            n = ((from_day.year - start.year) * 12 + from_day.month - start.month) // step
+            n = max(0, n - 1)
+            while True:
+                day = _add_months(start.replace(day=1), n * step, dom)
+                if day >= start:
+                    yield day
+                n += 1
+
+        elif self.frequency == "yearly":
+            n = max(0, (from_day.year - start.year) // step - 1)
+            while True:
+                day = _add_months(start.replace(day=1), n * step * 12, start.day)
+                yield day
+                n += 1
+
+        else:
+            # daily / custom
+            n = -(-skip // step)
+            while True:
+                yield start + timedelta(days=n * step)
+                n += 1
+
+    def dates(self, day_from: date, day_to: date, holidays: FrozenSet[str] = frozenset()) -> List[date]:
+        """Dny výskytů v okně day_from..day_to (včetně) po uplatnění výjimek"""
+        last = min(day_to, self.end_date) if self.end_date else day_to
+        # S omezeným počtem výskytů je nutné počítat od začátku pravidla
+        first = self.start_date if self.count else max(day_from, self.start_date)
+        result = []
+        seen = 0
+        for day in self._candidates(first):
+            if day > last:
+                break
+            iso = day.isoformat()
+            if ((self.skip_weekends and day.weekday() >= 5)
+                    or (self.skip_holidays and iso in holidays)
+                    or iso in self.custom_dates):
+                continue
+            seen += 1
+            if self.count and seen > self.count:
+                break
+            if day >= day_from:
+                result.append(day)
+        return result
+
+
+@dataclass
+class Occurrence:
+    """Výskyt pravidla v konkrétní den (neuložený v databázi)"""
+    rule: RecurrenceRule
+    day: date
+    virtual_id: int = 0
+
+    @property
+    def start(self) -> datetime:
+        return datetime.combine(self.day, self.rule.start_time)
+
+    @property
+    def end(self) -> datetime:
+        return self.start + timedelta(minutes=self.rule.duration_minutes)
+
+    @property
+    def title(self) -> str:
+        return f"{self.rule.name} (opakující se)"
+
+    def as_event(self) -> dict:
+        """Výskyt ve tvaru řádku calendar_events pro pohledy kalendáře"""
+        return {
+            "id": self.virtual_id,
+            "title": self.title,
+            "description": "",
+            "notes": "",
+            "event_type": self.rule.event_type,
+            "start_datetime": self.start.isoformat(),
+            "end_datetime": self.end.isoformat(),
+            "all_day": 0,
+            "customer_id": None,
+            "vehicle_id": None,
+            "order_id": None,
+            "mechanic_id": self.rule.mechanic_id,
+            "priority": 2,
+            "color": self.rule.color,
+            "status": "scheduled",
+            "reminder_minutes": None,
+            "customer_name": None,
+            "customer_phone": None,
+            "customer_email": None,
+            "vehicle_info": None,
+            "license_plate": None,
+            "mechanic_name": self.rule.mechanic_name,
+            "recurring_rule_id": self.rule.id,
+            "recurrence_date": self.day.isoformat(),
+            "created_at": None,
+            "updated_at": None,
+        }
+
+
+# -----------------------
+# Rozvinutí pro pohledy
+# -----------------------
+class RecurrenceExpander:
+    """Rozvinutí pravidel pro okna pohledů (cache oken + výjimky z calendar_events)"""
+
+    # Počet cachovaných oken (měsíc/týden/den pohledů, kapacita)
+    WINDOW_CACHE_SIZE = 32
+
+    def __init__(self):
+        self._rules: Optional[Dict[int, RecurrenceRule]] = None
+        self._holidays: Optional[FrozenSet[str]] = None
+        self._windows: "OrderedDict[Tuple[date, date], List[Occurrence]]" = OrderedDict()
+        # Výskyty nemají id v databázi - dostanou záporné id (stabilní během běhu)
+        self._virtual_ids: Dict[Tuple[int, date], int] = {}
+        self._virtual_keys: Dict[int, Tuple[int, date]] = {}
+
+    def invalidate(self):
+        """Zahodí načtená pravidla, svátky i rozvinutá okna"""
+        self._rules = None
+        self._holidays = None
+        self._windows.clear()
+
+    def rules(self) -> Dict[int, RecurrenceRule]:
+        if self._rules is None:
+            try:
+                rows = db.fetch_all("""
+                    SELECT r.*, u.full_name AS mechanic_name
+                    FROM calendar_recurring_rules r
+                    LEFT JOIN users u ON u.id = r.mechanic_id
+                """)
+                self._rules = {row["id"]: RecurrenceRule.from_row(row) for row in rows}
+            except Exception as e:
+                print(f"Chyba při načítání pravidel opakování: {e}")
+                self._rules = {}
+        return self._rules
+
+    def holidays(self) -> FrozenSet[str]:
+        """Zavírací dny dílny (jeden dotaz za běh, ne pro každý výskyt)"""
+        if self._holidays is None:
+            rows = db.fetch_all("SELECT holiday_date FROM calendar_holidays WHERE is_closed = 1")
+            self._holidays = frozenset(row[0] for row in rows)
+        return self._holidays
+
+    def _virtual_id(self, rule_id: int, day: date) -> int:
+        key = (rule_id, day)
+        vid = self._virtual_ids.get(key)
+        if vid is None:
+            vid = -(len(self._virtual_ids) + 1)
+            self._virtual_ids[key] = vid
+            self._virtual_keys[vid] = key
+        return vid
+
+    def occurrences(self, day_from: date, day_to: date) -> List[Occurrence]:
+        """Všechny výskyty pravidel v okně (bez ohledu na uložené výjimky)"""
+        key = (day_from, day_to)
+        cached = self._windows.get(key)
+        if cached is not None:
+            self._windows.move_to_end(key)
+            return cached
+
+        holidays = self.holidays()
+        result = [
+            Occurrence(rule, day, self._virtual_id(rule.id, day))
+            for rule in self.rules().values()
+            for day in rule.dates(day_from, day_to, holidays)
+        ]
+        result.sort(key=lambda occ: occ.start)
+
+        self._windows[key] = result
+        if len(self._windows) > self.WINDOW_CACHE_SIZE:
+            self._windows.popitem(last=False)
+        return result
+
+    def overridden(self, day_from: date, day_to: date) -> Set[Tuple[int, str]]:
+        """Výskyty nahrazené uloženou událostí {(rule_id, 'YYYY-MM-DD')}"""
+        rows = db.fetch_all("""
+            SELECT recurring_rule_id, recurrence_date
+            FROM calendar_events
+            WHERE recurring_rule_id IS NOT NULL
+              AND recurrence_date >= ? AND recurrence_date <= ?
+        """, (day_from.isoformat(), day_to.isoformat()))
+        return {(row[0], row[1]) for row in rows}
+
+    def expand(self, day_from: date, day_to: date, mechanic_id: Optional[int] = None,
+               event_type: Optional[str] = None) -> List[Occurrence]:
+        """Výskyty k zobrazení: bez uložených výjimek, volitelně filtrované"""
+        occurrences = self.occurrences(day_from, day_to)
+        if not occurrences:
+            return []
+        overridden = self.overridden(day_from, day_to)
+        return [
+            occ for occ in occurrences
+            if (occ.rule.id, occ.day.isoformat()) not in overridden
+            and (not mechanic_id or occ.rule.mechanic_id == mechanic_id)
+            and (not event_type or occ.rule.event_type == event_type)
+        ]
+
+    def expand_events(self, day_from: date, day_to: date, mechanic_id: Optional[int] = None,
+                      event_type: Optional[str] = None) -> List[dict]:
+        """Výskyty jako řádky calendar_events (exporty, seznam, reporty)"""
+        return [occ.as_event() for occ in self.expand(day_from, day_to, mechanic_id, event_type)]
+
+    def upcoming(self, rule_id: int, day_from: date, limit: int = 10,
+                 horizon_days: int = 366) -> List[date]:
+        """Nejbližší dny výskytů jednoho pravidla (náhled)"""
+        rule = self.rules().get(rule_id)
+        if rule is None:
+            return []
+        days = rule.dates(day_from, day_from + timedelta(days=horizon_days), self.holidays())
+        return days[:limit]
+
+    # -----------------------
+    # Výjimky
+    # -----------------------
+    def occurrence_event(self, event_id: int) -> Optional[dict]:
+        """
+        Data výskytu (záporné id) pro editační dialog - nic se neukládá,
+        výjimka vznikne až při uložení (materialize)
+        """
+        key = self._virtual_keys.get(event_id)
+        if key is None:
+            return None
+        rule_id, day = key
+        rule = self.rules().get(rule_id)
+        if rule is None:
+            return None
+        return Occurrence(rule, day).as_event()
+
+    def materialize(self, event_id: int) -> Optional[int]:
+        """
+        Uloží výskyt jako výjimku (událost v calendar_events) a vrátí její id.
+        Kladné id je už uložená událost a vrací se beze změny.
+        """
+        if event_id is None or event_id >= 0:
+            return event_id
+        key = self._virtual_keys.get(event_id)
+        if key is None:
+            return None
+        rule_id, day = key
+
+        existing = db.fetch_one("""
+            SELECT id FROM calendar_events
+            WHERE recurring_rule_id = ? AND recurrence_date = ?
+        """, (rule_id, day.isoformat()))
+        if existing:
+            return existing[0]
+
+        rule = self.rules().get(rule_id)
+        if rule is None:
+            return None
+        event = Occurrence(rule, day).as_event()
+        now = datetime.now().isoformat()
+        data = {
+            "title": event["title"],
+            "event_type": event["event_type"],
+            "start_datetime": event["start_datetime"],
+            "end_datetime": event["end_datetime"],
+            "all_day": 0,
+            "recurring_rule_id": rule_id,
+            "recurrence_date": event["recurrence_date"],
+            "mechanic_id": event["mechanic_id"],
+            "priority": event["priority"],
+            "color": event["color"],
+            "status": "scheduled",
+            "created_at": now,
+            "updated_at": now,
+        }
+        columns = ", ".join(data.keys())
+        placeholders = ", ".join("?" for _ in data)
+        with db.transaction():
+            db.execute_query(f"INSERT INTO calendar_events ({columns}) VALUES ({placeholders})",
+                             tuple(data.values()))
+            return db.cursor.lastrowid
+
+    def count_overrides(self, rule_id: int) -> int:
+        row = db.fetch_one("SELECT COUNT(*) FROM calendar_events WHERE recurring_rule_id = ?",
+                           (rule_id,))
+        return row[0] if row else 0
+
+
+# Globální instance
+recurrence = RecurrenceExpander()
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Časové řady pro management (trendy, sezónnost, predikce)
+Čte tabulky order_rollups_daily / order_rollups_monthly / mechanic_rollups_daily,
+které udržují triggery (database_manager.ensure_order_rollups). Dotazy jdou přes
+desítky až stovky řádků souhrnů bez ohledu na délku historie zakázek.
+
+- RollupEngine.series(): obrat, počty, materiál, práce po dnech/týdnech/měsících/kvartálech
+- RollupEngine.totals() / by_type() / month_of_year() / weekday_orders()
+- RollupEngine.mechanic_hours(): hodiny mechaniků po obdobích
+- linear_fit / linear_forecast / moving_average / growth_rates: výpočty nad řadami
+"""
+
+import calendar
+import statistics
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from database_manager import db
+
+
+DateLike = Union[str, date, datetime]
+
+# Stavy zrušených zakázek (v datech se vyskytují obě varianty)
+CANCELLED_STATUSES = ("Zrušeno", "cancelled")
+
+# Výraz období nad sloupcem dne / měsíce souhrnu
+_DAY_PERIODS = {
+    "day": "day",
+    "week": "strftime('%Y-%W', day)",
+    "month": "substr(day, 1, 7)",
+    "quarter": "substr(day, 1, 4) || '-Q' || ((CAST(substr(day, 6, 2) AS INTEGER) + 2) / 3)",
+    "year": "substr(day, 1, 4)",
+}
+_MONTH_PERIODS = {
+    "month": "month",
+    "quarter": "substr(month, 1, 4) || '-Q' || ((CAST(substr(month, 6, 2) AS INTEGER) + 2) / 3)",
+    "year": "substr(month, 1, 4)",
+}
+
+_SUMS = """SUM(orders), SUM(revenue), SUM(material_cost), SUM(parts), SUM(labor), SUM(external)"""
+
+
+def _iso(value: Optional[DateLike]) -> Optional[str]:
+    """Datum jako 'YYYY-MM-DD' (QDate přes toString, None zůstává)"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "toString"):
+        return value.toString("yyyy-MM-dd")
+    return str(value)[:10]
+
+
+def months_ago(months: int, today: Optional[date] = None) -> str:
+    """Datum před N měsíci (jako SQLite date('now', '-N months'), den oříznutý na konec měsíce)"""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - months
+    year, month = divmod(index, 12)
+    day = min(today.day, calendar.monthrange(year, month + 1)[1])
+    return date(year, month + 1, day).isoformat()
+
+
+def days_ago(days: int, today: Optional[date] = None) -> str:
+    return ((today or date.today()) - timedelta(days=days)).isoformat()
+
+
+# -----------------------
+# Výsledky
+# -----------------------
+@dataclass
+class Bucket:
+    """Souhrn zakázek za období"""
+    period: str = ""
+    orders: int = 0
+    revenue: float = 0.0
+    material_cost: float = 0.0
+    parts: float = 0.0
+    labor: float = 0.0
+    external: float = 0.0
+
+    @classmethod
+    def from_row(cls, row) -> "Bucket":
+        period, *values = row
+        return cls(str(period) if period is not None else "", *(v or 0 for v in values))
+
+    @property
+    def avg_value(self) -> float:
+        return self.revenue / self.orders if self.orders else 0.0
+
+    @property
+    def profit(self) -> float:
+        """Hrubý zisk (obrat - materiál)"""
+        return self.revenue - self.material_cost
+
+    @property
+    def margin(self) -> float:
+        """Marže v % z obratu"""
+        return self.profit / self.revenue * 100 if self.revenue else 0.0
+
+
+# -----------------------
+# Engine
+# -----------------------
+class RollupEngine:
+    """Dotazy nad časovými souhrny zakázek a hodin mechaniků"""
+
+    def _status_filter(self, exclude_cancelled: bool) -> Tuple[str, tuple]:
+        if not exclude_cancelled:
+            return "", ()
+        marks = ", ".join("?" for _ in CANCELLED_STATUSES)
+        return f" AND status NOT IN ({marks})", CANCELLED_STATUSES
+
+    def _use_monthly(self, granularity: str, date_from: Optional[str], date_to: Optional[str]) -> bool:
+        """Měsíční tabulka stačí, pokud období začíná/končí na hranici měsíce"""
+        if granularity not in _MONTH_PERIODS:
+            return False
+        if date_from and not date_from.endswith("-01"):
+            return False
+        if date_to:
+            d = date.fromisoformat(date_to)
+            if d.day != calendar.monthrange(d.year, d.month)[1]:
+                return False
+        return True
+
+    def _query(self, period_sql: Optional[str], date_from: Optional[DateLike],
+               date_to: Optional[DateLike], granularity: str, exclude_cancelled: bool) -> list:
+        date_from, date_to = _iso(date_from), _iso(date_to)
+        if self._use_monthly(granularity, date_from, date_to):
+            table, column = "order_rollups_monthly", "month"
+            period = period_sql or _MONTH_PERIODS[granularity]
+            bounds = (date_from[:7] if date_from else None, date_to[:7] if date_to else None)
+        else:
+            table, column = "order_rollups_daily", "day"
+            period = period_sql or _DAY_PERIODS[granularity]
+            bounds = (date_from, date_to)
+
+        where = "WHERE 1 = 1"
+        params: tuple = ()
+        if bounds[0]:
+            where += f" AND {column} >= ?"
+            params += (bounds[0],)
+        if bounds[1]:
+            where += f" AND {column} <= ?"
+            params += (bounds[1],)
+        status_sql, status_params = self._status_filter(exclude_cancelled)
+        where += status_sql
+        params += status_params
+
+        return db.fetch_all(f"""
+            SELECT {period} AS period, {_SUMS}
+            FROM {table}
+            {where}
+            GROUP BY period
+            ORDER BY period
+        """, params)
+
+    def series(self, granularity: str = "month", date_from: Optional[DateLike] = None,
+               date_to: Optional[DateLike] = None, exclude_cancelled: bool = True) -> List[Bucket]:
+        """
+        Souhrny po obdobích
+
+        Args:
+            granularity: 'day' / 'week' / 'month' / 'quarter' / 'year'
+            date_from, date_to: rozsah dnů (včetně); None = bez omezení
+        """
+        if granularity not in _DAY_PERIODS:
+            raise ValueError(f"Neznámá granularita: {granularity}")
+        rows = self._query(None, date_from, date_to, granularity, exclude_cancelled)
+        return [Bucket.from_row(row) for row in rows]
+
+    def totals(self, date_from: Optional[DateLike] = None, date_to: Optional[DateLike] = None,
+               exclude_cancelled: bool = True) -> Bucket:
+        """Součet za celé období"""
+        rows = self._query("''", date_from, date_to, "month", exclude_cancelled)
+        return Bucket.from_row(rows[0]) if rows else Bucket()
+
+    def by_type(self, date_from: Optional[DateLike] = None, date_to: Optional[DateLike] = None,
+                exclude_cancelled: bool = True) -> List[Bucket]:
+        """Souhrny podle typu zakázky (period = typ)"""
+        rows = self._query("order_type", date_from, date_to, "month", exclude_cancelled)
+        return [Bucket.from_row(row) for row in rows]
+
+    def month_of_year(self, exclude_cancelled: bool = True) -> List[Bucket]:
+        """Souhrny podle měsíce v roce přes celou historii (period = '1'..'12')"""
+        rows = self._query("CAST(substr(month, 6, 2) AS INTEGER)", None, None, "month",
+                           exclude_cancelled)
+        return sorted((Bucket.from_row(row) for row in rows), key=lambda b: int(b.period))
+
+    def weekday_orders(self, exclude_cancelled: bool = True) -> Dict[int, int]:
+        """Počet zakázek podle dne v týdnu (0 = neděle, jako strftime('%w'))"""
+        rows = self._query("CAST(strftime('%w', day) AS INTEGER)", None, None, "day",
+                           exclude_cancelled)
+        return {int(row[0]): row[1] or 0 for row in rows}
+
+    def mechanic_hours(self, granularity: str = "month", date_from: Optional[DateLike] = None,
+                       date_to: Optional[DateLike] = None,
+                       user_id: Optional[int] = None) -> List[Tuple[str, float, int]]:
+        """Hodiny mechaniků po obdobích: [(období, hodiny, počet mechaniků)]"""
+        where = "WHERE 1 = 1"
+        params: tuple = ()
+        if date_from is not None:
+            where += " AND day >= ?"
+            params += (_iso(date_from),)
+        if date_to is not None:
+            where += " AND day <= ?"
+            params += (_iso(date_to),)
+        if user_id is not None:
+            where += " AND user_id = ?"
+            params += (user_id,)
+        rows = db.fetch_all(f"""
+            SELECT {_DAY_PERIODS[granularity]} AS period, SUM(hours), COUNT(DISTINCT user_id)
+            FROM mechanic_rollups_daily
+            {where}
+            GROUP BY period
+            ORDER BY period
+        """, params)
+        return [(row[0], row[1] or 0.0, row[2] or 0) for row in rows]
+
+    def hours_by_mechanic(self, date_from: DateLike, date_to: DateLike) -> Dict[int, float]:
+        """Hodiny za období po mechanicích {user_id: hodiny}"""
+        rows = db.fetch_all("""
+            SELECT user_id, SUM(hours)
+            FROM mechanic_rollups_daily
+            WHERE day BETWEEN ? AND ?
+            GROUP BY user_id
+        """, (_iso(date_from), _iso(date_to)))
+        return {row[0]: row[1] or 0.0 for row in rows}
+
+    def total_hours(self, date_from: DateLike, date_to: DateLike) -> float:
+        row = db.fetch_one("SELECT COALESCE(SUM(hours), 0) FROM mechanic_rollups_daily WHERE day BETWEEN ? AND ?",
+                           (_iso(date_from), _iso(date_to)))
+        return row[0] if row else 0.0
+
+
+# -----------------------
+# Trend a predikce
+# -----------------------
+def linear_fit(values: Sequence[float]) -> Tuple[float, float]:
+    """Lineární regrese y = slope * x + intercept pro x = 0..n-1"""
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0
+    if n == 1:
+        return 0.0, float(values[0])
+    slope, intercept = statistics.linear_regression(range(n), values)
+    return slope, intercept
+
+
+def linear_forecast(values: Sequence[float], periods: int) -> List[float]:
+    """Predikce dalších period podle lineárního trendu (záporné hodnoty = 0)"""
+    slope, intercept = linear_fit(values)
+    n = len(values)
+    return [max(0.0, slope * i + intercept) for i in range(n, n + periods)]
+
+
+def moving_average(values: Sequence[float], window: int = 3) -> List[float]:
+    """Klouzavý průměr; prvních window-1 hodnot zůstává beze změny"""
+    result = list(values[:window - 1])
+    running = sum(values[:window - 1])
+    for i in range(window - 1, len(values)):
+        running += values[i]
+        result.append(running / window)
+        running -= values[i - window + 1]
+    return result
+
+
+def growth_rates(values: Sequence[float]) -> List[float]:
+    """Meziobdobní růst v % (první období 0)"""
+    rates = [0.0] if values else []
+    for prev, cur in zip(values, values[1:]):
+        rates.append((cur - prev) / prev * 100 if prev > 0 else 0.0)
+    return rates
+
+
+def coefficient_of_variation(values: Sequence[float]) -> float:
+    """Variační koeficient (směrodatná odchylka / průměr)"""
+    if not values:
+        return 0.0
+    mean = statistics.fmean(values)
+    return statistics.pstdev(values) / mean if mean > 0 else 0.0
+
+
+# Globální instance
+rollups = RollupEngine()
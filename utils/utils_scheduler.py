@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+Plánovač připomínek a upozornění (jedna služba pro celou aplikaci)
+- Zdroje: připomínky kalendáře, připomínky vozidel, konec STK / pojištění
+  všech vozidel, splatnost faktur a položky skladu pod minimem
+- Položky s budoucím časem upozornění čekají v haldě (heapq) podle notify_at;
+  jediný QTimer se nastaví na nejbližší položku (nejpozději na půlnoc) -
+  žádné pravidelné dotazování
+- Dotazy běží na pozadí (BackgroundLoader), jen přes indexované sloupce
+  a jen do horizontu HORIZON_DAYS; o půlnoci se vše znovu načte
+- Po změně dat modul zavolá reminder_scheduler.refresh(zdroj[, id]) -
+  načte se jen daný zdroj (případně jeden záznam)
+
+Signály:
+    item_due(ScheduledItem)  - položka právě dosáhla času upozornění (každá jednou)
+    summary_changed(dict)    - počty aktivních upozornění podle druhu
+    day_changed()            - přechod přes půlnoc (přepočet "dnes / zítra")
+"""
+
+import heapq
+import itertools
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from database_manager import db
+from utils.utils_loader import BackgroundLoader
+
+# Jak daleko dopředu se položky načítají (dál je pokryje půlnoční načtení)
+HORIZON_DAYS = 60
+# Kolik dní předem upozornit na konec STK / pojištění
+VEHICLE_NOTIFY_DAYS = 30
+# Výchozí předstih u připomínek vozidel bez notify_days_before
+REMINDER_NOTIFY_DAYS = 7
+# Nejdelší předstih připomínky vozidla (mez dotazu přes index due_date)
+MAX_NOTIFY_DAYS = 365
+
+# Druhy upozornění
+CALENDAR = "calendar"
+VEHICLE_REMINDER = "vehicle_reminder"
+STK = "stk"
+INSURANCE = "insurance"
+INVOICE = "invoice"
+STOCK = "stock"
+
+KIND_LABELS = {
+    CALENDAR: "📅 Připomínka",
+    VEHICLE_REMINDER: "🔔 Připomínka vozidla",
+    STK: "🚗 Konec STK",
+    INSURANCE: "🛡️ Konec pojištění",
+    INVOICE: "💰 Splatnost faktury",
+    STOCK: "📦 Sklad pod minimem",
+}
+
+
+@dataclass
+class ScheduledItem:
+    """Jedno upozornění plánovače"""
+    kind: str
+    ref_id: int                      # ID záznamu ve zdrojové tabulce
+    title: str
+    notify_at: datetime              # kdy upozornit
+    due_date: Optional[date] = None  # termín (None = stavové upozornění, např. sklad)
+    vehicle_id: Optional[int] = None
+    detail: str = ""
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return self.kind, self.ref_id
+
+    def days_left(self, today: Optional[date] = None) -> Optional[int]:
+        if self.due_date is None:
+            return None
+        return (self.due_date - (today or date.today())).days
+
+    def text(self) -> str:
+        """Text pro zobrazení (typ, název, zbývající dny)"""
+        days = self.days_left()
+        if days is None:
+            when = ""
+        elif days < 0:
+            when = f" - {abs(days)} dní po termínu"
+        elif days == 0:
+            when = " - dnes"
+        else:
+            when = f" - za {days} dní ({self.due_date.strftime('%d.%m.%Y')})"
+        return f"{KIND_LABELS.get(self.kind, self.kind)}: {self.title}{when}"
+
+
+# -----------------------
+# Zdroje (běží v pracovním vlákně)
+# -----------------------
+def _parse_date(value) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        day = _parse_date(value)
+        return datetime.combine(day, time.min) if day else None
+
+
+def _columns(table: str) -> set:
+    return {row[1] for row in db.fetch_all(f"PRAGMA table_info({table})")}
+
+
+def _id_filter(column: str, ref_id: Optional[int]) -> Tuple[str, tuple]:
+    return (f" AND {column} = ?", (ref_id,)) if ref_id is not None else ("", ())
+
+
+def _fetch_calendar(horizon: date, ref_id: Optional[int]) -> List[ScheduledItem]:
+    extra, params = _id_filter("r.id", ref_id)
+    rows = db.fetch_all(f"""
+        SELECT r.id, r.remind_at, COALESCE(r.title, e.title, 'Připomínka') AS title,
+               e.vehicle_id
+        FROM calendar_reminders r
+        LEFT JOIN calendar_events e ON e.id = r.event_id
+        WHERE r.sent = 0 AND r.remind_at < ?{extra}
+    """, (horizon.isoformat(),) + params)
+    items = []
+    for row in rows:
+        notify_at = _parse_datetime(row["remind_at"])
+        if notify_at is not None:
+            items.append(ScheduledItem(CALENDAR, row["id"], row["title"], notify_at,
+                                       notify_at.date(), row["vehicle_id"]))
+    return items
+
+
+def _fetch_vehicle_reminders(horizon: date, ref_id: Optional[int]) -> List[ScheduledItem]:
+    columns = _columns("vehicle_reminders")
+    extra, params = _id_filter("id", ref_id)
+    if "due_date" in columns:
+        rows = db.fetch_all(f"""
+            SELECT id, vehicle_id, title, due_date, status, snoozed_until,
+                   COALESCE(notify_days_before, {REMINDER_NOTIFY_DAYS}) AS notify_days
+            FROM vehicle_reminders
+            WHERE status IN ('active', 'snoozed') AND due_date IS NOT NULL
+              AND due_date < ?{extra}
+        """, ((horizon + timedelta(days=MAX_NOTIFY_DAYS)).isoformat(),) + params)
+    elif "reminder_date" in columns:
+        # Starší schéma (reminder_date, is_completed)
+        rows = db.fetch_all(f"""
+            SELECT id, vehicle_id, COALESCE(description, reminder_type) AS title,
+                   reminder_date AS due_date, 'active' AS status, NULL AS snoozed_until,
+                   {REMINDER_NOTIFY_DAYS} AS notify_days
+            FROM vehicle_reminders
+            WHERE COALESCE(is_completed, 0) = 0 AND reminder_date IS NOT NULL
+              AND reminder_date < DATE(?, '+{REMINDER_NOTIFY_DAYS} days'){extra}
+        """, (horizon.isoformat(),) + params)
+    else:
+        return []
+
+    items = []
+    for row in rows:
+        due = _parse_date(row["due_date"])
+        if due is None:
+            continue
+        notify_day = due - timedelta(days=row["notify_days"] or 0)
+        snoozed = _parse_date(row["snoozed_until"]) if row["status"] == "snoozed" else None
+        if snoozed is not None:
+            notify_day = max(notify_day, snoozed)
+        items.append(ScheduledItem(VEHICLE_REMINDER, row["id"], row["title"] or "Připomínka",
+                                   datetime.combine(notify_day, time.min), due, row["vehicle_id"]))
+    return items
+
+
+def _fetch_vehicles(horizon: date, ref_id: Optional[int]) -> List[ScheduledItem]:
+    limit = (horizon + timedelta(days=VEHICLE_NOTIFY_DAYS)).isoformat()
+    extra, params = _id_filter("id", ref_id)
+    items = []
+    for kind, column in ((STK, "stk_valid_until"), (INSURANCE, "insurance_valid_until")):
+        rows = db.fetch_all(f"""
+            SELECT id, brand || ' ' || model || ' (' || COALESCE(license_plate, '') || ')' AS title,
+                   {column} AS valid_until
+            FROM vehicles
+            WHERE {column} IS NOT NULL AND {column} < ?
+              AND COALESCE(is_active, 1) = 1{extra}
+        """, (limit,) + params)
+        for row in rows:
+            due = _parse_date(row["valid_until"])
+            if due is not None:
+                notify_at = datetime.combine(due - timedelta(days=VEHICLE_NOTIFY_DAYS), time.min)
+                items.append(ScheduledItem(kind, row["id"], row["title"], notify_at, due, row["id"]))
+    return items
+
+
+def _fetch_invoices(horizon: date, ref_id: Optional[int]) -> List[ScheduledItem]:
+    extra, params = _id_filter("id", ref_id)
+    rows = db.fetch_all(f"""
+        SELECT id, invoice_number, due_date, total_with_vat, paid_amount
+        FROM invoices
+        WHERE due_date IS NOT NULL AND due_date < ?
+          AND status NOT IN ('paid', 'cancelled'){extra}
+    """, (horizon.isoformat(),) + params)
+    items = []
+    for row in rows:
+        due = _parse_date(row["due_date"])
+        if due is None:
+            continue
+        remaining = (row["total_with_vat"] or 0) - (row["paid_amount"] or 0)
+        items.append(ScheduledItem(INVOICE, row["id"], f"Faktura {row['invoice_number']}",
+                                   datetime.combine(due, time.min), due,
+                                   detail=f"Zbývá uhradit {remaining:,.2f} Kč".replace(",", " ")))
+    return items
+
+
+def _fetch_stock(horizon: date, ref_id: Optional[int]) -> List[ScheduledItem]:
+    extra, params = _id_filter("id", ref_id)
+    # Podmínka odpovídá částečnému indexu idx_warehouse_below_min
+    rows = db.fetch_all(f"""
+        SELECT id, name, quantity, min_quantity, unit
+        FROM warehouse
+        WHERE quantity < min_quantity{extra}
+    """, params)
+    now = datetime.now()
+    return [
+        ScheduledItem(STOCK, row["id"], row["name"], now,
+                      detail=f"{row['quantity'] or 0:g} / min. {row['min_quantity'] or 0:g} {row['unit'] or ''}".strip())
+        for row in rows
+    ]
+
+
+# Zdroj -> (funkce načtení, druhy položek, které zdroj vytváří)
+SOURCES: Dict[str, Tuple[Callable[[date, Optional[int]], List[ScheduledItem]], Tuple[str, ...]]] = {
+    "calendar": (_fetch_calendar, (CALENDAR,)),
+    "vehicle_reminders": (_fetch_vehicle_reminders, (VEHICLE_REMINDER,)),
+    "vehicles": (_fetch_vehicles, (STK, INSURANCE)),
+    "invoices": (_fetch_invoices, (INVOICE,)),
+    "stock": (_fetch_stock, (STOCK,)),
+}
+
+
+# -----------------------
+# Plánovač
+# -----------------------
+class ReminderScheduler(QObject):
+    """Halda nejbližších upozornění + jeden časovač"""
+
+    item_due = pyqtSignal(object)        # ScheduledItem
+    summary_changed = pyqtSignal(dict)   # {druh: počet aktivních upozornění}
+    day_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loader = BackgroundLoader(self)
+        self._heap: List[Tuple[datetime, int, ScheduledItem]] = []
+        self._sequence = itertools.count()
+        self._due: Dict[Tuple[str, int], ScheduledItem] = {}
+        self._announced = set()
+        self._loaded = set()
+        self._today = date.today()
+        self._started = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._wake)
+
+    # -----------------------
+    # Načítání
+    # -----------------------
+    def start(self):
+        """Načte všechny zdroje a začne plánovat (volá se jednou po startu)"""
+        self._started = True
+        self.reload()
+
+    def reload(self):
+        for source in SOURCES:
+            self.refresh(source)
+
+    def refresh(self, source: str, ref_id: Optional[int] = None):
+        """Znovu načte zdroj (nebo jeden jeho záznam) po změně dat"""
+        if not self._started or source not in SOURCES:
+            return
+        fetch, _ = SOURCES[source]
+        horizon = date.today() + timedelta(days=HORIZON_DAYS)
+        key = f"scheduler:{source}" if ref_id is None else f"scheduler:{source}:{ref_id}"
+        self.loader.load(
+            key,
+            lambda params: fetch(*params),
+            lambda items: self._apply(source, ref_id, items),
+            params=(horizon, ref_id),
+        )
+
+    def _apply(self, source: str, ref_id: Optional[int], items: List[ScheduledItem]):
+        """Nahradí položky zdroje (nebo jednoho záznamu) v haldě a mezi aktivními"""
+        kinds = SOURCES[source][1]
+
+        def replaced(item: ScheduledItem) -> bool:
+            return item.kind in kinds and (ref_id is None or item.ref_id == ref_id)
+
+        self._heap = [entry for entry in self._heap if not replaced(entry[2])]
+        heapq.heapify(self._heap)
+        for key in [key for key, item in self._due.items() if replaced(item)]:
+            del self._due[key]
+
+        now = datetime.now()
+        for item in items:
+            if item.notify_at <= now:
+                self._activate(item)
+            else:
+                heapq.heappush(self._heap, (item.notify_at, next(self._sequence), item))
+
+        # Vyřízená / odložená upozornění se po novém dosažení termínu ohlásí znovu
+        self._announced = {key for key in self._announced
+                           if key in self._due or key[0] not in kinds
+                           or (ref_id is not None and key[1] != ref_id)}
+        if ref_id is None:
+            self._loaded.add(source)
+
+        self._arm()
+        self.summary_changed.emit(self.summary())
+
+    # -----------------------
+    # Časovač
+    # -----------------------
+    def _activate(self, item: ScheduledItem):
+        self._due[item.key] = item
+        if item.key not in self._announced:
+            self._announced.add(item.key)
+            self.item_due.emit(item)
+
+    def _arm(self):
+        """Nastaví časovač na nejbližší položku haldy, nejpozději na půlnoc"""
+        now = datetime.now()
+        wake_at = datetime.combine(now.date() + timedelta(days=1), time.min)
+        if self._heap and self._heap[0][0] < wake_at:
+            wake_at = self._heap[0][0]
+        delay_ms = max(0, int((wake_at - now).total_seconds() * 1000)) + 50
+        self._timer.start(delay_ms)
+
+    def _wake(self):
+        today = date.today()
+        if today != self._today:
+            # Půlnoc - posunout horizont a přepočítat dny do termínu
+            self._today = today
+            self.day_changed.emit()
+            self.reload()
+            return
+
+        now = datetime.now()
+        changed = False
+        while self._heap and self._heap[0][0] <= now:
+            _, _, item = heapq.heappop(self._heap)
+            self._activate(item)
+            changed = True
+        self._arm()
+        if changed:
+            self.summary_changed.emit(self.summary())
+
+    # -----------------------
+    # Dotazy z UI
+    # -----------------------
+    def is_loaded(self, source: str) -> bool:
+        return source in self._loaded
+
+    def due_items(self, kind: Optional[str] = None,
+                  vehicle_id: Optional[int] = None) -> List[ScheduledItem]:
+        """Aktivní upozornění (seřazená podle termínu)"""
+        items = [
+            item for item in self._due.values()
+            if (kind is None or item.kind == kind)
+            and (vehicle_id is None or item.vehicle_id == vehicle_id)
+        ]
+        return sorted(items, key=lambda item: (item.due_date or date.min, item.title))
+
+    def count(self, kind: str) -> int:
+        return sum(1 for item in self._due.values() if item.kind == kind)
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for item in self._due.values():
+            counts[item.kind] = counts.get(item.kind, 0) + 1
+        return counts
+
+    def next_wakeup(self) -> Optional[datetime]:
+        return self._heap[0][0] if self._heap else None
+
+
+# Globální instance
+reminder_scheduler = ReminderScheduler()
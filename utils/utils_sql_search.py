@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+SQL vyhledávání pro seznamové moduly Motoservis DMS
+- SqlFilter: skládá parametrizovanou WHERE klauzuli z vyhledávacího pole a comboboxů
+- QueryWorker: spustí COUNT + první stránku v pracovním vlákně (vlastní WAL spojení)
+- DebouncedQuery: odloží dotaz do konce psaní a zruší běžící dotaz při dalším stisku
+"""
+
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from database_manager import db
+
+
+# -----------------------
+# WHERE builder
+# -----------------------
+def like_pattern(text: str) -> str:
+    """Vzor pro LIKE '%text%' s escapovanými zástupnými znaky (ESCAPE '\\')"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class SqlFilter:
+    """
+    Parametrizovaná WHERE klauzule
+
+    Příklad:
+        flt = SqlFilter()
+        flt.add("o.status = ?", "Otevřená")
+        flt.add_search("abc 123", ["o.order_number", "v.license_plate"])
+        where, params = flt.where()
+    """
+
+    def __init__(self):
+        self.clauses: List[str] = []
+        self.params: List = []
+
+    def add(self, clause: str, *params) -> "SqlFilter":
+        """Přidá podmínku (spojují se přes AND)"""
+        self.clauses.append(clause)
+        self.params.extend(params)
+        return self
+
+    def add_search(self, text: str, columns: Sequence[str]) -> "SqlFilter":
+        """
+        Fulltextové hledání přes LIKE: každé slovo musí být nalezeno
+        alespoň v jednom ze sloupců (slova se spojují přes AND)
+        """
+        for word in (text or "").split():
+            pattern = like_pattern(word)
+            parts = [f"{col} LIKE ? ESCAPE '\\'" for col in columns]
+            self.clauses.append("(" + " OR ".join(parts) + ")")
+            self.params.extend([pattern] * len(columns))
+        return self
+
+    def is_empty(self) -> bool:
+        return not self.clauses
+
+    def where(self) -> Tuple[str, tuple]:
+        """Vrátí (" WHERE ...", params) nebo ("", ())"""
+        if not self.clauses:
+            return "", ()
+        return " WHERE " + " AND ".join(self.clauses), tuple(self.params)
+
+
+class PagedQuery:
+    """
+    Stránkovaný dotaz: SELECT ... {where} ORDER BY ... LIMIT ? OFFSET ?
+
+    Args:
+        select_sql: SELECT a FROM/JOIN část bez WHERE
+        count_sql: SELECT COUNT(*) a FROM/JOIN část bez WHERE
+        where: Výstup SqlFilter.where()
+        order_by: Výraz pro ORDER BY (bez klíčového slova)
+        page_size: Velikost stránky
+    """
+
+    def __init__(self, select_sql: str, count_sql: str, where: Tuple[str, tuple],
+                 order_by: str = "", page_size: int = 200):
+        self.select_sql = select_sql
+        self.count_sql = count_sql
+        self.where_sql, self.params = where
+        self.order_by = order_by
+        self.page_size = page_size
+
+    def page_sql(self) -> str:
+        sql = self.select_sql + self.where_sql
+        if self.order_by:
+            sql += f" ORDER BY {self.order_by}"
+        return sql + " LIMIT ? OFFSET ?"
+
+    def count(self, conn) -> int:
+        row = conn.execute(self.count_sql + self.where_sql, self.params).fetchone()
+        return row[0] if row else 0
+
+    def page(self, conn, offset: int) -> list:
+        cur = conn.execute(self.page_sql(), self.params + (self.page_size, offset))
+        return [tuple(r) for r in cur.fetchall()]
+
+    def page_loader(self) -> Callable[[int], list]:
+        """Funkce offset -> řádky pro LazyTableModel (běží v GUI vlákně, jen jedna stránka)"""
+        def load(offset: int) -> list:
+            rows = db.fetch_all(self.page_sql(), self.params + (self.page_size, offset))
+            return [tuple(r) for r in rows]
+        return load
+
+
+# -----------------------
+# Pracovní vlákno
+# -----------------------
+class QueryWorker(QThread):
+    """Spustí COUNT a první stránku dotazu mimo GUI vlákno"""
+
+    loaded = pyqtSignal(int, int, list)   # generace, počet celkem, první stránka
+    failed = pyqtSignal(int, str)         # generace, chyba
+
+    def __init__(self, generation: int, query: PagedQuery, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.query = query
+        self._conn = None
+        self._cancelled = False
+
+    def cancel(self):
+        """Zruší běžící dotaz (sqlite3 interrupt je bezpečné volat z jiného vlákna)"""
+        self._cancelled = True
+        conn = self._conn
+        if conn is not None:
+            try:
+                conn.interrupt()
+            except Exception:
+                pass
+
+    def run(self):
+        try:
+            self._conn = db.get_connection()
+            if self._cancelled:
+                return
+            total = self.query.count(self._conn)
+            if self._cancelled:
+                return
+            rows = self.query.page(self._conn, 0)
+            if not self._cancelled:
+                self.loaded.emit(self.generation, total, rows)
+        except Exception as e:
+            if not self._cancelled:
+                self.failed.emit(self.generation, str(e))
+        finally:
+            self._conn = None
+            db.release_thread_connection()
+
+
+class DebouncedQuery(QObject):
+    """
+    Debounce + zrušení pro vyhledávání v seznamech
+
+    Modul zavolá schedule(builder) při každé změně filtru; builder se vyhodnotí
+    až po `delay` ms klidu a vrátí PagedQuery. Starší dotaz, který ještě běží,
+    se přeruší a jeho výsledek se zahodí (kontrola generace).
+    """
+
+    results_ready = pyqtSignal(int, list, object)   # počet celkem, první stránka, PagedQuery
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None, delay: int = 300):
+        super().__init__(parent)
+        self._builder: Optional[Callable[[], PagedQuery]] = None
+        self._generation = 0
+        self._workers: List[QueryWorker] = []
+        self._current: Optional[PagedQuery] = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay)
+        self._timer.timeout.connect(self._start)
+
+    def schedule(self, builder: Callable[[], PagedQuery]):
+        """Naplánuje dotaz po uplynutí debounce intervalu"""
+        self._builder = builder
+        self._cancel_running()
+        self._timer.start()
+
+    def run_now(self, builder: Callable[[], PagedQuery]):
+        """Spustí dotaz ihned (první načtení, refresh)"""
+        self._builder = builder
+        self._timer.stop()
+        self._start()
+
+    def _cancel_running(self):
+        for worker in self._workers:
+            worker.cancel()
+
+    def _start(self):
+        if self._builder is None:
+            return
+        self._cancel_running()
+        self._generation += 1
+        try:
+            query = self._builder()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self._current = query
+
+        worker = QueryWorker(self._generation, query, self)
+        worker.loaded.connect(self._on_loaded)
+        worker.failed.connect(self._on_failed)
+        worker.finished.connect(lambda w=worker: self._on_finished(w))
+        self._workers.append(worker)
+        worker.start()
+
+    def _on_loaded(self, generation: int, total: int, rows: list):
+        if generation != self._generation:
+            return
+        self.results_ready.emit(total, rows, self._current)
+
+    def _on_failed(self, generation: int, message: str):
+        if generation != self._generation:
+            return
+        print(f"Chyba při vyhledávání: {message}")
+        self.failed.emit(message)
+
+    def _on_finished(self, worker: QueryWorker):
+        if worker in self._workers:
+            self._workers.remove(worker)
+        worker.deleteLater()
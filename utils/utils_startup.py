@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Start aplikace Motoservis DMS
+- import_class: import třídy až při prvním použití ("balik.modul:Trida")
+- StartupTimer: měření fází startu a výpis časového reportu do konzole
+"""
+
+import importlib
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+
+def import_class(path: str):
+    """
+    Import třídy podle cesty "balik.modul:Trida"
+
+    Příklad:
+        cls = import_class("modules.warehouse:WarehouseModule")
+    """
+    module_name, _, class_name = path.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
+class StartupTimer:
+    """
+    Měření fází startu
+
+    Fáze označené jako interaktivní (např. čekání na přihlášení) se vypíší,
+    ale nezapočítávají se do celkového času startu.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: List[Tuple[str, float, bool]] = []
+
+    def start(self, at: Optional[float] = None):
+        """Začátek měření (např. perf_counter() zapsaný na prvním řádku main.py)"""
+        self.started = at if at is not None else time.perf_counter()
+        self._last = self.started
+        self.phases.clear()
+
+    def mark(self, name: str, interactive: bool = False):
+        """Ukončí fázi trvající od předchozí značky"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last, interactive))
+        self._last = now
+
+    @contextmanager
+    def measure(self, name: str, interactive: bool = False):
+        """Změří blok kódu jako samostatnou fázi"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self.phases.append((name, now - start, interactive))
+            self._last = now
+
+    def total(self) -> float:
+        """Celkový čas startu bez interaktivních fází"""
+        return sum(seconds for _, seconds, interactive in self.phases if not interactive)
+
+    def report(self) -> str:
+        """Textový report fází startu"""
+        width = max((len(name) for name, _, _ in self.phases), default=10)
+        lines = ["⏱️ Start aplikace:"]
+        for name, seconds, interactive in self.phases:
+            note = "  (uživatel, nezapočítáno)" if interactive else ""
+            lines.append(f"   {name:<{width}}  {seconds * 1000:8.0f} ms{note}")
+        lines.append(f"   {'celkem':<{width}}  {self.total() * 1000:8.0f} ms")
+        return "\n".join(lines)
+
+    def print_report(self):
+        print(self.report())
+
+
+# Globální instance (vzniká při prvním importu - co nejdříve v main.py)
+startup_timer = StartupTimer()
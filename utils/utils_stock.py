@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""
+Skladová kniha Motoservis DMS
+Pohyby (warehouse_movements) jsou zdroj pravdy pro stav zásob, warehouse.quantity
+je jen uložený aktuální zůstatek, který kniha udržuje.
+
+- post(): zápis pohybu s průběžným zůstatkem (balance_after) a aktualizací skladu
+- stock_as_of(): stav k datu = měsíční snapshot + pohyby rozpracovaného měsíce
+- turnover(): obrátka zásob za období (stav na začátku/konci ze snapshotů)
+- reconcile(): kontrola skladových karet proti knize, fix_drift(): korekční pohyby
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Union
+
+from database_manager import db
+
+
+DateLike = Union[str, date, datetime]
+
+# Typy pohybů
+RECEIPT = "Příjem"
+ISSUE = "Výdej"
+INVENTORY = "Inventura"
+STORNO = "Storno"
+CORRECTION = "Korekce"
+OPENING = "Počáteční stav"
+
+# Tolerance pro porovnání množství (REAL)
+EPSILON = 0.0001
+
+
+def _timestamp(value: Optional[DateLike]) -> str:
+    """Datum pohybu jako 'YYYY-MM-DD HH:MM:SS' (samotné datum doplní aktuální čas)"""
+    now = datetime.now()
+    if value is None:
+        return now.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        value = value.isoformat()
+    value = str(value)
+    if len(value) <= 10:
+        return f"{value} {now.strftime('%H:%M:%S')}"
+    return value
+
+
+def _iso_date(value: DateLike) -> str:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+def _next_period(period: str) -> str:
+    year, month = int(period[:4]), int(period[5:7])
+    return f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+
+
+def _prev_period(period: str) -> str:
+    year, month = int(period[:4]), int(period[5:7])
+    return f"{year - 1:04d}-12" if month == 1 else f"{year:04d}-{month - 1:02d}"
+
+
+class StockLedger:
+    """Skladová kniha - zápis pohybů, stav k datu, kontrola zůstatků"""
+
+    # -----------------------
+    # Zápis pohybů
+    # -----------------------
+    def post(self, item_id: int, movement_type: str, qty_change: float,
+             quantity: Optional[float] = None, unit_price: float = 0,
+             supplier_id: Optional[int] = None, document_number: Optional[str] = None,
+             date: Optional[DateLike] = None, note: Optional[str] = None,
+             created_by: Optional[str] = None, reason: Optional[str] = None) -> int:
+        """
+        Zapíše pohyb a aktualizuje stav položky
+
+        Args:
+            qty_change: změna stavu se znaménkem (výdej záporně)
+            quantity: množství zobrazované v historii (výchozí |qty_change|)
+
+        Returns:
+            ID pohybu
+        """
+        when = _timestamp(date)
+        if quantity is None:
+            quantity = abs(qty_change)
+
+        with db.transaction() as cur:
+            balance = self._balance(cur, item_id) + qty_change
+            cur.execute(
+                """INSERT INTO warehouse_movements
+                   (item_id, movement_date, date, qty_change, quantity, movement_type,
+                    unit_price, supplier_id, document_number, note, created_by, reason,
+                    balance_after)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (item_id, when, when, qty_change, quantity, movement_type,
+                 unit_price, supplier_id, document_number, note, created_by, reason,
+                 balance)
+            )
+            movement_id = cur.lastrowid
+            cur.execute("UPDATE warehouse SET quantity = ? WHERE id = ?", (balance, item_id))
+            self._invalidate_snapshots(cur, when[:7])
+        return movement_id
+
+    def count(self, item_id: int, actual_quantity: float, **kwargs) -> int:
+        """Inventura - pohyb o rozdíl mezi knihou a skutečným stavem"""
+        with db.transaction() as cur:
+            difference = actual_quantity - self._balance(cur, item_id)
+            return self.post(item_id, INVENTORY, difference, quantity=difference, **kwargs)
+
+    def reverse(self, movement_id: int, created_by: Optional[str] = None) -> int:
+        """
+        Storno pohybu: původní pohyb se označí jako stornovaný a zapíše se
+        protipohyb - historie zůstává, zůstatky navazují.
+        """
+        with db.transaction() as cur:
+            cur.execute(
+                "SELECT item_id, movement_type, qty_change, quantity, unit_price "
+                "FROM warehouse_movements WHERE id = ?",
+                (movement_id,)
+            )
+            row = cur.fetchone()
+            if row is None:
+                raise ValueError("Pohyb neexistuje")
+            item_id, movement_type, qty_change, quantity, unit_price = row
+            if movement_type == STORNO:
+                raise ValueError("Pohyb už byl stornován")
+
+            cur.execute(
+                "UPDATE warehouse_movements "
+                "SET movement_type = ?, note = COALESCE(note, '') || ' [STORNOVÁNO]' "
+                "WHERE id = ?",
+                (STORNO, movement_id)
+            )
+            return self.post(
+                item_id, STORNO, -(qty_change or 0), quantity=quantity,
+                unit_price=unit_price or 0, note=f"Storno pohybu #{movement_id} ({movement_type})",
+                created_by=created_by, reason=f"storno:{movement_id}"
+            )
+
+    @staticmethod
+    def _balance(cur, item_id: int) -> float:
+        """Zůstatek položky podle posledního pohybu"""
+        cur.execute(
+            "SELECT balance_after FROM warehouse_movements WHERE item_id = ? ORDER BY id DESC LIMIT 1",
+            (item_id,)
+        )
+        row = cur.fetchone()
+        if row is None:
+            return 0.0
+        if row[0] is None:
+            cur.execute("SELECT COALESCE(SUM(qty_change), 0) FROM warehouse_movements WHERE item_id = ?",
+                        (item_id,))
+            return cur.fetchone()[0]
+        return row[0]
+
+    # -----------------------
+    # Měsíční snapshoty
+    # -----------------------
+    @staticmethod
+    def _invalidate_snapshots(cur, period: str):
+        """Pohyb do uzavřeného měsíce zneplatní snapshoty od tohoto měsíce"""
+        cur.execute("DELETE FROM warehouse_stock_snapshots WHERE period >= ?", (period,))
+        cur.execute("DELETE FROM warehouse_snapshot_periods WHERE period >= ?", (period,))
+
+    @staticmethod
+    def _first_missing_period(fetch_one) -> Optional[str]:
+        """První měsíc bez snapshotu (None = žádné pohyby)"""
+        row = fetch_one("SELECT MAX(period) FROM warehouse_snapshot_periods")
+        if row is not None and row[0] is not None:
+            return _next_period(row[0])
+        row = fetch_one("SELECT MIN(movement_date) FROM warehouse_movements")
+        if row is None or row[0] is None:
+            return None
+        return row[0][:7]
+
+    def build_snapshots(self, through: Optional[str] = None) -> int:
+        """
+        Doplní snapshoty uzavřených měsíců (inkrementálně od posledního hotového)
+
+        Args:
+            through: poslední měsíc 'YYYY-MM' (výchozí a maximum = minulý měsíc)
+
+        Returns:
+            počet nově zpracovaných měsíců
+        """
+        last_closed = _prev_period(date.today().strftime("%Y-%m"))
+        through = min(through or last_closed, last_closed)
+
+        # Čtení bez zámku - zápisová transakce jen tehdy, když chybí nějaký měsíc
+        # (reporty na pozadí tak neblokují zápisy)
+        period = self._first_missing_period(db.fetch_one)
+        if period is None or period > through:
+            return 0
+
+        with db.transaction() as cur:
+            # Znovu uvnitř transakce - mezitím mohl snapshoty doplnit někdo jiný
+            period = self._first_missing_period(lambda sql: cur.execute(sql).fetchone())
+            if period is None:
+                return 0
+
+            built = 0
+            while period <= through:
+                following = _next_period(period)
+                # Stav na konci měsíce = předchozí snapshot + pohyby měsíce
+                cur.execute("""
+                    INSERT OR REPLACE INTO warehouse_stock_snapshots (item_id, period, quantity)
+                    SELECT d.item_id, :period,
+                           COALESCE((SELECT s.quantity FROM warehouse_stock_snapshots s
+                                     WHERE s.item_id = d.item_id AND s.period < :period
+                                     ORDER BY s.period DESC LIMIT 1), 0) + d.delta
+                    FROM (
+                        SELECT item_id, SUM(qty_change) AS delta
+                        FROM warehouse_movements
+                        WHERE movement_date >= :start AND movement_date < :end
+                        GROUP BY item_id
+                    ) d
+                """, {"period": period, "start": f"{period}-01", "end": f"{following}-01"})
+                cur.execute("INSERT OR REPLACE INTO warehouse_snapshot_periods (period) VALUES (?)",
+                            (period,))
+                period = following
+                built += 1
+        return built
+
+    # -----------------------
+    # Stav k datu
+    # -----------------------
+    def stock_as_of(self, day: DateLike, item_ids: Optional[Iterable[int]] = None) -> Dict[int, float]:
+        """
+        Stav položek na konci dne day: {item_id: množství}
+
+        Snapshot posledního uzavřeného měsíce před day (jedno vyhledání v indexu
+        na položku) + pohyby od konce tohoto měsíce do day.
+        """
+        day = _iso_date(day)
+        next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+        last_closed = _prev_period(date.today().strftime("%Y-%m"))
+        base = min(_prev_period(day[:7]), last_closed)
+        self.build_snapshots(base)
+
+        where = ""
+        params: list = [base, f"{_next_period(base)}-01", next_day]
+        if item_ids is not None:
+            ids = list(item_ids)
+            if not ids:
+                return {}
+            where = f"WHERE w.id IN ({', '.join('?' for _ in ids)})"
+            params += ids
+
+        rows = db.fetch_all(f"""
+            SELECT w.id,
+                   COALESCE((SELECT s.quantity FROM warehouse_stock_snapshots s
+                             WHERE s.item_id = w.id AND s.period <= ?
+                             ORDER BY s.period DESC LIMIT 1), 0)
+                   + COALESCE(d.delta, 0)
+            FROM warehouse w
+            LEFT JOIN (
+                SELECT item_id, SUM(qty_change) AS delta
+                FROM warehouse_movements
+                WHERE movement_date >= ? AND movement_date < ?
+                GROUP BY item_id
+            ) d ON d.item_id = w.id
+            {where}
+        """, tuple(params))
+        return {row[0]: row[1] or 0.0 for row in rows}
+
+    def valuation_as_of(self, day: DateLike) -> float:
+        """Hodnota skladu k datu (stav k datu × aktuální nákupní cena)"""
+        stock = self.stock_as_of(day)
+        prices = {row[0]: row[1] or 0 for row in db.fetch_all("SELECT id, price_purchase FROM warehouse")}
+        return sum(qty * prices.get(item_id, 0) for item_id, qty in stock.items())
+
+    def turnover(self, date_from: DateLike, date_to: DateLike) -> List[dict]:
+        """
+        Obrátka zásob za období po položkách
+
+        Výdeje z pohybů období, průměrný stav = (stav před začátkem + stav na konci) / 2.
+        """
+        date_from, date_to = _iso_date(date_from), _iso_date(date_to)
+        day_before = (date.fromisoformat(date_from) - timedelta(days=1)).isoformat()
+        next_day = (date.fromisoformat(date_to) + timedelta(days=1)).isoformat()
+        days = (date.fromisoformat(date_to) - date.fromisoformat(date_from)).days + 1
+
+        opening = self.stock_as_of(day_before)
+        closing = self.stock_as_of(date_to)
+        issued = {
+            row[0]: -(row[1] or 0)
+            for row in db.fetch_all("""
+                SELECT item_id, SUM(qty_change)
+                FROM warehouse_movements
+                WHERE movement_type = ? AND movement_date >= ? AND movement_date < ?
+                GROUP BY item_id
+            """, (ISSUE, date_from, next_day))
+        }
+
+        result = []
+        for row in db.fetch_all("SELECT id, code, name FROM warehouse ORDER BY name"):
+            item_id = row[0]
+            avg_stock = (opening.get(item_id, 0) + closing.get(item_id, 0)) / 2
+            consumed = issued.get(item_id, 0)
+            ratio = consumed / avg_stock if avg_stock > EPSILON else 0.0
+            result.append({
+                "item_id": item_id,
+                "code": row[1],
+                "name": row[2],
+                "opening": opening.get(item_id, 0),
+                "closing": closing.get(item_id, 0),
+                "issued": consumed,
+                "turnover": ratio,
+                "days_of_stock": days / ratio if ratio else None,
+            })
+        return result
+
+    # -----------------------
+    # Kontrola zůstatků
+    # -----------------------
+    def reconcile(self) -> List[dict]:
+        """
+        Položky, u kterých nesedí skladová karta s knihou
+
+        quantity = warehouse.quantity, ledger = součet pohybů,
+        balance = zůstatek posledního pohybu (řetěz balance_after)
+        """
+        rows = db.fetch_all("""
+            SELECT w.id, w.code, w.name,
+                   COALESCE(w.quantity, 0),
+                   COALESCE(m.total, 0),
+                   lm.balance_after
+            FROM warehouse w
+            LEFT JOIN (
+                SELECT item_id, SUM(qty_change) AS total, MAX(id) AS last_id
+                FROM warehouse_movements GROUP BY item_id
+            ) m ON m.item_id = w.id
+            LEFT JOIN warehouse_movements lm ON lm.id = m.last_id
+        """)
+        issues = []
+        for item_id, code, name, quantity, ledger, balance in rows:
+            balance = ledger if balance is None and not ledger else balance
+            if abs(quantity - ledger) > EPSILON or balance is None or abs(balance - ledger) > EPSILON:
+                issues.append({
+                    "item_id": item_id,
+                    "code": code,
+                    "name": name,
+                    "quantity": quantity,
+                    "ledger": ledger,
+                    "balance": balance,
+                })
+        return issues
+
+    def fix_drift(self, item_ids: Optional[Iterable[int]] = None,
+                  movement_type: str = CORRECTION,
+                  note: str = "Korekce podle skladové karty") -> int:
+        """
+        Srovná knihu se skladovou kartou korekčním pohybem (rozdíl karta - kniha)
+        u položek, kde karta byla změněna mimo knihu (ruční úprava, import).
+
+        Returns:
+            počet zapsaných korekcí
+        """
+        if item_ids is None:
+            chunks = [None]
+        else:
+            # Po dávkách - limit počtu parametrů SQLite (velké importy)
+            ids = list(item_ids)
+            if not ids:
+                return 0
+            chunks = [ids[i:i + 500] for i in range(0, len(ids), 500)]
+
+        fixed = 0
+        with db.transaction() as cur:
+            for chunk in chunks:
+                fixed += self._insert_corrections(cur, chunk, movement_type, note)
+        return fixed
+
+    @staticmethod
+    def _insert_corrections(cur, ids: Optional[List[int]], movement_type: str, note: str) -> int:
+        where = ""
+        params: list = [movement_type, note]
+        if ids is not None:
+            where = f"AND w.id IN ({', '.join('?' for _ in ids)})"
+            params += ids
+        cur.execute(f"""
+            INSERT INTO warehouse_movements
+                (item_id, movement_date, date, qty_change, quantity, movement_type,
+                 unit_price, note, created_by, balance_after)
+            SELECT w.id, datetime('now', 'localtime'), datetime('now', 'localtime'),
+                   COALESCE(w.quantity, 0) - COALESCE(m.total, 0),
+                   COALESCE(w.quantity, 0) - COALESCE(m.total, 0),
+                   ?, COALESCE(w.price_purchase, 0), ?, 'system',
+                   COALESCE(w.quantity, 0)
+            FROM warehouse w
+            LEFT JOIN (
+                SELECT item_id, SUM(qty_change) AS total
+                FROM warehouse_movements GROUP BY item_id
+            ) m ON m.item_id = w.id
+            WHERE ABS(COALESCE(w.quantity, 0) - COALESCE(m.total, 0)) > {EPSILON}
+            {where}
+        """, tuple(params))
+        return cur.rowcount
+
+    def rebuild_balances(self) -> int:
+        """Přepočet balance_after všech pohybů (oprava přerušeného řetězu)"""
+        with db.transaction() as cur:
+            cur.execute("""
+                UPDATE warehouse_movements
+                SET balance_after = r.balance
+                FROM (
+                    SELECT id, SUM(qty_change) OVER (PARTITION BY item_id ORDER BY id) AS balance
+                    FROM warehouse_movements
+                ) AS r
+                WHERE r.id = warehouse_movements.id
+            """)
+            return cur.rowcount
+
+
+# Globální instance
+stock_ledger = StockLedger()
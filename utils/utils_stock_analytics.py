@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+Analýzy skladu Motoservis DMS (ABC, obratovost, marže, dead stock, predikce)
+
+Historie pohybů se načte jedním agregačním dotazem (položka × den) do sloupců
+po položkách s kumulativními součty výdejů. Výdej za libovolné období je pak
+jedno bisect na položku, takže změna období v záložkách databázi nezatěžuje.
+Historie i hotový výsledek se cachují podle id posledního pohybu.
+"""
+
+from bisect import bisect_left
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+from database_manager import db
+from utils.utils_stock import stock_ledger, ISSUE, CORRECTION
+
+
+# -----------------------
+# Výsledky
+# -----------------------
+@dataclass
+class AbcRow:
+    item_id: int
+    name: str
+    quantity: float
+    value: float
+    percent: float
+    cumulative: float
+    category: str
+
+
+@dataclass
+class TurnoverRow:
+    item_id: int
+    name: str
+    avg_stock: float
+    issued: float
+    turnover: float
+    per_month: float
+    days_to_stockout: float
+
+
+@dataclass
+class MarginRow:
+    item_id: int
+    name: str
+    quantity: float
+    purchase: float
+    sale: float
+    margin: float
+    margin_pct: float
+
+
+@dataclass
+class DeadStockRow:
+    item_id: int
+    name: str
+    quantity: float
+    value: float
+    last_movement: Optional[str]
+    days_without: int
+    location: str
+
+
+@dataclass
+class PredictionRow:
+    item_id: int
+    name: str
+    stock: float
+    per_day: float
+    predicted: float
+    recommended: float
+    supplier: str
+    status: str          # 'ok' / 'low' / 'short'
+
+
+@dataclass
+class WarehouseAnalytics:
+    """Všech pět analýz z jednoho načtení historie"""
+    generated: str
+    params: Tuple[int, int, int]
+    abc: List[AbcRow] = field(default_factory=list)
+    turnover: List[TurnoverRow] = field(default_factory=list)
+    margin: List[MarginRow] = field(default_factory=list)
+    dead_stock: List[DeadStockRow] = field(default_factory=list)
+    prediction: List[PredictionRow] = field(default_factory=list)
+    purchase_value: float = 0.0
+    sale_value: float = 0.0
+
+    @property
+    def margin_value(self) -> float:
+        return self.sale_value - self.purchase_value
+
+    @property
+    def avg_margin(self) -> float:
+        """Průměrná marže v % z nákupní hodnoty"""
+        return self.margin_value / self.purchase_value * 100 if self.purchase_value else 0.0
+
+    @property
+    def dead_stock_value(self) -> float:
+        return sum(row.value for row in self.dead_stock)
+
+    def abc_counts(self) -> Dict[str, int]:
+        counts = {"A": 0, "B": 0, "C": 0}
+        for row in self.abc:
+            counts[row.category] += 1
+        return counts
+
+    def abc_values(self) -> Dict[str, float]:
+        values = {"A": 0.0, "B": 0.0, "C": 0.0}
+        for row in self.abc:
+            values[row.category] += row.value
+        return values
+
+    def as_dict(self) -> dict:
+        """Data pro export (JSON)"""
+        return {
+            "generated": self.generated,
+            "abc_analysis": [asdict(row) for row in self.abc],
+            "turnover": [asdict(row) for row in self.turnover],
+            "margin": {
+                "purchase_value": self.purchase_value,
+                "sale_value": self.sale_value,
+                "total_margin": self.margin_value,
+                "avg_margin": self.avg_margin,
+                "items": [asdict(row) for row in self.margin],
+            },
+            "dead_stock": [asdict(row) for row in self.dead_stock],
+            "prediction": [asdict(row) for row in self.prediction],
+        }
+
+
+# -----------------------
+# Historie pohybů
+# -----------------------
+class _ItemHistory:
+    """Výdeje jedné položky po dnech (vzestupně) s kumulativními součty"""
+    __slots__ = ("days", "cum_issued", "issued_value", "unpriced_qty", "last_day")
+
+    def __init__(self):
+        self.days: List[str] = []
+        self.cum_issued: List[float] = []
+        self.issued_value = 0.0
+        self.unpriced_qty = 0.0
+        self.last_day: Optional[str] = None
+
+    @property
+    def total_issued(self) -> float:
+        return self.cum_issued[-1] if self.cum_issued else 0.0
+
+    def issued_since(self, day: str) -> float:
+        """Vydáno od dne day (včetně)"""
+        idx = bisect_left(self.days, day)
+        before = self.cum_issued[idx - 1] if idx else 0.0
+        return self.total_issued - before
+
+
+# -----------------------
+# Engine
+# -----------------------
+class StockAnalyticsEngine:
+    """Výpočet analýz skladu z cachované historie pohybů"""
+
+    # Hranice ABC (kumulativní % hodnoty výdejů)
+    ABC_LIMITS = (80, 95)
+    # Historie spotřeby pro predikci
+    PREDICTION_HISTORY_DAYS = 90
+    # "Nikdy" v počtu dní bez pohybu
+    NEVER_MOVED_DAYS = 9999
+
+    def __init__(self):
+        self._history: Optional[Tuple[int, Dict[int, _ItemHistory]]] = None
+        self._result: Optional[Tuple[tuple, WarehouseAnalytics]] = None
+
+    def latest_movement_id(self) -> int:
+        row = db.fetch_one("SELECT MAX(id) FROM warehouse_movements")
+        return (row[0] or 0) if row else 0
+
+    def invalidate(self):
+        self._history = None
+        self._result = None
+
+    def _load_history(self, movement_id: int) -> Dict[int, _ItemHistory]:
+        """Historie po položkách - jeden průchod tabulkou pohybů"""
+        if self._history is not None and self._history[0] == movement_id:
+            return self._history[1]
+
+        rows = db.fetch_all("""
+            SELECT item_id,
+                   DATE(COALESCE(movement_date, date)) AS day,
+                   SUM(CASE WHEN movement_type = ? THEN ABS(quantity) ELSE 0 END),
+                   SUM(CASE WHEN movement_type = ? THEN ABS(quantity) * COALESCE(unit_price, 0) ELSE 0 END),
+                   SUM(CASE WHEN movement_type = ? AND COALESCE(unit_price, 0) = 0
+                            THEN ABS(quantity) ELSE 0 END),
+                   SUM(CASE WHEN movement_type != ? THEN 1 ELSE 0 END)
+            FROM warehouse_movements
+            WHERE item_id IS NOT NULL
+            GROUP BY item_id, day
+            ORDER BY item_id, day
+        """, (ISSUE, ISSUE, ISSUE, CORRECTION))
+
+        history: Dict[int, _ItemHistory] = {}
+        issued: Dict[int, List[float]] = {}
+        for item_id, day, qty, value, unpriced, moves in rows:
+            item = history.get(item_id)
+            if item is None:
+                item = history[item_id] = _ItemHistory()
+                issued[item_id] = []
+            if moves and day:
+                item.last_day = day
+            if qty:
+                item.days.append(day)
+                issued[item_id].append(qty)
+                item.issued_value += value or 0
+                item.unpriced_qty += unpriced or 0
+
+        for item_id, quantities in issued.items():
+            history[item_id].cum_issued = list(accumulate(quantities))
+
+        self._history = (movement_id, history)
+        return history
+
+    def compute(self, turnover_months: int = 6, dead_stock_months: int = 6,
+                prediction_days: int = 30, force: bool = False) -> WarehouseAnalytics:
+        """
+        Všechny analýzy najednou
+
+        Args:
+            turnover_months: období obratovosti
+            dead_stock_months: bez pohybu déle než (dead stock)
+            prediction_days: horizont predikce
+            force: znovu načíst skladové karty (ceny, umístění) i beze změny pohybů
+        """
+        today = date.today()
+        movement_id = self.latest_movement_id()
+        params = (turnover_months, dead_stock_months, prediction_days)
+        key = (movement_id, params, today)
+        if not force and self._result is not None and self._result[0] == key:
+            return self._result[1]
+
+        history = self._load_history(movement_id)
+        items = db.fetch_all("""
+            SELECT w.id, w.name, COALESCE(w.quantity, 0), COALESCE(w.min_quantity, 0),
+                   COALESCE(w.price_purchase, 0), COALESCE(w.price_sale, 0),
+                   w.location, s.name
+            FROM warehouse w
+            LEFT JOIN warehouse_suppliers s ON w.supplier_id = s.id
+            ORDER BY w.name
+        """)
+
+        result = WarehouseAnalytics(generated=today.isoformat(), params=params)
+        empty = _ItemHistory()
+        turnover_from = (today - timedelta(days=turnover_months * 30)).isoformat()
+        dead_limit = (today - timedelta(days=dead_stock_months * 30)).isoformat()
+        history_from = (today - timedelta(days=self.PREDICTION_HISTORY_DAYS)).isoformat()
+        opening = stock_ledger.stock_as_of(
+            date.fromisoformat(turnover_from) - timedelta(days=1))
+
+        abc = []
+        for item_id, name, stock, min_qty, purchase, sale, location, supplier in items:
+            h = history.get(item_id, empty)
+            name = name or ""
+
+            # ABC - výdeje bez ceny oceněny aktuální nákupní cenou
+            value = h.issued_value + h.unpriced_qty * purchase
+            if value > 0:
+                abc.append((value, item_id, name, h.total_issued))
+
+            # Obratovost - průměr stavu na začátku období (kniha) a dnes
+            issued = h.issued_since(turnover_from)
+            if issued > 0:
+                avg_stock = (max(opening.get(item_id, 0.0), 0.0) + stock) / 2
+                per_month = issued / turnover_months
+                result.turnover.append(TurnoverRow(
+                    item_id, name, avg_stock, issued,
+                    issued / avg_stock if avg_stock > 0 else 0.0,
+                    per_month,
+                    stock / per_month * 30 if per_month > 0 else 999,
+                ))
+
+            # Marže skladových zásob
+            if stock > 0 and purchase > 0:
+                result.margin.append(MarginRow(
+                    item_id, name, stock, purchase, sale,
+                    (sale - purchase) * stock, (sale - purchase) / purchase * 100,
+                ))
+                result.purchase_value += purchase * stock
+                result.sale_value += sale * stock
+
+            # Dead stock
+            if stock > 0 and (h.last_day is None or h.last_day < dead_limit):
+                days_without = ((today - date.fromisoformat(h.last_day)).days
+                                if h.last_day else self.NEVER_MOVED_DAYS)
+                result.dead_stock.append(DeadStockRow(
+                    item_id, name, stock, stock * purchase, h.last_day,
+                    days_without, location or "---",
+                ))
+
+            # Predikce spotřeby
+            recent = h.issued_since(history_from)
+            if recent > 0:
+                per_day = recent / self.PREDICTION_HISTORY_DAYS
+                predicted = per_day * prediction_days
+                if stock >= predicted + min_qty:
+                    status = "ok"
+                elif stock >= predicted:
+                    status = "low"
+                else:
+                    status = "short"
+                result.prediction.append(PredictionRow(
+                    item_id, name, stock, per_day, predicted,
+                    max(0.0, predicted - stock + min_qty), supplier or "---", status,
+                ))
+
+        # ABC: kumulativní podíl v pořadí podle hodnoty
+        abc.sort(key=lambda r: r[0], reverse=True)
+        total_value = sum(r[0] for r in abc)
+        limit_a, limit_b = self.ABC_LIMITS
+        cumulative = 0.0
+        for value, item_id, name, quantity in abc:
+            percent = value / total_value * 100
+            cumulative += percent
+            category = "A" if cumulative <= limit_a else "B" if cumulative <= limit_b else "C"
+            result.abc.append(AbcRow(item_id, name, quantity, value, percent, cumulative, category))
+
+        result.turnover.sort(key=lambda r: r.issued, reverse=True)
+        result.margin.sort(key=lambda r: r.margin, reverse=True)
+        result.dead_stock.sort(key=lambda r: r.days_without, reverse=True)
+
+        self._result = (key, result)
+        return result
+
+
+# Globální instance
+stock_analytics = StockAnalyticsEngine()
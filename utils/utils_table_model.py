@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+Virtualizované tabulky pro Motoservis DMS
+Model/view náhrada za QTableWidget plněný řádek po řádku:
+- řádky drží jako kompaktní tuple (žádné QTableWidgetItem na buňku)
+- formátování, barvy a fonty se počítají líně v data() jen pro viditelné buňky
+- řádky se do view zpřístupňují po dávkách (canFetchMore / fetchMore)
+- filtrování a řazení nad tuple, bez procházení widgetů
+- stránkovaný režim: další řádky dotahuje page_loader (LIMIT/OFFSET v SQL),
+  řazení se pak předává zpět modulu přes sort_requested (ORDER BY v SQL)
+"""
+
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Union
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QBrush, QColor, QFont
+from PyQt6.QtWidgets import QTableView, QHeaderView, QAbstractItemView
+
+
+ALIGN_LEFT = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+ALIGN_RIGHT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+ALIGN_CENTER = Qt.AlignmentFlag.AlignCenter
+
+
+class TableColumn:
+    """
+    Definice sloupce virtualizované tabulky
+
+    Args:
+        title: Titulek v hlavičce
+        value: Index do tuple řádku, nebo funkce row -> hodnota
+        formatter: Funkce (hodnota) -> text; výchozí str() s "" pro None
+        align: Zarovnání textu (ALIGN_LEFT / ALIGN_RIGHT / ALIGN_CENTER)
+        background: Funkce row -> barva ("#rrggbb") nebo None
+        foreground: Funkce row -> barva ("#rrggbb") nebo None
+        bold: Tučné písmo
+        hidden: Skrytý sloupec (např. ID)
+        width: Pevná výchozí šířka v px (jinak odhad ze vzorku)
+        stretch: Sloupec se roztahuje do volného místa
+        sql: Výraz pro ORDER BY ve stránkovaném režimu (alias ze SELECTu)
+    """
+
+    def __init__(self, title: str, value: Union[int, Callable[[tuple], Any]],
+                 formatter: Optional[Callable[[Any], str]] = None,
+                 align=ALIGN_LEFT,
+                 background: Optional[Callable[[tuple], Optional[str]]] = None,
+                 foreground: Optional[Callable[[tuple], Optional[str]]] = None,
+                 bold: bool = False, hidden: bool = False,
+                 width: Optional[int] = None, stretch: bool = False,
+                 sql: Optional[str] = None):
+        self.title = title
+        self.value = value
+        self.formatter = formatter
+        self.align = align
+        self.background = background
+        self.foreground = foreground
+        self.bold = bold
+        self.hidden = hidden
+        self.width = width
+        self.stretch = stretch
+        self.sql = sql
+
+    def raw(self, row: tuple) -> Any:
+        """Surová hodnota sloupce z řádku"""
+        if callable(self.value):
+            return self.value(row)
+        return row[self.value]
+
+    def text(self, row: tuple) -> str:
+        """Zobrazovaný text buňky"""
+        value = self.raw(row)
+        if self.formatter is not None:
+            return self.formatter(value)
+        return "" if value is None else str(value)
+
+
+def _sort_key(value):
+    """Klíč pro řazení odolný vůči None a smíšeným typům"""
+    if value is None:
+        return (0, "")
+    if isinstance(value, (int, float)):
+        return (1, value)
+    return (2, str(value).lower())
+
+
+class LazyTableModel(QAbstractTableModel):
+    """Model tabulky nad seznamem tuple s líným formátováním a dávkovým načítáním"""
+
+    # Řazení ve stránkovaném režimu musí provést SQL (sloupec, pořadí)
+    sort_requested = pyqtSignal(int, object)
+
+    def __init__(self, columns: Sequence[TableColumn], parent=None, batch_size: int = 500):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self._rows: List[tuple] = []
+        self._order: List[int] = []   # indexy do _rows po filtru a řazení
+        self._loaded = 0              # kolik řádků z _order view už zná
+        self._filter: Optional[Callable[[tuple], bool]] = None
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._page_loader: Optional[Callable[[int], list]] = None
+        self._total: Optional[int] = None   # počet řádků v DB (stránkovaný režim)
+        self._brushes = {}
+        self._bold_font = QFont()
+        self._bold_font.setBold(True)
+
+    # -----------------------
+    # Data
+    # -----------------------
+    def set_rows(self, rows: Iterable, total: Optional[int] = None,
+                 page_loader: Optional[Callable[[int], list]] = None):
+        """
+        Nahradí data modelu (sqlite3.Row i tuple se převedou na tuple)
+
+        Args:
+            rows: Řádky (ve stránkovaném režimu první stránka)
+            total: Celkový počet řádků odpovídajících dotazu
+            page_loader: Funkce offset -> další řádky; zapíná stránkovaný režim
+        """
+        self.beginResetModel()
+        self._rows = [tuple(r) for r in rows]
+        self._page_loader = page_loader
+        self._total = total if page_loader is not None else None
+        if page_loader is not None:
+            # Filtr i řazení už provedlo SQL
+            self._filter = None
+        self._rebuild_order()
+        self.endResetModel()
+
+    def is_paged(self) -> bool:
+        return self._page_loader is not None
+
+    def sql_order_by(self, default: str = "") -> str:
+        """ORDER BY výraz podle aktuálního řazení (jen sloupce s `sql`)"""
+        if 0 <= self._sort_column < len(self.columns):
+            expr = self.columns[self._sort_column].sql
+            if expr:
+                direction = "DESC" if self._sort_order == Qt.SortOrder.DescendingOrder else "ASC"
+                return f"{expr} {direction}"
+        return default
+
+    def set_filter(self, predicate: Optional[Callable[[tuple], bool]]):
+        """Nastaví filtr řádků (None = bez filtru)"""
+        self.beginResetModel()
+        self._filter = predicate
+        self._rebuild_order()
+        self.endResetModel()
+
+    def _rebuild_order(self):
+        if self._filter is None:
+            self._order = list(range(len(self._rows)))
+        else:
+            flt = self._filter
+            self._order = [i for i, r in enumerate(self._rows) if flt(r)]
+        if self._sort_column >= 0 and self._page_loader is None:
+            self._apply_sort()
+        self._loaded = min(self.batch_size, len(self._order))
+
+    def _apply_sort(self):
+        col = self.columns[self._sort_column]
+        rows = self._rows
+        self._order.sort(
+            key=lambda i: _sort_key(col.raw(rows[i])),
+            reverse=self._sort_order == Qt.SortOrder.DescendingOrder,
+        )
+
+    def row(self, view_row: int) -> Optional[tuple]:
+        """Tuple řádku podle pozice ve view"""
+        if 0 <= view_row < len(self._order):
+            return self._rows[self._order[view_row]]
+        return None
+
+    def rows(self) -> List[tuple]:
+        """Všechny řádky po aplikaci filtru (v pořadí view)"""
+        return [self._rows[i] for i in self._order]
+
+    def total_count(self) -> int:
+        """Počet všech řádků v modelu (ve stránkovaném režimu počet v DB)"""
+        if self._total is not None:
+            return self._total
+        return len(self._rows)
+
+    def visible_count(self) -> int:
+        """Počet řádků po filtru (ve stránkovaném režimu počet v DB)"""
+        if self._total is not None:
+            return self._total
+        return len(self._order)
+
+    # -----------------------
+    # Dávkové zpřístupňování řádků
+    # -----------------------
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        if self._loaded < len(self._order):
+            return True
+        return self._page_loader is not None and len(self._rows) < (self._total or 0)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        if self._loaded >= len(self._order) and self._page_loader is not None:
+            self._load_page()
+        remaining = len(self._order) - self._loaded
+        count = min(self.batch_size, remaining)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def _load_page(self):
+        """Dotáhne další stránku z DB (LIMIT/OFFSET) na konec _rows"""
+        page = [tuple(r) for r in self._page_loader(len(self._rows))]
+        if not page:
+            # DB vrátila méně řádků, než hlásil COUNT (mezitím smazáno)
+            self._total = len(self._rows)
+            return
+        start = len(self._rows)
+        self._rows.extend(page)
+        self._order.extend(range(start, start + len(page)))
+
+    # -----------------------
+    # QAbstractTableModel API
+    # -----------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def _brush(self, color: Optional[str]):
+        if not color:
+            return None
+        brush = self._brushes.get(color)
+        if brush is None:
+            brush = QBrush(QColor(color))
+            self._brushes[color] = brush
+        return brush
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[self._order[index.row()]]
+        col = self.columns[index.column()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return col.text(row)
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return col.align
+        if role == Qt.ItemDataRole.BackgroundRole and col.background:
+            return self._brush(col.background(row))
+        if role == Qt.ItemDataRole.ForegroundRole and col.foreground:
+            return self._brush(col.foreground(row))
+        if role == Qt.ItemDataRole.FontRole and col.bold:
+            return self._bold_font
+        if role == Qt.ItemDataRole.UserRole:
+            return col.raw(row)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            if 0 <= section < len(self.columns):
+                return self.columns[section].title
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if not 0 <= column < len(self.columns):
+            return
+        if self._page_loader is not None:
+            # Na klientovi je jen část řádků - řadit musí SQL
+            self._sort_column = column
+            self._sort_order = order
+            self.sort_requested.emit(column, order)
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._sort_column = column
+        self._sort_order = order
+        self._apply_sort()
+        self.layoutChanged.emit()
+
+
+class LazyTableView(QTableView):
+    """
+    QTableView nad LazyTableModel s nastavením obvyklým v modulech:
+    výběr celých řádků, pevná výška řádků, odhad šířek sloupců ze vzorku.
+    """
+
+    ROW_HEIGHT = 32
+
+    def __init__(self, columns: Sequence[TableColumn], parent=None, batch_size: int = 500):
+        super().__init__(parent)
+        self.table_model = LazyTableModel(columns, self, batch_size=batch_size)
+        self.setModel(self.table_model)
+
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setAlternatingRowColors(True)
+        self.setWordWrap(False)
+
+        # Pevná výška řádků - view nemusí měřit obsah
+        vheader = self.verticalHeader()
+        vheader.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vheader.setDefaultSectionSize(self.ROW_HEIGHT)
+        vheader.setVisible(False)
+
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        for i, col in enumerate(self.table_model.columns):
+            self.setColumnHidden(i, col.hidden)
+            if col.stretch:
+                header.setSectionResizeMode(i, QHeaderView.ResizeMode.Stretch)
+            elif col.width:
+                self.setColumnWidth(i, col.width)
+
+    def set_rows(self, rows: Iterable, autosize: bool = True, total: Optional[int] = None,
+                 page_loader: Optional[Callable[[int], list]] = None):
+        """Naplní tabulku daty (s page_loader ve stránkovaném režimu)"""
+        self.table_model.set_rows(rows, total=total, page_loader=page_loader)
+        if autosize:
+            self.autosize_columns()
+
+    def set_filter(self, predicate: Optional[Callable[[tuple], bool]]):
+        """Filtr řádků nad tuple"""
+        self.table_model.set_filter(predicate)
+
+    def autosize_columns(self, sample: int = 200, max_width: int = 400):
+        """Odhad šířky sloupců z prvních `sample` řádků (místo resizeColumnToContents)"""
+        metrics = self.fontMetrics()
+        header_metrics = self.horizontalHeader().fontMetrics()
+        model = self.table_model
+        count = min(sample, model.rowCount())
+        for i, col in enumerate(model.columns):
+            if col.hidden or col.stretch or col.width:
+                continue
+            width = header_metrics.horizontalAdvance(col.title) + 30
+            for r in range(count):
+                width = max(width, metrics.horizontalAdvance(col.text(model.row(r))) + 24)
+            self.setColumnWidth(i, min(width, max_width))
+
+    def current_record(self) -> Optional[tuple]:
+        """Tuple aktuálně vybraného řádku"""
+        index = self.currentIndex()
+        if not index.isValid():
+            return None
+        return self.table_model.row(index.row())
+
+    def selected_records(self) -> List[tuple]:
+        """Tuple všech vybraných řádků"""
+        rows = sorted({idx.row() for idx in self.selectionModel().selectedRows()})
+        return [self.table_model.row(r) for r in rows]
+
+    def record_at(self, position) -> Optional[tuple]:
+        """Tuple řádku pod pozicí kurzoru (pro kontextové menu)"""
+        index = self.indexAt(position)
+        if not index.isValid():
+            return None
+        return self.table_model.row(index.row())
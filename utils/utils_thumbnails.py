@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Náhledy fotek: disková LRU cache + generování na pozadí
+- ThumbnailCache.image(zdroj, velikost): QImage náhledu, chybějící se vytvoří;
+  JPEG se čte rovnou zmenšený (QImageReader.setScaledSize) - originál se
+  celý nedekóduje. Bezpečné v pracovním vlákně (QImage, ne QPixmap).
+- request(zdroj, velikost): načtení na pozadí, výsledek signálem ready
+  (galerie žádá jen o náhledy, které jsou vidět)
+- prefetch(zdroj): všechny velikosti config.THUMBNAIL_SIZES hned po nahrání
+- pixmap(zdroj, velikost): synchronně pro jednotlivé obrázky (karta vozidla)
+- trim(): nejdéle nepoužité náhledy nad config.THUMBNAIL_CACHE_MB se smažou
+  (mtime souboru = poslední použití)
+
+Náhledy leží v config.THUMBNAIL_DIR/<velikost>/<klíč>.jpg, klíč je hash obsahu
+(soubory z blob_store) nebo hash cesty + mtime (starší soubory).
+"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Set, Tuple, Union
+
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThread, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap, QPixmapCache
+
+import config
+from utils.utils_blobs import blob_store
+
+THUMBNAIL_QUALITY = 85
+# Po kolika vytvořených náhledech se kontroluje velikost cache
+TRIM_EVERY = 200
+# Čas použití se zapisuje nejvýš jednou za hodinu (zbytečné zápisy na disk)
+TOUCH_INTERVAL = 3600
+
+SMALL, MEDIUM, LARGE = config.THUMBNAIL_SIZES
+
+
+class _ThumbnailTask(QRunnable):
+    """Vytvoření / načtení náhledů jednoho souboru ve vlákně z poolu"""
+
+    def __init__(self, cache: "ThumbnailCache", source: str, sizes: Tuple[int, ...], emit: bool):
+        super().__init__()
+        self.cache = cache
+        self.source = source
+        self.sizes = sizes
+        self.emit = emit
+
+    def run(self):
+        for size in self.sizes:
+            try:
+                image = self.cache.image(self.source, size)
+            except Exception as e:
+                print(f"Chyba při vytváření náhledu {self.source}: {e}")
+                image = QImage()
+            finally:
+                self.cache._done(self.source, size)
+            if self.emit:
+                self.cache.ready.emit(self.source, size, image)
+
+
+class ThumbnailCache(QObject):
+    """Náhledy obrázků na disku s vlastním poolem vláken"""
+
+    ready = pyqtSignal(str, int, QImage)   # zdroj, velikost, náhled (isNull = nelze načíst)
+
+    def __init__(self, root: Union[str, Path], max_bytes: int):
+        super().__init__()
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        # Vlastní pool - náhledy nezdržují načítání dat modulů
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, QThread.idealThreadCount() // 2))
+        self._lock = threading.Lock()
+        self._pending: Set[Tuple[str, int]] = set()
+        self._generated = 0
+
+    # -----------------------
+    # Soubory náhledů
+    # -----------------------
+    def key(self, source: Union[str, Path]) -> str:
+        """Klíč náhledu: hash obsahu (blob_store) nebo cesty a času změny"""
+        digest = blob_store.digest(source)
+        if digest:
+            return digest
+        try:
+            stamp = Path(source).stat().st_mtime_ns
+        except OSError:
+            stamp = 0
+        return hashlib.sha1(f"{Path(source).resolve()}|{stamp}".encode("utf-8")).hexdigest()
+
+    def path(self, source: Union[str, Path], size: int) -> Path:
+        return self.root / str(size) / f"{self.key(source)}.jpg"
+
+    def image(self, source: Union[str, Path], size: int) -> QImage:
+        """Náhled (delší strana nejvýš `size` px); prázdný QImage, pokud zdroj nejde načíst"""
+        path = self.path(source, size)
+        if path.exists():
+            image = QImage(str(path))
+            if not image.isNull():
+                self._touch(path)
+                return image
+
+        reader = QImageReader(str(source))
+        reader.setAutoTransform(True)
+        original = reader.size()
+        if original.isValid() and max(original.width(), original.height()) > size:
+            reader.setScaledSize(original.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return image
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp")
+        if image.save(str(tmp_path), "JPG", THUMBNAIL_QUALITY):
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._generated += 1
+                trim = self._generated % TRIM_EVERY == 0
+            if trim:
+                self.trim()
+        return image
+
+    @staticmethod
+    def _touch(path: Path):
+        try:
+            if time.time() - path.stat().st_mtime > TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            pass
+
+    def pixmap(self, source: Union[str, Path], size: int) -> QPixmap:
+        """Náhled jako QPixmap (GUI vlákno) - paměťová cache QPixmapCache"""
+        cache_key = f"thumb:{size}:{self.key(source)}"
+        pixmap = QPixmapCache.find(cache_key)
+        if pixmap is None or pixmap.isNull():
+            pixmap = QPixmap.fromImage(self.image(source, size))
+            if not pixmap.isNull():
+                QPixmapCache.insert(cache_key, pixmap)
+        return pixmap
+
+    def remove(self, source: Union[str, Path]):
+        """Smaže náhledy souboru (po smazání originálu)"""
+        key = self.key(source)
+        for size in config.THUMBNAIL_SIZES:
+            (self.root / str(size) / f"{key}.jpg").unlink(missing_ok=True)
+
+    # -----------------------
+    # Pozadí
+    # -----------------------
+    def _start(self, source: str, sizes: Iterable[int], emit: bool, priority: int):
+        with self._lock:
+            sizes = tuple(size for size in sizes if (source, size) not in self._pending)
+            self._pending.update((source, size) for size in sizes)
+        if sizes:
+            self.pool.start(_ThumbnailTask(self, source, sizes, emit), priority)
+
+    def _done(self, source: str, size: int):
+        with self._lock:
+            self._pending.discard((source, size))
+
+    def request(self, source: Union[str, Path], size: int):
+        """Načte náhled na pozadí, výsledek přijde signálem ready (přednost před prefetch)"""
+        self._start(str(source), (size,), True, 1)
+
+    def prefetch(self, source: Union[str, Path], sizes: Optional[Iterable[int]] = None):
+        """Vytvoří náhledy na pozadí bez oznámení (po nahrání fotky)"""
+        self._start(str(source), sizes or config.THUMBNAIL_SIZES, False, 0)
+
+    def trim(self) -> int:
+        """Smaže nejdéle nepoužité náhledy nad limit; vrací počet smazaných"""
+        files = []
+        total = 0
+        for path in self.root.glob("*/*.jpg"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        # Uvolnit až na 90 % limitu, ať se nemaže po každém novém náhledu
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                path.unlink()
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+# Globální instance
+thumbnails = ThumbnailCache(config.THUMBNAIL_DIR, config.THUMBNAIL_CACHE_MB * 1024 * 1024)